@@ -0,0 +1,194 @@
+"""Load test of the local API while the event loop decodes simulated advertisements.
+
+Measures how late the event loop runs its callbacks, a proxy for BLE intake delay,
+without clients and then with WebSocket stream clients and HTTP pollers connected.
+
+Run with `python benchmarks/api_load.py [--streams 20] [--pollers 10] [--rate 200]`.
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import os
+import struct
+import time
+
+from van_assistant.api.server import ApiServer
+from van_assistant.metrics.histogram import LatencyHistogram
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+from van_assistant.state.store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# Interval at which the loop lag is sampled, in seconds
+LAG_INTERVAL = 0.01
+
+
+class NullService(NotificationService):
+    """Discards every notification, the benchmark only needs the state store."""
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Discard the notification."""
+
+
+class Counters:
+    """Totals collected by the clients."""
+
+    def __init__(self) -> None:
+        """Start every total at zero."""
+        self.messages = 0
+        self.bytes = 0
+        self.full = 0
+        self.not_modified = 0
+        self.poll_latency = LatencyHistogram()
+
+
+async def intake(store: StateStore, rate: float, devices: int) -> None:
+    """Decode simulated advertisements into the store at a steady rate."""
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=devices, remco_count=0, seed=1))
+    decoders = fleet.build_devices(NullService())
+    for device in decoders:
+        store.watch(device)
+
+    interval = 1 / rate
+    next_time = time.monotonic()
+    while True:
+        for advertiser, device in zip(fleet.victron, decoders, strict=True):
+            device.handle_advertisement(advertiser.next_advertisement())
+            next_time += interval
+            await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+
+
+async def measure_lag(duration: float) -> LatencyHistogram:
+    """Return how late, in nanoseconds, a periodic sleep wakes up over a duration."""
+    lag = LatencyHistogram()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        start = time.perf_counter_ns()
+        await asyncio.sleep(LAG_INTERVAL)
+        lag.record(time.perf_counter_ns() - start - int(LAG_INTERVAL * 1e9))
+    return lag
+
+
+async def stream_client(port: int, interval: float, counters: Counters) -> None:
+    """Receive the stream until cancelled."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /api/stream?interval={interval} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n\r\n".encode(),
+    )
+    await reader.readuntil(b"\r\n\r\n")
+    try:
+        while True:
+            _, length = await reader.readexactly(2)
+            if length == 126:
+                (length,) = struct.unpack("!H", await reader.readexactly(2))
+            elif length == 127:
+                (length,) = struct.unpack("!Q", await reader.readexactly(8))
+            await reader.readexactly(length)
+            counters.messages += 1
+            counters.bytes += length
+    finally:
+        writer.close()
+
+
+async def poller(port: int, interval: float, counters: Counters) -> None:
+    """Poll the state with If-None-Match over a kept-alive connection until cancelled."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etag = ""
+    try:
+        while True:
+            start = time.perf_counter_ns()
+            writer.write(
+                (
+                    f"GET /api/state HTTP/1.1\r\nHost: localhost\r\nIf-None-Match: {etag}\r\n\r\n"
+                ).encode(),
+            )
+            head = (await reader.readuntil(b"\r\n\r\n")).decode()
+            headers = dict(line.split(": ", 1) for line in head.split("\r\n")[1:] if ": " in line)
+            body = await reader.readexactly(int(headers["Content-Length"]))
+            counters.poll_latency.record(time.perf_counter_ns() - start)
+            if head.startswith("HTTP/1.1 304"):
+                counters.not_modified += 1
+            else:
+                counters.full += 1
+                counters.bytes += len(body)
+            etag = headers.get("ETag", "")
+            await asyncio.sleep(interval)
+    finally:
+        writer.close()
+
+
+def log_lag(label: str, lag: LatencyHistogram) -> None:
+    """Log the loop lag percentiles in milliseconds."""
+    logger.info(
+        f"{label:14}: loop lag p50 {lag.percentile(50) / 1e6:6.2f}ms "
+        f"p99 {lag.percentile(99) / 1e6:6.2f}ms max {lag.max / 1e6:6.2f}ms",
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the baseline and the loaded phase and log the results."""
+    store = StateStore()
+    server = ApiServer(store, "127.0.0.1", 0, min_interval=args.interval, max_clients=1000)
+    feeder = asyncio.create_task(intake(store, args.rate, args.devices))
+    serving = asyncio.create_task(server.run())
+    await asyncio.sleep(1)
+    port = server.sockets[0].getsockname()[1]
+
+    log_lag("no clients", await measure_lag(args.duration))
+
+    counters = Counters()
+    clients = [
+        asyncio.create_task(stream_client(port, args.interval, counters))
+        for _ in range(args.streams)
+    ]
+    clients.extend(
+        asyncio.create_task(poller(port, args.poll_interval, counters)) for _ in range(args.pollers)
+    )
+    await asyncio.sleep(1)
+    counters.messages = counters.bytes = counters.full = counters.not_modified = 0
+    counters.poll_latency = LatencyHistogram()
+
+    log_lag(f"{args.streams}+{args.pollers} clients", await measure_lag(args.duration))
+    for task in (*clients, feeder, serving):
+        task.cancel()
+    await asyncio.gather(*clients, feeder, serving, return_exceptions=True)
+
+    logger.info(
+        f"streams       : {counters.messages / args.duration / max(args.streams, 1):6.1f} "
+        f"messages/s per client, {counters.bytes / args.duration / 1024:.0f} KiB/s in total",
+    )
+    polls = counters.full + counters.not_modified
+    if polls:
+        logger.info(
+            f"polls         : {polls} ({counters.not_modified / polls:.0%} not modified), "
+            f"p50 {counters.poll_latency.percentile(50) / 1e6:.2f}ms "
+            f"p99 {counters.poll_latency.percentile(99) / 1e6:.2f}ms",
+        )
+
+
+def main() -> None:
+    """Parse the arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=200.0, help="advertisements per second")
+    parser.add_argument("--devices", type=int, default=24)
+    parser.add_argument("--interval", type=float, default=0.5, help="stream interval")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("van_assistant").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Cost of decoding captured Victron advertisements one at a time versus in batches.
+
+Decrypts and decodes the advertisements of a simulated fleet in two ways:
+
+- per packet: each advertisement decoded with the device's decode(), as the
+  gateway does on the packet path
+- batched: the advertisements of each device decoded at once with decode_batch(),
+  as when backfilling from a capture file
+
+and logs advertisements per second. Needs NumPy.
+
+Run with `python benchmarks/batch_decode.py [--advertisements 120000] [--devices 12]`.
+"""
+
+import argparse
+import contextlib
+import logging
+import time
+
+from van_assistant.devices.victron.batch_decoder import decode_batch
+from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+logger = logging.getLogger(__name__)
+
+Capture = list[tuple[VictronDevice, str, list[bytes]]]
+
+
+class NullService(NotificationService):
+    """Discards every notification."""
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Discard the notification."""
+
+
+def generate(devices: int, advertisements: int) -> Capture:
+    """Return the advertisements of each device of a simulated fleet."""
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=devices, remco_count=0, seed=1))
+    service = NullService()
+    return [
+        (
+            advertiser.device_type(advertiser.address, service, advertiser.encryption_key.hex()),
+            advertiser.encryption_key.hex(),
+            [advertiser.next_advertisement() for _ in range(advertisements // devices)],
+        )
+        for advertiser in fleet.victron
+    ]
+
+
+def per_packet(capture: Capture) -> int:
+    """Decode every advertisement on its own, returning the number decoded."""
+    decoded = 0
+    for device, _, payloads in capture:
+        for payload in payloads:
+            with contextlib.suppress(ValueError):
+                decoded += device.decode(payload) is not None
+    return decoded
+
+
+def batched(capture: Capture) -> int:
+    """Decode the advertisements of each device at once, returning the number decoded."""
+    return sum(
+        len(decode_batch(type(device), key, payloads, address=device.addr))
+        for device, key, payloads in capture
+    )
+
+
+def main() -> None:
+    """Run both ways and log their throughput."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--advertisements", type=int, default=120_000)
+    parser.add_argument("--devices", type=int, default=12)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("van_assistant").setLevel(logging.ERROR)
+    capture = generate(args.devices, args.advertisements)
+    total = sum(len(payloads) for _, _, payloads in capture)
+
+    baseline = 0.0
+    for label, run in (("per packet", per_packet), ("batched", batched)):
+        start = time.perf_counter()
+        decoded = run(capture)
+        rate = total / (time.perf_counter() - start)
+        baseline = baseline or rate
+        logger.info(
+            f"{label:10}: {rate:9.0f} advertisements/s ({rate / baseline:.2f}x), {decoded} decoded",
+        )
+
+
+if __name__ == "__main__":
+    main()
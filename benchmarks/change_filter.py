@@ -0,0 +1,114 @@
+"""Values reaching the sinks with and without change detection.
+
+Publishes the readings of a simulated fleet, one reading per device per second
+of simulated time, through the devices to a sink counting the values it receives:
+
+- unfiltered: every value of every reading
+- filtered: values published by a ChangeFilter with the example deadbands and a
+  five minute heartbeat
+
+and logs readings per second and values sent per reading.
+
+Run with `python benchmarks/change_filter.py [--readings 48000] [--devices 12]`.
+"""
+
+import argparse
+import logging
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+from van_assistant.devices.victron.record import VictronRecord
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.change_filter import ChangeFilter, Deadband
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+if TYPE_CHECKING:
+    from van_assistant.devices.victron.devices.base import VictronDevice
+
+logger = logging.getLogger(__name__)
+
+DEADBANDS = {
+    "amps": Deadband(0.1),
+    "current": Deadband(0.1),
+    "soc": Deadband(0.5),
+    "power": Deadband(5.0, 0.02),
+}
+
+
+class CountingService(NotificationService):
+    """Counts the notifications it receives."""
+
+    def __init__(self) -> None:
+        """Create a service with no notifications counted."""
+        self.sent = 0
+
+    def publish(self, topic: str, payload: object) -> None:  # noqa: ARG002
+        """Count the notification."""
+        self.sent += 1
+
+
+def generate(fleet: SimulatedFleet, readings: int) -> list[tuple[int, Mapping[str, Any]]]:
+    """Return decoded readings of the fleet by the index of their device."""
+    return [
+        (
+            index,
+            dict(
+                VictronRecord(
+                    advertiser.device_type.record_layout,
+                    advertiser.build_record().ljust(16, b"\0"),
+                    advertiser.address,
+                ),
+            ),
+        )
+        for _ in range(readings // len(fleet.victron))
+        for index, advertiser in enumerate(fleet.victron)
+    ]
+
+
+def run(
+    fleet: SimulatedFleet,
+    readings: list[tuple[int, Mapping[str, Any]]],
+    *,
+    filtered: bool,
+) -> tuple[float, int]:
+    """Publish the readings, returning readings per second and values sent."""
+    service = CountingService()
+    # Simulated time, one reading per device per second
+    now = [0.0]
+    change_filter = ChangeFilter(DEADBANDS, clock=lambda: now[0])
+    devices: list[VictronDevice] = []
+    for advertiser in fleet.victron:
+        device = advertiser.device_type(advertiser.address, service)
+        if filtered:
+            change_filter.watch(device)
+        devices.append(device)
+
+    start = time.perf_counter()
+    for i, (index, data) in enumerate(readings):
+        now[0] = i // len(devices)
+        devices[index].publish_data(data)
+    return len(readings) / (time.perf_counter() - start), service.sent
+
+
+def main() -> None:
+    """Publish the readings both ways and log throughput and values sent."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readings", type=int, default=48_000)
+    parser.add_argument("--devices", type=int, default=12)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=args.devices, remco_count=0, seed=1))
+    readings = generate(fleet, args.readings)
+
+    for label, filtered in (("unfiltered", False), ("filtered", True)):
+        rate, sent = run(fleet, readings, filtered=filtered)
+        logger.info(
+            f"{label:10}: {rate:9.0f} readings/s, {sent / len(readings):5.2f} values/reading",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Throughput of Victron decoding on the event loop versus in worker processes.
+
+Run with `python benchmarks/decode_workers.py [--packets N] [--devices N] [--workers 1 2 4]`.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from van_assistant.devices.victron.identifier import VictronDeviceIdentifier
+from van_assistant.notification_services.logging_service import LoggingService
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+from van_assistant.workers.pool import DecodeWorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+def generate(devices: int, packets: int) -> tuple[dict[str, str], list[tuple[str, bytes]]]:
+    """Return the keys and a list of advertisements from a simulated fleet."""
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=devices, remco_count=0, seed=1))
+    keys = {advertiser.address: advertiser.encryption_key.hex() for advertiser in fleet.victron}
+    advertisements = [
+        (advertiser.address, advertiser.next_advertisement())
+        for _ in range(packets // devices)
+        for advertiser in fleet.victron
+    ]
+    return keys, advertisements
+
+
+def bench_inline(keys: dict[str, str], advertisements: list[tuple[str, bytes]]) -> float:
+    """Return packets per second decoded on a single core."""
+    service = LoggingService()
+    decoders = {}
+    for address, payload in advertisements:
+        if address not in decoders:
+            device_type = VictronDeviceIdentifier.detect_device_type(payload)
+            decoders[address] = device_type(address, service, keys[address])
+
+    start = time.perf_counter()
+    for address, payload in advertisements:
+        decoders[address].decode(payload)
+    return len(advertisements) / (time.perf_counter() - start)
+
+
+async def bench_pool(
+    keys: dict[str, str],
+    advertisements: list[tuple[str, bytes]],
+    workers: int,
+) -> float:
+    """Return packets per second decoded by a pool of worker processes."""
+    received = 0
+    done = asyncio.Event()
+
+    def on_result(_address: str, _type_name: str, _parsed: dict) -> None:
+        nonlocal received
+        received += 1
+        if received == len(advertisements):
+            done.set()
+
+    pool = DecodeWorkerPool(keys, workers, on_result, ring_capacity=len(advertisements))
+    pool.start()
+    runner = asyncio.create_task(pool.run())
+
+    # Warm up so process start-up is not measured
+    await asyncio.sleep(2)
+
+    start = time.perf_counter()
+    for address, payload in advertisements:
+        pool.submit(address, 0x02E1, payload)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    runner.cancel()
+    pool.stop()
+    return len(advertisements) / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and log packets per second for each configuration."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packets", type=int, default=48_000)
+    parser.add_argument("--devices", type=int, default=48)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    keys, advertisements = generate(args.devices, args.packets)
+    logger.info(f"{len(advertisements)} advertisements from {args.devices} devices")
+    logger.info(f"{os.cpu_count()} CPUs available")
+
+    inline = bench_inline(keys, advertisements)
+    logger.info(f"inline     : {inline:9.0f} packets/s")
+
+    for workers in args.workers:
+        rate = asyncio.run(bench_pool(keys, advertisements, workers))
+        logger.info(f"{workers} worker(s): {rate:9.0f} packets/s ({rate / inline:.2f}x inline)")
+
+
+if __name__ == "__main__":
+    main()
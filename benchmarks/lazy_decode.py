@@ -0,0 +1,114 @@
+"""Cost of decoding and publishing Victron records eagerly versus lazily.
+
+Decodes plaintext records of a simulated fleet, so decryption is not measured, in
+these ways:
+
+- eager: every field decoded into a dict, as parse() does
+- lazy, all fields: every field read from a lazy record
+- lazy, voltage+soc: only the voltage and state of charge read from a lazy record
+
+then publishes each record to a sink that discards every notification, once with
+the sink publishing every field and once with it publishing voltage and soc only.
+
+Run with `python benchmarks/lazy_decode.py [--records 48000] [--devices 48]`.
+"""
+
+import argparse
+import logging
+import time
+from collections.abc import Callable
+
+from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import VictronRecord
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+logger = logging.getLogger(__name__)
+
+SELECTED = ("voltage", "battery_voltage", "soc")
+
+
+class NullService(NotificationService):
+    """Discards every notification."""
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Discard the notification."""
+
+
+def generate(devices: int, records: int) -> list[tuple[VictronDevice, bytes]]:
+    """Return plaintext records of a simulated fleet with the device decoding each."""
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=devices, remco_count=0, seed=1))
+    service = NullService()
+    decoders = [
+        (advertiser.device_type(advertiser.address, service), advertiser)
+        for advertiser in fleet.victron
+    ]
+    return [
+        (device, advertiser.build_record().ljust(16, b"\0"))
+        for _ in range(records // devices)
+        for device, advertiser in decoders
+    ]
+
+
+def eager(device: VictronDevice, record: bytes) -> None:
+    """Decode every field into a dict."""
+    device.parse(record)
+
+
+def lazy_all(device: VictronDevice, record: bytes) -> None:
+    """Read every field of a lazy record."""
+    dict(VictronRecord(device.record_layout, record, device.addr))
+
+
+def lazy_selected(device: VictronDevice, record: bytes) -> None:
+    """Read the selected fields of a lazy record."""
+    view = VictronRecord(device.record_layout, record, device.addr)
+    for name in SELECTED:
+        view.get(name)
+
+
+def publish(device: VictronDevice, record: bytes) -> None:
+    """Publish a lazy record to the device's sink."""
+    device.publish_data(VictronRecord(device.record_layout, record, device.addr))
+
+
+def run(records: list[tuple[VictronDevice, bytes]], variant: Callable[..., None]) -> float:
+    """Return records per second handled by a variant."""
+    start = time.perf_counter()
+    for device, record in records:
+        variant(device, record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run every variant and log records per second."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=48_000)
+    parser.add_argument("--devices", type=int, default=48)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    records = generate(args.devices, args.records)
+
+    baseline = 0.0
+    for label, variant in (
+        ("eager", eager),
+        ("lazy, all fields", lazy_all),
+        ("lazy, voltage+soc", lazy_selected),
+    ):
+        rate = run(records, variant)
+        baseline = baseline or rate
+        logger.info(f"decode {label:20}: {rate:9.0f} records/s ({rate / baseline:.2f}x)")
+
+    baseline = 0.0
+    for label, fields in (("all fields", None), ("voltage+soc", frozenset(SELECTED))):
+        for device, _ in records:
+            device.notification_service.fields = fields
+        rate = run(records, publish)
+        baseline = baseline or rate
+        logger.info(f"publish {label:19}: {rate:9.0f} records/s ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
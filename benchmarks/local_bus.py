@@ -0,0 +1,161 @@
+"""Throughput and latency of the local bus versus MQTT through a local broker.
+
+For each transport a subscriber on its own thread receives messages published
+through the gateway's notification service:
+
+- throughput: a burst of readings published as fast as possible, timed until the
+  subscriber received the last one
+- latency: readings published one per interval, each carrying its publish time,
+  with the median and 99th percentile delay until the subscriber received it
+
+MQTT needs a broker, e.g. the mosquitto container of docker-compose.yml, and is
+skipped if none is reachable.
+
+Run with `python benchmarks/local_bus.py [--messages 20000] [--samples 500]
+[--broker localhost] [--port 1883]`.
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import paho.mqtt.client as mqtt
+
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.local_bus import (
+    LocalBusClient,
+    LocalBusError,
+    LocalBusService,
+)
+from van_assistant.notification_services.mqtt_service import MQTTService
+
+logger = logging.getLogger(__name__)
+
+TOPIC = "victron/aabbccddeeff/voltage"
+PREFIX = "victron/"
+# Seconds to wait for the subscriber before giving up on missing messages
+TIMEOUT = 10.0
+
+Receiver = list[tuple[int, bytes]]
+
+
+class Transport:
+    """A notification service and a subscriber receiving what it publishes."""
+
+    def __init__(self, service: NotificationService, stop: Callable[[], None]) -> None:
+        """Wrap a service and the function stopping its subscriber."""
+        self.service = service
+        self.stop = stop
+        self.received: Receiver = []
+        self.done = threading.Event()
+        self.expected = 0
+
+    def on_message(self, payload: bytes) -> None:
+        """Record a message with the time it arrived."""
+        self.received.append((time.perf_counter_ns(), payload))
+        if len(self.received) >= self.expected:
+            self.done.set()
+
+    def expect(self, count: int) -> None:
+        """Start waiting for a number of messages."""
+        self.received = []
+        self.expected = count
+        self.done.clear()
+
+
+def local_bus(path: Path, buffer: int) -> Transport:
+    """Return the local bus with a client subscribed on a thread."""
+    service = LocalBusService(path, buffer)
+    client = LocalBusClient(path)
+    client.subscribe(PREFIX)
+    transport = Transport(service, client.close)
+
+    def receive() -> None:
+        try:
+            while True:
+                transport.on_message(client.receive().payload)
+        except (LocalBusError, OSError, ValueError):
+            return
+
+    threading.Thread(target=receive, daemon=True).start()
+    time.sleep(0.1)
+    return transport
+
+
+def mqtt_broker(broker: str, port: int) -> Transport:
+    """Return an MQTT service with a paho client subscribed through the broker."""
+    service = MQTTService(broker, port)
+    client = mqtt.Client()
+    client.connect(broker, port)
+    client.subscribe(f"{PREFIX}#")
+    client.loop_start()
+    transport = Transport(service, client.loop_stop)
+    client.on_message = lambda _client, _userdata, message: transport.on_message(message.payload)
+    time.sleep(0.5)
+    return transport
+
+
+def throughput(transport: Transport, messages: int) -> tuple[float, int]:
+    """Return the messages per second delivered in a burst and the number lost."""
+    transport.expect(messages)
+    start = time.perf_counter()
+    for i in range(messages):
+        transport.service.publish(TOPIC, f"{12 + i % 100 / 100:.2f}")
+    transport.done.wait(TIMEOUT)
+    received = len(transport.received)
+    elapsed = (transport.received[-1][0] / 1e9 if received else time.perf_counter()) - start
+    return received / elapsed, messages - received
+
+
+def latency(transport: Transport, samples: int, interval: float) -> tuple[float, float]:
+    """Return the median and 99th percentile delivery delay in milliseconds."""
+    transport.expect(samples)
+    for _ in range(samples):
+        transport.service.publish(TOPIC, str(time.perf_counter_ns()))
+        time.sleep(interval)
+    transport.done.wait(TIMEOUT)
+    delays = [(arrived - int(payload)) / 1e6 for arrived, payload in transport.received]
+    if len(delays) < 2:
+        return float("nan"), float("nan")
+    return statistics.median(delays), statistics.quantiles(delays, n=100)[98]
+
+
+def main() -> None:
+    """Measure both transports and log their throughput and latency."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--interval", type=float, default=0.002, help="seconds between samples")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        transports: list[tuple[str, Callable[[], Transport]]] = [
+            ("local bus", lambda: local_bus(Path(directory) / "bus.sock", args.messages)),
+            ("mqtt", lambda: mqtt_broker(args.broker, args.port)),
+        ]
+        for label, create in transports:
+            try:
+                transport = create()
+            except OSError as e:
+                logger.info(f"{label:9}: skipped, {e}")
+                continue
+            rate, lost = throughput(transport, args.messages)
+            median, p99 = latency(transport, args.samples, args.interval)
+            transport.service.close()
+            transport.stop()
+            logger.info(
+                f"{label:9}: {rate:9.0f} messages/s, {lost} lost, "
+                f"latency median {median:.3f} ms, p99 {p99:.3f} ms",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cost of per-packet logging to the calling thread.
+
+Logs a stream of per-packet messages from a few simulated devices in several ways:
+
+- synchronous: f-string messages written to a file by the calling thread
+- background: lazy messages queued to a logging thread writing the file
+- disabled: messages below the logger's level, as f-strings and lazily
+- rate limited: lazy messages through a RateLimitedLogger, one per device per second
+
+and logs calls per second in the calling thread.
+
+Run with `python benchmarks/logging_pipeline.py [--messages 100000] [--devices 12]`.
+"""
+
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from collections.abc import Callable
+from logging.handlers import QueueListener
+from pathlib import Path
+
+from van_assistant.util.background_logging import BackgroundHandler, RateLimitedLogger
+
+logger = logging.getLogger(__name__)
+packets = logging.getLogger("benchmark.packets")
+packets.propagate = False
+
+FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def run(messages: int, devices: int, log: Callable[[str, int], None]) -> float:
+    """Return the calls per second of logging a message per packet."""
+    addresses = [f"AA:BB:CC:DD:EE:{i:02X}" for i in range(devices)]
+    start = time.perf_counter()
+    for i in range(messages):
+        log(addresses[i % devices], i)
+    return messages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run each way and log its throughput."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--devices", type=int, default=12)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        file_handler = logging.FileHandler(Path(directory) / "packets.log")
+        file_handler.setFormatter(logging.Formatter(FORMAT))
+        packets.setLevel(logging.INFO)
+
+        packets.addHandler(file_handler)
+        synchronous = run(
+            args.messages,
+            args.devices,
+            lambda address, i: packets.info(f"Packet {i} from {address}"),
+        )
+        packets.removeHandler(file_handler)
+
+        records: queue.Queue = queue.Queue(args.messages)
+        listener = QueueListener(records, file_handler)
+        packets.addHandler(BackgroundHandler(records))
+        listener.start()
+        background = run(
+            args.messages,
+            args.devices,
+            lambda address, i: packets.info("Packet %d from %s", i, address),
+        )
+        listener.stop()
+
+        packets.setLevel(logging.WARNING)
+        disabled_fstring = run(
+            args.messages,
+            args.devices,
+            lambda address, i: packets.info(f"Packet {i} from {address}"),
+        )
+        disabled_lazy = run(
+            args.messages,
+            args.devices,
+            lambda address, i: packets.info("Packet %d from %s", i, address),
+        )
+
+        packets.setLevel(logging.INFO)
+        rate_limited = RateLimitedLogger(packets, interval=1.0)
+        limited = run(
+            args.messages,
+            args.devices,
+            lambda address, i: rate_limited.info(address, "Packet %d from %s", i, address),
+        )
+        file_handler.close()
+
+    for label, rate in (
+        ("synchronous", synchronous),
+        ("background", background),
+        ("disabled f-string", disabled_fstring),
+        ("disabled lazy", disabled_lazy),
+        ("rate limited", limited),
+    ):
+        logger.info(f"{label:17}: {rate:10.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Cost of aggregating and serialising readings one at a time versus in columnar batches.
+
+Feeds the readings of a simulated fleet to an uplink-like sink in two ways:
+
+- per reading: each reading serialised to JSON, and a running count, minimum,
+  maximum and sum kept per field in Python
+- batched: readings collected into a ReadingBatch per device type, then summarised
+  and serialised once per batch
+
+and logs readings per second and bytes per reading sent.
+
+Run with `python benchmarks/reading_batches.py [--readings 48000] [--devices 12] [--batch 1000]`.
+"""
+
+import argparse
+import json
+import logging
+import math
+import time
+from collections.abc import Mapping
+from enum import Enum
+from typing import Any
+
+from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import VictronRecord
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.batch import ReadingBatch
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+logger = logging.getLogger(__name__)
+
+Reading = tuple[VictronDevice, float, Mapping[str, Any]]
+
+
+class NullService(NotificationService):
+    """Discards every notification."""
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Discard the notification."""
+
+
+def generate(devices: int, readings: int) -> list[Reading]:
+    """Return decoded readings of a simulated fleet, with every field decoded."""
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=devices, remco_count=0, seed=1))
+    service = NullService()
+    decoders = [
+        (advertiser.device_type(advertiser.address, service), advertiser)
+        for advertiser in fleet.victron
+    ]
+    return [
+        (
+            device,
+            float(i),
+            dict(
+                VictronRecord(
+                    device.record_layout,
+                    advertiser.build_record().ljust(16, b"\0"),
+                    device.addr,
+                ),
+            ),
+        )
+        for i in range(readings // devices)
+        for device, advertiser in decoders
+    ]
+
+
+def per_reading(readings: list[Reading]) -> int:
+    """Serialise and aggregate each reading on its own, returning the bytes sent."""
+    sent = 0
+    aggregates: dict[tuple[str, str], list[float]] = {}
+    for device, timestamp, data in readings:
+        payload = {
+            name: value.name if isinstance(value, Enum) else value for name, value in data.items()
+        }
+        payload["timestamp"] = timestamp
+        sent += len(json.dumps(payload).encode())
+        for name, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, Enum):
+                aggregate = aggregates.setdefault(
+                    (type(device).__name__, name),
+                    [0, math.inf, -math.inf, 0.0],
+                )
+                aggregate[0] += 1
+                aggregate[1] = min(aggregate[1], value)
+                aggregate[2] = max(aggregate[2], value)
+                aggregate[3] += value
+    return sent
+
+
+def batched(readings: list[Reading], rows: int) -> int:
+    """Collect the readings into batches, summarising and serialising each full one."""
+    sent = 0
+    batches: dict[str, ReadingBatch] = {}
+    for device, timestamp, data in readings:
+        device_type = type(device).__name__
+        batch = batches.get(device_type)
+        if batch is None:
+            batch = batches[device_type] = ReadingBatch(device_type)
+        batch.append(device.addr, timestamp, data)
+        if len(batch) >= rows:
+            batch.summary()
+            sent += len(batch.to_bytes())
+            del batches[device_type]
+    for batch in batches.values():
+        batch.summary()
+        sent += len(batch.to_bytes())
+    return sent
+
+
+def main() -> None:
+    """Run both ways and log their throughput and bytes sent per reading."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readings", type=int, default=48_000)
+    parser.add_argument("--devices", type=int, default=12)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    readings = generate(args.devices, args.readings)
+
+    for label, run in (
+        ("per reading", per_reading),
+        ("batched", lambda readings: batched(readings, args.batch)),
+    ):
+        start = time.perf_counter()
+        sent = run(readings)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"{label:11}: {len(readings) / elapsed:9.0f} readings/s, "
+            f"{sent / len(readings):6.1f} bytes/reading",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Time to first reading, CPU and wakeups of continuous and duty cycled scanning.
+
+Runs the gateway against a simulated fleet once per scan mode, with readings that
+change every advertisement (driving) or never change (parked overnight), and logs:
+
+- first reading: seconds from start until each device published, median and max
+- max gap: longest time a device went without a new reading, the cost of resting
+- scanning: fraction of the time the scanner was active
+- wakeups/s: advertisements delivered to the detection callback, each one a wakeup
+- CPU: process CPU time as a fraction of one core
+
+Time is compressed: the simulated devices advertise every 0.1s instead of every
+second, and the windows are scaled the same way, so every 10s of run time stands
+for about 100s in a van.
+
+Run with `python benchmarks/scan_duty_cycle.py [--devices 12] [--duration 30]`.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData, AdvertisementDataCallback
+
+from van_assistant.config import parse_config
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.runtime import Runtime
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+from van_assistant.simulator.scanner import FakeBleakScanner
+
+logger = logging.getLogger(__name__)
+
+ADVERTISEMENT_INTERVAL = 0.1
+
+
+class Readings(NotificationService):
+    """Records when each device published, discarding the notifications."""
+
+    def __init__(self, addresses: list[str]) -> None:
+        """Start with no readings from the devices at the addresses."""
+        self.start = time.monotonic()
+        self._devices = {address.replace(":", "").lower() for address in addresses}
+        self.first: dict[str, float] = {}
+        self.last: dict[str, float] = {}
+        self.max_gap = 0.0
+
+    def publish(self, topic: str, payload: object) -> None:  # noqa: ARG002
+        """Record the time of a notification from one of the devices."""
+        _, device, _ = topic.rsplit("/", 2)
+        if device not in self._devices:
+            return
+        now = time.monotonic() - self.start
+        self.first.setdefault(device, now)
+        self.max_gap = max(self.max_gap, now - self.last.get(device, now))
+        self.last[device] = now
+
+
+async def run_mode(
+    args: argparse.Namespace,
+    duty_cycle: dict[str, object],
+    *,
+    parked: bool,
+) -> tuple[Readings, Runtime, int, float]:
+    """Run the gateway once and return its first readings, runtime, wakeups and CPU time."""
+    fleet = SimulatedFleet(
+        SimulatorConfig(
+            victron_count=args.devices,
+            remco_count=0,
+            advertisement_interval=ADVERTISEMENT_INTERVAL,
+            seed=1,
+        ),
+    )
+    if parked:
+        for advertiser in fleet.victron:
+            advertiser.freeze()
+
+    wakeups = 0
+
+    def scanner_factory(callback: AdvertisementDataCallback) -> FakeBleakScanner:
+        def counting(device: BLEDevice, ad_data: AdvertisementData) -> None:
+            nonlocal wakeups
+            wakeups += 1
+            callback(device, ad_data)
+
+        return fleet.scanner_factory(counting)
+
+    config = parse_config(
+        {
+            "devices": [
+                {
+                    "address": advertiser.address,
+                    "brand": "victron",
+                    "key": advertiser.encryption_key.hex(),
+                }
+                for advertiser in fleet.victron
+            ],
+            "scanning": {"duty_cycle": duty_cycle},
+            "watchdog": {"enabled": False},
+        },
+    )
+    readings = Readings([advertiser.address for advertiser in fleet.victron])
+    runtime = Runtime(config, readings, scanner_factory, fleet.client_factory)
+
+    asyncio.get_running_loop().call_later(args.duration, runtime.stop)
+    cpu = time.process_time()
+    await runtime.run()
+    return readings, runtime, wakeups, time.process_time() - cpu
+
+
+def log_mode(
+    label: str,
+    args: argparse.Namespace,
+    result: tuple[Readings, Runtime, int, float],
+) -> None:
+    """Log the measurements of one run."""
+    readings, runtime, wakeups, cpu = result
+    first = sorted(readings.first.values()) or [float("nan")]
+    scheduler = runtime.scan_scheduler
+    scanning = scheduler.scanning_time / args.duration if scheduler is not None else 1.0
+    logger.info(
+        f"{label:22}: first reading p50 {statistics.median(first):5.2f}s max {first[-1]:5.2f}s "
+        f"({len(readings.first)}/{args.devices}), max gap {readings.max_gap:5.2f}s, "
+        f"scanning {scanning:4.0%}, "
+        f"{wakeups / args.duration:6.1f} wakeups/s, CPU {cpu / args.duration:5.1%}",
+    )
+
+
+def main() -> None:
+    """Run every scan mode with changing and with stable readings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per run")
+    parser.add_argument("--active", type=float, default=1.0, help="active window")
+    parser.add_argument("--idle", type=float, default=2.0, help="idle window")
+    parser.add_argument("--max-idle", type=float, default=10.0, help="adaptive idle limit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("van_assistant").setLevel(logging.WARNING)
+
+    modes = {
+        "continuous": {"enabled": False},
+        "fixed": {"enabled": True, "active": args.active, "idle": args.idle},
+        "adaptive": {
+            "enabled": True,
+            "active": args.active,
+            "idle": args.idle,
+            "adaptive": True,
+            "min_idle": args.idle / 4,
+            "max_idle": args.max_idle,
+        },
+    }
+    for parked in (False, True):
+        for name, duty_cycle in modes.items():
+            result = asyncio.run(run_mode(args, duty_cycle, parked=parked))
+            log_mode(f"{name} ({'parked' if parked else 'driving'})", args, result)
+
+
+if __name__ == "__main__":
+    main()
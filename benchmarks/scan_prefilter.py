@@ -0,0 +1,165 @@
+"""Python side cost of the scan callback in a busy campground, with and without prefiltering.
+
+Replays the advertisements a gateway hears in a minute: its own Victron devices, the
+Victron devices of neighbouring vans and the phones, watches and trackers around it,
+through the device scanner in three ways:
+
+- unfiltered: every advertisement reaches Python, as with active scanning
+- fast reject: every advertisement reaches Python, unconfigured addresses are dropped first
+- passive: BlueZ only reports the Victron and Remco manufacturer IDs, simulated with
+  the same patterns the passive scanner registers, then unconfigured addresses are dropped
+
+Run with `python benchmarks/scan_prefilter.py [--fleet 4] [--neighbours 20] [--noise 150]`.
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from van_assistant.devices.victron.devices.base import VICTRON_MANUFACTURER_ID
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.scanners.device_scanner import DeviceScanner
+from van_assistant.scanners.prefilter import Prefilter, or_patterns
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet, simulated_address
+
+logger = logging.getLogger(__name__)
+
+# Manufacturer IDs of common noise: Apple, Microsoft, Samsung, Google and Garmin
+NOISE_MANUFACTURER_IDS = (0x004C, 0x0006, 0x0075, 0x00E0, 0x0087)
+
+Advertisement = tuple[BLEDevice, AdvertisementData]
+
+
+class NullService(NotificationService):
+    """Discards every notification, the benchmark only measures the scan callback."""
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Discard the notification."""
+
+
+def advertisement(address: str, manufacturer_id: int, payload: bytes, rssi: int) -> Advertisement:
+    """Return the device and advertisement data bleak would pass to the callback."""
+    ad_data = AdvertisementData(
+        local_name=None,
+        manufacturer_data={manufacturer_id: payload},
+        service_data={},
+        service_uuids=[],
+        tx_power=None,
+        rssi=rssi,
+        platform_data=(),
+    )
+    return BLEDevice(address, None, None), ad_data
+
+
+def generate(args: argparse.Namespace) -> tuple[SimulatedFleet, list[Advertisement]]:
+    """Return the gateway's own fleet and a minute of interleaved advertisements."""
+    rng = random.Random(1)  # noqa: S311
+    fleet = SimulatedFleet(SimulatorConfig(victron_count=args.fleet, remco_count=0, seed=1))
+    neighbours = SimulatedFleet(
+        SimulatorConfig(victron_count=args.neighbours, remco_count=0, seed=2),
+    )
+    noise = [
+        (simulated_address(0x4E, i), rng.choice(NOISE_MANUFACTURER_IDS)) for i in range(args.noise)
+    ]
+
+    advertisements = []
+    for _ in range(int(args.seconds * args.victron_rate)):
+        advertisements.extend(
+            advertisement(
+                advertiser.address,
+                VICTRON_MANUFACTURER_ID,
+                advertiser.next_advertisement(),
+                -70,
+            )
+            for advertiser in fleet.victron
+        )
+        advertisements.extend(
+            advertisement(
+                simulated_address(0xF1, i),
+                VICTRON_MANUFACTURER_ID,
+                advertiser.next_advertisement(),
+                -85,
+            )
+            for i, advertiser in enumerate(neighbours.victron)
+        )
+    for _ in range(int(args.seconds * args.noise_rate)):
+        advertisements.extend(
+            advertisement(address, manufacturer_id, rng.randbytes(22), -80)
+            for address, manufacturer_id in noise
+        )
+    rng.shuffle(advertisements)
+    return fleet, advertisements
+
+
+def reported_by_bluez(advertisements: list[Advertisement]) -> list[Advertisement]:
+    """Return the advertisements BlueZ reports when the passive scanner patterns are set."""
+    patterns = or_patterns()
+    return [
+        (device, ad_data)
+        for device, ad_data in advertisements
+        if any(
+            (manufacturer_id.to_bytes(2, "little") + data)[pattern.start_position :].startswith(
+                pattern.content_of_pattern,
+            )
+            for manufacturer_id, data in ad_data.manufacturer_data.items()
+            for pattern in patterns
+        )
+    ]
+
+
+def run(
+    fleet: SimulatedFleet,
+    advertisements: list[Advertisement],
+    prefilter: Prefilter | None,
+) -> float:
+    """Return the seconds a fresh scanner spends in the callback for the advertisements."""
+    scanner = DeviceScanner(fleet.scanner_factory)
+    for device in fleet.build_devices(NullService()):
+        scanner.add_device(device)
+    scanner.prefilter = prefilter
+
+    start = time.perf_counter()
+    for device, ad_data in advertisements:
+        scanner.detection_callback(device, ad_data)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run every variant and log the callback rate and CPU time per second of air time."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleet", type=int, default=4, help="configured Victron devices")
+    parser.add_argument("--neighbours", type=int, default=20, help="unconfigured Victron devices")
+    parser.add_argument("--noise", type=int, default=150, help="devices of other manufacturers")
+    parser.add_argument("--victron-rate", type=float, default=3.0, help="advertisements/s each")
+    parser.add_argument("--noise-rate", type=float, default=5.0, help="advertisements/s each")
+    parser.add_argument("--seconds", type=float, default=60.0, help="air time replayed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("van_assistant").setLevel(logging.WARNING)
+
+    fleet, advertisements = generate(args)
+    prefilter = Prefilter(advertiser.address for advertiser in fleet.victron)
+    variants = (
+        ("unfiltered", advertisements, None),
+        ("fast reject", advertisements, prefilter),
+        ("passive", reported_by_bluez(advertisements), prefilter),
+    )
+
+    baseline = 0.0
+    for label, delivered, variant_prefilter in variants:
+        elapsed = run(fleet, delivered, variant_prefilter)
+        baseline = baseline or elapsed
+        logger.info(
+            f"{label:11}: {len(delivered) / args.seconds:7.0f} callbacks/s, "
+            f"{elapsed / args.seconds * 1e3:6.2f}ms CPU per second ({elapsed / baseline:.0%})",
+        )
+
+
+if __name__ == "__main__":
+    main()
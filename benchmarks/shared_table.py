@@ -0,0 +1,89 @@
+"""Read rate and consistency of the shared memory table under concurrent writes.
+
+A writer process updates one device's record as fast as it can, every column set
+to the same counter, while this process reads snapshots of it for a few seconds.
+A snapshot whose columns differ would be a torn read the seqlock failed to
+prevent. Logs reads and writes per second and the number of torn reads.
+
+Run with `python benchmarks/shared_table.py [--seconds 3] [--columns 16]`.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import tempfile
+import time
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.synchronize import Event
+from pathlib import Path
+
+from van_assistant.state.shared_table import (
+    Column,
+    SharedTableReader,
+    SharedTableWriter,
+    TableLayout,
+)
+
+logger = logging.getLogger(__name__)
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+def write(path: Path, columns: int, stop: Event, writes: Synchronized) -> None:
+    """Update the record with a new counter in every column until stopped."""
+    layout = TableLayout(
+        (ADDRESS,),
+        {},
+        tuple(Column(f"value_{i}", f"value_{i}") for i in range(columns)),
+        {},
+    )
+    writer = SharedTableWriter(path, layout)
+    names = [column.name for column in layout.columns]
+    counter = 0
+    while not stop.is_set():
+        counter += 1
+        writer.update(ADDRESS, dict.fromkeys(names, counter), float(counter))
+    writes.value = counter
+    writer.close()
+
+
+def main() -> None:
+    """Read snapshots while the writer runs and log the rates and torn reads."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--columns", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "table"
+        stop = multiprocessing.Event()
+        writes = multiprocessing.Value("q", 0)
+        writer = multiprocessing.Process(
+            target=write,
+            args=(path, args.columns, stop, writes),
+            daemon=True,
+        )
+        writer.start()
+        while not path.exists():
+            time.sleep(0.01)
+
+        reader = SharedTableReader(path)
+        reads = torn = 0
+        start = time.perf_counter()
+        deadline = start + args.seconds
+        while time.perf_counter() < deadline:
+            values = set(reader.read(ADDRESS).values.values())
+            reads += 1
+            torn += len(values) > 1
+        elapsed = time.perf_counter() - start
+        stop.set()
+        writer.join()
+        reader.close()
+
+    logger.info(f"reads : {reads / elapsed:9.0f}/s, {torn} torn")
+    logger.info(f"writes: {writes.value / elapsed:9.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
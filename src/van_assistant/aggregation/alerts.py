@@ -0,0 +1,274 @@
+import logging
+import time
+from collections.abc import Callable, Mapping
+from enum import Enum
+from typing import Any, NamedTuple
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.state.store import StateStore
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "active"
+CLEAR = "clear"
+
+# Address the alert states are kept under in the state store
+ALERTS = "alerts"
+
+# Returns whether a published value meets a condition
+Predicate = Callable[[Any], bool]
+# Returns the part of a published value a rule compares, or None to skip the value
+Selector = Callable[[Any], Any]
+
+
+class Rule(NamedTuple):
+    """A condition on one field of a device that raises an alert.
+
+    A rule with above or below triggers when a numeric value crosses the threshold
+    and clears once it is back past the threshold by hysteresis. A rule with
+    equals or not_equals compares enum fields, such as AlarmReason, by name. List
+    fields such as cell_voltages trigger when any element meets the condition.
+    Elements that are not numbers, such as cells reading N/A, are ignored by above
+    and below, and a value without any numbers is skipped.
+    """
+
+    name: str
+    address: str
+    field: str
+    above: float | None = None
+    below: float | None = None
+    equals: str | None = None
+    not_equals: str | None = None
+    hysteresis: float = 0.0
+    # Seconds the condition must hold before the alert is raised
+    duration: float = 0.0
+    # Seconds after an alert clears during which it is not raised again
+    cooldown: float = 0.0
+
+
+class _CompiledRule:
+    """A rule's predicates and alert state."""
+
+    __slots__ = (
+        "active",
+        "clear",
+        "cleared_at",
+        "pending_since",
+        "rule",
+        "select",
+        "topic",
+        "trigger",
+        "warned",
+    )
+
+    def __init__(
+        self,
+        rule: Rule,
+        select: Selector,
+        trigger: Predicate,
+        clear: Predicate,
+    ) -> None:
+        self.rule = rule
+        self.select = select
+        self.trigger = trigger
+        self.clear = clear
+        self.topic = f"alerts/{rule.name}"
+        self.active = False
+        # When the condition started holding, None while it does not
+        self.pending_since: float | None = None
+        self.cleared_at = -float("inf")
+        # Whether a value the rule cannot compare has been logged
+        self.warned = False
+
+
+class AlertRules:
+    """Evaluates alert rules against the data devices publish.
+
+    Rules are compiled once into trigger and clear predicates indexed by device
+    address and field, so a reading is only checked against the rules on the
+    fields it contains. The listener is registered ahead of the others and alerts
+    are sent with NotificationService.publish_alert, so an alert goes out before
+    the telemetry of the reading that raised it.
+
+    Alerts publish "active" or "clear" to alerts/<name>.
+    """
+
+    def __init__(
+        self,
+        notification_service: NotificationService,
+        state: StateStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an engine without rules.
+
+        Args:
+            notification_service: Service to send alerts to.
+            state: Store to keep the alert states in, under ALERTS.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.notification_service = notification_service
+        self.state = state
+        self._clock = clock
+        # Rules by device address and then field name
+        self._rules: dict[str, dict[str, list[_CompiledRule]]] = {}
+
+    def add_rule(self, rule: Rule) -> None:
+        """Compile a rule and start evaluating it.
+
+        Args:
+            rule: The rule to add.
+
+        Raises:
+            ValueError: If the rule has no condition or more than one.
+
+        """
+        compiled = _CompiledRule(rule, *_compile(rule))
+        fields = self._rules.setdefault(rule.address, {})
+        fields.setdefault(rule.field, []).append(compiled)
+
+    def watch(self, device: Device) -> None:
+        """Evaluate the rules on a device's fields against the data it publishes.
+
+        Args:
+            device: The device to evaluate.
+
+        """
+        if device.addr in self._rules:
+            device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Evaluate the rules on the fields present in a batch of data.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        fields = self._rules.get(device.addr)
+        if fields is None:
+            return
+
+        now = 0.0
+        for name, compiled_rules in fields.items():
+            value = data.get(name)
+            if value is None or value == []:
+                continue
+            now = now or self._clock()
+            for compiled in compiled_rules:
+                self._evaluate(compiled, value, now)
+
+    def active(self) -> list[str]:
+        """Return the names of the alerts currently raised."""
+        return [
+            compiled.rule.name
+            for fields in self._rules.values()
+            for compiled_rules in fields.values()
+            for compiled in compiled_rules
+            if compiled.active
+        ]
+
+    def _evaluate(self, compiled: _CompiledRule, published: Any, now: float) -> None:  # noqa: ANN401
+        value = compiled.select(published)
+        if value is None:
+            if not compiled.warned and not _all_none(published):
+                compiled.warned = True
+                rule = compiled.rule
+                logger.warning(
+                    f"Alert {rule.name}: {rule.field} of {rule.address} is not a number: "
+                    f"{published}",
+                )
+            return
+
+        if compiled.active:
+            if compiled.clear(value):
+                compiled.active = False
+                compiled.pending_since = None
+                compiled.cleared_at = now
+                logger.info(f"Alert {compiled.rule.name} cleared")
+                self._send(compiled, CLEAR)
+            return
+
+        if not compiled.trigger(value):
+            compiled.pending_since = None
+            return
+
+        if compiled.pending_since is None:
+            compiled.pending_since = now
+        rule = compiled.rule
+        if (
+            now - compiled.pending_since < rule.duration
+            or now - compiled.cleared_at < rule.cooldown
+        ):
+            return
+
+        compiled.active = True
+        logger.warning(f"Alert {rule.name}: {rule.field} of {rule.address} is {value}")
+        self._send(compiled, ACTIVE)
+
+    def _send(self, compiled: _CompiledRule, state: str) -> None:
+        self.notification_service.publish_alert(compiled.topic, state)
+        if self.state is not None:
+            self.state.update(ALERTS, {compiled.rule.name: state}, ALERTS)
+
+
+def _compile(rule: Rule) -> tuple[Selector, Predicate, Predicate]:
+    conditions = [
+        key for key in ("above", "below", "equals", "not_equals") if getattr(rule, key) is not None
+    ]
+    if len(conditions) != 1:
+        msg = f"rule {rule.name} needs exactly one of above, below, equals or not_equals"
+        raise ValueError(msg)
+
+    if rule.above is not None:
+        threshold, reset = rule.above, rule.above - rule.hysteresis
+        return (
+            _highest,
+            lambda value: value > threshold,
+            lambda value: value <= reset,
+        )
+    if rule.below is not None:
+        threshold, reset = rule.below, rule.below + rule.hysteresis
+        return (
+            _lowest,
+            lambda value: value < threshold,
+            lambda value: value >= reset,
+        )
+    if rule.equals is not None:
+        name = rule.equals
+        return (
+            _name,
+            lambda value: value == name,
+            lambda value: value != name,
+        )
+    name = rule.not_equals
+    return (
+        _name,
+        lambda value: value != name,
+        lambda value: value == name,
+    )
+
+
+# The numbers in a value or in the elements of a list value
+def _numbers(value: Any) -> list[float]:  # noqa: ANN401
+    values = value if isinstance(value, list) else (value,)
+    return [element for element in values if isinstance(element, int | float)]
+
+
+def _highest(value: Any) -> float | None:  # noqa: ANN401
+    numbers = _numbers(value)
+    return max(numbers) if numbers else None
+
+
+def _lowest(value: Any) -> float | None:  # noqa: ANN401
+    numbers = _numbers(value)
+    return min(numbers) if numbers else None
+
+
+def _all_none(value: Any) -> bool:  # noqa: ANN401
+    return all(element is None for element in value) if isinstance(value, list) else value is None
+
+
+def _name(value: Any) -> str:  # noqa: ANN401
+    return value.name if isinstance(value, Enum) else str(value)
@@ -0,0 +1,240 @@
+import logging
+import time
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = 30.0
+
+
+class PackState:
+    """Latest contribution of a single pack to the bank totals."""
+
+    __slots__ = (
+        "capacity",
+        "current",
+        "last_seen",
+        "max_cell",
+        "min_cell",
+        "remain",
+        "soc",
+        "stale",
+        "topic_prefix",
+        "volts",
+    )
+
+    def __init__(self, topic_prefix: str) -> None:
+        """Create an empty pack state.
+
+        Args:
+            topic_prefix: Topic prefix of the pack device.
+
+        """
+        self.topic_prefix = topic_prefix
+        self.volts = 0.0
+        self.current = 0.0
+        self.capacity = 0.0
+        self.remain = 0.0
+        self.soc = 0.0
+        self.min_cell: float | None = None
+        self.max_cell: float | None = None
+        self.last_seen: float | None = None
+        self.stale = True
+
+
+class BatteryBank:
+    """Aggregates parallel battery packs into a single bank-level view.
+
+    Totals are kept as running sums that are adjusted by the difference of each
+    pack update, so an update costs the same regardless of how many packs there are.
+    Packs that have not reported within the stale timeout are flagged and excluded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        notification_service: NotificationService,
+        stale_after: float = STALE_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a battery bank.
+
+        Args:
+            name: Name of the bank, used in the published topics.
+            notification_service: Service to publish the bank view to.
+            stale_after: Seconds without a report after which a pack is stale.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.topic_prefix = f"bank/{name}"
+        self.notification_service = notification_service
+        self.stale_after = stale_after
+        self._clock = clock
+        self._packs: dict[str, PackState] = {}
+
+        self._volts_sum = 0.0
+        self._current_sum = 0.0
+        self._capacity_sum = 0.0
+        self._remain_sum = 0.0
+        self._weighted_soc_sum = 0.0
+        self._live_count = 0
+        self._min_cell: float | None = None
+        self._max_cell: float | None = None
+
+    def add_pack(self, pack: Device) -> None:
+        """Add a pack to the bank and listen to its data.
+
+        Args:
+            pack: The battery device to aggregate.
+
+        """
+        self._packs[pack.addr] = PackState(pack.topic_prefix)
+        pack.add_listener(self.on_pack_data)
+
+    def on_pack_data(self, pack: Device, data: Mapping[str, Any]) -> None:
+        """Update the bank with data published by one of its packs.
+
+        Args:
+            pack: The pack that published the data.
+            data: The published data.
+
+        """
+        state = self._packs.get(pack.addr)
+        if state is None:
+            return
+
+        now = self._clock()
+        self.check_stale(now)
+
+        if state.stale:
+            state.stale = False
+            self._live_count += 1
+            self._add_totals(state)
+            self._publish_pack_stale(state)
+            # Its cells from before it went stale count again
+            if state.min_cell is not None:
+                self._rescan_cells()
+
+        state.last_seen = now
+
+        if "amps" in data:
+            self._remove_totals(state)
+            state.volts = data["volts"]
+            state.current = data["amps"]
+            state.capacity = data["capacity"]
+            state.remain = data["remain"]
+            state.soc = data["percent"]
+            self._add_totals(state)
+
+        if data.get("cell_voltages"):
+            self._update_cells(state, data["cell_voltages"])
+
+        self.publish()
+
+    def check_stale(self, now: float | None = None) -> None:
+        """Flag packs that have not reported within the stale timeout.
+
+        Args:
+            now: Current clock time, read from the clock if not given.
+
+        """
+        if now is None:
+            now = self._clock()
+
+        for state in self._packs.values():
+            if state.stale or state.last_seen is None:
+                continue
+            if now - state.last_seen <= self.stale_after:
+                continue
+
+            logger.warning(f"Pack {state.topic_prefix} is stale")
+            self._remove_totals(state)
+            state.stale = True
+            self._live_count -= 1
+            if not self._live_count:
+                # Clear the rounding error the removals left behind
+                self._reset_totals()
+            self._publish_pack_stale(state)
+            if state.min_cell == self._min_cell or state.max_cell == self._max_cell:
+                self._rescan_cells()
+
+    def summary(self) -> dict[str, float | int | None]:
+        """Return the current bank-level view."""
+        live = self._live_count
+        return {
+            "volts": round(self._volts_sum / live, 2) if live else None,
+            "amps": round(self._current_sum, 2) if live else None,
+            "capacity": round(self._capacity_sum, 2) if live else None,
+            "remain": round(self._remain_sum, 2) if live else None,
+            "percent": (
+                round(self._weighted_soc_sum / self._capacity_sum, 1)
+                if live and self._capacity_sum > 0
+                else None
+            ),
+            "min_cell": self._min_cell,
+            "max_cell": self._max_cell,
+            "cell_delta": (
+                round(self._max_cell - self._min_cell, 3)
+                if self._min_cell is not None and self._max_cell is not None
+                else None
+            ),
+            "packs": live,
+            "stale_packs": len(self._packs) - live,
+        }
+
+    def publish(self) -> None:
+        """Publish the bank-level view."""
+        for key, val in self.summary().items():
+            self.notification_service.publish(f"{self.topic_prefix}/{key}", val)
+
+    def _add_totals(self, state: PackState) -> None:
+        self._volts_sum += state.volts
+        self._current_sum += state.current
+        self._capacity_sum += state.capacity
+        self._remain_sum += state.remain
+        self._weighted_soc_sum += state.soc * state.capacity
+
+    def _remove_totals(self, state: PackState) -> None:
+        if state.stale:
+            return
+        self._volts_sum -= state.volts
+        self._current_sum -= state.current
+        self._capacity_sum -= state.capacity
+        self._remain_sum -= state.remain
+        self._weighted_soc_sum -= state.soc * state.capacity
+
+    def _reset_totals(self) -> None:
+        self._volts_sum = 0.0
+        self._current_sum = 0.0
+        self._capacity_sum = 0.0
+        self._remain_sum = 0.0
+        self._weighted_soc_sum = 0.0
+
+    def _update_cells(self, state: PackState, cells: list[float]) -> None:
+        old_min, old_max = state.min_cell, state.max_cell
+        state.min_cell = min(cells)
+        state.max_cell = max(cells)
+
+        # Only rescan the other packs when this pack held an extreme and moved away from it
+        if (old_min is not None and old_min == self._min_cell and state.min_cell > old_min) or (
+            old_max is not None and old_max == self._max_cell and state.max_cell < old_max
+        ):
+            self._rescan_cells()
+            return
+
+        if self._min_cell is None or state.min_cell < self._min_cell:
+            self._min_cell = state.min_cell
+        if self._max_cell is None or state.max_cell > self._max_cell:
+            self._max_cell = state.max_cell
+
+    def _rescan_cells(self) -> None:
+        live = [s for s in self._packs.values() if not s.stale and s.min_cell is not None]
+        self._min_cell = min((s.min_cell for s in live), default=None)
+        self._max_cell = max((s.max_cell for s in live), default=None)
+
+    def _publish_pack_stale(self, state: PackState) -> None:
+        self.notification_service.publish(f"{state.topic_prefix}/stale", state.stale)
@@ -0,0 +1,214 @@
+import heapq
+import logging
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.state.store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# Address of the device publishing a value, or SYSTEM, and the value's name
+ValueKey = tuple[str, str]
+
+# Source of derived values spanning several devices, published under derived/
+SYSTEM = "derived"
+
+_MISSING = object()
+
+
+class _Node:
+    """A derived value and the values it is computed from."""
+
+    __slots__ = ("compute", "device", "inputs", "key", "order")
+
+    def __init__(
+        self,
+        key: ValueKey,
+        inputs: tuple[ValueKey, ...],
+        compute: Callable[..., Any],
+        device: Device | None,
+    ) -> None:
+        self.key = key
+        self.inputs = inputs
+        self.compute = compute
+        self.device = device
+        # Position in dependency order, inputs always come first
+        self.order = 0
+
+
+class DerivedMetrics:
+    """Computes values derived from the fields devices publish.
+
+    Formulas declared by device classes are computed per device and published
+    like native fields; formulas spanning devices are published under derived/.
+    The dependency graph is sorted once when formulas are added, and an update
+    only recomputes the formulas downstream of the fields whose values changed.
+    """
+
+    def __init__(
+        self,
+        notification_service: NotificationService,
+        state: StateStore | None = None,
+    ) -> None:
+        """Create an empty engine.
+
+        Args:
+            notification_service: Service to publish cross-device values to.
+            state: Store to keep the derived values in alongside the device fields,
+                with cross-device values under SYSTEM.
+
+        """
+        self.notification_service = notification_service
+        self.state = state
+        self._values: dict[ValueKey, Any] = {}
+        self._nodes: dict[ValueKey, _Node] = {}
+        # Formulas reading each value, by device address and then field name
+        self._dependents: dict[str, dict[str, list[_Node]]] = {}
+        self._devices: set[str] = set()
+
+    def watch(self, device: Device) -> None:
+        """Compute the formulas declared by a device's class from its data.
+
+        Args:
+            device: The device to derive values for.
+
+        """
+        if device.addr in self._devices:
+            return
+        self._devices.add(device.addr)
+        device.add_listener(self.on_data)
+
+        for formula in type(device).derived:
+            self._add_node(
+                _Node(
+                    (device.addr, formula.name),
+                    tuple((device.addr, name) for name in formula.inputs),
+                    formula.compute,
+                    device,
+                ),
+            )
+        self._sort()
+
+    def add_formula(
+        self,
+        name: str,
+        inputs: tuple[ValueKey, ...],
+        compute: Callable[..., Any],
+    ) -> None:
+        """Add a value computed from the fields of several devices.
+
+        The value is published to derived/<name>. The input devices must also be
+        passed to watch().
+
+        Args:
+            name: Name of the derived value.
+            inputs: Address and field name of each input.
+            compute: Called with the input values in order, when none is None.
+
+        """
+        self._add_node(_Node((SYSTEM, name), inputs, compute, None))
+        self._sort()
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Recompute the values depending on fields that changed.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        dependents = self._dependents.get(device.addr)
+        if dependents is None:
+            return
+
+        queue: list[tuple[int, int, _Node]] = []
+        for name, nodes in dependents.items():
+            value = data.get(name, _MISSING)
+            if value is _MISSING or self._values.get((device.addr, name), _MISSING) == value:
+                continue
+            self._values[device.addr, name] = value
+            for node in nodes:
+                heapq.heappush(queue, (node.order, id(node), node))
+
+        self._propagate(queue)
+
+    def value(self, address: str, name: str) -> Any:  # noqa: ANN401
+        """Return the latest value of a tracked or derived field.
+
+        Args:
+            address: Address of the device, or SYSTEM for cross-device values.
+            name: Name of the field.
+
+        """
+        return self._values.get((address, name))
+
+    def _add_node(self, node: _Node) -> None:
+        if node.key in self._nodes:
+            msg = f"{node.key[1]} is already derived for {node.key[0]}"
+            raise ValueError(msg)
+        self._nodes[node.key] = node
+        for address, name in node.inputs:
+            self._dependents.setdefault(address, {}).setdefault(name, []).append(node)
+
+    def _sort(self) -> None:
+        # Kahn's algorithm over the derived values only, plain fields have no inputs
+        pending = {
+            key: sum(1 for source in node.inputs if source in self._nodes)
+            for key, node in self._nodes.items()
+        }
+        ready = [key for key, count in pending.items() if not count]
+        order = 0
+        while ready:
+            key = ready.pop()
+            self._nodes[key].order = order
+            order += 1
+            address, name = key
+            for node in self._dependents.get(address, {}).get(name, []):
+                pending[node.key] -= 1
+                if not pending[node.key]:
+                    ready.append(node.key)
+
+        if order < len(self._nodes):
+            cycle = sorted(f"{address}/{name}" for (address, name), n in pending.items() if n)
+            msg = f"Derived values depend on each other: {', '.join(cycle)}"
+            raise ValueError(msg)
+
+    def _propagate(self, queue: list[tuple[int, int, _Node]]) -> None:
+        done: set[ValueKey] = set()
+        while queue:
+            _, _, node = heapq.heappop(queue)
+            if node.key in done:
+                continue
+            done.add(node.key)
+
+            value = self._compute(node)
+            if self._values.get(node.key, _MISSING) == value:
+                continue
+            self._values[node.key] = value
+            self._publish(node, value)
+
+            address, name = node.key
+            for dependent in self._dependents.get(address, {}).get(name, []):
+                heapq.heappush(queue, (dependent.order, id(dependent), dependent))
+
+    def _compute(self, node: _Node) -> Any:  # noqa: ANN401
+        values = [self._values.get(key) for key in node.inputs]
+        if any(value is None for value in values):
+            return None
+        try:
+            return node.compute(*values)
+        except (ArithmeticError, TypeError, ValueError) as e:
+            # Formatted only if debug logging is enabled, this runs for every reading
+            logger.debug("Cannot compute %s: %s", node.key[1], e)
+            return None
+
+    def _publish(self, node: _Node, value: Any) -> None:  # noqa: ANN401
+        if self.state is not None:
+            address, name = node.key
+            self.state.update(address, {name: value}, None if node.device else SYSTEM)
+        if node.device is not None:
+            node.device.publish(node.key[1], value)
+        else:
+            self.notification_service.publish(f"{SYSTEM}/{node.key[1]}", value)
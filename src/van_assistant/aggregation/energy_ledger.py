@@ -0,0 +1,332 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Mapping
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_INTERVAL = 300.0
+# Seconds between samples beyond which the interval is not integrated
+MAX_GAP = 60.0
+SECONDS_PER_HOUR = 3600.0
+
+
+class EnergyCounter:
+    """Watt-hours and amp-hours integrated from one device's samples."""
+
+    __slots__ = (
+        "address",
+        "ah_today",
+        "ah_total",
+        "current",
+        "day",
+        "invert",
+        "last_amps",
+        "last_time",
+        "last_watts",
+        "name",
+        "power",
+        "voltage",
+        "wh_today",
+        "wh_total",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        address: str,
+        *,
+        power: str | None = None,
+        voltage: str | None = None,
+        current: str | None = None,
+        invert: bool = False,
+    ) -> None:
+        """Create a counter.
+
+        Args:
+            name: Name of the counter, used in the published topics.
+            address: Address of the device sampled.
+            power: Field holding the power in watts.
+            voltage: Field holding the voltage, used with current when there is no
+                power field.
+            current: Field holding the current in amps.
+            invert: Count the negative part of the readings, e.g. loads on a shunt,
+                instead of the positive part.
+
+        """
+        self.name = name
+        self.address = address
+        self.power = power
+        self.voltage = voltage
+        self.current = current
+        self.invert = invert
+        self.wh_today = 0.0
+        self.wh_total = 0.0
+        self.ah_today = 0.0
+        self.ah_total = 0.0
+        self.day: str | None = None
+        self.last_time: float | None = None
+        self.last_watts: float | None = None
+        self.last_amps: float | None = None
+
+    def watts(self, data: Mapping[str, Any]) -> float | None:
+        """Return the power in a sample, or None if it has none."""
+        if self.power is not None:
+            return self._part(data.get(self.power))
+        if self.voltage is not None and self.current is not None:
+            volts, amps = data.get(self.voltage), data.get(self.current)
+            if volts is not None and amps is not None:
+                return self._part(volts * amps)
+        return None
+
+    def amps(self, data: Mapping[str, Any]) -> float | None:
+        """Return the current in a sample, or None if it has none."""
+        return self._part(data.get(self.current)) if self.current is not None else None
+
+    def _part(self, value: float | None) -> float | None:
+        if value is None:
+            return None
+        return max(-value, 0.0) if self.invert else max(value, 0.0)
+
+
+class EnergyLedger:
+    """Integrates power and current samples into daily and lifetime totals.
+
+    Consecutive samples are integrated with the trapezoid rule. Intervals longer
+    than max_gap, e.g. while a device was out of range or the gateway was off, are
+    skipped rather than guessed. Totals are checkpointed to a small JSON file every
+    checkpoint_interval seconds and on shutdown, by writing a temporary file and
+    renaming it over the old one, so a crash leaves either checkpoint intact and
+    the SD card is not written on every sample.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        path: str | Path,
+        notification_service: NotificationService,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+        max_gap: float = MAX_GAP,
+        clock: Callable[[], float] = time.time,
+        today: Callable[[float], date] = lambda now: datetime.fromtimestamp(now).date(),  # noqa: DTZ006
+    ) -> None:
+        """Create a ledger, restoring totals from the checkpoint file if it exists.
+
+        Args:
+            path: Path of the checkpoint file.
+            notification_service: Service to publish the totals to.
+            checkpoint_interval: Seconds between checkpoints.
+            max_gap: Longest interval between samples that is integrated.
+            clock: Wall clock returning seconds, persisted across restarts.
+            today: Returns the local date of a clock time, for daily rollover.
+
+        """
+        self.path = Path(path)
+        self.notification_service = notification_service
+        self.checkpoint_interval = checkpoint_interval
+        self.max_gap = max_gap
+        self._clock = clock
+        self._today = today
+        self._counters: dict[str, EnergyCounter] = {}
+        self._by_address: dict[str, list[EnergyCounter]] = {}
+        self._restored: dict[str, dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def add_counter(self, counter: EnergyCounter) -> None:
+        """Add a counter, resuming its totals from the checkpoint.
+
+        Args:
+            counter: The counter to add.
+
+        """
+        saved = self._restored.get(counter.name)
+        if saved is not None:
+            counter.wh_total = saved.get("wh_total", 0.0)
+            counter.ah_total = saved.get("ah_total", 0.0)
+            counter.day = saved.get("day")
+            if counter.day == self._today(self._clock()).isoformat():
+                counter.wh_today = saved.get("wh_today", 0.0)
+                counter.ah_today = saved.get("ah_today", 0.0)
+
+        self._counters[counter.name] = counter
+        self._by_address.setdefault(counter.address, []).append(counter)
+
+    def watch(self, device: Device) -> None:
+        """Integrate the samples of a device if any counter reads it.
+
+        Args:
+            device: The device to sample.
+
+        """
+        if device.addr in self._by_address:
+            device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Integrate a sample published by a device.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        now = self._clock()
+        day = self._today(now).isoformat()
+        for counter in self._by_address.get(device.addr, ()):
+            watts, amps = counter.watts(data), counter.amps(data)
+            if watts is None and amps is None:
+                continue
+            self._integrate(counter, now, day, watts, amps)
+            self._publish(counter)
+
+    def totals(self) -> dict[str, dict[str, float]]:
+        """Return the totals of every counter."""
+        return {
+            name: {
+                "wh_today": counter.wh_today,
+                "wh_total": counter.wh_total,
+                "ah_today": counter.ah_today,
+                "ah_total": counter.ah_total,
+            }
+            for name, counter in self._counters.items()
+        }
+
+    def checkpoint(self) -> None:
+        """Write the totals to the checkpoint file if they changed."""
+        if not self._dirty:
+            return
+
+        state = {
+            name: {**totals, "day": self._counters[name].day}
+            for name, totals in self.totals().items()
+        }
+        # Counters not configured any more are kept, they may come back
+        state = {**self._restored, **state}
+
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("w", encoding="utf-8") as file:
+                json.dump(state, file)
+                file.flush()
+                os.fsync(file.fileno())
+            tmp.replace(self.path)
+            # The rename is only durable once the directory entry is on disk
+            directory = os.open(self.path.parent, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        except OSError as e:
+            logger.warning(f"Cannot write energy checkpoint {self.path}: {e}")
+            return
+        self._dirty = False
+
+    async def run(self) -> None:
+        """Checkpoint periodically until cancelled, and once more on the way out."""
+        try:
+            while True:
+                await asyncio.sleep(self.checkpoint_interval)
+                self.checkpoint()
+        finally:
+            self.checkpoint()
+
+    def _integrate(
+        self,
+        counter: EnergyCounter,
+        now: float,
+        day: str,
+        watts: float | None,
+        amps: float | None,
+    ) -> None:
+        last_time = counter.last_time
+        integrate = last_time is not None and 0 < now - last_time <= self.max_gap
+        if counter.day != day:
+            if integrate and counter.day is not None:
+                # Credit the part of the interval before midnight to the day it ended
+                midnight = self._midnight(last_time, now)
+                share = (midnight - last_time) / (now - last_time)
+                self._accumulate(
+                    counter,
+                    midnight,
+                    _interpolate(counter.last_watts, watts, share),
+                    _interpolate(counter.last_amps, amps, share),
+                )
+            if counter.day is not None:
+                logger.info(f"{counter.name}: {counter.wh_today:.0f}Wh on {counter.day}")
+            counter.day = day
+            counter.wh_today = counter.ah_today = 0.0
+            self._dirty = True
+
+        if integrate:
+            self._accumulate(counter, now, watts, amps)
+            self._dirty = True
+
+        counter.last_time = now
+        counter.last_watts = watts
+        counter.last_amps = amps
+
+    # Add the trapezoid from the counter's last sample to this one, and make it the last
+    @staticmethod
+    def _accumulate(
+        counter: EnergyCounter,
+        now: float,
+        watts: float | None,
+        amps: float | None,
+    ) -> None:
+        hours = (now - counter.last_time) / SECONDS_PER_HOUR
+        if watts is not None and counter.last_watts is not None:
+            energy = (watts + counter.last_watts) / 2 * hours
+            counter.wh_today += energy
+            counter.wh_total += energy
+        if amps is not None and counter.last_amps is not None:
+            charge = (amps + counter.last_amps) / 2 * hours
+            counter.ah_today += charge
+            counter.ah_total += charge
+        counter.last_time = now
+        counter.last_watts = watts
+        counter.last_amps = amps
+
+    # First time after start that is on a later day, to the millisecond. Bisecting with
+    # today() rather than computing midnight keeps DST and custom calendars right.
+    def _midnight(self, start: float, end: float) -> float:
+        first = self._today(start)
+        while end - start > 0.001:
+            middle = (start + end) / 2
+            if self._today(middle) == first:
+                start = middle
+            else:
+                end = middle
+        return end
+
+    def _publish(self, counter: EnergyCounter) -> None:
+        prefix = f"ledger/{counter.name}"
+        if counter.last_watts is not None:
+            self.notification_service.publish(f"{prefix}/wh_today", round(counter.wh_today, 2))
+            self.notification_service.publish(f"{prefix}/wh_total", round(counter.wh_total, 2))
+        if counter.last_amps is not None:
+            self.notification_service.publish(f"{prefix}/ah_today", round(counter.ah_today, 3))
+            self.notification_service.publish(f"{prefix}/ah_total", round(counter.ah_total, 3))
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable energy checkpoint {self.path}: {e}")
+            return {}
+        return state if isinstance(state, dict) else {}
+
+
+# Linear interpolation between two samples, None if either is missing
+def _interpolate(start: float | None, end: float | None, share: float) -> float | None:
+    if start is None or end is None:
+        return None
+    return start + (end - start) * share
@@ -0,0 +1,108 @@
+import ast
+from collections.abc import Callable
+from typing import Any
+
+# Decimal places results are rounded to, hiding floating point noise such as 0.30000000000000004
+DECIMALS = 3
+
+# Functions an expression may call
+FUNCTIONS: dict[str, Callable[..., Any]] = {"abs": abs, "min": min, "max": max, "round": round}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd)
+
+# A field of a device, referenced as <device name>.<field> in an expression
+FieldReference = tuple[str, str]
+
+
+class _References(ast.NodeTransformer):
+    def __init__(self) -> None:
+        self.references: list[FieldReference] = []
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        if not isinstance(node.value, ast.Name):
+            msg = "only <device>.<field> references are allowed"
+            raise ValueError(msg)  # noqa: TRY004
+
+        reference = (node.value.id, node.attr)
+        if reference not in self.references:
+            self.references.append(reference)
+        return ast.copy_location(
+            ast.Name(f"_{self.references.index(reference)}", ast.Load()),
+            node,
+        )
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            msg = f"only {', '.join(FUNCTIONS)} can be called"
+            raise ValueError(msg)
+        return self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id not in FUNCTIONS:
+            msg = f"unknown name {node.id}, reference fields as <device>.<field>"
+            raise ValueError(msg)
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        allowed = (
+            ast.Expression,
+            ast.BinOp,
+            ast.UnaryOp,
+            ast.Call,
+            ast.Load,
+            *_OPERATORS,
+        )
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                msg = f"unsupported constant {node.value!r}"
+                raise ValueError(msg)  # noqa: TRY004
+        elif not isinstance(node, allowed):
+            msg = f"unsupported syntax {type(node).__name__}"
+            raise ValueError(msg)  # noqa: TRY004
+        return super().generic_visit(node)
+
+
+def compile_expression(expression: str) -> tuple[tuple[FieldReference, ...], Callable[..., Any]]:
+    """Compile an arithmetic expression over device fields.
+
+    Expressions may use numbers, + - * /, abs, min, max, round and references to
+    device fields such as house.amps + shunt.current. Results are rounded to
+    DECIMALS places.
+
+    Args:
+        expression: The expression to compile.
+
+    Returns:
+        The referenced fields, and a function taking their values in that order.
+
+    Raises:
+        ValueError: If the expression is invalid or uses unsupported syntax.
+
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        msg = f"invalid expression: {e.msg}"
+        raise ValueError(msg) from None
+
+    transformer = _References()
+    body = transformer.visit(tree).body
+    if not transformer.references:
+        msg = "an expression must reference at least one field"
+        raise ValueError(msg)
+
+    arguments = ast.arguments(
+        posonlyargs=[],
+        args=[ast.arg(f"_{i}") for i in range(len(transformer.references))],
+        kwonlyargs=[],
+        kw_defaults=[],
+        defaults=[],
+    )
+    rounded = ast.Call(ast.Name("round", ast.Load()), [body, ast.Constant(DECIMALS)], [])
+    function = ast.fix_missing_locations(ast.Expression(ast.Lambda(arguments, rounded)))
+    # Only arithmetic and the whitelisted functions survive the checks above
+    compute = eval(  # noqa: S307
+        compile(function, "<expression>", "eval"),
+        {"__builtins__": {}, **FUNCTIONS},
+    )
+    return tuple(transformer.references), compute
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+RESOLUTION = 1.0
+WHEEL_SLOTS = 256
+
+ONLINE = "online"
+OFFLINE = "offline"
+
+
+class _Entry:
+    """Last-seen state of a device or one of its metrics."""
+
+    __slots__ = ("available", "due", "is_device", "last_seen", "metrics", "timeout", "topic")
+
+    def __init__(self, topic: str, timeout: float, *, is_device: bool) -> None:
+        self.topic = topic
+        self.is_device = is_device
+        self.timeout = timeout
+        self.last_seen = 0.0
+        self.available = False
+        # Wheel tick the entry is next checked at, None when not scheduled
+        self.due: int | None = None
+        self.metrics: dict[str, _Entry] = {}
+
+
+class StalenessWatchdog:
+    """Tracks when devices and their metrics were last seen and publishes availability.
+
+    Every device and every metric is an entry in a single timer wheel advanced by
+    one periodic tick, so tracking hundreds of entities needs no task or timer per
+    entity. Updates only record the time; an entry is moved to a later slot when
+    its slot comes round and it turns out to have been seen since, so each entry is
+    touched at most once per timeout however often it reports.
+
+    Devices publish "online" or "offline" to <prefix>/available and metrics publish
+    whether they are stale to <prefix>/<metric>/stale.
+    """
+
+    def __init__(
+        self,
+        notification_service: NotificationService,
+        timeouts: Mapping[str, float] | None = None,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        resolution: float = RESOLUTION,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a watchdog.
+
+        Args:
+            notification_service: Service to publish availability changes to.
+            timeouts: Seconds without data after which a device is offline, by
+                device class name.
+            default_timeout: Timeout of device classes not in timeouts.
+            resolution: Seconds between ticks, the precision of the timeouts.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.notification_service = notification_service
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.resolution = resolution
+        self._clock = clock
+        self._devices: dict[str, _Entry] = {}
+        self._wheel: list[list[_Entry]] = [[] for _ in range(WHEEL_SLOTS)]
+        self._tick = math.floor(clock() / resolution)
+
+    def watch(self, device: Device) -> None:
+        """Start tracking a device from the data it publishes.
+
+        Args:
+            device: The device to track.
+
+        """
+        if device.addr in self._devices:
+            return
+
+        timeout = self.timeouts.get(type(device).__name__, self.default_timeout)
+        self._devices[device.addr] = _Entry(device.topic_prefix, timeout, is_device=True)
+        device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Mark a device and the metrics it published as seen.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        entry = self._devices.get(device.addr)
+        if entry is None:
+            return
+
+        now = self._clock()
+        self._seen(entry, now)
+        metrics = entry.metrics
+        for key in data:
+            metric = metrics.get(key)
+            if metric is None:
+                metric = metrics[key] = _Entry(
+                    f"{entry.topic}/{key}",
+                    entry.timeout,
+                    is_device=False,
+                )
+            self._seen(metric, now)
+
+    def is_available(self, address: str, metric: str | None = None) -> bool:
+        """Return whether a device, or one of its metrics, has been seen recently.
+
+        Args:
+            address: Address of the device.
+            metric: Name of a metric of the device.
+
+        """
+        entry = self._devices.get(address)
+        if entry is not None and metric is not None:
+            entry = entry.metrics.get(metric)
+        return entry is not None and entry.available
+
+    def tick(self, now: float | None = None) -> None:
+        """Expire every entry whose timeout has passed since it was last seen.
+
+        Args:
+            now: Current clock time, read from the clock if not given.
+
+        """
+        if now is None:
+            now = self._clock()
+
+        current = math.floor(now / self.resolution)
+        # After a long stall, one revolution still visits every slot
+        start = max(self._tick + 1, current - WHEEL_SLOTS + 1)
+        for tick in range(start, current + 1):
+            slot = self._wheel[tick % WHEEL_SLOTS]
+            if slot:
+                self._wheel[tick % WHEEL_SLOTS] = []
+                for entry in slot:
+                    self._check(entry, current, now)
+        self._tick = current
+
+    async def run(self) -> None:
+        """Tick every resolution seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.resolution)
+            self.tick()
+
+    def _seen(self, entry: _Entry, now: float) -> None:
+        entry.last_seen = now
+        if not entry.available:
+            entry.available = True
+            self._publish_availability(entry)
+        if entry.due is None:
+            self._schedule(entry, now + entry.timeout)
+
+    def _schedule(self, entry: _Entry, deadline: float) -> None:
+        entry.due = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        self._wheel[entry.due % WHEEL_SLOTS].append(entry)
+
+    def _check(self, entry: _Entry, current: int, now: float) -> None:
+        if entry.due is not None and entry.due > current:
+            # Due in a later revolution of the wheel
+            self._wheel[entry.due % WHEEL_SLOTS].append(entry)
+            return
+
+        deadline = entry.last_seen + entry.timeout
+        if deadline > now:
+            self._schedule(entry, deadline)
+            return
+
+        entry.due = None
+        entry.available = False
+        if entry.is_device:
+            logger.warning(f"{entry.topic} has not been seen for {now - entry.last_seen:.0f}s")
+        self._publish_availability(entry)
+
+    def _publish_availability(self, entry: _Entry) -> None:
+        if entry.is_device:
+            self.notification_service.publish(
+                f"{entry.topic}/available",
+                ONLINE if entry.available else OFFLINE,
+            )
+        else:
+            self.notification_service.publish(f"{entry.topic}/stale", not entry.available)
@@ -0,0 +1,382 @@
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import time
+from collections.abc import Iterable, Mapping
+from enum import Enum
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from van_assistant.api.websocket import (
+    Opcode,
+    WebSocketError,
+    accept_key,
+    encode_frame,
+    read_frame,
+)
+from van_assistant.metrics import pipeline
+from van_assistant.state.store import Change, Record, StateStore, Subscription
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 0.5
+MAX_CLIENTS = 50
+
+# Limits on a request, which only ever needs a line and a few headers
+MAX_HEADER_LINES = 64
+REQUEST_TIMEOUT = 10.0
+# Seconds a kept-alive connection may sit idle between requests
+IDLE_TIMEOUT = 30.0
+# Bytes queued for a stream client beyond which it is too slow and disconnected
+HIGH_WATER = 256 * 1024
+
+STATE_PATH = "/api/state"
+DEVICE_PATH = "/api/devices/"
+STREAM_PATH = "/api/stream"
+METRICS_PATH = "/api/metrics"
+
+_MAC_DIGITS = 12
+
+
+class _Request:
+    """Method, path, query and headers of an HTTP request."""
+
+    __slots__ = ("headers", "method", "path", "query")
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, list[str]],
+        headers: dict[str, str],
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+
+
+class ApiServer:
+    """Local HTTP and WebSocket API over the state store.
+
+    GET /api/state returns every record and GET /api/devices/<address> a single
+    one, with the store or record version as ETag so a poll that finds nothing new
+    gets an empty 304. Encoded bodies are cached per version, so any number of
+    pollers cost one encoding per change.
+
+    GET /api/stream upgrades to a WebSocket that receives a snapshot followed by
+    only the fields that changed, batched so each client gets at most one message
+    per interval. The devices, fields and interval query parameters narrow the
+    stream, e.g. /api/stream?fields=voltage,current&interval=1. Clients that fall
+    more than HIGH_WATER bytes behind are disconnected rather than buffered.
+
+    GET /api/metrics returns the packet counters and per stage latency summaries
+    of the pipeline statistics, or 404 while metrics are disabled.
+    """
+
+    def __init__(
+        self,
+        state: StateStore,
+        host: str = "0.0.0.0",  # noqa: S104
+        port: int = 8080,
+        *,
+        min_interval: float = MIN_INTERVAL,
+        max_clients: int = MAX_CLIENTS,
+    ) -> None:
+        """Create a server, started by run().
+
+        Args:
+            state: The store to serve.
+            host: Address to listen on.
+            port: Port to listen on.
+            min_interval: Shortest interval between stream messages to one client.
+            max_clients: Most stream clients connected at once.
+
+        """
+        self.state = state
+        self.host = host
+        self.port = port
+        self.min_interval = min_interval
+        self.max_clients = max_clients
+        self.clients = 0
+        self._state_body: tuple[int, bytes] = (-1, b"")
+        self._server: asyncio.Server | None = None
+
+    @property
+    def sockets(self) -> tuple[Any, ...]:
+        """Return the listening sockets, e.g. to find the port when it is 0."""
+        return tuple(self._server.sockets) if self._server is not None else ()
+
+    async def run(self) -> None:
+        """Serve until cancelled."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"API listening on {self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await asyncio.wait_for(_read_request(reader), IDLE_TIMEOUT)
+                if request is None:
+                    break
+                if request.path == STREAM_PATH and request.method == "GET":
+                    await self._stream(request, reader, writer)
+                    break
+                self._respond(request, writer)
+                await writer.drain()
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (TimeoutError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"API connection closed: {e!r}")
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def _respond(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        if request.method != "GET":
+            _write_response(writer, HTTPStatus.METHOD_NOT_ALLOWED, b"", {"Allow": "GET"})
+            return
+
+        if request.path == METRICS_PATH:
+            _write_metrics(writer)
+            return
+        if request.path == STATE_PATH:
+            version, body = self._encoded_state()
+        elif request.path.startswith(DEVICE_PATH):
+            record = self._find(unquote(request.path.removeprefix(DEVICE_PATH)))
+            if record is None:
+                _write_response(writer, HTTPStatus.NOT_FOUND, b"")
+                return
+            version, body = record.version, _encode(_record(record))
+        else:
+            _write_response(writer, HTTPStatus.NOT_FOUND, b"")
+            return
+
+        etag = f'"{version}"'
+        headers = {"ETag": etag, "Content-Type": "application/json"}
+        if request.headers.get("if-none-match") == etag:
+            _write_response(writer, HTTPStatus.NOT_MODIFIED, b"", headers)
+        else:
+            _write_response(writer, HTTPStatus.OK, body, headers)
+
+    def _encoded_state(self) -> tuple[int, bytes]:
+        snapshot = self.state.snapshot()
+        if self._state_body[0] != snapshot.version:
+            body = {
+                "version": snapshot.version,
+                "devices": {
+                    address: _record(record) for address, record in snapshot.records.items()
+                },
+            }
+            self._state_body = (snapshot.version, _encode(body))
+        return self._state_body
+
+    def _find(self, text: str) -> Record | None:
+        # Addresses may be given as in the topics, lower case without colons
+        address = text.upper()
+        if len(address) == _MAC_DIGITS and ":" not in address:
+            address = ":".join(address[i : i + 2] for i in range(0, _MAC_DIGITS, 2))
+        return self.state.get(text) or self.state.get(address)
+
+    async def _stream(
+        self,
+        request: _Request,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        key = request.headers.get("sec-websocket-key")
+        if request.headers.get("upgrade", "").lower() != "websocket" or not key:
+            _write_response(writer, HTTPStatus.BAD_REQUEST, b"expected a WebSocket upgrade")
+            return
+        if self.clients >= self.max_clients:
+            _write_response(writer, HTTPStatus.SERVICE_UNAVAILABLE, b"too many clients")
+            return
+
+        addresses = _split(request.query, "devices")
+        if addresses is not None:
+            addresses = [
+                record.address if (record := self._find(address)) else address
+                for address in addresses
+            ]
+        fields = _split(request.query, "fields")
+        try:
+            interval = max(float(request.query["interval"][0]), self.min_interval)
+        except (KeyError, ValueError):
+            interval = self.min_interval
+
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            b"Connection: Upgrade\r\nSec-WebSocket-Accept: "
+            + accept_key(key).encode()
+            + b"\r\n\r\n",
+        )
+
+        # Subscribing and taking the snapshot without awaiting in between loses nothing
+        subscription = self.state.subscribe(addresses, fields)
+        snapshot = self.state.snapshot()
+        devices = {
+            address: _record(record, fields)
+            for address, record in snapshot.records.items()
+            if addresses is None or address in addresses
+        }
+        writer.write(
+            _message({"type": "snapshot", "version": snapshot.version, "devices": devices}),
+        )
+
+        self.clients += 1
+        sender = asyncio.create_task(self._send_changes(subscription, writer, interval))
+        try:
+            await _receive(reader, writer)
+        finally:
+            self.clients -= 1
+            subscription.close()
+            sender.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await sender
+
+    async def _send_changes(
+        self,
+        subscription: Subscription,
+        writer: asyncio.StreamWriter,
+        interval: float,
+    ) -> None:
+        last_sent = 0.0
+        async for change in subscription:
+            wait = last_sent + interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            changes = [change, *subscription.drain()]
+
+            if writer.transport.get_write_buffer_size() > HIGH_WATER:
+                logger.info("Disconnecting API stream client that is not keeping up")
+                writer.transport.abort()
+                return
+            writer.write(_message(_delta(changes)))
+            last_sent = time.monotonic()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> _Request | None:
+    line = await reader.readline()
+    if not line:
+        return None
+
+    async with asyncio.timeout(REQUEST_TIMEOUT):
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            msg = f"malformed request line {line!r}"
+            raise ValueError(msg) from None
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            header = await reader.readline()
+            if header in {b"\r\n", b"\n", b""}:
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            msg = "too many headers"
+            raise ValueError(msg)
+
+    url = urlsplit(target)
+    return _Request(method, url.path, parse_qs(url.query), headers)
+
+
+async def _receive(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    # Answers pings and returns when the client closes the stream
+    try:
+        while True:
+            opcode, payload = await read_frame(reader)
+            if opcode == Opcode.PING:
+                writer.write(encode_frame(Opcode.PONG, payload))
+            elif opcode == Opcode.CLOSE:
+                writer.write(encode_frame(Opcode.CLOSE, payload[:2]))
+                return
+    except WebSocketError as e:
+        logger.debug(f"Closing API stream: {e}")
+        writer.write(encode_frame(Opcode.CLOSE, (1002).to_bytes(2)))
+
+
+def _write_response(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    body: bytes,
+    headers: Mapping[str, str] | None = None,
+) -> None:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+def _split(query: dict[str, list[str]], name: str) -> list[str] | None:
+    values = query.get(name)
+    if not values:
+        return None
+    return [value for joined in values for value in joined.split(",") if value]
+
+
+def _record(record: Record, fields: Iterable[str] | None = None) -> dict[str, Any]:
+    values = record.fields
+    if fields is not None:
+        values = {name: values[name] for name in fields if name in values}
+    return {"type": record.device_type, "version": record.version, "fields": values}
+
+
+def _delta(changes: list[Change]) -> dict[str, Any]:
+    return {
+        "type": "delta",
+        "version": max(change.version for change in changes),
+        "devices": {change.address: change.fields for change in changes},
+    }
+
+
+def _write_metrics(writer: asyncio.StreamWriter) -> None:
+    stats = pipeline.active
+    if stats is None:
+        _write_response(writer, HTTPStatus.NOT_FOUND, b"metrics are disabled")
+        return
+    # Counters change with every packet, so there is no version to cache by
+    headers = {"Content-Type": "application/json", "Cache-Control": "no-store"}
+    _write_response(writer, HTTPStatus.OK, _encode(stats.snapshot()), headers)
+
+
+def _message(body: dict[str, Any]) -> bytes:
+    return encode_frame(Opcode.TEXT, _encode(body))
+
+
+# Non-finite floats are not valid JSON, they are sent as null. Encoding is retried
+# with them replaced rather than checking every value, as they are rare.
+def _encode(body: Any) -> bytes:  # noqa: ANN401
+    try:
+        text = json.dumps(body, default=_json_default, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        text = json.dumps(
+            _finite(body),
+            default=_json_default,
+            separators=(",", ":"),
+            allow_nan=False,
+        )
+    return text.encode()
+
+
+def _finite(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, Mapping):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
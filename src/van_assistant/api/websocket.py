@@ -0,0 +1,100 @@
+import asyncio
+import base64
+import hashlib
+import struct
+from enum import IntEnum
+
+# Appended to the client's key to prove the server understood the handshake, RFC 6455
+HANDSHAKE_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Largest frame accepted from a client, which only sends control frames
+MAX_FRAME = 64 * 1024
+
+_LENGTH_16 = 126
+_LENGTH_64 = 127
+
+
+class Opcode(IntEnum):
+    """WebSocket frame types."""
+
+    CONTINUATION = 0x0
+    TEXT = 0x1
+    BINARY = 0x2
+    CLOSE = 0x8
+    PING = 0x9
+    PONG = 0xA
+
+
+class WebSocketError(ValueError):
+    """Raised when a client sends an invalid frame."""
+
+
+def accept_key(key: str) -> str:
+    """Return the Sec-WebSocket-Accept value answering a client's handshake key.
+
+    Args:
+        key: The client's Sec-WebSocket-Key header.
+
+    """
+    digest = hashlib.sha1((key + HANDSHAKE_GUID).encode(), usedforsecurity=False).digest()
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(opcode: Opcode, payload: bytes = b"") -> bytes:
+    """Encode a single unfragmented frame as sent by a server, without a mask.
+
+    Args:
+        opcode: The frame type.
+        payload: The frame payload.
+
+    """
+    length = len(payload)
+    if length < _LENGTH_16:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length <= 0xFFFF:
+        header = struct.pack("!BBH", 0x80 | opcode, _LENGTH_16, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, _LENGTH_64, length)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[Opcode, bytes]:
+    """Read and unmask a single frame sent by a client.
+
+    Args:
+        reader: Stream of the client connection.
+
+    Returns:
+        The frame type and payload.
+
+    Raises:
+        WebSocketError: If the frame is not masked, too large or of unknown type.
+        asyncio.IncompleteReadError: If the client disconnects mid-frame.
+
+    """
+    first, second = await reader.readexactly(2)
+    try:
+        opcode = Opcode(first & 0x0F)
+    except ValueError:
+        msg = f"unknown opcode {first & 0x0F}"
+        raise WebSocketError(msg) from None
+
+    if not second & 0x80:
+        msg = "client frames must be masked"
+        raise WebSocketError(msg)
+
+    length = second & 0x7F
+    if length == _LENGTH_16:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == _LENGTH_64:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_FRAME:
+        msg = f"frame of {length} bytes is too large"
+        raise WebSocketError(msg)
+
+    mask = await reader.readexactly(4)
+    payload = await reader.readexactly(length)
+    # XOR with the repeated mask in one big-integer operation rather than per byte
+    repeated = (mask * (length // 4 + 1))[:length]
+    unmasked = int.from_bytes(payload) ^ int.from_bytes(repeated)
+    return opcode, unmasked.to_bytes(length)
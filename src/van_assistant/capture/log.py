@@ -0,0 +1,218 @@
+import struct
+import time
+from collections.abc import Iterator
+from enum import IntEnum
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"VANCAP\x00\x01"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Payload length, kind, timestamp, address, manufacturer ID, RSSI
+RECORD = struct.Struct("<HBd6sHb")
+MAX_PAYLOAD = 0xFFFF
+ADDRESS_SIZE = 6
+# Seconds between flushes, bounding what a crash loses
+FLUSH_INTERVAL = 1.0
+
+
+class RecordKind(IntEnum):
+    """The source of a captured record."""
+
+    ADVERTISEMENT = 1
+    NOTIFICATION = 2
+
+
+class CaptureRecord(NamedTuple):
+    """Raw data as seen by a radio, with the wall clock time it arrived."""
+
+    kind: RecordKind
+    timestamp: float
+    address: str
+    manufacturer_id: int
+    rssi: int
+    payload: bytes
+
+
+class CaptureError(ValueError):
+    """Raised when a capture file cannot be written or read."""
+
+
+def _pack_address(address: str) -> bytes:
+    try:
+        packed = bytes.fromhex(address.replace(":", ""))
+    except ValueError:
+        packed = b""
+    if len(packed) != ADDRESS_SIZE:
+        msg = f"Cannot capture non MAC address {address}"
+        raise CaptureError(msg)
+    return packed
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    # Decompressing streams may return less than asked for before the end
+    data = stream.read(size)
+    while 0 < len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def _unpack_address(address: bytes) -> str:
+    return ":".join(f"{octet:02X}" for octet in address)
+
+
+class CaptureWriter:
+    """Appends raw advertisements and notifications to a capture file.
+
+    Each record is a fixed header holding the payload length followed by the
+    payload, so a file is read back without any framing beyond the header. The
+    whole stream is optionally zstd compressed, which needs the `zstandard`
+    package.
+    """
+
+    def __init__(self, path: str | Path, *, compress: bool = False) -> None:
+        """Create the capture file, replacing any existing one.
+
+        Args:
+            path: Path of the capture file.
+            compress: Whether to zstd compress the file.
+
+        Raises:
+            CaptureError: If compression is requested but zstandard is not installed.
+
+        """
+        if compress and zstandard is None:
+            msg = "Compressed captures need the zstandard package"
+            raise CaptureError(msg)
+
+        self.path = Path(path)
+        self.records = 0
+        self._last_flush = time.monotonic()
+        self._file = self.path.open("wb")
+        self._stream: BinaryIO = self._file
+        if compress:
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._file)
+        self._stream.write(MAGIC)
+
+    def advertisement(
+        self,
+        address: str,
+        manufacturer_id: int,
+        payload: bytes,
+        rssi: int = 0,
+    ) -> None:
+        """Record the manufacturer data of an advertisement.
+
+        Args:
+            address: BLE MAC address of the advertiser.
+            manufacturer_id: The manufacturer ID of the data.
+            payload: The manufacturer data.
+            rssi: Received signal strength of the advertisement.
+
+        """
+        self._write(RecordKind.ADVERTISEMENT, address, manufacturer_id, rssi, payload)
+
+    def notification(self, address: str, payload: bytes | bytearray) -> None:
+        """Record a GATT notification.
+
+        Args:
+            address: BLE MAC address of the connected device.
+            payload: The notification data.
+
+        """
+        self._write(RecordKind.NOTIFICATION, address, 0, 0, bytes(payload))
+
+    def flush(self) -> None:
+        """Write buffered records to disk."""
+        self._stream.flush()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Finish and close the capture file."""
+        self._stream.close()
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(
+        self,
+        kind: RecordKind,
+        address: str,
+        manufacturer_id: int,
+        rssi: int,
+        payload: bytes,
+    ) -> None:
+        if len(payload) > MAX_PAYLOAD:
+            msg = f"Cannot capture {len(payload)} byte payload from {address}"
+            raise CaptureError(msg)
+
+        self._stream.write(
+            RECORD.pack(
+                len(payload),
+                kind,
+                time.time(),
+                _pack_address(address),
+                manufacturer_id,
+                max(-128, min(127, rssi)),
+            )
+            + payload,
+        )
+        self.records += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+
+def read_capture(path: str | Path) -> Iterator[CaptureRecord]:
+    """Read the records of a capture file in order.
+
+    Args:
+        path: Path of the capture file.
+
+    Yields:
+        Each captured record.
+
+    Raises:
+        CaptureError: If the file is not a capture, or is compressed and zstandard
+            is not installed.
+
+    """
+    with Path(path).open("rb") as file:
+        stream: BinaryIO = file
+        if file.read(len(ZSTD_MAGIC)) == ZSTD_MAGIC:
+            if zstandard is None:
+                msg = f"{path} is compressed, reading it needs the zstandard package"
+                raise CaptureError(msg)
+            file.seek(0)
+            stream = zstandard.ZstdDecompressor().stream_reader(file)
+        else:
+            file.seek(0)
+
+        if _read_exact(stream, len(MAGIC)) != MAGIC:
+            msg = f"{path} is not a capture file"
+            raise CaptureError(msg)
+
+        while header := _read_exact(stream, RECORD.size):
+            if len(header) < RECORD.size:
+                # Capture cut short, e.g. by a crash
+                return
+            length, kind, timestamp, address, manufacturer_id, rssi = RECORD.unpack(header)
+            payload = _read_exact(stream, length)
+            if len(payload) < length:
+                return
+            yield CaptureRecord(
+                RecordKind(kind),
+                timestamp,
+                _unpack_address(address),
+                manufacturer_id,
+                rssi,
+                payload,
+            )
@@ -0,0 +1,216 @@
+import asyncio
+import contextlib
+import inspect
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData, AdvertisementDataCallback
+
+from van_assistant.capture.log import CaptureRecord, RecordKind, read_capture
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the runtime to start the scanners and subscribe the clients
+READY_TIMEOUT = 5.0
+# Records delivered between yields to the event loop when replaying flat out
+FAST_BATCH = 256
+
+NotifyCallback = Callable[[Any, bytearray], Awaitable[None] | None]
+
+
+class ReplayScanner:
+    """Stand-in for BleakScanner receiving captured advertisements."""
+
+    def __init__(self, detection_callback: AdvertisementDataCallback) -> None:
+        """Create a replay scanner.
+
+        Args:
+            detection_callback: Callback invoked for each advertisement.
+
+        """
+        self.detection_callback = detection_callback
+        self.started = asyncio.Event()
+        self._devices: dict[str, BLEDevice] = {}
+
+    async def start(self) -> None:
+        """Start receiving advertisements."""
+        self.started.set()
+
+    async def stop(self) -> None:
+        """Stop receiving advertisements."""
+        self.started.clear()
+
+    def deliver(self, record: CaptureRecord) -> None:
+        """Pass a captured advertisement to the detection callback.
+
+        Args:
+            record: The captured advertisement.
+
+        """
+        ble_device = self._devices.get(record.address)
+        if ble_device is None:
+            ble_device = self._devices[record.address] = BLEDevice(record.address, None, None)
+
+        ad_data = AdvertisementData(
+            local_name=None,
+            manufacturer_data={record.manufacturer_id: record.payload},
+            service_data={},
+            service_uuids=[],
+            tx_power=None,
+            rssi=record.rssi,
+            platform_data=(),
+        )
+        self.detection_callback(ble_device, ad_data)
+
+
+class ReplayClient:
+    """Stand-in for BleakClient receiving captured notifications."""
+
+    def __init__(self, address: str) -> None:
+        """Create a replay client.
+
+        Args:
+            address: BLE MAC address of the captured device.
+
+        """
+        self.address = address
+        self.subscribed = asyncio.Event()
+        self._callback: NotifyCallback | None = None
+
+    async def connect(self) -> None:
+        """Connect to the captured device."""
+
+    async def disconnect(self) -> None:
+        """Disconnect from the captured device."""
+        self._callback = None
+        self.subscribed.clear()
+
+    async def start_notify(self, char_specifier: Any, callback: NotifyCallback) -> None:  # noqa: ANN401, ARG002
+        """Subscribe to the captured notifications."""
+        self._callback = callback
+        self.subscribed.set()
+
+    async def write_gatt_char(
+        self,
+        char_specifier: Any,  # noqa: ANN401
+        data: bytes,
+        response: bool | None = None,  # noqa: FBT001
+    ) -> None:
+        """Ignore commands, the responses are already in the capture."""
+
+    async def deliver(self, record: CaptureRecord) -> None:
+        """Pass a captured notification to the subscribed callback.
+
+        Args:
+            record: The captured notification.
+
+        """
+        if self._callback is None:
+            return
+        result = self._callback(None, bytearray(record.payload))
+        if inspect.isawaitable(result):
+            await result
+
+
+class CaptureReplay:
+    """Feeds a capture file back through the scanners and connectable devices.
+
+    Pass scanner_factory and client_factory to the runtime in place of bleak, then
+    await run() to deliver the captured records with their original spacing.
+    """
+
+    def __init__(self, path: str | Path, speed: float = 1.0) -> None:
+        """Create a replay of a capture file.
+
+        Args:
+            path: Path of the capture file.
+            speed: Playback speed, e.g. 10 for ten times real time. Zero replays
+                as fast as possible.
+
+        """
+        if speed < 0:
+            msg = "Replay speed cannot be negative"
+            raise ValueError(msg)
+
+        self.path = Path(path)
+        self.speed = speed
+        self.delivered = 0
+        self.unmatched = 0
+        self._scanners: list[ReplayScanner] = []
+        self._clients: dict[str, ReplayClient] = {}
+
+    def scanner_factory(self, detection_callback: AdvertisementDataCallback) -> ReplayScanner:
+        """Return a scanner receiving the captured advertisements.
+
+        Args:
+            detection_callback: Callback invoked for each advertisement.
+
+        """
+        scanner = ReplayScanner(detection_callback)
+        self._scanners.append(scanner)
+        return scanner
+
+    def client_factory(self, address: str) -> ReplayClient:
+        """Return a client receiving the captured notifications of an address.
+
+        Args:
+            address: BLE MAC address of the device.
+
+        """
+        client = self._clients[address] = ReplayClient(address)
+        return client
+
+    async def run(self) -> None:
+        """Deliver every record of the capture, then return."""
+        # Give the runtime a chance to start scanning and subscribe before the first record
+        waiters = [scanner.started.wait() for scanner in self._scanners]
+        waiters.extend(client.subscribed.wait() for client in self._clients.values())
+        if waiters:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(asyncio.gather(*waiters), READY_TIMEOUT)
+
+        start = time.monotonic()
+        first_timestamp: float | None = None
+
+        for index, record in enumerate(read_capture(self.path)):
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+
+            if self.speed:
+                delay = start + (record.timestamp - first_timestamp) / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif index % FAST_BATCH == 0:
+                await asyncio.sleep(0)
+
+            if record.kind == RecordKind.ADVERTISEMENT:
+                self._deliver_advertisement(record)
+            else:
+                await self._deliver_notification(record)
+
+        logger.info(
+            f"Replayed {self.delivered} records from {self.path}, {self.unmatched} unmatched",
+        )
+
+    def _deliver_advertisement(self, record: CaptureRecord) -> None:
+        scanners = [scanner for scanner in self._scanners if scanner.started.is_set()]
+        if not scanners:
+            self.unmatched += 1
+            return
+
+        for scanner in scanners:
+            scanner.deliver(record)
+        self.delivered += 1
+
+    async def _deliver_notification(self, record: CaptureRecord) -> None:
+        client = self._clients.get(record.address)
+        if client is None or not client.subscribed.is_set():
+            self.unmatched += 1
+            return
+
+        await client.deliver(record)
+        self.delivered += 1
@@ -0,0 +1,862 @@
+import re
+import tomllib
+from dataclasses import dataclass, field
+from difflib import get_close_matches
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from van_assistant.aggregation.expression import compile_expression
+from van_assistant.devices.brands import BRAND_TO_DEVICE_TYPES, SupportedBrand, brand_fields
+
+MAC_ADDRESS = re.compile(r"^[0-9A-F]{2}(:[0-9A-F]{2}){5}$")
+VICTRON_KEY_LENGTH = 16
+SINK_TYPES = {"local", "logging", "mqtt"}
+DEVICE_TYPES = frozenset(
+    device_type.__name__
+    for device_types in BRAND_TO_DEVICE_TYPES.values()
+    for device_type in device_types
+)
+
+
+class ConfigError(ValueError):
+    """Raised when the configuration file is invalid."""
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceConfig:
+    """Compiled settings of a single device."""
+
+    address: str
+    brand: SupportedBrand
+    name: str | None = None
+    # Victron encryption key as validated hex
+    encryption_key: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SinkConfig:
+    """Settings of a single notification sink."""
+
+    type: str
+    host: str = "localhost"
+    port: int = 1883
+    username: str | None = None
+    password: str | None = None
+    # Unix domain socket of the local bus, and messages queued per slow subscriber
+    path: str = "/tmp/van-assistant.sock"  # noqa: S108
+    buffer: int = 1000
+    # Device fields the sink publishes, e.g. ("voltage", "soc"), None for every field
+    fields: tuple[str, ...] | None = None
+    # Receive device readings in batches, see BatchingConfig
+    batch: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class BatchingConfig:
+    """Settings for collecting readings into batches for batched sinks."""
+
+    # Seconds between publishing every batch
+    interval: float = 60.0
+    # Readings of one device type at which its batch is published early
+    max_rows: int = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class BankConfig:
+    """Settings of a bank of parallel battery packs."""
+
+    name: str
+    packs: tuple[str, ...]
+    stale_after: float = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedConfig:
+    """A value computed from the fields of several devices."""
+
+    name: str
+    # Arithmetic over <device name>.<field> references
+    expression: str
+
+
+@dataclass(frozen=True, slots=True)
+class RuleConfig:
+    """An alert raised when a device field meets a condition."""
+
+    name: str
+    address: str
+    field: str
+    # Exactly one of above, below, equals and not_equals is set
+    above: float | None = None
+    below: float | None = None
+    equals: str | None = None
+    not_equals: str | None = None
+    hysteresis: float = 0.0
+    duration: float = 0.0
+    cooldown: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class PollingConfig:
+    """Settings for polling connectable devices."""
+
+    interval: float = 5.0
+    reconnect_delay: float = 10.0
+    stale_check_interval: float = 5.0
+
+
+@dataclass(frozen=True, slots=True)
+class DutyCycleConfig:
+    """Settings for alternating between scanning and resting."""
+
+    enabled: bool = False
+    active: float = 10.0
+    idle: float = 20.0
+    # Shorten or lengthen the idle window with how recent and stable the readings are
+    adaptive: bool = False
+    min_idle: float = 5.0
+    max_idle: float = 300.0
+    stable_change: float = 0.02
+
+
+@dataclass(frozen=True, slots=True)
+class ScanningConfig:
+    """Settings for scanning for advertisements."""
+
+    # Scan passively, with BlueZ reporting only supported manufacturers
+    passive: bool = False
+    # Drop advertisements from unconfigured addresses before any processing
+    prefilter: bool = False
+    # Bluetooth adapters to scan on, e.g. hci0, the default adapter if empty
+    adapters: tuple[str, ...] = ()
+    duty_cycle: DutyCycleConfig = field(default_factory=DutyCycleConfig)
+
+
+@dataclass(frozen=True, slots=True)
+class WorkersConfig:
+    """Settings for decoding Victron advertisements in worker processes."""
+
+    # Zero decodes on the event loop
+    count: int = 0
+    ring_capacity: int = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsConfig:
+    """Settings for pipeline latency instrumentation."""
+
+    enabled: bool = False
+    # Seconds between logging the collected statistics
+    dump_interval: float = 60.0
+
+
+@dataclass(frozen=True, slots=True)
+class ProfilerConfig:
+    """Settings for the on-demand sampling profiler."""
+
+    # Seconds sampled when a profile is requested without a duration
+    duration: float = 30.0
+    interval: float = 0.005
+    output_dir: str = "."
+
+
+@dataclass(frozen=True, slots=True)
+class WatchdogConfig:
+    """Settings for tracking when devices were last seen."""
+
+    enabled: bool = True
+    default_timeout: float = 60.0
+    # Timeouts by device class name, e.g. RemcoBattery
+    timeouts: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class CounterConfig:
+    """An energy counter integrating one device's power or current."""
+
+    name: str
+    address: str
+    power: str | None = None
+    voltage: str | None = None
+    current: str | None = None
+    # Count the negative part of the readings instead of the positive part
+    invert: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerConfig:
+    """Settings for the persistent energy ledger."""
+
+    path: str = "energy.json"
+    checkpoint_interval: float = 300.0
+    # Longest interval between samples that is integrated, in seconds
+    max_gap: float = 60.0
+    counters: tuple[CounterConfig, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ApiConfig:
+    """Settings for the local HTTP and WebSocket API."""
+
+    enabled: bool = False
+    host: str = "0.0.0.0"  # noqa: S104
+    port: int = 8080
+    # Shortest interval between stream messages to one client, in seconds
+    min_interval: float = 0.5
+    max_clients: int = 50
+
+
+@dataclass(frozen=True, slots=True)
+class SharedMemoryConfig:
+    """Settings for the memory-mapped table of latest values for local processes."""
+
+    enabled: bool = False
+    path: str = "/dev/shm/van-assistant"  # noqa: S108
+    # Fields with a column, e.g. ("voltage", "soc"), None for every Victron field
+    fields: tuple[str, ...] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DeadbandConfig:
+    """How far a field must move from its last published value to be published again."""
+
+    absolute: float = 0.0
+    # Fraction of the last published value
+    relative: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeDetectionConfig:
+    """Settings for publishing device values to the sinks only when they change."""
+
+    enabled: bool = False
+    # Seconds after which an unchanged value is published anyway, 0 for never
+    heartbeat: float = 300.0
+    default: DeadbandConfig = field(default_factory=DeadbandConfig)
+    # Deadbands by field name, e.g. cell_voltages
+    deadbands: dict[str, DeadbandConfig] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class AppConfig:
+    """The complete, validated runtime configuration."""
+
+    devices: tuple[DeviceConfig, ...]
+    sinks: tuple[SinkConfig, ...] = (SinkConfig("logging"),)
+    batching: BatchingConfig = field(default_factory=BatchingConfig)
+    banks: tuple[BankConfig, ...] = ()
+    derived: tuple[DerivedConfig, ...] = ()
+    rules: tuple[RuleConfig, ...] = ()
+    polling: PollingConfig = field(default_factory=PollingConfig)
+    scanning: ScanningConfig = field(default_factory=ScanningConfig)
+    workers: WorkersConfig = field(default_factory=WorkersConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    profiler: ProfilerConfig = field(default_factory=ProfilerConfig)
+    watchdog: WatchdogConfig = field(default_factory=WatchdogConfig)
+    ledger: LedgerConfig = field(default_factory=LedgerConfig)
+    api: ApiConfig = field(default_factory=ApiConfig)
+    shared_memory: SharedMemoryConfig = field(default_factory=SharedMemoryConfig)
+    change_detection: ChangeDetectionConfig = field(default_factory=ChangeDetectionConfig)
+    log_level: str = "INFO"
+
+
+def load_config(path: str | Path) -> AppConfig:
+    """Load and validate a TOML or YAML configuration file.
+
+    Args:
+        path: Path of the configuration file.
+
+    Returns:
+        The validated configuration.
+
+    Raises:
+        ConfigError: If the file cannot be read or is invalid.
+
+    """
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        msg = f"Cannot read config file {path}: {e}"
+        raise ConfigError(msg) from e
+
+    try:
+        if path.suffix in {".yaml", ".yml"}:
+            raw = yaml.safe_load(text) or {}
+        else:
+            raw = tomllib.loads(text)
+    except (tomllib.TOMLDecodeError, yaml.YAMLError) as e:
+        msg = f"Cannot parse config file {path}: {e}"
+        raise ConfigError(msg) from e
+
+    return parse_config(raw)
+
+
+def parse_config(raw: Any) -> AppConfig:  # noqa: ANN401
+    """Validate a raw configuration mapping.
+
+    Args:
+        raw: The configuration as loaded from TOML or YAML.
+
+    Returns:
+        The validated configuration.
+
+    Raises:
+        ConfigError: If the configuration is invalid.
+
+    """
+    raw = _mapping(raw, "config")
+
+    devices = tuple(
+        _parse_device(entry, f"devices[{i}]")
+        for i, entry in enumerate(_list(raw.get("devices", []), "devices"))
+    )
+    if not devices:
+        msg = "devices: at least one device must be configured"
+        raise ConfigError(msg)
+
+    addresses = [device.address for device in devices]
+    duplicates = sorted({address for address in addresses if addresses.count(address) > 1})
+    if duplicates:
+        msg = f"devices: duplicate addresses {', '.join(duplicates)}"
+        raise ConfigError(msg)
+
+    # Fields any configured device publishes, for the sinks and shared memory to select
+    published = frozenset().union(*(brand_fields(device.brand) for device in devices))
+    sinks = tuple(
+        _parse_sink(entry, f"sinks[{i}]", published)
+        for i, entry in enumerate(_list(raw.get("sinks", [{"type": "logging"}]), "sinks"))
+    )
+
+    batching = _parse_batching(_mapping(raw.get("batching", {}), "batching"))
+
+    by_address = {device.address: device for device in devices}
+    by_name = {device.name: device for device in devices if device.name}
+    banks = tuple(
+        _parse_bank(entry, f"banks[{i}]", by_address, by_name)
+        for i, entry in enumerate(_list(raw.get("banks", []), "banks"))
+    )
+
+    derived = tuple(
+        _parse_derived(entry, f"derived[{i}]", by_name)
+        for i, entry in enumerate(_list(raw.get("derived", []), "derived"))
+    )
+    names = [entry.name for entry in derived]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        msg = f"derived: duplicate names {', '.join(duplicates)}"
+        raise ConfigError(msg)
+
+    rules = tuple(
+        _parse_rule(entry, f"rules[{i}]", by_address, by_name)
+        for i, entry in enumerate(_list(raw.get("rules", []), "rules"))
+    )
+    names = [rule.name for rule in rules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        msg = f"rules: duplicate names {', '.join(duplicates)}"
+        raise ConfigError(msg)
+
+    polling_raw = _mapping(raw.get("polling", {}), "polling")
+    polling = PollingConfig(
+        interval=_positive(polling_raw.get("interval", 5.0), "polling.interval"),
+        reconnect_delay=_positive(
+            polling_raw.get("reconnect_delay", 10.0),
+            "polling.reconnect_delay",
+        ),
+        stale_check_interval=_positive(
+            polling_raw.get("stale_check_interval", 5.0),
+            "polling.stale_check_interval",
+        ),
+    )
+
+    scanning = _parse_scanning(_mapping(raw.get("scanning", {}), "scanning"))
+
+    workers_raw = _mapping(raw.get("workers", {}), "workers")
+    workers = WorkersConfig(
+        count=_count(workers_raw.get("count", 0), "workers.count"),
+        ring_capacity=_count(workers_raw.get("ring_capacity", 4096), "workers.ring_capacity"),
+    )
+    if workers.ring_capacity == 0:
+        msg = "workers.ring_capacity: must be at least 1"
+        raise ConfigError(msg)
+
+    metrics_raw = _mapping(raw.get("metrics", {}), "metrics")
+    metrics = MetricsConfig(
+        enabled=_flag(metrics_raw.get("enabled", False), "metrics.enabled"),
+        dump_interval=_positive(metrics_raw.get("dump_interval", 60.0), "metrics.dump_interval"),
+    )
+
+    profiler_raw = _mapping(raw.get("profiler", {}), "profiler")
+    profiler = ProfilerConfig(
+        duration=_positive(profiler_raw.get("duration", 30.0), "profiler.duration"),
+        interval=_positive(profiler_raw.get("interval", 0.005), "profiler.interval"),
+        output_dir=str(profiler_raw.get("output_dir", ".")),
+    )
+
+    watchdog_raw = _mapping(raw.get("watchdog", {}), "watchdog")
+    watchdog = WatchdogConfig(
+        enabled=_flag(watchdog_raw.get("enabled", True), "watchdog.enabled"),
+        default_timeout=_positive(
+            watchdog_raw.get("default_timeout", 60.0),
+            "watchdog.default_timeout",
+        ),
+        timeouts={
+            _device_type(name, "watchdog.timeouts"): _positive(
+                timeout,
+                f"watchdog.timeouts.{name}",
+            )
+            for name, timeout in _mapping(
+                watchdog_raw.get("timeouts", {}),
+                "watchdog.timeouts",
+            ).items()
+        },
+    )
+
+    ledger = _parse_ledger(_mapping(raw.get("ledger", {}), "ledger"), by_address, by_name)
+
+    api_raw = _mapping(raw.get("api", {}), "api")
+    api = ApiConfig(
+        enabled=_flag(api_raw.get("enabled", False), "api.enabled"),
+        host=str(api_raw.get("host", "0.0.0.0")),  # noqa: S104
+        port=_port(api_raw.get("port", 8080), "api.port"),
+        min_interval=_positive(api_raw.get("min_interval", 0.5), "api.min_interval"),
+        max_clients=_count(api_raw.get("max_clients", 50), "api.max_clients"),
+    )
+
+    log_level = str(_mapping(raw.get("logging", {}), "logging").get("level", "INFO")).upper()
+    if log_level not in {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}:
+        msg = f"logging.level: unknown level {log_level}"
+        raise ConfigError(msg)
+
+    return AppConfig(
+        devices=devices,
+        sinks=sinks,
+        batching=batching,
+        banks=banks,
+        derived=derived,
+        rules=rules,
+        polling=polling,
+        scanning=scanning,
+        workers=workers,
+        metrics=metrics,
+        profiler=profiler,
+        watchdog=watchdog,
+        ledger=ledger,
+        api=api,
+        shared_memory=_parse_shared_memory(
+            _mapping(raw.get("shared_memory", {}), "shared_memory"),
+            published,
+        ),
+        change_detection=_parse_change_detection(
+            _mapping(raw.get("change_detection", {}), "change_detection"),
+        ),
+        log_level=log_level,
+    )
+
+
+def _parse_device(raw: Any, where: str) -> DeviceConfig:  # noqa: ANN401
+    raw = _mapping(raw, where)
+
+    address = str(raw.get("address", "")).upper()
+    if not MAC_ADDRESS.match(address):
+        msg = f"{where}.address: expected a MAC address like AA:BB:CC:DD:EE:FF"
+        raise ConfigError(msg)
+
+    brand_name = str(raw.get("brand", "")).upper()
+    try:
+        brand = SupportedBrand[brand_name]
+    except KeyError:
+        supported = ", ".join(brand.name.lower() for brand in SupportedBrand)
+        msg = f"{where}.brand: expected one of {supported}"
+        raise ConfigError(msg) from None
+
+    encryption_key = None
+    if brand == SupportedBrand.VICTRON:
+        encryption_key = str(raw.get("key", "")).lower()
+        try:
+            key_length = len(bytes.fromhex(encryption_key))
+        except ValueError:
+            key_length = 0
+        if key_length != VICTRON_KEY_LENGTH:
+            msg = f"{where}.key: Victron devices need a {VICTRON_KEY_LENGTH * 2} digit hex key"
+            raise ConfigError(msg)
+
+    name = raw.get("name")
+    return DeviceConfig(
+        address=address,
+        brand=brand,
+        name=str(name) if name is not None else None,
+        encryption_key=encryption_key,
+    )
+
+
+def _parse_sink(raw: Any, where: str, published: frozenset[str]) -> SinkConfig:  # noqa: ANN401
+    raw = _mapping(raw, where)
+
+    sink_type = str(raw.get("type", ""))
+    if sink_type not in SINK_TYPES:
+        msg = f"{where}.type: expected one of {', '.join(sorted(SINK_TYPES))}"
+        raise ConfigError(msg)
+
+    fields = raw.get("fields")
+    if fields is not None:
+        fields = tuple(
+            _field(name, published, f"{where}.fields") for name in _list(fields, f"{where}.fields")
+        )
+
+    buffer = _count(raw.get("buffer", 1000), f"{where}.buffer")
+    if buffer == 0:
+        msg = f"{where}.buffer: must be at least 1"
+        raise ConfigError(msg)
+
+    return SinkConfig(
+        type=sink_type,
+        host=str(raw.get("host", "localhost")),
+        port=_port(raw.get("port", 1883), f"{where}.port"),
+        username=_optional_string(raw.get("username"), f"{where}.username"),
+        password=_optional_string(raw.get("password"), f"{where}.password"),
+        path=str(raw.get("path", "/tmp/van-assistant.sock")),  # noqa: S108
+        buffer=buffer,
+        fields=fields,
+        batch=_flag(raw.get("batch", False), f"{where}.batch"),
+    )
+
+
+def _parse_batching(raw: dict[str, Any]) -> BatchingConfig:
+    batching = BatchingConfig(
+        interval=_positive(raw.get("interval", 60.0), "batching.interval"),
+        max_rows=_count(raw.get("max_rows", 1000), "batching.max_rows"),
+    )
+    if batching.max_rows == 0:
+        msg = "batching.max_rows: must be at least 1"
+        raise ConfigError(msg)
+    return batching
+
+
+def _parse_shared_memory(raw: dict[str, Any], published: frozenset[str]) -> SharedMemoryConfig:
+    fields = raw.get("fields")
+    if fields is not None:
+        fields = tuple(str(name) for name in _list(fields, "shared_memory.fields"))
+        # A list element can be named directly, e.g. cell_voltages/0
+        for name in fields:
+            _field(name.split("/", 1)[0], published, "shared_memory.fields")
+    return SharedMemoryConfig(
+        enabled=_flag(raw.get("enabled", False), "shared_memory.enabled"),
+        path=str(raw.get("path", "/dev/shm/van-assistant")),  # noqa: S108
+        fields=fields,
+    )
+
+
+def _parse_change_detection(raw: dict[str, Any]) -> ChangeDetectionConfig:
+    return ChangeDetectionConfig(
+        enabled=_flag(raw.get("enabled", False), "change_detection.enabled"),
+        heartbeat=_non_negative(raw.get("heartbeat", 300.0), "change_detection.heartbeat"),
+        default=_parse_deadband(raw.get("default", {}), "change_detection.default"),
+        deadbands={
+            str(name): _parse_deadband(deadband, f"change_detection.deadbands.{name}")
+            for name, deadband in _mapping(
+                raw.get("deadbands", {}),
+                "change_detection.deadbands",
+            ).items()
+        },
+    )
+
+
+def _parse_deadband(raw: Any, where: str) -> DeadbandConfig:  # noqa: ANN401
+    raw = _mapping(raw, where)
+    return DeadbandConfig(
+        absolute=_non_negative(raw.get("absolute", 0.0), f"{where}.absolute"),
+        relative=_non_negative(raw.get("relative", 0.0), f"{where}.relative"),
+    )
+
+
+def _parse_bank(
+    raw: Any,  # noqa: ANN401
+    where: str,
+    by_address: dict[str, DeviceConfig],
+    by_name: dict[str, DeviceConfig],
+) -> BankConfig:
+    raw = _mapping(raw, where)
+
+    name = raw.get("name")
+    if not name:
+        msg = f"{where}.name: a bank needs a name"
+        raise ConfigError(msg)
+
+    packs = []
+    for pack in _list(raw.get("packs", []), f"{where}.packs"):
+        device = by_name.get(str(pack)) or by_address.get(str(pack).upper())
+        if device is None or device.brand != SupportedBrand.REMCO:
+            msg = f"{where}.packs: {pack} is not a configured Remco device"
+            raise ConfigError(msg)
+        packs.append(device.address)
+
+    if not packs:
+        msg = f"{where}.packs: a bank needs at least one pack"
+        raise ConfigError(msg)
+
+    return BankConfig(
+        name=str(name),
+        packs=tuple(packs),
+        stale_after=_positive(raw.get("stale_after", 30.0), f"{where}.stale_after"),
+    )
+
+
+def _parse_derived(
+    raw: Any,  # noqa: ANN401
+    where: str,
+    by_name: dict[str, DeviceConfig],
+) -> DerivedConfig:
+    raw = _mapping(raw, where)
+
+    name = raw.get("name")
+    if not name:
+        msg = f"{where}.name: a derived value needs a name"
+        raise ConfigError(msg)
+
+    expression = str(raw.get("expression", ""))
+    try:
+        references, _ = compile_expression(expression)
+    except ValueError as e:
+        msg = f"{where}.expression: {e}"
+        raise ConfigError(msg) from None
+
+    for device_name, field_name in references:
+        if device_name not in by_name:
+            msg = f"{where}.expression: {device_name} is not the name of a configured device"
+            raise ConfigError(msg)
+        _field(field_name, brand_fields(by_name[device_name].brand), f"{where}.expression")
+
+    return DerivedConfig(name=str(name), expression=expression)
+
+
+def _parse_rule(
+    raw: Any,  # noqa: ANN401
+    where: str,
+    by_address: dict[str, DeviceConfig],
+    by_name: dict[str, DeviceConfig],
+) -> RuleConfig:
+    raw = _mapping(raw, where)
+
+    name = raw.get("name")
+    if not name:
+        msg = f"{where}.name: a rule needs a name"
+        raise ConfigError(msg)
+
+    reference = str(raw.get("device", ""))
+    device = by_name.get(reference) or by_address.get(reference.upper())
+    if device is None:
+        msg = f"{where}.device: {reference} is not a configured device"
+        raise ConfigError(msg)
+
+    field_name = raw.get("field")
+    if not field_name:
+        msg = f"{where}.field: a rule needs a field"
+        raise ConfigError(msg)
+
+    conditions = [key for key in ("above", "below", "equals", "not_equals") if key in raw]
+    if len(conditions) != 1:
+        msg = f"{where}: expected exactly one of above, below, equals or not_equals"
+        raise ConfigError(msg)
+
+    thresholds = {
+        key: _number(raw[key], f"{where}.{key}") for key in ("above", "below") if key in raw
+    }
+    names = {key: str(raw[key]) for key in ("equals", "not_equals") if key in raw}
+    return RuleConfig(
+        name=str(name),
+        address=device.address,
+        field=_field(field_name, brand_fields(device.brand), f"{where}.field"),
+        **thresholds,
+        **names,
+        hysteresis=_non_negative(raw.get("hysteresis", 0.0), f"{where}.hysteresis"),
+        duration=_non_negative(raw.get("duration", 0.0), f"{where}.duration"),
+        cooldown=_non_negative(raw.get("cooldown", 0.0), f"{where}.cooldown"),
+    )
+
+
+def _parse_scanning(raw: dict[str, Any]) -> ScanningConfig:
+    passive = _flag(raw.get("passive", False), "scanning.passive")
+    adapters = tuple(
+        str(adapter) for adapter in _list(raw.get("adapters", []), "scanning.adapters")
+    )
+    if len(set(adapters)) != len(adapters):
+        msg = "scanning.adapters: adapters must be listed once"
+        raise ConfigError(msg)
+
+    duty_raw = _mapping(raw.get("duty_cycle", {}), "scanning.duty_cycle")
+    duty_cycle = DutyCycleConfig(
+        enabled=_flag(duty_raw.get("enabled", False), "scanning.duty_cycle.enabled"),
+        active=_positive(duty_raw.get("active", 10.0), "scanning.duty_cycle.active"),
+        idle=_positive(duty_raw.get("idle", 20.0), "scanning.duty_cycle.idle"),
+        adaptive=_flag(duty_raw.get("adaptive", False), "scanning.duty_cycle.adaptive"),
+        min_idle=_positive(duty_raw.get("min_idle", 5.0), "scanning.duty_cycle.min_idle"),
+        max_idle=_positive(duty_raw.get("max_idle", 300.0), "scanning.duty_cycle.max_idle"),
+        stable_change=_non_negative(
+            duty_raw.get("stable_change", 0.02),
+            "scanning.duty_cycle.stable_change",
+        ),
+    )
+    if duty_cycle.min_idle > duty_cycle.max_idle:
+        msg = "scanning.duty_cycle: min_idle cannot be above max_idle"
+        raise ConfigError(msg)
+
+    return ScanningConfig(
+        passive=passive,
+        prefilter=_flag(raw.get("prefilter", passive), "scanning.prefilter"),
+        adapters=adapters,
+        duty_cycle=duty_cycle,
+    )
+
+
+def _parse_ledger(
+    raw: dict[str, Any],
+    by_address: dict[str, DeviceConfig],
+    by_name: dict[str, DeviceConfig],
+) -> LedgerConfig:
+    counters = tuple(
+        _parse_counter(entry, f"ledger.counters[{i}]", by_address, by_name)
+        for i, entry in enumerate(_list(raw.get("counters", []), "ledger.counters"))
+    )
+    names = [counter.name for counter in counters]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        msg = f"ledger.counters: duplicate names {', '.join(duplicates)}"
+        raise ConfigError(msg)
+
+    return LedgerConfig(
+        path=str(raw.get("path", "energy.json")),
+        checkpoint_interval=_positive(
+            raw.get("checkpoint_interval", 300.0),
+            "ledger.checkpoint_interval",
+        ),
+        max_gap=_positive(raw.get("max_gap", 60.0), "ledger.max_gap"),
+        counters=counters,
+    )
+
+
+def _parse_counter(
+    raw: Any,  # noqa: ANN401
+    where: str,
+    by_address: dict[str, DeviceConfig],
+    by_name: dict[str, DeviceConfig],
+) -> CounterConfig:
+    raw = _mapping(raw, where)
+
+    name = raw.get("name")
+    if not name:
+        msg = f"{where}.name: a counter needs a name"
+        raise ConfigError(msg)
+
+    reference = str(raw.get("device", ""))
+    device = by_name.get(reference) or by_address.get(reference.upper())
+    if device is None:
+        msg = f"{where}.device: {reference} is not a configured device"
+        raise ConfigError(msg)
+
+    power, voltage, current = (raw.get(key) for key in ("power", "voltage", "current"))
+    if power is None and current is None:
+        msg = f"{where}: a counter needs a power or current field"
+        raise ConfigError(msg)
+
+    direction = raw.get("direction", "positive")
+    if direction not in {"positive", "negative"}:
+        msg = f"{where}.direction: expected positive or negative"
+        raise ConfigError(msg)
+
+    fields = brand_fields(device.brand)
+    return CounterConfig(
+        name=str(name),
+        address=device.address,
+        power=_field(power, fields, f"{where}.power") if power is not None else None,
+        voltage=_field(voltage, fields, f"{where}.voltage") if voltage is not None else None,
+        current=_field(current, fields, f"{where}.current") if current is not None else None,
+        invert=direction == "negative",
+    )
+
+
+def _mapping(raw: Any, where: str) -> dict[str, Any]:  # noqa: ANN401
+    if not isinstance(raw, dict):
+        msg = f"{where}: expected a table"
+        raise ConfigError(msg)
+    return raw
+
+
+def _list(raw: Any, where: str) -> list[Any]:  # noqa: ANN401
+    if not isinstance(raw, list):
+        msg = f"{where}: expected a list"
+        raise ConfigError(msg)
+    return raw
+
+
+def _field(raw: Any, fields: frozenset[str], where: str) -> str:  # noqa: ANN401
+    name = str(raw)
+    if name not in fields:
+        close = get_close_matches(name, fields, n=1)
+        hint = f", did you mean {close[0]}?" if close else ""
+        msg = f"{where}: {name} is not a field the devices publish{hint}"
+        raise ConfigError(msg)
+    return name
+
+
+def _device_type(raw: Any, where: str) -> str:  # noqa: ANN401
+    name = str(raw)
+    if name not in DEVICE_TYPES:
+        close = get_close_matches(name, DEVICE_TYPES, n=1)
+        hint = f", did you mean {close[0]}?" if close else ""
+        msg = f"{where}: {name} is not a device type{hint}"
+        raise ConfigError(msg)
+    return name
+
+
+def _optional_string(raw: Any, where: str) -> str | None:  # noqa: ANN401
+    if raw is not None and not isinstance(raw, str):
+        msg = f"{where}: expected a string"
+        raise ConfigError(msg)
+    return raw
+
+
+def _positive(raw: Any, where: str) -> float:  # noqa: ANN401
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)) or raw <= 0:
+        msg = f"{where}: expected a positive number"
+        raise ConfigError(msg)
+    return float(raw)
+
+
+def _non_negative(raw: Any, where: str) -> float:  # noqa: ANN401
+    value = _number(raw, where)
+    if value < 0:
+        msg = f"{where}: expected zero or a positive number"
+        raise ConfigError(msg)
+    return value
+
+
+def _number(raw: Any, where: str) -> float:  # noqa: ANN401
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+        msg = f"{where}: expected a number"
+        raise ConfigError(msg)
+    return float(raw)
+
+
+def _port(raw: Any, where: str) -> int:  # noqa: ANN401
+    if isinstance(raw, bool) or not isinstance(raw, int) or not 0 < raw < 65536:
+        msg = f"{where}: expected a port number"
+        raise ConfigError(msg)
+    return raw
+
+
+def _count(raw: Any, where: str) -> int:  # noqa: ANN401
+    if isinstance(raw, bool) or not isinstance(raw, int) or raw < 0:
+        msg = f"{where}: expected a whole number"
+        raise ConfigError(msg)
+    return raw
+
+
+def _flag(raw: Any, where: str) -> bool:  # noqa: ANN401
+    if not isinstance(raw, bool):
+        msg = f"{where}: expected true or false"
+        raise ConfigError(msg)
+    return raw
@@ -1,3 +1,5 @@
+from abc import abstractmethod
+
 from van_assistant.devices.base.device import Device
 
 
@@ -5,3 +7,24 @@ class BLEAdvertisementDevice(Device):
     """Device that only listens to BLE advertisements, no connection needed."""
 
     connectable = False
+
+    async def start(self) -> None:
+        """Start the device, advertisements are delivered by the scanner."""
+
+    async def stop(self) -> None:
+        """Stop the device, advertisements are delivered by the scanner."""
+
+    async def handle_data(self, data: bytes | bytearray) -> None:
+        """Handle incoming data from the device."""
+        self.handle_advertisement(bytes(data))
+
+    @abstractmethod
+    def handle_advertisement(self, data: bytes) -> None:
+        """Handle manufacturer data of an advertisement.
+
+        Called synchronously from the scanner's detection callback, so it must not block.
+
+        Args:
+            data: The manufacturer-specific advertisement data.
+
+        """
@@ -1,10 +1,17 @@
 from abc import abstractmethod
+from time import perf_counter_ns
+from typing import TYPE_CHECKING
 
 from bleak import BleakClient
 from bleak.backends.characteristic import BleakGATTCharacteristic
 
 from van_assistant.devices.base.device import Device
+from van_assistant.metrics import pipeline
 from van_assistant.notification_services.base import NotificationService
+from van_assistant.util.ble_backend import ClientFactory
+
+if TYPE_CHECKING:
+    from van_assistant.capture.log import CaptureWriter
 
 
 class BLEConnectableDevice(Device):
@@ -12,17 +19,25 @@ class BLEConnectableDevice(Device):
 
     connectable = True
 
-    def __init__(self, addr: str, notification_service: NotificationService) -> None:
+    def __init__(
+        self,
+        addr: str,
+        notification_service: NotificationService,
+        client_factory: ClientFactory = BleakClient,
+    ) -> None:
         """Create a BLE connectable device.
 
         Args:
             addr: Unique identifier for the device, e.g. BLE MAC address.
             notification_service: Service to publish notifications to.
+            client_factory: Callable creating the BLE client for an address, e.g. a simulator.
 
         """
         super().__init__(addr, notification_service)
-        self._client = BleakClient(self.addr)
+        self._client = client_factory(self.addr)
         self._running = False
+        # Set to record every notification received
+        self.capture: CaptureWriter | None = None
 
     async def notify_handler(
         self,
@@ -36,8 +51,19 @@ class BLEConnectableDevice(Device):
             data: The data received in the notification.
 
         """
+        stats = pipeline.active
+        if stats is not None:
+            stats.intake_ns = perf_counter_ns()
+            stats.count("in")
+
+        if self.capture is not None:
+            self.capture.notification(self.addr, data)
+
         await self.handle_data(data)
 
+        if stats is not None:
+            stats.intake_ns = 0
+
     async def start(self) -> None:
         """Establish BLE connection."""
         self._running = True
@@ -1,13 +1,33 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Mapping
+from enum import Enum
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any
 
+from van_assistant.devices.base.formula import Formula
+from van_assistant.metrics import pipeline
 from van_assistant.notification_services.base import NotificationService
 
+if TYPE_CHECKING:
+    from van_assistant.notification_services.change_filter import DeviceChanges
+
+DataListener = Callable[["Device", Mapping[str, Any]], None]
+
 
 class Device(ABC):
     """Base class for all Bluetooth devices."""
 
     connectable = False
 
+    # First level of the topics the device publishes under
+    topic_root = "device"
+
+    # Names of the fields the device publishes, for checking the configuration
+    field_names: tuple[str, ...] = ()
+
+    # Values computed from the published fields, see DerivedMetrics
+    derived: tuple[Formula, ...] = ()
+
     def __init__(
         self,
         addr: str,
@@ -25,6 +45,76 @@ class Device(ABC):
         self.addr = addr
         self.notification_service = notification_service
         self.encryption_key = encryption_key
+        self.topic_prefix = f"{self.topic_root}/{addr.replace(':', '').lower()}"
+        self._listeners: list[DataListener] = []
+        # Values last published, set by a ChangeFilter to publish changed values only
+        self.changes: DeviceChanges | None = None
+
+    def add_listener(self, listener: DataListener) -> None:
+        """Register a callback receiving every batch of data the device publishes.
+
+        Args:
+            listener: Callable taking the device and the published data.
+
+        """
+        self._listeners.append(listener)
+
+    def publish(self, key: str, value: Any, name: str | None = None) -> None:  # noqa: ANN401
+        """Publish a single value under the device's topic namespace.
+
+        Lists are published as one topic per element and enums by their name. With
+        a change filter, values that did not change meaningfully are not published.
+
+        Args:
+            key: Name of the value.
+            value: The value to publish.
+            name: Name of the field the value belongs to, the key if not given.
+
+        """
+        name = name or key
+        if isinstance(value, list):
+            for i, list_val in enumerate(value):
+                self.publish(f"{key}/{i}", list_val, name)
+        elif self.changes is not None and not self.changes.changed(key, name, value):
+            return
+        elif isinstance(value, Enum):
+            self.notification_service.publish_reading(
+                f"{self.topic_prefix}/{key}",
+                name,
+                value.name,
+            )
+        else:
+            self.notification_service.publish_reading(f"{self.topic_prefix}/{key}", name, value)
+
+    def publish_data(self, data: Mapping[str, Any]) -> None:
+        """Pass data to the listeners and publish each value.
+
+        Only the fields some sink publishes are read from the data, so a lazily
+        decoded record never decodes the others for publishing.
+
+        Args:
+            data: Mapping of value names to values.
+
+        """
+        stats = pipeline.active
+        start = perf_counter_ns() if stats is not None else 0
+        if self.changes is not None:
+            self.changes.start()
+
+        for listener in self._listeners:
+            listener(self, data)
+
+        fields = self.notification_service.reading_fields
+        for key in data if fields is None else [key for key in data if key in fields]:
+            self.publish(key, data[key])
+
+        if stats is not None:
+            end = perf_counter_ns()
+            device_type = type(self).__name__
+            stats.count("published")
+            stats.record(device_type, "publish", end - start)
+            if stats.intake_ns:
+                stats.record(device_type, "total", end - stats.intake_ns)
 
     @abstractmethod
     async def start(self) -> None:
@@ -0,0 +1,26 @@
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+
+class Formula(NamedTuple):
+    """A value derived from other fields a device publishes.
+
+    compute is called with the input values in order, and only when none of them
+    is None.
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable[..., Any]
+
+
+def power(name: str, voltage: str, current: str) -> Formula:
+    """Return a formula multiplying a voltage and a current field into watts.
+
+    Args:
+        name: Name of the derived field.
+        voltage: Name of the voltage field, in volts.
+        current: Name of the current field, in amps.
+
+    """
+    return Formula(name, (voltage, current), lambda volts, amps: round(volts * amps, 1))
@@ -1,8 +1,14 @@
 from enum import StrEnum
 
+from van_assistant.devices.base.device import Device
 from van_assistant.devices.base.identifier import DeviceIdentifier
+from van_assistant.devices.remco.devices.bms import RemcoBattery
 from van_assistant.devices.remco.identifier import RemcoDeviceIdentifier
-from van_assistant.devices.victron.identifier import VictronDeviceIdentifier
+from van_assistant.devices.victron.identifier import (
+    MODE_DEVICE_MAP,
+    MODEL_PARSER_OVERRIDE,
+    VictronDeviceIdentifier,
+)
 
 
 class SupportedBrand(StrEnum):
@@ -21,3 +27,24 @@ BRAND_TO_IDENTIFIER: dict[SupportedBrand, type[DeviceIdentifier]] = {
     SupportedBrand.VICTRON: VictronDeviceIdentifier,
     SupportedBrand.REMCO: RemcoDeviceIdentifier,
 }
+
+BRAND_TO_DEVICE_TYPES: dict[SupportedBrand, tuple[type[Device], ...]] = {
+    SupportedBrand.VICTRON: tuple(
+        dict.fromkeys((*MODE_DEVICE_MAP.values(), *MODEL_PARSER_OVERRIDE.values())),
+    ),
+    SupportedBrand.REMCO: (RemcoBattery,),
+}
+
+
+def brand_fields(brand: SupportedBrand) -> frozenset[str]:
+    """Return the names of the fields devices of a brand publish, derived values included.
+
+    Args:
+        brand: The brand of the devices.
+
+    """
+    return frozenset(
+        name
+        for device_type in BRAND_TO_DEVICE_TYPES[brand]
+        for name in (*device_type.field_names, *(formula.name for formula in device_type.derived))
+    )
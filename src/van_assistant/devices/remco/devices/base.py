@@ -2,8 +2,13 @@ import asyncio
 from abc import abstractmethod
 from itertools import cycle
 
+from bleak import BleakClient
+
 from van_assistant.devices.base.ble_connect_device import BLEConnectableDevice
 from van_assistant.notification_services.base import NotificationService
+from van_assistant.util.ble_backend import ClientFactory
+
+REMCO_MANUFACTURER_ID = 0x3461
 
 NOTIFY_UUID = "0000ff01-0000-1000-8000-00805f9b34fb"
 WRITE_UUID = "0000ff02-0000-1000-8000-00805f9b34fb"
@@ -17,15 +22,24 @@ POLL_INTERVAL = 5.0
 class RemcoDevice(BLEConnectableDevice):
     """BLE connectable device for Remco BMS units."""
 
-    def __init__(self, addr: str, notification_service: NotificationService) -> None:
+    def __init__(
+        self,
+        addr: str,
+        notification_service: NotificationService,
+        client_factory: ClientFactory = BleakClient,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
         """Create a Remco BMS device.
 
         Args:
             addr: Unique identifier for the device, e.g. BLE MAC address.
             notification_service: Service to publish notifications to.
+            client_factory: Callable creating the BLE client for an address.
+            poll_interval: Seconds between polling commands.
 
         """
-        super().__init__(addr, notification_service)
+        super().__init__(addr, notification_service, client_factory)
+        self.poll_interval = poll_interval
         self._packet_buffer: bytearray = bytearray()
 
     def get_notify_uuid(self) -> str:
@@ -43,7 +57,7 @@ class RemcoDevice(BLEConnectableDevice):
                 cmd,
                 response=False,
             )
-            await asyncio.sleep(POLL_INTERVAL)
+            await asyncio.sleep(self.poll_interval)
 
     async def handle_data(
         self,
@@ -1,6 +1,7 @@
 import struct
 from datetime import date
 
+from van_assistant.devices.base.formula import Formula, power
 from van_assistant.devices.remco.devices.base import RemcoDevice
 
 CMD_INFO = bytes.fromhex("dd a5 03 00 ff fd 77")
@@ -10,9 +11,43 @@ BATT_INFO = 0x03
 CELL_INFO = 0x04
 
 
+def _hours_to_empty(remain: float, amps: float) -> float | None:
+    return round(remain / -amps, 2) if amps < 0 else None
+
+
+def _hours_to_full(capacity: float, remain: float, amps: float) -> float | None:
+    return round((capacity - remain) / amps, 2) if amps > 0 else None
+
+
 class RemcoBattery(RemcoDevice):
     """Remco battery device."""
 
+    topic_root = "bms"
+
+    field_names = (
+        "volts",
+        "amps",
+        "remain",
+        "capacity",
+        "cycles",
+        "mdate",
+        "balance1",
+        "balance2",
+        "protect",
+        "vers",
+        "percent",
+        "fet",
+        "cells",
+        "temps",
+        "cell_voltages",
+    )
+
+    derived = (
+        power("power", "volts", "amps"),
+        Formula("hours_to_empty", ("remain", "amps"), _hours_to_empty),
+        Formula("hours_to_full", ("capacity", "remain", "amps"), _hours_to_full),
+    )
+
     def get_commands(self) -> list[bytes]:
         """Return the list of commands to poll from the device."""
         return [CMD_INFO, CMD_CELL]
@@ -88,12 +123,7 @@ class RemcoBattery(RemcoDevice):
         data_res["cells"] = cells
         data_res["temps"] = temps
 
-        for key, val in data_res.items():
-            if isinstance(val, list):
-                for i, list_val in enumerate(val):
-                    self.notification_service.publish(f"bms/{key}/{i}", list_val)
-            else:
-                self.notification_service.publish(f"bms/{key}", val)
+        self.publish_data(data_res)
 
     def decode_cells(self, packet_data: bytearray) -> None:
         """Decode the individual cell voltages from the data buffer.
@@ -111,8 +141,7 @@ class RemcoBattery(RemcoDevice):
 
         cells = [cell / 1000 for cell in cells]
 
-        for i, cell in enumerate(cells):
-            self.notification_service.publish(f"bms/cell_voltages/{i}", cell)
+        self.publish_data({"cell_voltages": cells})
 
     def parse_manufacture_date(self, mdate: int) -> str:
         """Parse the manufacture date from the raw integer value.
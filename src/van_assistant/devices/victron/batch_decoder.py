@@ -0,0 +1,253 @@
+import logging
+import math
+from array import array
+from collections.abc import Mapping, Sequence
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from Crypto.Cipher import AES
+
+from van_assistant.capture.log import RecordKind, read_capture
+from van_assistant.devices.victron.devices.base import (
+    HEADER_SIZE,
+    IV_OFFSET,
+    VICTRON_MANUFACTURER_ID,
+    VictronDevice,
+)
+from van_assistant.devices.victron.identifier import VictronDeviceIdentifier
+from van_assistant.devices.victron.record import ABSENT, Field
+from van_assistant.notification_services.batch import MISSING_CODE, ReadingBatch
+from van_assistant.scanners.replay_window import ReplayWindow, Verdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 16
+# Offset of the model ID in the advertisement header
+MODEL_ID_OFFSET = 2
+
+
+class BatchDecodeError(ValueError):
+    """Raised when payloads cannot be decoded in a batch."""
+
+
+def decode_batch(
+    device_type: type[VictronDevice],
+    encryption_key: str,
+    payloads: Sequence[bytes],
+    timestamps: Sequence[float] | None = None,
+    address: str = "",
+) -> ReadingBatch:
+    """Decrypt and decode the advertisements of one device type at once.
+
+    Meant for decoding captured advertisements after the fact. The keystream of
+    every payload is computed in a single AES call, and each bit-field is read from
+    all records with NumPy shifts and masks. The values are those parse() returns,
+    with NaN for a missing reading and for an optional field a record does not
+    carry. An enum field whose raw value is no member of its enum is missing,
+    where parse() would reject the whole record. Fields with a convert function
+    are computed per record in Python.
+
+    Args:
+        device_type: The Victron device class the payloads are from.
+        encryption_key: Hex encoded AES key of the device's Instant Readout data.
+        payloads: Manufacturer data of the advertisements.
+        timestamps: Time of each advertisement, the payload's index if not given.
+        address: Address of the device, recorded in the batch.
+
+    Returns:
+        The readings of the payloads that decrypt, with their model_id, in order.
+
+    Raises:
+        BatchDecodeError: If NumPy is not installed or the key is not valid.
+
+    """
+    if np is None:
+        msg = "Batch decoding needs the numpy package, install van-assistant[numpy]"
+        raise BatchDecodeError(msg)
+    try:
+        key = bytes.fromhex(encryption_key)
+        cipher = AES.new(key, AES.MODE_ECB)
+    except ValueError as e:
+        msg = f"Invalid encryption key: {e}"
+        raise BatchDecodeError(msg) from e
+
+    layout = device_type.record_layout
+    blocks = max(math.ceil(layout.size / BLOCK_SIZE), 1)
+    width = HEADER_SIZE + 1 + blocks * BLOCK_SIZE
+
+    lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+    frames = np.frombuffer(
+        b"".join(payload[:width].ljust(width, b"\0") for payload in payloads),
+        dtype=np.uint8,
+    ).reshape(len(payloads), width)
+
+    # Encrypted bytes after the key check byte, PKCS7 padded as decrypt() does
+    encrypted = np.maximum(lengths - HEADER_SIZE - 1, 0)
+    padded = (encrypted // BLOCK_SIZE + 1) * BLOCK_SIZE
+    valid = (lengths > HEADER_SIZE) & (frames[:, HEADER_SIZE] == key[0]) & (padded >= layout.size)
+    rows = np.flatnonzero(valid)
+    frames, encrypted, padded = frames[rows], encrypted[rows], padded[rows]
+    if len(rows) < len(payloads):
+        logger.debug(f"Skipping {len(payloads) - len(rows)} payloads that do not decrypt")
+
+    columns = np.arange(blocks * BLOCK_SIZE)
+    ciphertext = np.where(
+        columns < encrypted[:, None],
+        frames[:, HEADER_SIZE + 1 :],
+        (padded - encrypted).astype(np.uint8)[:, None],
+    ).astype(np.uint8)
+
+    # Counter blocks are the IV plus the block number, as 128-bit little endian integers
+    ivs = frames[:, IV_OFFSET].astype(np.uint64) | frames[:, IV_OFFSET + 1].astype(np.uint64) << 8
+    counters = np.zeros((len(rows), blocks, 2), dtype="<u8")
+    counters[:, :, 0] = ivs[:, None] + np.arange(blocks, dtype=np.uint64)
+    keystream = np.frombuffer(cipher.encrypt(counters.tobytes()), dtype=np.uint8)
+    words = (ciphertext ^ keystream.reshape(ciphertext.shape)).view("<u8").astype(np.uint64)
+
+    model_ids = frames[:, MODEL_ID_OFFSET] | frames[:, MODEL_ID_OFFSET + 1].astype(np.uint16) << 8
+
+    batch = ReadingBatch(device_type.__name__)
+    if timestamps is None:
+        batch.timestamps = _float_column(rows)
+    else:
+        batch.timestamps = _float_column(np.asarray(timestamps, dtype=np.float64)[rows])
+    batch.addresses = [address]
+    batch.address_index = array("H", bytes(2 * len(rows)))
+
+    raw = {name: _bit_field(words, *layout.bit_fields[name]) for name in layout.bit_fields}
+    for value_field in layout.fields.values():
+        _decode_field(batch, value_field, raw)
+    batch.columns["model_id"] = _float_column(model_ids)
+    return batch
+
+
+def _bit_field(words: Any, shift: int, mask: int, sign: int) -> Any:  # noqa: ANN401
+    # Reads a bit-field of every record, whose 64-bit words may both hold part of it
+    word, shift = divmod(shift, 64)
+    values = words[:, word] >> np.uint64(shift)
+    if shift + mask.bit_length() > 64:
+        values |= words[:, word + 1] << np.uint64(64 - shift)
+    values = (values & np.uint64(mask)).astype(np.int64)
+    if sign:
+        values = np.where(values & sign, values - (sign << 1), values)
+    return values
+
+
+def _decode_field(
+    batch: ReadingBatch,
+    value_field: Field,
+    raw: Mapping[str, Any],
+) -> None:
+    if value_field.convert is not None:
+        values = [
+            value_field.convert(*sources)
+            for sources in zip(
+                *(raw[source].tolist() for source in value_field.sources),
+                strict=True,
+            )
+        ]
+        _python_columns(batch, value_field.name, values, optional=value_field.optional)
+        return
+
+    values = raw[value_field.sources[0]]
+    if value_field.enum is not None:
+        if value_field.missing is not None:
+            values = np.where(values == value_field.missing, 0, values)
+        members = np.array([member.value for member in value_field.enum], dtype=np.int64)
+        codes = np.where(np.isin(values, members), values, MISSING_CODE)
+        batch.columns[value_field.name] = array("q", codes.astype("=i8").tobytes())
+        batch.enums[value_field.name] = value_field.enum
+        return
+
+    decoded = (values * value_field.factor + value_field.offset).astype(np.float64)
+    if value_field.divisor is not None:
+        decoded /= value_field.divisor
+    if value_field.missing is not None:
+        decoded[values == value_field.missing] = np.nan
+    batch.columns[value_field.name] = _float_column(decoded)
+
+
+# Columns of a field computed in Python, a column per element for list values
+def _python_columns(batch: ReadingBatch, name: str, values: list, *, optional: bool) -> None:
+    values = [None if value is ABSENT else value for value in values]
+    if optional and all(value is None for value in values):
+        return
+    if any(isinstance(value, list) for value in values):
+        elements = max(len(value) for value in values if isinstance(value, list))
+        for i in range(elements):
+            _python_columns(
+                batch,
+                f"{name}/{i}",
+                [
+                    value[i] if isinstance(value, list) and i < len(value) else None
+                    for value in values
+                ],
+                optional=True,
+            )
+        return
+
+    if all(
+        value is None or (isinstance(value, (int, float)) and not isinstance(value, Enum))
+        for value in values
+    ):
+        batch.columns[name] = array("d", (math.nan if value is None else value for value in values))
+    else:
+        batch.columns[name] = values
+
+
+def _float_column(values: Any) -> array:  # noqa: ANN401
+    return array("d", np.asarray(values, dtype="=f8").tobytes())
+
+
+def decode_capture(path: Path, keys: Mapping[str, str]) -> list[ReadingBatch]:
+    """Decode the Victron advertisements of a capture file, a batch per device.
+
+    Repeated and replayed payloads are skipped like the scanner skips them, by
+    each device's IV, before anything is decrypted.
+
+    Args:
+        path: The capture file.
+        keys: Hex encoded encryption key by device address, devices without one
+            are skipped.
+
+    Returns:
+        A batch of the readings of each device and device type, ordered by address.
+
+    Raises:
+        CaptureError: If the file is not a capture.
+        BatchDecodeError: If NumPy is not installed or a key is not valid.
+
+    """
+    window = ReplayWindow()
+    groups: dict[tuple[str, type[VictronDevice]], tuple[list[bytes], list[float]]] = {}
+    for record in read_capture(path):
+        if (
+            record.kind != RecordKind.ADVERTISEMENT
+            or record.manufacturer_id != VICTRON_MANUFACTURER_ID
+            or record.address not in keys
+            or len(record.payload) <= HEADER_SIZE
+        ):
+            continue
+        iv = int.from_bytes(record.payload[IV_OFFSET:HEADER_SIZE], "little")
+        if window.check(record.address, iv) != Verdict.NEW:
+            continue
+        device_type = VictronDeviceIdentifier.detect_device_type(record.payload)
+        if device_type is None:
+            continue
+        payloads, timestamps = groups.setdefault((record.address, device_type), ([], []))
+        payloads.append(record.payload)
+        timestamps.append(record.timestamp)
+
+    return [
+        decode_batch(device_type, keys[address], payloads, timestamps, address)
+        for (address, device_type), (payloads, timestamps) in sorted(
+            groups.items(),
+            key=lambda group: (group[0][0], group[0][1].__name__),
+        )
+    ]
@@ -1,6 +1,7 @@
 from van_assistant.devices.base.device_data import DeviceData
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import BitReader, ChargerError, OperationMode
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import BitField, ChargerError, OperationMode
 
 
 class VictronACChargerData(DeviceData):
@@ -52,48 +53,36 @@ class VictronACCharger(VictronDevice):
 
     data_type = VictronACChargerData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-
+    layout = (
+        BitField("charge_state", 8),
+        BitField("charger_error", 8),
+        BitField("output_voltage1", 13),
+        BitField("output_current1", 11),
+        BitField("output_voltage2", 13),
+        BitField("output_current2", 11),
+        BitField("output_voltage3", 13),
+        BitField("output_current3", 11),
+        BitField("temperature", 7),
+        BitField("ac_current", 9),
+    )
+
+    fields = (
         # Charge State:   0 - Off
         #                 3 - Bulk
         #                 4 - Absorption
         #                 5 - Float
-        charge_state = reader.read_unsigned_int(8)
-        charger_error = reader.read_unsigned_int(8)
-        output_voltage1 = reader.read_unsigned_int(
-            13,
-        )  # Output voltage reading in 0.01V increments
-        output_current1 = reader.read_unsigned_int(
-            11,
-        )  # Output current reading in 0.1A increments
-        output_voltage2 = reader.read_unsigned_int(13)
-        output_current2 = reader.read_unsigned_int(11)
-        output_voltage3 = reader.read_unsigned_int(13)
-        output_current3 = reader.read_unsigned_int(11)
-        temperature = reader.read_unsigned_int(7)  # Celsius
-        ac_current = reader.read_unsigned_int(
-            9,
-        )  # AC current reading in 0.1A increments
-
-        return {
-            "charge_state": OperationMode(charge_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "output_voltage1": (output_voltage1 / 100 if output_voltage1 != 0x1FFF else None),
-            "output_voltage2": (output_voltage2 / 100 if output_voltage2 != 0x1FFF else None),
-            "output_voltage3": (output_voltage3 / 100 if output_voltage3 != 0x1FFF else None),
-            "output_current1": (output_current1 / 10 if output_current1 != 0x7FF else None),
-            "output_current2": (output_current2 / 10 if output_current2 != 0x7FF else None),
-            "output_current3": (output_current3 / 10 if output_current3 != 0x7FF else None),
-            "temperature": ((temperature - 40) if temperature != 0x7F else None),
-            "ac_current": (ac_current / 10 if ac_current != 0x1FF else None),
-        }
+        Field("charge_state", enum=OperationMode),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
+        # Output voltage readings in 0.01V increments
+        Field("output_voltage1", missing=0x1FFF, divisor=100),
+        Field("output_voltage2", missing=0x1FFF, divisor=100),
+        Field("output_voltage3", missing=0x1FFF, divisor=100),
+        # Output current readings in 0.1A increments
+        Field("output_current1", missing=0x7FF, divisor=10),
+        Field("output_current2", missing=0x7FF, divisor=10),
+        Field("output_current3", missing=0x7FF, divisor=10),
+        # Celsius
+        Field("temperature", missing=0x7F, offset=-40),
+        # AC current reading in 0.1A increments
+        Field("ac_current", missing=0x1FF, divisor=10),
+    )
@@ -1,6 +1,6 @@
 import logging
 import struct
-from abc import abstractmethod
+from time import perf_counter_ns
 
 from Crypto.Cipher import AES
 from Crypto.Util import Counter
@@ -8,8 +8,23 @@ from Crypto.Util.Padding import pad
 
 from van_assistant.devices.base.ble_ad_device import BLEAdvertisementDevice
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.victron.record import Field, RecordLayout, VictronRecord
+from van_assistant.devices.victron.utils import BitField
+from van_assistant.metrics import pipeline
+from van_assistant.metrics.pipeline import PipelineStats
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.util.background_logging import RateLimitedLogger
 
 logger = logging.getLogger(__name__)
+# Devices advertise several times a second, so per-packet messages are rate limited
+packet_logger = RateLimitedLogger(logger)
+
+VICTRON_MANUFACTURER_ID = 0x02E1
+
+HEADER_FORMAT = "<HHBH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+# The IV, incremented by the device for every new payload, closes the header
+IV_OFFSET = struct.calcsize("<HHB")
 
 
 class VictronDevice(BLEAdvertisementDevice):
@@ -17,44 +32,167 @@ class VictronDevice(BLEAdvertisementDevice):
 
     data_type: type[DeviceData] = DeviceData
     connectable = False
+    topic_root = "victron"
+
+    # Bit-fields of the decrypted record, LSB first
+    layout: tuple[BitField, ...] = ()
+    # Values computed from the bit-fields, in publishing order
+    fields: tuple[Field, ...] = ()
+    record_layout = RecordLayout((), ())
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        """Compile the record layout of a device type once, when it is defined."""
+        super().__init_subclass__(**kwargs)
+        cls.record_layout = RecordLayout(cls.layout, cls.fields)
+        cls.field_names = (*cls.record_layout.fields, "model_id")
+
+    def __init__(
+        self,
+        addr: str,
+        notification_service: NotificationService,
+        encryption_key: str | None = None,
+    ) -> None:
+        """Create a Victron device.
+
+        Args:
+            addr: Unique identifier for the device, e.g. BLE MAC address.
+            notification_service: Service to publish notifications to.
+            encryption_key: Hex encoded AES key of the device's Instant Readout data.
+
+        """
+        super().__init__(addr, notification_service, encryption_key)
+        # Decoded once here so the packet path never parses the key
+        self._key = bytes.fromhex(encryption_key) if encryption_key else b""
+
+    def handle_advertisement(self, data: bytes) -> None:
+        """Decrypt, parse and publish an advertisement from the device."""
+        stats = pipeline.active
+        if stats is not None:
+            self._handle_timed(data, stats)
+            return
 
-    async def handle_data(self, data: bytes | bytearray) -> None:
-        """Handle incoming data from the device."""
-        if not self.encryption_key or isinstance(data, bytearray):
+        try:
+            record = self.record(data)
+        except ValueError as e:
+            packet_logger.warning(self.addr, "Skipping malformed packet from %s: %s", self.addr, e)
             return
 
-        fmt = "<HHBH"
-        size = struct.calcsize(fmt)
+        if record is None:
+            return
 
-        _, model_id, _, iv = struct.unpack_from(fmt, data)
-        encrypted_data = data[size:]
+        # The record's fields are only decoded for the log if debug logging is enabled
+        packet_logger.debug(self.addr, "%s", self.data_type(record))
 
-        encryption_key = bytes.fromhex(self.encryption_key)
+        self.publish_data(record)
 
-        if encrypted_data[0] != encryption_key[0]:
-            logger.warning(
-                f"Skipping packet with invalid encryption key prefix: {encrypted_data[0]}",
-            )
+    def _handle_timed(self, data: bytes, stats: PipelineStats) -> None:
+        """Handle an advertisement like handle_advertisement, timing each stage."""
+        device_type = type(self).__name__
+        start = perf_counter_ns()
+        if stats.intake_ns:
+            stats.record(device_type, "scan", start - stats.intake_ns)
+
+        packet = self._decrypt_packet(data)
+        decrypted = perf_counter_ns()
+        if packet is None:
+            stats.count("dropped")
+            return
+        model_id, decrypted_data = packet
+        stats.count("decrypted")
+        stats.record(device_type, "decrypt", decrypted - start)
+
+        try:
+            record = VictronRecord(self.record_layout, decrypted_data, self.addr, model_id=model_id)
+        except ValueError as e:
+            packet_logger.warning(self.addr, "Skipping malformed packet from %s: %s", self.addr, e)
+            stats.count("dropped")
             return
+        stats.count("parsed")
+        stats.record(device_type, "parse", perf_counter_ns() - decrypted)
 
-        ctr = Counter.new(128, initial_value=iv, little_endian=True)
+        packet_logger.debug(self.addr, "%s", self.data_type(record))
 
-        cipher = AES.new(
-            encryption_key,
-            AES.MODE_CTR,
-            counter=ctr,
-        )
+        self.publish_data(record)
+
+    def record(self, data: bytes) -> VictronRecord | None:
+        """Decrypt an advertisement into a record whose fields are decoded on access.
+
+        Args:
+            data: The manufacturer data of the advertisement.
+
+        Returns:
+            The record, or None if the packet cannot be decrypted.
+
+        Raises:
+            ValueError: If the decrypted record is shorter than the layout.
+
+        """
+        packet = self._decrypt_packet(data)
+        if packet is None:
+            return None
 
-        decrypted_data = cipher.decrypt(pad(encrypted_data[1:], 16))
+        model_id, decrypted_data = packet
+        return VictronRecord(self.record_layout, decrypted_data, self.addr, model_id=model_id)
 
+    def decode(self, data: bytes) -> dict | None:
+        """Decrypt and parse an advertisement.
+
+        Args:
+            data: The manufacturer data of the advertisement.
+
+        Returns:
+            The parsed data fields, or None if the packet cannot be decrypted.
+
+        """
+        packet = self._decrypt_packet(data)
+        if packet is None:
+            return None
+
+        model_id, decrypted_data = packet
         parsed_data = self.parse(decrypted_data)
         parsed_data["model_id"] = model_id
+        return parsed_data
+
+    # Model ID and decrypted record of an advertisement, None if it cannot be decrypted
+    def _decrypt_packet(self, data: bytes) -> tuple[int, bytes] | None:
+        if not self._key or len(data) <= HEADER_SIZE:
+            return None
+
+        _, model_id, _, iv = struct.unpack_from(HEADER_FORMAT, data)
+        decrypted_data = self.decrypt(data[HEADER_SIZE:], iv)
+        if decrypted_data is None:
+            return None
+        return model_id, decrypted_data
+
+    def decrypt(self, encrypted_data: bytes, iv: int) -> bytes | None:
+        """Decrypt the encrypted part of an advertisement.
+
+        Args:
+            encrypted_data: The key check byte followed by the encrypted record.
+            iv: The nonce from the advertisement header.
 
-        device_data = self.data_type(parsed_data)
+        Returns:
+            The decrypted record, or None if it was encrypted with another key.
+
+        """
+        if encrypted_data[0] != self._key[0]:
+            packet_logger.warning(
+                self.addr,
+                "Skipping packet with invalid encryption key prefix: %s",
+                encrypted_data[0],
+            )
+            return None
+
+        ctr = Counter.new(128, initial_value=iv, little_endian=True)
+
+        cipher = AES.new(
+            self._key,
+            AES.MODE_CTR,
+            counter=ctr,
+        )
 
-        logger.info(device_data)
+        return cipher.decrypt(pad(encrypted_data[1:], 16))
 
-    @abstractmethod
     def parse(self, decrypted: bytes) -> dict:
         """Parse raw data bytes into structured data.
 
@@ -65,3 +203,4 @@ class VictronDevice(BLEAdvertisementDevice):
             A dictionary containing the parsed data fields.
 
         """
+        return self.record_layout.decode(decrypted)
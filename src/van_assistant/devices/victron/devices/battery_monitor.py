@@ -1,13 +1,65 @@
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import ABSENT, Field
 from van_assistant.devices.victron.utils import (
     AlarmReason,
     AuxMode,
+    BitField,
     BitReader,
     kelvin_to_celsius,
 )
 
 
+def starter_voltage(aux: int, aux_mode: int) -> float:
+    """Return the starter battery voltage in volts, if the aux input measures it.
+
+    Args:
+        aux: Raw value of the auxillary input.
+        aux_mode: Raw aux input mode.
+
+    Returns:
+        The voltage, or ABSENT in another aux input mode.
+
+    """
+    if aux_mode != AuxMode.STARTER_VOLTAGE.value:
+        return ABSENT
+    # Starter voltage is treated as signed
+    return BitReader.to_signed_int(aux, 16) / 100
+
+
+def midpoint_voltage(aux: int, aux_mode: int) -> float:
+    """Return the midpoint voltage in volts, if the aux input measures it.
+
+    Args:
+        aux: Raw value of the auxillary input.
+        aux_mode: Raw aux input mode.
+
+    Returns:
+        The voltage, or ABSENT in another aux input mode.
+
+    """
+    if aux_mode != AuxMode.MIDPOINT_VOLTAGE.value:
+        return ABSENT
+    return aux / 100
+
+
+def aux_temperature(aux: int, aux_mode: int) -> float:
+    """Return the temperature in Celsius, if the aux input measures it.
+
+    Args:
+        aux: Raw value of the auxillary input, in 0.01 Kelvin.
+        aux_mode: Raw aux input mode.
+
+    Returns:
+        The temperature, or ABSENT in another aux input mode.
+
+    """
+    if aux_mode != AuxMode.TEMPERATURE.value:
+        return ABSENT
+    return kelvin_to_celsius(aux / 100)
+
+
 class VictronBatteryMonitorData(DeviceData):
     """Structured data class for Victron Battery Monitor data."""
 
@@ -57,52 +109,34 @@ class VictronBatteryMonitor(VictronDevice):
 
     data_type: type[DeviceData] = VictronBatteryMonitorData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
+    derived = (power("power", "voltage", "current"),)
 
-        """
-        reader = BitReader(decrypted)
+    layout = (
+        BitField("remaining_mins", 16),
+        BitField("voltage", 16, signed=True),
+        BitField("alarm", 16),
+        BitField("aux", 16),
+        BitField("aux_mode", 2),
+        BitField("current", 22, signed=True),
+        BitField("consumed_ah", 20),
+        BitField("soc", 10),
+    )
 
+    fields = (
         # Remaining time in minutes
-        remaining_mins = reader.read_unsigned_int(16)
+        Field("remaining_mins", missing=0xFFFF),
         # Voltage reading in 10mV increments
-        voltage = reader.read_signed_int(16)
-        # Alarm reason
-        alarm = reader.read_unsigned_int(16)
-        # Value of the auxillary input (millivolts or degrees)
-        aux = reader.read_unsigned_int(16)
-        aux_mode = reader.read_unsigned_int(2)
+        Field("voltage", missing=0x7FFF, divisor=100),
+        Field("alarm", enum=AlarmReason),
+        Field("aux_mode", enum=AuxMode),
         # The current in milliamps
-        current = reader.read_signed_int(22)
+        Field("current", missing=0x3FFFFF, divisor=1000),
         # Consumed Ah in 0.1Ah increments
-        consumed_ah = reader.read_unsigned_int(20)
+        Field("consumed_ah", missing=0xFFFFF, factor=-1, divisor=10),
         # The state of charge in 0.1% increments
-        soc = reader.read_unsigned_int(10)
-
-        parsed = {
-            "remaining_mins": remaining_mins if remaining_mins != 0xFFFF else None,
-            "voltage": voltage / 100 if voltage != 0x7FFF else None,
-            "alarm": AlarmReason(alarm),
-            "aux_mode": AuxMode(aux_mode),
-            "current": current / 1000 if current != 0x3FFFFF else None,
-            "consumed_ah": -consumed_ah / 10 if consumed_ah != 0xFFFFF else None,
-            "soc": soc / 10 if soc != 0x3FF else None,
-        }
-
-        if aux_mode == AuxMode.STARTER_VOLTAGE.value:
-            # Starter voltage is treated as signed
-            parsed["starter_voltage"] = BitReader.to_signed_int(aux, 16) / 100
-        elif aux_mode == AuxMode.MIDPOINT_VOLTAGE.value:
-            parsed["midpoint_voltage"] = aux / 100
-        elif aux_mode == AuxMode.TEMPERATURE.value:
-            temperature_kelvin = aux / 100
-            temperature_celsius = kelvin_to_celsius(temperature_kelvin)
-            parsed["temperature"] = temperature_celsius
-
-        return parsed
+        Field("soc", missing=0x3FF, divisor=10),
+        # The auxillary input carries one of these, depending on its mode
+        Field("starter_voltage", ("aux", "aux_mode"), convert=starter_voltage, optional=True),
+        Field("midpoint_voltage", ("aux", "aux_mode"), convert=midpoint_voltage, optional=True),
+        Field("temperature", ("aux", "aux_mode"), convert=aux_temperature, optional=True),
+    )
@@ -1,12 +1,14 @@
 from enum import Enum
 
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.devices.battery_monitor import aux_temperature, starter_voltage
+from van_assistant.devices.victron.record import ABSENT, Field
 from van_assistant.devices.victron.utils import (
     AlarmReason,
     AuxMode,
-    BitReader,
-    kelvin_to_celsius,
+    BitField,
 )
 
 
@@ -64,53 +66,39 @@ class VictronDCEnergyMeterData(DeviceData):
         return self.data.get("starter_voltage")
 
 
+# The meter reports a temperature of 0xFFFF when no sensor is connected
+def _temperature(aux: int, aux_mode: int) -> float:
+    return ABSENT if aux == 0xFFFF else aux_temperature(aux, aux_mode)
+
+
 class VictronDCEnergyMeter(VictronDevice):
     """Class representing a Victron DC Energy Meter device."""
 
     data_type = VictronDCEnergyMeterData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
+    derived = (power("power", "voltage", "current"),)
 
-        Returns:
-            A dictionary containing the parsed data fields.
+    layout = (
+        BitField("meter_type", 16, signed=True),
+        BitField("voltage", 16, signed=True),
+        BitField("alarm", 16),
+        BitField("aux", 16),
+        BitField("aux_mode", 2),
+        BitField("current", 22, signed=True),
+    )
 
-        """
-        reader = BitReader(decrypted)
-
-        meter_type = reader.read_signed_int(16)
-        # Voltage reading in 10mV increments
-        voltage = reader.read_signed_int(16)
-        # Alarm reason
-        alarm_int = reader.read_unsigned_int(16)
-        # Value of the auxillary input
-        aux = reader.read_unsigned_int(16)
+    fields = (
+        Field("meter_type", enum=MeterType),
         # The aux input mode:
         #   0 = Starter battery voltage
         #   2 = Temperature
         #   3 = Disabled
-        aux_mode = reader.read_unsigned_int(2)
+        Field("aux_mode", enum=AuxMode),
         # The current in milliamps
-        current = reader.read_signed_int(22)
-
-        parsed = {
-            "meter_type": MeterType(meter_type),
-            "aux_mode": AuxMode(aux_mode),
-            "current": current / 1000 if current != 0x3FFFFF else None,
-            "voltage": voltage / 100 if voltage != 0x7FFF else None,
-            "alarm": AlarmReason(alarm_int),
-        }
-
-        if aux_mode == AuxMode.STARTER_VOLTAGE.value:
-            # Starter voltage is treated as signed
-            parsed["starter_voltage"] = BitReader.to_signed_int(aux, 16) / 100
-
-        elif aux_mode == AuxMode.TEMPERATURE.value and aux != 0xFFFF:
-            temperature_kelvin = aux / 100
-            temperature_celsius = kelvin_to_celsius(temperature_kelvin)
-            parsed["temperature"] = temperature_celsius
-
-        return parsed
+        Field("current", missing=0x3FFFFF, divisor=1000),
+        # Voltage reading in 10mV increments
+        Field("voltage", missing=0x7FFF, divisor=100),
+        Field("alarm", enum=AlarmReason),
+        Field("starter_voltage", ("aux", "aux_mode"), convert=starter_voltage, optional=True),
+        Field("temperature", ("aux", "aux_mode"), convert=_temperature, optional=True),
+    )
@@ -1,7 +1,8 @@
 from van_assistant.devices.base.device_data import DeviceData
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import Field
 from van_assistant.devices.victron.utils import (
-    BitReader,
+    BitField,
     ChargerError,
     OffReason,
     OperationMode,
@@ -37,36 +38,25 @@ class VictronDCDCConverter(VictronDevice):
 
     data_type = VictronDCDCConverterData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
+    layout = (
+        BitField("device_state", 8),
+        BitField("charger_error", 8),
+        BitField("input_voltage", 16),
+        BitField("output_voltage", 16, signed=True),
+        BitField("off_reason", 32),
+    )
 
+    fields = (
         # Charge State:   0 - Off
         #                 3 - Bulk
         #                 4 - Absorption
         #                 5 - Float
-        device_state = reader.read_unsigned_int(8)
-        # Charger Error Code
-        charger_error = reader.read_unsigned_int(8)
+        Field("device_state", enum=OperationMode),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
         # Input voltage reading in 0.01V increments
-        input_voltage = reader.read_unsigned_int(16)
+        Field("input_voltage", missing=0xFFFF, divisor=100),
         # Output voltage in 0.01V
-        output_voltage = reader.read_signed_int(16)
+        Field("output_voltage", missing=0x7FFF, divisor=100),
         # Reason for Charger Off
-        off_reason = reader.read_unsigned_int(32)
-
-        return {
-            "device_state": OperationMode(device_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "input_voltage": input_voltage / 100 if input_voltage != 0xFFFF else None,
-            "output_voltage": (output_voltage / 100 if output_voltage != 0x7FFF else None),
-            "off_reason": OffReason(off_reason),
-        }
+        Field("off_reason", enum=OffReason),
+    )
@@ -1,6 +1,7 @@
 from van_assistant.devices.base.device_data import DeviceData
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import AlarmReason, BitReader, OperationMode
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import AlarmReason, BitField, OperationMode
 
 
 class VictronInverterData(DeviceData):
@@ -36,36 +37,25 @@ class VictronInverter(VictronDevice):
 
     data_type = VictronInverterData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
+    layout = (
+        BitField("device_state", 8),
+        BitField("alarm", 16),
+        BitField("battery_voltage", 16, signed=True),
+        BitField("ac_apparent_power", 16),
+        BitField("ac_voltage", 15),
+        BitField("ac_current", 11),
+    )
 
+    fields = (
         # Device State:   0 - Off
-        device_state = reader.read_unsigned_int(8)
-        # Alarm Reason Code
-        alarm = reader.read_unsigned_int(16)
+        Field("device_state", enum=OperationMode),
+        Field("alarm", enum=AlarmReason),
         # Input voltage reading in 0.01V increments
-        battery_voltage = reader.read_signed_int(16)
+        Field("battery_voltage", missing=0x7FFF, divisor=100),
         # Output AC power in 1VA
-        ac_apparent_power = reader.read_unsigned_int(16)
+        Field("ac_apparent_power", missing=0xFFFF),
         # Output AC voltage in 0.01V
-        ac_voltage = reader.read_unsigned_int(15)
+        Field("ac_voltage", missing=0x7FFF, divisor=100),
         # Output AC current in 0.1A
-        ac_current = reader.read_unsigned_int(11)
-
-        return {
-            "device_state": OperationMode(device_state),
-            "alarm": AlarmReason(alarm),
-            "battery_voltage": ((battery_voltage) / 100 if battery_voltage != 0x7FFF else None),
-            "ac_apparent_power": (ac_apparent_power if ac_apparent_power != 0xFFFF else None),
-            "ac_voltage": ac_voltage / 100 if ac_voltage != 0x7FFF else None,
-            "ac_current": ac_current / 10 if ac_current != 0x7FF else None,
-        }
+        Field("ac_current", missing=0x7FF, divisor=10),
+    )
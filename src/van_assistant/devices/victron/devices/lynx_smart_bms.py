@@ -1,6 +1,8 @@
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import BitReader
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import BitField
 
 
 class VictronLynxSmartBMSData(DeviceData):
@@ -48,35 +50,28 @@ class VictronLynxSmartBMS(VictronDevice):
 
     data_type = VictronLynxSmartBMSData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-        error_flags = reader.read_unsigned_int(8)
-        remaining_mins = reader.read_unsigned_int(16)
-        voltage = reader.read_signed_int(16)
-        current = reader.read_signed_int(16)
-        io_status = reader.read_unsigned_int(16)
-        alarm_flags = reader.read_unsigned_int(18)
-        soc = reader.read_unsigned_int(10)
-        consumed_ah = reader.read_unsigned_int(20)
-        temperature = reader.read_unsigned_int(7)
-
-        return {
-            "error_flags": error_flags,
-            "remaining_mins": (remaining_mins if remaining_mins != 0xFFFF else None),
-            "voltage": voltage / 100 if voltage != 0x7FFF else None,
-            "current": current / 10 if current != 0x7FFF else None,
-            "io_status": io_status,
-            "alarm_flags": alarm_flags,
-            "soc": soc / 10.0 if soc != 0x3FFF else None,
-            "consumed_ah": consumed_ah / 10 if consumed_ah != 0xFFFFF else None,
-            "battery_temperature": ((temperature - 40) if temperature != 0x7F else None),
-        }
+    derived = (power("power", "voltage", "current"),)
+
+    layout = (
+        BitField("error_flags", 8),
+        BitField("remaining_mins", 16),
+        BitField("voltage", 16, signed=True),
+        BitField("current", 16, signed=True),
+        BitField("io_status", 16),
+        BitField("alarm_flags", 18),
+        BitField("soc", 10),
+        BitField("consumed_ah", 20),
+        BitField("temperature", 7),
+    )
+
+    fields = (
+        Field("error_flags"),
+        Field("remaining_mins", missing=0xFFFF),
+        Field("voltage", missing=0x7FFF, divisor=100),
+        Field("current", missing=0x7FFF, divisor=10),
+        Field("io_status"),
+        Field("alarm_flags"),
+        Field("soc", missing=0x3FFF, divisor=10),
+        Field("consumed_ah", missing=0xFFFFF, divisor=10),
+        Field("battery_temperature", ("temperature",), missing=0x7F, offset=-40),
+    )
@@ -1,9 +1,10 @@
-import struct
 from enum import Enum
 
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import ACInState, ChargerError
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import ACInState, BitField, ChargerError
 
 
 class MultiRSOperationMode(Enum):
@@ -78,38 +79,28 @@ class VictronMultiRS(VictronDevice):
 
     data_type = VictronMultiRSData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        (
-            device_state,
-            charger_error,
-            battery_current,
-            battery_voltage_ac_in,
-            active_ac_in_power,
-            active_ac_out_power,
-            pv_power,
-            yield_today,
-        ) = struct.unpack("<bbhHhhHH", decrypted[:14])
-
-        battery_voltage = (battery_voltage_ac_in & 0x3FFF) / 100.0
-        active_ac_in = (battery_voltage_ac_in >> 14) & 0x03
-
-        return {
-            "device_state": MultiRSOperationMode(device_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "battery_current": (battery_current / 10.0 if battery_current != 0x7FFF else None),
-            "battery_voltage": battery_voltage,
-            "active_ac_in": ACInState(active_ac_in),
-            "active_ac_in_power": (active_ac_in_power if active_ac_in_power != 0x7FFF else None),
-            "active_ac_out_power": (active_ac_out_power if active_ac_out_power != 0x7FFF else None),
-            "pv_power": pv_power if pv_power != 0xFFFF else None,
-            "yield_today": yield_today / 100.0 if yield_today != 0xFFFF else None,
-        }
+    derived = (power("battery_power", "battery_voltage", "battery_current"),)
+
+    layout = (
+        BitField("device_state", 8, signed=True),
+        BitField("charger_error", 8, signed=True),
+        BitField("battery_current", 16, signed=True),
+        BitField("battery_voltage", 14),
+        BitField("active_ac_in", 2),
+        BitField("active_ac_in_power", 16, signed=True),
+        BitField("active_ac_out_power", 16, signed=True),
+        BitField("pv_power", 16),
+        BitField("yield_today", 16),
+    )
+
+    fields = (
+        Field("device_state", enum=MultiRSOperationMode),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
+        Field("battery_current", missing=0x7FFF, divisor=10),
+        Field("battery_voltage", divisor=100),
+        Field("active_ac_in", enum=ACInState),
+        Field("active_ac_in_power", missing=0x7FFF),
+        Field("active_ac_out_power", missing=0x7FFF),
+        Field("pv_power", missing=0xFFFF),
+        Field("yield_today", missing=0xFFFF, divisor=100),
+    )
@@ -1,7 +1,9 @@
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import Field
 from van_assistant.devices.victron.utils import (
-    BitReader,
+    BitField,
     ChargerError,
     OffReason,
     OperationMode,
@@ -45,45 +47,39 @@ class VictronOrionXS(VictronDevice):
 
     data_type = VictronOrionXSData
 
+    derived = (
+        power("input_power", "input_voltage", "input_current"),
+        power("output_power", "output_voltage", "output_current"),
+    )
+
+    layout = (
+        BitField("device_state", 8),
+        BitField("charger_error", 8),
+        BitField("output_voltage", 16),
+        BitField("output_current", 16),
+        BitField("input_voltage", 16),
+        BitField("input_current", 16),
+        BitField("off_reason", 32),
+    )
+
     # Based on reverse engineering by Fabian Schmidt.
     # The record format has not been documented by Victron as of when this was implemented.
     # See https://github.com/Fabian-Schmidt/esphome-victron_ble/pull/54
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-
+    fields = (
         # Charge State:   0 - Off
         #                 3 - Bulk
         #                 4 - Absorption
         #                 5 - Float
-        device_state = reader.read_unsigned_int(8)
-        # Charger Error Code
-        charger_error = reader.read_unsigned_int(8)
+        Field("device_state", enum=OperationMode),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
         # Output voltage in 0.01V
-        output_voltage = reader.read_unsigned_int(16)
+        Field("output_voltage", missing=0xFFFF, divisor=100),
         # Output current in 0.1A
-        output_current = reader.read_unsigned_int(16)
+        Field("output_current", missing=0xFFFF, divisor=10),
         # Input voltage reading in 0.01V increments
-        input_voltage = reader.read_unsigned_int(16)
+        Field("input_voltage", missing=0xFFFF, divisor=100),
         # Input current in 0.1A
-        input_current = reader.read_unsigned_int(16)
+        Field("input_current", missing=0xFFFF, divisor=10),
         # Reason for Charger Off
-        off_reason = reader.read_unsigned_int(32)
-
-        return {
-            "device_state": OperationMode(device_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "output_voltage": (output_voltage / 100 if output_voltage != 0xFFFF else None),
-            "output_current": output_current / 10 if output_current != 0xFFFF else None,
-            "input_voltage": input_voltage / 100 if input_voltage != 0xFFFF else None,
-            "input_current": input_current / 10 if input_current != 0xFFFF else None,
-            "off_reason": OffReason(off_reason),
-        }
+        Field("off_reason", enum=OffReason),
+    )
@@ -2,9 +2,10 @@ from enum import Enum
 
 from van_assistant.devices.base.device_data import DeviceData
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import Field
 from van_assistant.devices.victron.utils import (
     AlarmReason,
-    BitReader,
+    BitField,
     ChargerError,
     OffReason,
     OperationMode,
@@ -61,34 +62,24 @@ class VictronSmartBatteryProtect(VictronDevice):
 
     data_type = VictronSmartBatteryProtectData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-
-        device_state = reader.read_unsigned_int(8)
-        output_state = reader.read_unsigned_int(8)
-        charger_error = reader.read_unsigned_int(8)
-        alarm_reason = reader.read_unsigned_int(16)
-        warning_reason = reader.read_unsigned_int(16)
-        input_voltage = reader.read_signed_int(16)
-        output_voltage = reader.read_unsigned_int(16)
-        off_reason = reader.read_unsigned_int(32)
-
-        return {
-            "device_state": OperationMode(device_state),
-            "output_state": OutputState(output_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "alarm_reason": AlarmReason(alarm_reason),
-            "warning_reason": AlarmReason(warning_reason),
-            "input_voltage": (input_voltage / 100 if input_voltage != 0x7FFF else None),
-            "output_voltage": (output_voltage / 100 if output_voltage != 0xFFFF else None),
-            "off_reason": OffReason(off_reason),
-        }
+    layout = (
+        BitField("device_state", 8),
+        BitField("output_state", 8),
+        BitField("charger_error", 8),
+        BitField("alarm_reason", 16),
+        BitField("warning_reason", 16),
+        BitField("input_voltage", 16, signed=True),
+        BitField("output_voltage", 16),
+        BitField("off_reason", 32),
+    )
+
+    fields = (
+        Field("device_state", enum=OperationMode),
+        Field("output_state", enum=OutputState),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
+        Field("alarm_reason", enum=AlarmReason),
+        Field("warning_reason", enum=AlarmReason),
+        Field("input_voltage", missing=0x7FFF, divisor=100),
+        Field("output_voltage", missing=0xFFFF, divisor=100),
+        Field("off_reason", enum=OffReason),
+    )
@@ -2,7 +2,8 @@ from enum import Enum
 
 from van_assistant.devices.base.device_data import DeviceData
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import BitReader
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import BitField
 
 
 class BalancerStatus(Enum):
@@ -14,6 +15,10 @@ class BalancerStatus(Enum):
     IMBALANCE = 3
 
 
+# Bit-fields of the cell voltages, in cell order
+CELL_VOLTAGES = tuple(f"cell_voltage_{i}" for i in range(8))
+
+
 class VictronSmartLithiumData(DeviceData):
     """Structured data class for Victron Smart Lithium data."""
 
@@ -42,41 +47,6 @@ class VictronSmartLithiumData(DeviceData):
         return self.data.get("balancer_status")
 
 
-class VictronSmartLithium(VictronDevice):
-    """Class representing a Victron Smart Lithium device."""
-
-    data_type = VictronSmartLithiumData
-
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-        bms_flags = reader.read_unsigned_int(32)
-        error_flags = reader.read_unsigned_int(16)
-        cell_voltages = [reader.read_unsigned_int(7) for _ in range(8)]
-        battery_voltage = reader.read_unsigned_int(12)
-        balancer_status = reader.read_unsigned_int(4)
-        battery_temperature = reader.read_unsigned_int(7)
-
-        return {
-            "bms_flags": bms_flags,
-            "error_flags": error_flags,
-            "cell_voltages": [parse_cell_voltage(v) for v in cell_voltages],
-            "battery_voltage": (battery_voltage / 100.0 if battery_voltage != 0x0FFF else None),
-            "balancer_status": BalancerStatus(0 if balancer_status == 0xF else balancer_status),
-            "battery_temperature": (
-                (battery_temperature - 40) if battery_temperature != 0x7F else None
-            ),  # Celsius
-        }
-
-
 def parse_cell_voltage(payload: int) -> float | None:
     """Parse a cell voltage payload into a voltage in volts.
 
@@ -91,3 +61,48 @@ def parse_cell_voltage(payload: int) -> float | None:
         payload,
         (260 + payload) / 100.0,
     )
+
+
+def parse_cell_voltages(*payloads: int) -> list[float | None]:
+    """Parse the cell voltage payloads of every cell.
+
+    Args:
+        *payloads: The raw cell voltage payloads, in cell order.
+
+    Returns:
+        The cell voltages in volts, see parse_cell_voltage.
+
+    """
+    return [parse_cell_voltage(payload) for payload in payloads]
+
+
+class VictronSmartLithium(VictronDevice):
+    """Class representing a Victron Smart Lithium device."""
+
+    data_type = VictronSmartLithiumData
+
+    layout = (
+        BitField("bms_flags", 32),
+        BitField("error_flags", 16),
+        BitField("cell_voltage_0", 7),
+        BitField("cell_voltage_1", 7),
+        BitField("cell_voltage_2", 7),
+        BitField("cell_voltage_3", 7),
+        BitField("cell_voltage_4", 7),
+        BitField("cell_voltage_5", 7),
+        BitField("cell_voltage_6", 7),
+        BitField("cell_voltage_7", 7),
+        BitField("battery_voltage", 12),
+        BitField("balancer_status", 4),
+        BitField("battery_temperature", 7),
+    )
+
+    fields = (
+        Field("bms_flags"),
+        Field("error_flags"),
+        Field("cell_voltages", CELL_VOLTAGES, convert=parse_cell_voltages),
+        Field("battery_voltage", missing=0x0FFF, divisor=100),
+        Field("balancer_status", missing=0xF, enum=BalancerStatus),
+        # Celsius
+        Field("battery_temperature", missing=0x7F, offset=-40),
+    )
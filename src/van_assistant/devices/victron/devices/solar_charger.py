@@ -1,6 +1,8 @@
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
-from van_assistant.devices.victron.utils import BitReader, ChargerError, OperationMode
+from van_assistant.devices.victron.record import Field
+from van_assistant.devices.victron.utils import BitField, ChargerError, OperationMode
 
 
 class VictronSolarChargerData(DeviceData):
@@ -40,45 +42,33 @@ class VictronSolarCharger(VictronDevice):
 
     data_type = VictronSolarChargerData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
+    derived = (power("battery_power", "battery_voltage", "battery_charging_current"),)
 
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
+    layout = (
+        BitField("charge_state", 8),
+        BitField("charger_error", 8),
+        BitField("battery_voltage", 16, signed=True),
+        BitField("battery_charging_current", 16, signed=True),
+        BitField("yield_today", 16),
+        BitField("solar_power", 16),
+        BitField("external_device_load", 9),
+    )
 
+    fields = (
         # Charge State:   0 - Off
         #                 3 - Bulk
         #                 4 - Absorption
         #                 5 - Float
-        charge_state = reader.read_unsigned_int(8)
-        charger_error = reader.read_unsigned_int(8)
+        Field("charge_state", enum=OperationMode),
+        Field("charger_error", missing=0xFF, enum=ChargerError),
         # Battery voltage reading in 0.01V increments
-        battery_voltage = reader.read_signed_int(16)
+        Field("battery_voltage", missing=0x7FFF, divisor=100),
         # Battery charging Current reading in 0.1A increments
-        battery_charging_current = reader.read_signed_int(16)
+        Field("battery_charging_current", missing=0x7FFF, divisor=10),
         # Todays solar power yield in 10Wh increments
-        yield_today = reader.read_unsigned_int(16)
+        Field("yield_today", missing=0xFFFF, factor=10),
         # Current power from solar in 1W increments
-        solar_power = reader.read_unsigned_int(16)
+        Field("solar_power", missing=0xFFFF),
         # External device load in 0.1A increments
-        external_device_load = reader.read_unsigned_int(9)
-
-        return {
-            "charge_state": OperationMode(charge_state),
-            "charger_error": ChargerError(0 if charger_error == 0xFF else charger_error),
-            "battery_voltage": (battery_voltage / 100 if battery_voltage != 0x7FFF else None),
-            "battery_charging_current": (
-                battery_charging_current / 10 if battery_charging_current != 0x7FFF else None
-            ),
-            "yield_today": yield_today * 10 if yield_today != 0xFFFF else None,
-            "solar_power": solar_power if solar_power != 0xFFFF else None,
-            "external_device_load": (
-                external_device_load / 10 if external_device_load != 0x1FF else None
-            ),
-        }
+        Field("external_device_load", missing=0x1FF, divisor=10),
+    )
@@ -1,10 +1,12 @@
 from enum import Enum
 
 from van_assistant.devices.base.device_data import DeviceData
+from van_assistant.devices.base.formula import power
 from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.record import Field
 from van_assistant.devices.victron.utils import (
     ACInState,
-    BitReader,
+    BitField,
     OperationMode,
 )
 
@@ -67,51 +69,38 @@ class VictronVEBus(VictronDevice):
 
     data_type = VictronVEBusData
 
-    def parse(self, decrypted: bytes) -> dict:
-        """Parse raw data bytes into structured data.
-
-        Args:
-            decrypted: The decrypted bytes from the BLE advertisement.
-
-        Returns:
-            A dictionary containing the parsed data fields.
-
-        """
-        reader = BitReader(decrypted)
-
-        # Device state
-        device_state = reader.read_unsigned_int(8)
+    derived = (power("battery_power", "battery_voltage", "battery_current"),)
+
+    layout = (
+        BitField("device_state", 8),
+        BitField("error", 8),
+        BitField("battery_current", 16, signed=True),
+        BitField("battery_voltage", 14),
+        BitField("ac_in_state", 2),
+        BitField("ac_in_power", 19, signed=True),
+        BitField("ac_out_power", 19, signed=True),
+        BitField("alarm", 2),
+        BitField("battery_temperature", 7),
+        BitField("soc", 7),
+    )
+
+    fields = (
+        Field("device_state", enum=OperationMode),
         # VE.Bus error (docs do not explain how to interpret)
-        error = reader.read_unsigned_int(8)
+        Field("error", missing=0xFF),
+        # Battery voltage reading in 0.01V increments
+        Field("battery_voltage", missing=0x3FFF, divisor=100),
         # Battery charging Current reading in 0.1A increments
-        battery_current = reader.read_signed_int(16)
-        # Battery voltage reading in 0.01V increments (14 bits)
-        # Active AC in state (enum) (2 bits)
-        battery_voltage = reader.read_unsigned_int(14)
+        Field("battery_current", missing=0x7FFF, divisor=10),
         # AC input active
-        ac_in_state = reader.read_unsigned_int(2)
-        # Active AC in power in 1W increments (19 bits, signed)
-        ac_in_power = reader.read_signed_int(19)
-        # AC out power in 1W increments (19 bits, signed)
-        ac_out_power = reader.read_signed_int(19)
-        # Alarm (enum but docs say "to be defined") (2 bits)
-        alarm = reader.read_unsigned_int(2)
-        # Battery temperature in 1 degree celcius increments (7 bits)
-        battery_temperature = reader.read_unsigned_int(7)
-        # Battery state of charge in 1% increments (7 bits)
-        soc = reader.read_unsigned_int(7)
-
-        return {
-            "device_state": OperationMode(device_state),
-            "error": error if error != 0xFF else None,
-            "battery_voltage": (battery_voltage / 100 if battery_voltage != 0x3FFF else None),
-            "battery_current": (battery_current / 10 if battery_current != 0x7FFF else None),
-            "ac_in_state": ACInState(ac_in_state),
-            "ac_in_power": ac_in_power if ac_in_power != 0x3FFFF else None,
-            "ac_out_power": ac_out_power if ac_out_power != 0x3FFFF else None,
-            "alarm": AlarmNotification(alarm),
-            "battery_temperature": (
-                battery_temperature - 40 if battery_temperature != 0x7F else None
-            ),
-            "soc": soc if soc != 0x7F else None,
-        }
+        Field("ac_in_state", enum=ACInState),
+        # Active AC in and AC out power in 1W increments
+        Field("ac_in_power", missing=0x3FFFF),
+        Field("ac_out_power", missing=0x3FFFF),
+        # Alarm (enum but docs say "to be defined")
+        Field("alarm", enum=AlarmNotification),
+        # Battery temperature in 1 degree celcius increments
+        Field("battery_temperature", missing=0x7F, offset=-40),
+        # Battery state of charge in 1% increments
+        Field("soc", missing=0x7F),
+    )
@@ -61,7 +61,7 @@ class VictronDeviceIdentifier(DeviceIdentifier):
         """
         try:
             model_id, mode = struct.unpack_from("<HB", data, 2)
-        except IndexError:
+        except struct.error:
             return None
 
         # Model ID override takes priority
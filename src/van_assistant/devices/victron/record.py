@@ -0,0 +1,246 @@
+import logging
+from collections.abc import Callable, Iterator, Mapping
+from enum import Enum
+from typing import Any, NamedTuple
+
+from van_assistant.devices.victron.utils import BitField
+from van_assistant.util.background_logging import RateLimitedLogger
+
+logger = logging.getLogger(__name__)
+packet_logger = RateLimitedLogger(logger)
+
+
+class _Absent:
+    def __repr__(self) -> str:
+        return "ABSENT"
+
+
+# Returned by a field's convert function when the record does not carry the field
+ABSENT: Any = _Absent()
+
+
+class Field(NamedTuple):
+    """A value of a Victron record, computed from bit-fields of its layout.
+
+    The value is (raw * factor + offset) / divisor, without the division if no
+    divisor is given, or None if the raw value is the missing one. Enum fields are
+    the member of the raw value instead, the member with value 0 for the missing one.
+    A convert function replaces both, called with the raw value of every source,
+    and returns ABSENT for a record that does not carry the field if it is optional.
+    """
+
+    name: str
+    # Bit-fields the value is computed from, the one of the same name if empty
+    sources: tuple[str, ...] = ()
+    missing: int | None = None
+    factor: int = 1
+    offset: int = 0
+    divisor: float | None = None
+    enum: type[Enum] | None = None
+    convert: Callable[..., Any] | None = None
+    optional: bool = False
+
+
+class RecordLayout:
+    """Offsets and masks of a record's bit-fields, computed once per device type."""
+
+    def __init__(self, layout: tuple[BitField, ...], fields: tuple[Field, ...]) -> None:
+        """Compile a layout.
+
+        Args:
+            layout: Bit-fields of the record, LSB first.
+            fields: Values of the record, in publishing order.
+
+        Raises:
+            ValueError: If a field reads a bit-field the layout does not have.
+
+        """
+        # Shift, mask and sign bit of each bit-field in the record read as one integer
+        self.bit_fields: dict[str, tuple[int, int, int]] = {}
+        offset = 0
+        for bit_field in layout:
+            sign = 1 << (bit_field.bits - 1) if bit_field.signed else 0
+            self.bit_fields[bit_field.name] = (offset, (1 << bit_field.bits) - 1, sign)
+            offset += bit_field.bits
+        self.size = (offset + 7) // 8
+
+        self.fields: dict[str, Field] = {}
+        for value_field in fields:
+            sources = value_field.sources or (value_field.name,)
+            for source in sources:
+                if source not in self.bit_fields:
+                    msg = f"Field {value_field.name} reads unknown bit-field {source}"
+                    raise ValueError(msg)
+            self.fields[value_field.name] = value_field._replace(sources=sources)
+        # Fields that may be absent, decoded to tell whether the record has them
+        self.optional = frozenset(
+            value_field.name for value_field in fields if value_field.optional
+        )
+
+    def raw(self, record: int, name: str) -> int:
+        """Return the raw value of a bit-field.
+
+        Args:
+            record: The record read as one little endian integer.
+            name: Name of the bit-field.
+
+        """
+        shift, mask, sign = self.bit_fields[name]
+        value = (record >> shift) & mask
+        return value - (sign << 1) if value & sign else value
+
+    def value(self, record: int, name: str) -> Any:  # noqa: ANN401
+        """Return the value of a field, ABSENT if the record does not carry it.
+
+        Args:
+            record: The record read as one little endian integer.
+            name: Name of the field.
+
+        Raises:
+            KeyError: If the record has no such field.
+            ValueError: If the raw value is no member of the field's enum.
+
+        """
+        value_field = self.fields[name]
+        if value_field.convert is not None:
+            return value_field.convert(
+                *(self.raw(record, source) for source in value_field.sources),
+            )
+
+        raw = self.raw(record, value_field.sources[0])
+        if value_field.enum is not None:
+            return value_field.enum(0 if raw == value_field.missing else raw)
+        if raw == value_field.missing:
+            return None
+        value = raw * value_field.factor + value_field.offset
+        return value / value_field.divisor if value_field.divisor is not None else value
+
+    def decode(self, decrypted: bytes) -> dict[str, Any]:
+        """Decode every field of a record.
+
+        Args:
+            decrypted: The decrypted record.
+
+        Raises:
+            ValueError: If the record is shorter than the layout or a raw value is
+                no member of its field's enum.
+
+        """
+        record = self.read(decrypted)
+        parsed = {}
+        for name in self.fields:
+            value = self.value(record, name)
+            if value is not ABSENT:
+                parsed[name] = value
+        return parsed
+
+    def read(self, decrypted: bytes) -> int:
+        """Return a record read as one little endian integer.
+
+        Args:
+            decrypted: The decrypted record.
+
+        Raises:
+            ValueError: If the record is shorter than the layout.
+
+        """
+        if len(decrypted) < self.size:
+            msg = f"Record of {len(decrypted)} bytes is shorter than its {self.size} byte layout"
+            raise ValueError(msg)
+        return int.from_bytes(decrypted[: self.size], "little")
+
+
+class VictronRecord(Mapping[str, Any]):
+    """Read-only view of a decrypted record, decoding each field on first access.
+
+    Fields are read as items or attributes and cached, so a consumer that only
+    looks at the state of charge never converts the other fields or builds their
+    enums. A field whose raw value does not decode is None, as a missing reading.
+    """
+
+    __slots__ = ("_address", "_extra", "_layout", "_record", "_values")
+
+    def __init__(
+        self,
+        layout: RecordLayout,
+        decrypted: bytes,
+        address: str,
+        **extra: Any,  # noqa: ANN401
+    ) -> None:
+        """Create a view over a record.
+
+        Args:
+            layout: The compiled layout of the record.
+            decrypted: The decrypted record.
+            address: Address of the device that sent the record, for log messages.
+            **extra: Values carried next to the record's fields, e.g. model_id.
+
+        Raises:
+            ValueError: If the record is shorter than the layout.
+
+        """
+        self._layout = layout
+        self._record = layout.read(decrypted)
+        self._address = address
+        self._extra = extra
+        self._values: dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:  # noqa: ANN401
+        """Return a field, decoding it on first access.
+
+        Raises:
+            KeyError: If the record has no such field.
+
+        """
+        try:
+            value = self._values[name]
+        except KeyError:
+            if name in self._extra:
+                return self._extra[name]
+            value = self._values[name] = self._decode(name)
+        if value is ABSENT:
+            raise KeyError(name)
+        return value
+
+    def _decode(self, name: str) -> Any:  # noqa: ANN401
+        try:
+            return self._layout.value(self._record, name)
+        except ValueError as e:
+            packet_logger.warning(
+                (self._address, name),
+                "Cannot decode field %s from %s: %s",
+                name,
+                self._address,
+                e,
+            )
+            return None
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Return a field as an attribute.
+
+        Raises:
+            AttributeError: If the record has no such field.
+
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the fields the record carries."""
+        optional = self._layout.optional
+        for name in self._layout.fields:
+            if name not in optional or name in self:
+                yield name
+        yield from self._extra
+
+    def __len__(self) -> int:
+        """Return the number of fields the record carries."""
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        """Return the fields of the record, decoding all of them."""
+        return f"{type(self).__name__}({dict(self)!r})"
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import NamedTuple
 
 
 def kelvin_to_celsius(temp_in_kelvin: float) -> float:
@@ -82,6 +83,49 @@ class BitReader:
         return value - (1 << num_bits) if value & (1 << (num_bits - 1)) else value
 
 
+class BitField(NamedTuple):
+    """A single bit-field in a Victron record layout."""
+
+    name: str
+    bits: int
+    signed: bool = False
+
+
+# Writes bit-field structures in the same LSB to MSB order that BitReader reads them.
+class BitWriter:
+    """Utility class for packing bit-field structures into a byte buffer."""
+
+    def __init__(self) -> None:
+        """Initialize an empty BitWriter."""
+        self._value = 0
+        self._index = 0
+
+    def write_unsigned_int(self, value: int, num_bits: int) -> None:
+        """Write an unsigned integer of the specified bit length.
+
+        Args:
+            value: The value to write, truncated to num_bits.
+            num_bits: The number of bits to write.
+
+        """
+        self._value |= (value & ((1 << num_bits) - 1)) << self._index
+        self._index += num_bits
+
+    def write_signed_int(self, value: int, num_bits: int) -> None:
+        """Write a signed integer of the specified bit length in two's complement.
+
+        Args:
+            value: The value to write.
+            num_bits: The number of bits to write.
+
+        """
+        self.write_unsigned_int(value, num_bits)
+
+    def to_bytes(self) -> bytes:
+        """Return the packed bytes, padded to a whole number of bytes."""
+        return self._value.to_bytes((self._index + 7) // 8, "little")
+
+
 class AuxMode(Enum):
     """Enum of auxiliary input modes."""
 
@@ -1,22 +1,174 @@
+import argparse
 import asyncio
+from pathlib import Path
 
-from van_assistant.devices.remco.devices.bms import RemcoBattery
-from van_assistant.notification_services.logging_service import LoggingService
+from van_assistant.capture.log import CaptureError, CaptureWriter
+from van_assistant.config import AppConfig, ConfigError, load_config
+from van_assistant.util.background_logging import start_background_logging
 
+DEFAULT_CONFIG = Path("van.toml")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
 
-async def test_bms() -> None:
-    address = "A5:C2:37:63:34:61"
-    not_ser = LoggingService()
-    device = RemcoBattery(address, not_ser)
 
-    device_task = asyncio.create_task(device.start())
-    await asyncio.sleep(30)
-    await device.stop()
-    await device_task
+def _setup_logging(config: AppConfig) -> None:
+    # Records are written on a background thread, away from the event loop
+    start_background_logging(config.log_level, LOG_FORMAT)
+
+
+def run(config: AppConfig, capture: CaptureWriter | None = None) -> None:
+    """Run the gateway until SIGTERM or SIGINT.
+
+    Args:
+        config: The validated configuration.
+        capture: Capture file recording the raw advertisements and notifications.
+
+    """
+    # Imported here so `van check` works without touching bluetooth
+    from van_assistant.runtime import Runtime  # noqa: PLC0415
+
+    _setup_logging(config)
+    try:
+        asyncio.run(Runtime(config, capture=capture).run())
+    finally:
+        if capture is not None:
+            capture.close()
+
+
+def replay(config: AppConfig, path: Path, speed: float) -> None:
+    """Feed a capture file through the gateway, stopping once it has been replayed.
+
+    Args:
+        config: The validated configuration.
+        path: Path of the capture file.
+        speed: Playback speed, zero replays as fast as possible.
+
+    """
+    from van_assistant.capture.replay import CaptureReplay  # noqa: PLC0415
+    from van_assistant.runtime import Runtime  # noqa: PLC0415
+
+    _setup_logging(config)
+    capture_replay = CaptureReplay(path, speed)
+    runtime = Runtime(
+        config,
+        scanner_factory=capture_replay.scanner_factory,
+        client_factory=capture_replay.client_factory,
+    )
+
+    async def replay_then_stop() -> None:
+        try:
+            await capture_replay.run()
+        finally:
+            runtime.stop()
+
+    async def main() -> None:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(runtime.run())
+            tg.create_task(replay_then_stop())
+
+    asyncio.run(main())
+
+
+def doctor(config: AppConfig, duration: float) -> str:
+    """Run the gateway for a while and report the reception of each Victron device.
+
+    Args:
+        config: The validated configuration.
+        duration: Seconds to listen for.
+
+    Returns:
+        The report, one line per device with the worst reception first, followed by
+        the throughput of each adapter when scanning on several.
+
+    """
+    from van_assistant.metrics.reception import format_report  # noqa: PLC0415
+    from van_assistant.runtime import Runtime  # noqa: PLC0415
+    from van_assistant.scanners.adapters import format_adapter_report  # noqa: PLC0415
+
+    _setup_logging(config)
+    runtime = Runtime(config)
+
+    async def main() -> None:
+        asyncio.get_running_loop().call_later(duration, runtime.stop)
+        await runtime.run()
+
+    asyncio.run(main())
+    names = {device.address: device.name for device in config.devices if device.name}
+    report = format_report(runtime.reception, names)
+    if runtime.adapters is not None:
+        report += "\n\n" + format_adapter_report(runtime.adapters)
+    return report
 
 
 def main() -> None:
-    asyncio.run(test_bms())
+    """Entry point of the `van` command."""
+    parser = argparse.ArgumentParser(prog="van", description="Van device gateway.")
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        default=DEFAULT_CONFIG,
+        help=f"TOML or YAML configuration file (default: {DEFAULT_CONFIG})",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="run the gateway (default)")
+    run_parser.add_argument(
+        "--capture",
+        type=Path,
+        help="record raw advertisements and notifications to this file",
+    )
+    run_parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="zstd compress the capture file",
+    )
+    subparsers.add_parser("check", help="validate the configuration and exit")
+    doctor_parser = subparsers.add_parser(
+        "doctor",
+        help="listen for a while and report packet loss and RSSI per device",
+    )
+    doctor_parser.add_argument(
+        "--duration",
+        type=float,
+        default=60.0,
+        help="seconds to listen for (default: 60)",
+    )
+    replay_parser = subparsers.add_parser("replay", help="feed a capture file through the gateway")
+    replay_parser.add_argument("capture", type=Path, help="capture file to replay")
+    replay_parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="playback speed, 0 replays as fast as possible (default: 1)",
+    )
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        parser.exit(2, f"van: {e}\n")
+
+    if args.command == "check":
+        parser.exit(0, f"{args.config}: {len(config.devices)} devices, {len(config.sinks)} sinks\n")
+
+    if args.command == "doctor":
+        if args.duration <= 0:
+            parser.exit(2, "van: --duration must be positive\n")
+        parser.exit(0, doctor(config, args.duration) + "\n")
+
+    if args.command == "replay":
+        if args.speed < 0:
+            parser.exit(2, "van: --speed cannot be negative\n")
+        replay(config, args.capture, args.speed)
+        return
+
+    capture = None
+    if getattr(args, "capture", None) is not None:
+        try:
+            capture = CaptureWriter(args.capture, compress=args.compress)
+        except (CaptureError, OSError) as e:
+            parser.exit(2, f"van: {e}\n")
+
+    run(config, capture)
 
 
 if __name__ == "__main__":
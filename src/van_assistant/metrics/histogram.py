@@ -0,0 +1,96 @@
+# Sub-buckets per power of two, bounding the relative error of a recorded value to 1/32
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values above this are clamped, about 18 minutes in nanoseconds
+MAX_VALUE = (1 << 40) - 1
+
+
+def _index(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return value
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    return (exponent - 1) * SUB_BUCKETS + (value >> (exponent - 1))
+
+
+def _highest_equivalent(index: int) -> int:
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return ((index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of non-negative integer values, e.g. nanoseconds.
+
+    Like an HDR histogram, values below 32 are counted exactly and larger values
+    land in one of 32 buckets per power of two, so recording is a couple of integer
+    operations and percentiles are accurate to about 3% at any magnitude.
+    """
+
+    __slots__ = ("_counts", "count", "max", "min", "total")
+
+    def __init__(self) -> None:
+        """Create an empty histogram."""
+        self._counts: list[int] = []
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """Add a value to the histogram.
+
+        Args:
+            value: The value, clamped to the range the histogram covers.
+
+        """
+        value = min(max(value, 0), MAX_VALUE)
+        index = _index(value)
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+
+        if not self.count or value < self.min:
+            self.min = value
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def mean(self) -> float:
+        """Return the mean of the recorded values."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """Return the value below which a percentage of the recorded values fall.
+
+        Args:
+            percentile: Percentage between 0 and 100.
+
+        Returns:
+            The highest value equivalent to the bucket holding the percentile.
+
+        """
+        if not self.count:
+            return 0
+
+        target = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen >= target:
+                return min(_highest_equivalent(index), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Return the count and common statistics of the recorded values."""
+        return {
+            "count": self.count,
+            "min": self.min,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max,
+        }
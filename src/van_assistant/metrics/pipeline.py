@@ -0,0 +1,105 @@
+import logging
+from typing import Any
+
+from van_assistant.metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Advertisements rejected by the prefilter, and packets received, dropped as
+# duplicates, decrypted, parsed, published and dropped because they could not be decoded
+COUNTERS = ("rejected", "in", "deduped", "stale", "decrypted", "parsed", "published", "dropped")
+
+# Pipeline stages timed per device type. scan is intake to the device, total is
+# intake to published.
+STAGES = ("scan", "decrypt", "parse", "publish", "total")
+
+
+class PipelineStats:
+    """Packet counters and per stage latency histograms of the packet pipeline."""
+
+    def __init__(self) -> None:
+        """Create empty statistics."""
+        self.counters: dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        # perf_counter_ns() of the packet being processed. Packets are handled
+        # synchronously from intake to publish, so one slot is enough.
+        self.intake_ns = 0
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Increase a counter.
+
+        Args:
+            counter: One of COUNTERS.
+            amount: Amount to add.
+
+        """
+        self.counters[counter] += amount
+
+    def record(self, device_type: str, stage: str, elapsed_ns: int) -> None:
+        """Record the time a stage took for a packet.
+
+        Args:
+            device_type: Name of the device class handling the packet.
+            stage: One of STAGES.
+            elapsed_ns: Time taken in nanoseconds.
+
+        """
+        histogram = self.histograms.get((device_type, stage))
+        if histogram is None:
+            histogram = self.histograms[device_type, stage] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the counters and a summary of each histogram.
+
+        Returns:
+            Mapping with "counters" and "stages", the latter keyed by device type
+            and then stage, with times in nanoseconds.
+
+        """
+        stages: dict[str, dict[str, dict[str, float]]] = {}
+        for (device_type, stage), histogram in sorted(self.histograms.items()):
+            stages.setdefault(device_type, {})[stage] = histogram.summary()
+        return {"counters": dict(self.counters), "stages": stages}
+
+    def reset(self) -> None:
+        """Clear all counters and histograms."""
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.histograms = {}
+
+    def dump(self) -> None:
+        """Log the counters and the latency of every stage."""
+        counters = ", ".join(f"{name}={value}" for name, value in self.counters.items())
+        logger.info(f"Pipeline counters: {counters}")
+
+        for (device_type, stage), histogram in sorted(self.histograms.items()):
+            logger.info(
+                f"{device_type} {stage}: n={histogram.count} "
+                f"p50={histogram.percentile(50) / 1000:.1f}us "
+                f"p99={histogram.percentile(99) / 1000:.1f}us "
+                f"max={histogram.max / 1000:.1f}us",
+            )
+
+
+# Statistics being collected, None when instrumentation is off. The packet path
+# only reads this, so turning it off costs a single None check per packet.
+active: PipelineStats | None = None
+
+
+def enable() -> PipelineStats:
+    """Start collecting pipeline statistics.
+
+    Returns:
+        The statistics being collected.
+
+    """
+    global active  # noqa: PLW0603
+    if active is None:
+        active = PipelineStats()
+    return active
+
+
+def disable() -> None:
+    """Stop collecting pipeline statistics."""
+    global active  # noqa: PLW0603
+    active = None
@@ -0,0 +1,202 @@
+import time
+from collections.abc import Callable, Iterable, Mapping
+
+from van_assistant.devices.victron.devices.base import (
+    HEADER_SIZE,
+    IV_OFFSET,
+    VICTRON_MANUFACTURER_ID,
+)
+
+# Largest IV step counted as missed payloads, a longer jump is a restart or an absence
+MAX_IV_GAP = 256
+
+# Weights of the latest RSSI in the fast and slow moving averages
+FAST_WEIGHT = 0.3
+SLOW_WEIGHT = 0.02
+
+# Loss ratios and average RSSI beyond which reception is marginal or poor
+MARGINAL_LOSS = 0.05
+POOR_LOSS = 0.2
+MARGINAL_RSSI = -80.0
+POOR_RSSI = -88.0
+
+REPORT_HEADER = (
+    f"{'device':<20} {'adv/s':>6} {'new/s':>6} {'loss':>6} {'dup':>6} "
+    f"{'rssi':>5} {'min':>5} {'max':>5} {'trend':>6}  verdict"
+)
+
+
+class LinkStats:
+    """Reception statistics of one advertising device."""
+
+    __slots__ = (
+        "address",
+        "advertisements",
+        "duplicates",
+        "first_seen",
+        "last_iv",
+        "last_seen",
+        "missed",
+        "payloads",
+        "resyncs",
+        "rssi_fast",
+        "rssi_max",
+        "rssi_min",
+        "rssi_slow",
+    )
+
+    def __init__(self, address: str) -> None:
+        """Create statistics for a device not seen yet.
+
+        Args:
+            address: Address of the device.
+
+        """
+        self.address = address
+        # Every advertisement received, including repeats of the same payload
+        self.advertisements = 0
+        # Distinct payloads received, and those the IV shows were never received
+        self.payloads = 0
+        self.missed = 0
+        self.duplicates = 0
+        # IV jumps too large to count as loss, e.g. the device restarted
+        self.resyncs = 0
+        self.first_seen = 0.0
+        self.last_seen = 0.0
+        self.last_iv: int | None = None
+        # Moving averages, and extremes, of the RSSI in dBm
+        self.rssi_fast = 0.0
+        self.rssi_slow = 0.0
+        self.rssi_min = 0
+        self.rssi_max = 0
+
+    @property
+    def loss(self) -> float:
+        """Return the fraction of payloads that were never received."""
+        total = self.payloads + self.missed
+        return self.missed / total if total else 0.0
+
+    @property
+    def rssi_trend(self) -> float:
+        """Return how many dB the recent RSSI is above the long-term average."""
+        return self.rssi_fast - self.rssi_slow
+
+    def rate(self, count: int) -> float:
+        """Return a count per second over the time the device has been seen.
+
+        Args:
+            count: The count, e.g. advertisements or payloads.
+
+        """
+        elapsed = self.last_seen - self.first_seen
+        return (count - 1) / elapsed if elapsed > 0 and count > 1 else 0.0
+
+    def verdict(self) -> str:
+        """Return "ok", "marginal" or "poor" from the loss and average RSSI."""
+        if not self.advertisements:
+            return "not seen"
+        if self.loss > POOR_LOSS or self.rssi_slow < POOR_RSSI:
+            return "poor"
+        if self.loss > MARGINAL_LOSS or self.rssi_slow < MARGINAL_RSSI:
+            return "marginal"
+        return "ok"
+
+
+class ReceptionStats:
+    """Tracks packet loss, advertisement rate and RSSI of Victron devices.
+
+    Victron devices increment the IV in the advertisement header for every new
+    payload and repeat each payload a few times, so the step between consecutive
+    IVs counts the payloads missed and a repeated IV a duplicate, without
+    decrypting anything.
+    """
+
+    def __init__(
+        self,
+        addresses: Iterable[str],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create statistics for a set of devices.
+
+        Args:
+            addresses: Addresses of the devices to track, others are ignored.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self._clock = clock
+        self.links: dict[str, LinkStats] = {address: LinkStats(address) for address in addresses}
+
+    def observe(self, address: str, manufacturer_id: int, data: bytes, rssi: int) -> None:
+        """Record an advertisement, before any de-duplication.
+
+        Args:
+            address: Address of the advertising device.
+            manufacturer_id: Manufacturer ID of the advertisement data.
+            data: The manufacturer data.
+            rssi: Received signal strength in dBm.
+
+        """
+        link = self.links.get(address)
+        if link is None or manufacturer_id != VICTRON_MANUFACTURER_ID or len(data) <= HEADER_SIZE:
+            return
+
+        now = self._clock()
+        if not link.advertisements:
+            link.first_seen = now
+        link.last_seen = now
+        link.advertisements += 1
+        self._observe_rssi(link, rssi)
+
+        iv = data[IV_OFFSET] | data[IV_OFFSET + 1] << 8
+        if link.last_iv is None:
+            link.payloads += 1
+        else:
+            step = (iv - link.last_iv) & 0xFFFF
+            if not step:
+                link.duplicates += 1
+                return
+            link.payloads += 1
+            if step <= MAX_IV_GAP:
+                link.missed += step - 1
+            else:
+                link.resyncs += 1
+        link.last_iv = iv
+
+    def _observe_rssi(self, link: LinkStats, rssi: int) -> None:
+        if link.advertisements == 1:
+            link.rssi_fast = link.rssi_slow = float(rssi)
+            link.rssi_min = link.rssi_max = rssi
+            return
+        link.rssi_fast += (rssi - link.rssi_fast) * FAST_WEIGHT
+        link.rssi_slow += (rssi - link.rssi_slow) * SLOW_WEIGHT
+        link.rssi_min = min(link.rssi_min, rssi)
+        link.rssi_max = max(link.rssi_max, rssi)
+
+
+def format_report(stats: ReceptionStats, names: Mapping[str, str] | None = None) -> str:
+    """Return a table of every tracked device's reception, worst first.
+
+    Args:
+        stats: The statistics to report.
+        names: Names to show instead of addresses.
+
+    """
+    names = names or {}
+    verdicts = ("not seen", "poor", "marginal", "ok")
+    links = sorted(
+        stats.links.values(),
+        key=lambda link: (verdicts.index(link.verdict()), -link.loss),
+    )
+
+    lines = [REPORT_HEADER]
+    for link in links:
+        name = names.get(link.address, link.address)
+        if not link.advertisements:
+            lines.append(f"{name:<20} {'no advertisements received':>58}  {link.verdict()}")
+            continue
+        lines.append(
+            f"{name:<20} {link.rate(link.advertisements):6.2f} {link.rate(link.payloads):6.2f} "
+            f"{link.loss:6.1%} {link.duplicates:6d} {link.rssi_slow:5.0f} {link.rssi_min:5d} "
+            f"{link.rssi_max:5d} {link.rssi_trend:+6.1f}  {link.verdict()}",
+        )
+    return "\n".join(lines)
@@ -1,11 +1,79 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import TYPE_CHECKING
 
 from paho.mqtt.client import PayloadType
 
+if TYPE_CHECKING:
+    from van_assistant.notification_services.batch import ReadingBatch
+
+# Called with the topic and payload of a received message
+MessageCallback = Callable[[str, bytes], None]
+
 
 class NotificationService(ABC):
     """Base class for notification services."""
 
+    # Names of the device fields the service publishes, None for every field
+    fields: frozenset[str] | None = None
+    # Whether device readings reach the service in batches instead of one at a time
+    batched = False
+
     @abstractmethod
     def publish(self, topic: str, payload: PayloadType) -> None:
         """Publish a notification to the service."""
+
+    def publish_alert(self, topic: str, payload: PayloadType) -> None:
+        """Publish an alert ahead of routine telemetry, where the service can.
+
+        Args:
+            topic: The topic of the alert.
+            payload: The payload of the alert.
+
+        """
+        self.publish(topic, payload)
+
+    @property
+    def reading_fields(self) -> frozenset[str] | None:
+        """Names of the device fields published one reading at a time, None for all."""
+        return frozenset() if self.batched else self.fields
+
+    @property
+    def batch_fields(self) -> frozenset[str] | None:
+        """Names of the device fields published in batches, None for all."""
+        return self.fields if self.batched else frozenset()
+
+    def publish_reading(self, topic: str, name: str, payload: PayloadType) -> None:
+        """Publish a device reading, if the service publishes the field one at a time.
+
+        Args:
+            topic: The topic of the reading.
+            name: Name of the device field the reading is a value of.
+            payload: The payload of the reading.
+
+        """
+        fields = self.reading_fields
+        if fields is None or name in fields:
+            self.publish(topic, payload)
+
+    def publish_batch(self, batch: "ReadingBatch") -> None:  # noqa: B027
+        """Publish a batch of device readings, if the service receives batches.
+
+        Args:
+            batch: Readings of one device type.
+
+        """
+
+    def close(self) -> None:  # noqa: B027
+        """Release any resources held by the service."""
+
+    def subscribe(self, topic: str, callback: MessageCallback) -> None:  # noqa: B027
+        """Receive messages published to a topic, if the service can receive messages.
+
+        The callback may be called from another thread.
+
+        Args:
+            topic: The topic to subscribe to.
+            callback: Called with the topic and payload of each message.
+
+        """
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import logging
+import math
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Callable, Mapping
+from enum import Enum
+from itertools import filterfalse
+from typing import TYPE_CHECKING, Any, NamedTuple, Self
+
+from van_assistant.devices.base.device import Device
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from van_assistant.notification_services.base import NotificationService
+
+logger = logging.getLogger(__name__)
+
+BATCH_INTERVAL = 60.0
+MAX_ROWS = 1000
+
+# Enum columns hold the member values, with this code for a reading without the field
+MISSING_CODE = -(2**63)
+
+# Length of the JSON header that starts a serialised batch
+HEADER_FORMAT = "<I"
+
+Column = array | list
+
+
+class BatchError(Exception):
+    """Raised when a serialised batch cannot be read."""
+
+
+class ColumnSummary(NamedTuple):
+    """Aggregate of the readings in a numeric column, ignoring missing ones."""
+
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+
+class ReadingBatch:
+    """Readings of one device type, stored as one typed array per field.
+
+    Numbers and bools are float64 columns with NaN for a missing reading, enums are
+    int64 columns of member values and anything else a list. List values are split
+    into a column per element, named like their topics, e.g. cell_voltages/0. Every
+    row has a timestamp and the index of the device's address, so a batch can hold
+    the readings of several devices of the same type.
+    """
+
+    def __init__(self, device_type: str, fields: frozenset[str] | None = None) -> None:
+        """Create an empty batch.
+
+        Args:
+            device_type: Class name of the devices, e.g. VictronBatteryMonitor.
+            fields: Names of the fields to keep, None for every field.
+
+        """
+        self.device_type = device_type
+        self.fields = fields
+        self.timestamps = array("d")
+        self.addresses: list[str] = []
+        self.address_index = array("H")
+        self.columns: dict[str, Column] = {}
+        self.enums: dict[str, type[Enum]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of readings in the batch."""
+        return len(self.timestamps)
+
+    def append(self, address: str, timestamp: float, data: Mapping[str, Any]) -> None:
+        """Add a reading.
+
+        Args:
+            address: Address of the device the reading is from.
+            timestamp: Time of the reading, in seconds since the epoch.
+            data: The published fields of the reading.
+
+        """
+        row = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        if address not in self.addresses:
+            self.addresses.append(address)
+        self.address_index.append(self.addresses.index(address))
+
+        names = data if self.fields is None else [name for name in data if name in self.fields]
+        for name in names:
+            value = data[name]
+            if isinstance(value, list):
+                for i, element in enumerate(value):
+                    self._set(f"{name}/{i}", element, row)
+            else:
+                self._set(name, value, row)
+
+        for name, column in self.columns.items():
+            if len(column) == row:
+                column.append(self._missing(name))
+
+    def _set(self, name: str, value: object, row: int) -> None:
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = self._new_column(name, value)
+            for _ in range(row):
+                column.append(self._missing(name))
+        elif len(column) > row:
+            # The same field twice in one reading, the last value wins
+            column.pop()
+
+        if isinstance(column, list):
+            column.append(value)
+        elif name in self.enums:
+            if isinstance(value, self.enums[name]):
+                column.append(value.value)
+            elif value is None:
+                column.append(MISSING_CODE)
+            else:
+                self._to_list(name).append(value)
+        elif value is None:
+            column.append(math.nan)
+        elif isinstance(value, (int, float)) and not isinstance(value, Enum):
+            column.append(value)
+        else:
+            self._to_list(name).append(value)
+
+    def _new_column(self, name: str, value: object) -> Column:
+        if isinstance(value, Enum):
+            self.enums[name] = type(value)
+            return array("q")
+        if value is None or isinstance(value, (int, float)):
+            return array("d")
+        return []
+
+    def _missing(self, name: str) -> object:
+        column = self.columns[name]
+        if isinstance(column, list):
+            return None
+        return MISSING_CODE if name in self.enums else math.nan
+
+    # A value that does not fit a typed column turns it into a list of values
+    def _to_list(self, name: str) -> list:
+        values = self.values(name)
+        self.enums.pop(name, None)
+        self.columns[name] = values
+        return values
+
+    def values(self, name: str) -> list[Any]:
+        """Return the readings of a field as Python values, None where missing.
+
+        Args:
+            name: Name of the column.
+
+        Raises:
+            KeyError: If the batch has no such column.
+
+        """
+        column = self.columns[name]
+        if isinstance(column, list):
+            return list(column)
+        enum = self.enums.get(name)
+        if enum is not None:
+            return [None if code == MISSING_CODE else enum(code) for code in column]
+        return [None if math.isnan(value) else value for value in column]
+
+    def select(self, fields: frozenset[str] | None) -> Self:
+        """Return a batch sharing the columns of the given fields.
+
+        Args:
+            fields: Names of the fields to keep, None for every field.
+
+        """
+        if fields is None:
+            return self
+        selected = type(self)(self.device_type, fields)
+        selected.timestamps = self.timestamps
+        selected.addresses = self.addresses
+        selected.address_index = self.address_index
+        selected.columns = {
+            name: column for name, column in self.columns.items() if name.split("/", 1)[0] in fields
+        }
+        selected.enums = {name: self.enums[name] for name in selected.columns if name in self.enums}
+        return selected
+
+    def summary(self) -> dict[str, ColumnSummary]:
+        """Return the count, minimum, maximum and mean of every float column.
+
+        The columns are aggregated in place with NumPy when it is installed.
+        """
+        summarize = _summarize if np is None else _summarize_numpy
+        return {
+            name: summarize(column)
+            for name, column in self.columns.items()
+            if isinstance(column, array) and name not in self.enums
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialise the batch.
+
+        A JSON header describing the columns, with the list columns in it, is
+        followed by the little endian contents of the timestamps, the address
+        indexes and the typed columns, in header order.
+        """
+        typed = {name: column for name, column in self.columns.items() if isinstance(column, array)}
+        header = {
+            "device_type": self.device_type,
+            "rows": len(self),
+            "addresses": self.addresses,
+            "typed": list(typed),
+            "enums": {
+                name: [type_.__name__, {member.name: member.value for member in type_}]
+                for name, type_ in self.enums.items()
+            },
+            "lists": {
+                name: column for name, column in self.columns.items() if isinstance(column, list)
+            },
+        }
+        encoded = json.dumps(header, separators=(",", ":"), default=str).encode()
+        parts = [struct.pack(HEADER_FORMAT, len(encoded)), encoded]
+        parts.extend(
+            _little_endian(column)
+            for column in (self.timestamps, self.address_index, *typed.values())
+        )
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        """Read a batch serialised by to_bytes().
+
+        Enum columns are restored with enums rebuilt from the member names and
+        values, the original enum classes are not needed.
+
+        Args:
+            data: The serialised batch.
+
+        Raises:
+            BatchError: If the data is not a serialised batch.
+
+        """
+        try:
+            (length,) = struct.unpack_from(HEADER_FORMAT, data)
+            offset = struct.calcsize(HEADER_FORMAT)
+            header = json.loads(data[offset : offset + length])
+            offset += length
+
+            batch = cls(header["device_type"])
+            batch.addresses = header["addresses"]
+            rows = header["rows"]
+            enums = {
+                name: Enum(enum_name, members)
+                for name, (enum_name, members) in header["enums"].items()
+            }
+
+            columns = [batch.timestamps, batch.address_index]
+            for name in header["typed"]:
+                column = batch.columns[name] = array("q" if name in enums else "d")
+                columns.append(column)
+            for column in columns:
+                end = offset + rows * column.itemsize
+                column.frombytes(data[offset:end])
+                offset = end
+                if sys.byteorder == "big":
+                    column.byteswap()
+                if len(column) != rows:
+                    msg = "Batch is truncated"
+                    raise BatchError(msg)
+        except (struct.error, ValueError, KeyError, TypeError) as e:
+            msg = f"Not a serialised batch: {e}"
+            raise BatchError(msg) from e
+
+        batch.columns.update(header["lists"])
+        batch.enums = enums
+        return batch
+
+
+def _summarize(column: array) -> ColumnSummary:
+    values = list(filterfalse(math.isnan, column))
+    if not values:
+        return ColumnSummary(0, math.nan, math.nan, math.nan)
+    return ColumnSummary(len(values), min(values), max(values), math.fsum(values) / len(values))
+
+
+def _summarize_numpy(column: array) -> ColumnSummary:
+    # A view of the array's buffer, not a copy
+    values = np.frombuffer(column, dtype=np.float64)
+    count = len(values) - int(np.count_nonzero(np.isnan(values)))
+    if not count:
+        return ColumnSummary(0, math.nan, math.nan, math.nan)
+    return ColumnSummary(
+        count,
+        float(np.nanmin(values)),
+        float(np.nanmax(values)),
+        float(np.nanmean(values)),
+    )
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+class ReadingBatcher:
+    """Collects device readings into a batch per device type for batched sinks.
+
+    A device type's batch is published once it holds the maximum number of rows,
+    and every batch at each interval and on the way out.
+    """
+
+    def __init__(
+        self,
+        notification_service: "NotificationService",
+        interval: float = BATCH_INTERVAL,
+        max_rows: int = MAX_ROWS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Create a batcher.
+
+        Args:
+            notification_service: Service to publish the batches to.
+            interval: Seconds between publishing every batch.
+            max_rows: Rows at which a batch is published before the interval ends.
+            clock: Wall clock returning seconds since the epoch.
+
+        """
+        self.notification_service = notification_service
+        self.interval = interval
+        self.max_rows = max_rows
+        self._clock = clock
+        self._batches: dict[str, ReadingBatch] = {}
+
+    def watch(self, device: Device) -> None:
+        """Collect the readings a device publishes.
+
+        Args:
+            device: The device to collect the readings of.
+
+        """
+        device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Add a reading to its device type's batch.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        device_type = type(device).__name__
+        batch = self._batches.get(device_type)
+        if batch is None:
+            batch = self._batches[device_type] = ReadingBatch(
+                device_type,
+                self.notification_service.batch_fields,
+            )
+        batch.append(device.addr, self._clock(), data)
+        if len(batch) >= self.max_rows:
+            self._publish(device_type)
+
+    def flush(self) -> None:
+        """Publish every batch holding readings."""
+        for device_type in list(self._batches):
+            self._publish(device_type)
+
+    def _publish(self, device_type: str) -> None:
+        batch = self._batches.pop(device_type)
+        if batch:
+            self.notification_service.publish_batch(batch)
+
+    async def run(self) -> None:
+        """Publish the batches periodically until cancelled, and once more on the way out."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                self.flush()
+        finally:
+            self.flush()
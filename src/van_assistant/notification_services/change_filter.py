@@ -0,0 +1,184 @@
+import math
+import time
+from array import array
+from collections.abc import Callable, Mapping
+from enum import Enum
+from typing import NamedTuple
+
+from van_assistant.devices.base.device import Device
+
+# Seconds a value goes unpublished at most, even if it did not change
+HEARTBEAT = 300.0
+
+# Types compared against the deadband, any other value is compared for equality
+_NUMBERS = (float, int, bool)
+
+
+class Deadband(NamedTuple):
+    """How far a value must move from the last published one to be published again.
+
+    A value is published if it moved by more than the absolute deadband or the
+    relative deadband times the last published value, whichever is larger. With
+    both zero every change is published.
+    """
+
+    absolute: float = 0.0
+    relative: float = 0.0
+
+
+# Publishes every change
+NO_DEADBAND = Deadband()
+
+
+class ChangeFilter:
+    """Publishes a device's values to the sinks only when they changed meaningfully.
+
+    Devices re-advertise or are polled for the same values over and over. Each
+    value, e.g. a field or an element of a list field such as cell_voltages, is
+    compared with the value last published under its topic, and published only if
+    it moved out of its field's deadband or went unpublished for the heartbeat.
+    The listeners, i.e. the rules, watchdog, ledger and batches, still see every
+    reading.
+    """
+
+    def __init__(
+        self,
+        deadbands: Mapping[str, Deadband],
+        default: Deadband = NO_DEADBAND,
+        heartbeat: float | None = HEARTBEAT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a filter, applied to devices by watch().
+
+        Args:
+            deadbands: Deadbands by field name, e.g. {"cell_voltages": Deadband(0.01)}.
+            default: Deadband of the fields without one.
+            heartbeat: Seconds after which an unchanged value is published again,
+                None to publish changes only.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.deadbands = dict(deadbands)
+        self.default = default
+        self.heartbeat = math.inf if heartbeat is None else heartbeat
+        self.clock = clock
+
+    def watch(self, device: Device) -> None:
+        """Filter the values the device publishes.
+
+        Args:
+            device: The device whose values to filter.
+
+        """
+        device.changes = DeviceChanges(self)
+
+
+class DeviceChanges:
+    """The values a device last published and when, one slot per topic.
+
+    Slots are numbered as topics are first published and their state is kept in
+    arrays, so a value is checked with a dictionary lookup and a few array reads.
+    """
+
+    __slots__ = (
+        "_absolute",
+        "_clock",
+        "_filter",
+        "_heartbeat",
+        "_numeric",
+        "_objects",
+        "_relative",
+        "_slots",
+        "_times",
+        "_values",
+        "now",
+        "suppressed",
+    )
+
+    def __init__(self, change_filter: ChangeFilter) -> None:
+        """Create the empty state of a device.
+
+        Args:
+            change_filter: The filter with the deadbands and heartbeat.
+
+        """
+        self._filter = change_filter
+        self._heartbeat = change_filter.heartbeat
+        self._clock = change_filter.clock
+        # Time of the reading being published, read once per reading by start()
+        self.now = self._clock()
+        # Values not published since the device was watched
+        self.suppressed = 0
+        self._slots: dict[str, int] = {}
+        self._absolute = array("d")
+        self._relative = array("d")
+        self._times = array("d")
+        # Last published value of each slot, in _values if it was a number
+        self._numeric = bytearray()
+        self._values = array("d")
+        self._objects: list[object] = []
+
+    def start(self) -> None:
+        """Start publishing a reading, reading the clock once for all its values."""
+        self.now = self._clock()
+
+    def changed(self, key: str, name: str, value: object) -> bool:
+        """Return whether to publish a value, remembering it as published if so.
+
+        Args:
+            key: Name of the value within the device's topics, e.g. cell_voltages/3.
+            name: Name of the field the value belongs to.
+            value: The value.
+
+        Returns:
+            True if the value is new, moved out of the deadband or is due a heartbeat.
+
+        """
+        if isinstance(value, Enum):
+            value = value.value
+        number = None
+        if type(value) in _NUMBERS:
+            if math.isnan(value):
+                # Compared as None, so a NaN reading equals the last one
+                value = None
+            else:
+                number = value
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._add(key, name)
+        elif not self._due(slot, number, value):
+            self.suppressed += 1
+            return False
+
+        self._times[slot] = self.now
+        if number is None:
+            self._numeric[slot] = 0
+            self._objects[slot] = value
+        else:
+            self._numeric[slot] = 1
+            self._values[slot] = number
+            self._objects[slot] = None
+        return True
+
+    # Whether the value moved out of the deadband or the heartbeat is due
+    def _due(self, slot: int, number: float | None, value: object) -> bool:
+        if self.now - self._times[slot] >= self._heartbeat:
+            return True
+        if number is None:
+            return bool(self._numeric[slot]) or self._objects[slot] != value
+        if not self._numeric[slot]:
+            return True
+        last = self._values[slot]
+        return abs(number - last) > max(self._absolute[slot], self._relative[slot] * abs(last))
+
+    def _add(self, key: str, name: str) -> int:
+        deadband = self._filter.deadbands.get(name, self._filter.default)
+        slot = self._slots[key] = len(self._slots)
+        self._absolute.append(deadband.absolute)
+        self._relative.append(deadband.relative)
+        self._times.append(self.now)
+        self._numeric.append(0)
+        self._values.append(math.nan)
+        self._objects.append(None)
+        return slot
@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from paho.mqtt.client import PayloadType
+
+from van_assistant.notification_services.base import MessageCallback, NotificationService
+
+if TYPE_CHECKING:
+    from van_assistant.notification_services.batch import ReadingBatch
+
+
+class FanoutService(NotificationService):
+    """Notification service that forwards every notification to several services."""
+
+    def __init__(self, services: Iterable[NotificationService]) -> None:
+        """Create a fan-out service.
+
+        Args:
+            services: The services to forward notifications to.
+
+        """
+        self.services = tuple(services)
+        self.batched = any(service.batched for service in self.services)
+        # A field is decoded if any service publishes it
+        self._reading_fields = _union(service.reading_fields for service in self.services)
+        self._batch_fields = _union(service.batch_fields for service in self.services)
+
+    @property
+    def reading_fields(self) -> frozenset[str] | None:
+        """Names of the device fields any service publishes one reading at a time."""
+        return self._reading_fields
+
+    @property
+    def batch_fields(self) -> frozenset[str] | None:
+        """Names of the device fields any service publishes in batches."""
+        return self._batch_fields
+
+    def publish(self, topic: str, payload: PayloadType) -> None:
+        """Publish the notification to every service.
+
+        Args:
+            topic: The topic of the notification.
+            payload: The payload of the notification.
+
+        """
+        for service in self.services:
+            service.publish(topic, payload)
+
+    def publish_alert(self, topic: str, payload: PayloadType) -> None:
+        """Publish the alert to every service.
+
+        Args:
+            topic: The topic of the alert.
+            payload: The payload of the alert.
+
+        """
+        for service in self.services:
+            service.publish_alert(topic, payload)
+
+    def publish_reading(self, topic: str, name: str, payload: PayloadType) -> None:
+        """Publish the reading to every service publishing the field.
+
+        Args:
+            topic: The topic of the reading.
+            name: Name of the device field the reading is a value of.
+            payload: The payload of the reading.
+
+        """
+        for service in self.services:
+            service.publish_reading(topic, name, payload)
+
+    def publish_batch(self, batch: "ReadingBatch") -> None:
+        """Publish the batch to every service receiving batches.
+
+        Args:
+            batch: Readings of one device type.
+
+        """
+        for service in self.services:
+            service.publish_batch(batch)
+
+    def subscribe(self, topic: str, callback: MessageCallback) -> None:
+        """Subscribe to the topic on every service.
+
+        Args:
+            topic: The topic to subscribe to.
+            callback: Called with the topic and payload of each message.
+
+        """
+        for service in self.services:
+            service.subscribe(topic, callback)
+
+    def close(self) -> None:
+        """Close every service."""
+        for service in self.services:
+            service.close()
+
+
+def _union(fields: Iterable[frozenset[str] | None]) -> frozenset[str] | None:
+    union: frozenset[str] = frozenset()
+    for names in fields:
+        if names is None:
+            return None
+        union |= names
+    return union
@@ -0,0 +1,513 @@
+import contextlib
+import logging
+import selectors
+import socket
+import struct
+import threading
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+
+from paho.mqtt.client import PayloadType
+
+from van_assistant.notification_services.base import MessageCallback, NotificationService
+from van_assistant.notification_services.batch import ReadingBatch
+from van_assistant.notification_services.mqtt_service import BATCH_TOPIC
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "/tmp/van-assistant.sock"  # noqa: S108
+# Messages queued for a subscriber that is not reading before the oldest are dropped
+BUFFER_SIZE = 1000
+# Alerts, which are never dropped, queued beyond the buffer before the subscriber is
+# disconnected. It gets the retained alerts again when it reconnects.
+KEPT_LIMIT = 100
+# Alert topics retained for later subscribers, the oldest is forgotten beyond this
+MAX_RETAINED = 256
+# Largest frame a client may send, a client sending a larger one is disconnected
+MAX_FRAME = 1 << 20
+# Kind, topic length and payload length of a frame, followed by the topic and payload
+FRAME = struct.Struct("<BHI")
+MESSAGE = 1
+SUBSCRIBE = 2
+UNSUBSCRIBE = 3
+# Sent to a subscriber that caught up after messages were dropped, with the count
+DROPPED = 4
+RECEIVE_SIZE = 65536
+
+
+class LocalBusError(Exception):
+    """Raised when the local bus cannot be started or a connection is broken."""
+
+
+def _encode(payload: PayloadType) -> bytes:
+    # Encoded like paho encodes a payload
+    if payload is None:
+        return b""
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode()
+    return str(payload).encode()
+
+
+def encode_frame(kind: int, topic: str, payload: bytes = b"") -> bytes:
+    """Return a frame of the local bus protocol.
+
+    Args:
+        kind: MESSAGE, SUBSCRIBE, UNSUBSCRIBE or DROPPED.
+        topic: The topic of a message, or the prefix of a subscription.
+        payload: The payload of a message.
+
+    """
+    encoded = topic.encode()
+    return FRAME.pack(kind, len(encoded), len(payload)) + encoded + payload
+
+
+class _Subscriber:
+    """A connected client and the messages waiting to be written to it."""
+
+    def __init__(self, connection: socket.socket, limit: int) -> None:
+        self.connection = connection
+        self.limit = limit
+        self.prefixes: list[str] = []
+        self.pending: deque[bytes] = deque()
+        # Bytes of the first pending frame already written
+        self.offset = 0
+        self.dropped = 0
+        self.reported = 0
+        self.received = bytearray()
+        self.closed = False
+
+    def matches(self, topic: str) -> bool:
+        return any(topic.startswith(prefix) for prefix in self.prefixes)
+
+    # Writes a frame now if nothing is waiting, otherwise queues it. True if the frame
+    # had to wait, or the subscriber is too far behind and the bus should disconnect it.
+    def send(self, frame: bytes, *, keep: bool = False) -> bool:
+        if self.closed:
+            return False
+        if self.pending:
+            return self._queue(frame, keep=keep)
+        try:
+            sent = self.connection.send(frame)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self.closed = True
+            return False
+        if sent == len(frame):
+            return False
+        self.pending.append(frame)
+        self.offset = sent
+        return True
+
+    # Queues a frame behind the waiting ones, dropping the oldest unwritten frame if the
+    # queue is full. Alerts are kept, up to KEPT_LIMIT beyond the limit.
+    def _queue(self, frame: bytes, *, keep: bool) -> bool:
+        if keep:
+            if len(self.pending) >= self.limit + KEPT_LIMIT:
+                logger.warning("Disconnecting local bus client that stopped reading alerts")
+                self.closed = True
+                return True
+        elif len(self.pending) >= self.limit:
+            self.dropped += 1
+            if not self.offset:
+                self.pending.popleft()
+            elif len(self.pending) > 1:
+                del self.pending[1]
+            else:
+                # The only waiting frame is partly written, drop the new one
+                return False
+        self.pending.append(frame)
+        return False
+
+    # Writes waiting frames until the socket is full, then reports drops once caught up.
+    # True once nothing is waiting.
+    def flush(self) -> bool:
+        while self.pending and not self.closed:
+            frame = self.pending[0]
+            try:
+                sent = self.connection.send(memoryview(frame)[self.offset :])
+            except BlockingIOError:
+                return False
+            except OSError:
+                self.closed = True
+                return True
+            self.offset += sent
+            if self.offset < len(frame):
+                return False
+            self.pending.popleft()
+            self.offset = 0
+            if not self.pending and self.dropped > self.reported:
+                self.pending.append(encode_frame(DROPPED, "", str(self.dropped).encode()))
+                self.reported = self.dropped
+        return True
+
+
+class LocalBusService(NotificationService):
+    """Notification service running a publish/subscribe bus on a Unix domain socket.
+
+    Clients on the same host connect to the socket and subscribe to topic prefixes,
+    so they get the gateway's messages without a broker. Every frame is a kind,
+    the topic and payload lengths, then the topic and payload. Each subscriber has
+    a bounded queue of messages waiting to be written; once it is full the oldest
+    is dropped and counted, and the subscriber is sent the count as a DROPPED
+    frame when it catches up. Alerts are never dropped, so a subscriber too far
+    behind to take them is disconnected instead. Messages clients publish reach the
+    other subscribers and the service's own subscriptions. The bus runs on its own
+    thread, away from the event loop, and a message is written by the publishing
+    thread directly unless the subscriber is behind.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PATH, buffer: int = BUFFER_SIZE) -> None:
+        """Start listening on the socket.
+
+        Args:
+            path: Path of the Unix domain socket, replaced if it exists.
+            buffer: Messages queued per subscriber before the oldest are dropped.
+
+        Raises:
+            LocalBusError: If the socket cannot be created.
+
+        """
+        self.path = Path(path)
+        self.buffer = buffer
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, _Subscriber] = {}
+        self._callbacks: list[tuple[str, MessageCallback]] = []
+        # Alerts by topic, sent to every subscriber of them when it subscribes
+        self._retained: dict[str, bytes] = {}
+        self._waiting: set[_Subscriber] = set()
+        self._dropped = 0
+        self._stopping = False
+
+        try:
+            if self.path.is_socket():
+                # Left behind by a gateway that did not shut down cleanly
+                self.path.unlink()
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(str(self.path))
+            self._server.listen()
+        except OSError as e:
+            msg = f"Cannot listen on {self.path}: {e}"
+            raise LocalBusError(msg) from e
+        self._server.setblocking(False)  # noqa: FBT003
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)  # noqa: FBT003
+        self._wake_writer.setblocking(False)  # noqa: FBT003
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name="local-bus", daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of messages dropped for subscribers that fell behind."""
+        with self._lock:
+            return self._dropped + sum(
+                subscriber.dropped for subscriber in self._subscribers.values()
+            )
+
+    @property
+    def subscribers(self) -> int:
+        """Return the number of connected clients."""
+        return len(self._subscribers)
+
+    def publish(self, topic: str, payload: PayloadType) -> None:
+        """Send a message to every client subscribed to a prefix of its topic.
+
+        Args:
+            topic: The topic of the message.
+            payload: The payload of the message.
+
+        """
+        self._send(encode_frame(MESSAGE, topic, _encode(payload)), topic)
+
+    def publish_alert(self, topic: str, payload: PayloadType) -> None:
+        """Send an alert that is never dropped, and retain it for later subscribers.
+
+        Args:
+            topic: The topic of the alert.
+            payload: The payload of the alert.
+
+        """
+        frame = encode_frame(MESSAGE, topic, _encode(payload))
+        with self._lock:
+            # Moved to the end, so the alert forgotten first is the one set longest ago
+            self._retained.pop(topic, None)
+            self._retained[topic] = frame
+            if len(self._retained) > MAX_RETAINED:
+                del self._retained[next(iter(self._retained))]
+        self._send(frame, topic, keep=True)
+
+    def publish_batch(self, batch: ReadingBatch) -> None:
+        """Send a batch of readings as one message to batch/<device type>.
+
+        Args:
+            batch: Readings of one device type.
+
+        """
+        topic = f"{BATCH_TOPIC}/{batch.device_type}"
+        self._send(encode_frame(MESSAGE, topic, batch.select(self.fields).to_bytes()), topic)
+
+    def _send(self, frame: bytes, topic: str, *, keep: bool = False) -> None:
+        wake = False
+        with self._lock:
+            for subscriber in self._subscribers.values():
+                if subscriber.matches(topic) and subscriber.send(frame, keep=keep):
+                    self._waiting.add(subscriber)
+                    wake = True
+        if wake:
+            self._wake()
+
+    def _wake(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            self._wake_writer.send(b"\0")
+
+    def subscribe(self, topic: str, callback: MessageCallback) -> None:
+        """Receive messages clients publish to topics starting with a prefix.
+
+        The callback is called on the bus thread.
+
+        Args:
+            topic: The topic prefix to subscribe to.
+            callback: Called with the topic and payload of each message.
+
+        """
+        self._callbacks.append((topic, callback))
+
+    def close(self) -> None:
+        """Stop the bus, disconnect every client and remove the socket."""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._wake()
+        self._thread.join()
+        for subscriber in self._subscribers.values():
+            subscriber.connection.close()
+        self._selector.close()
+        self._server.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+        self.path.unlink(missing_ok=True)
+        dropped = self.dropped
+        if dropped:
+            logger.warning(f"Local bus dropped {dropped} messages for slow subscribers")
+
+    def _run(self) -> None:
+        while not self._stopping:
+            for key, events in self._selector.select():
+                if key.fileobj is self._server:
+                    self._accept()
+                elif key.fileobj is self._wake_reader:
+                    self._drain_wake()
+                else:
+                    subscriber = self._subscribers.get(key.fd)
+                    if subscriber is None:
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(subscriber)
+                    if events & selectors.EVENT_READ:
+                        self._receive(subscriber)
+
+    def _accept(self) -> None:
+        try:
+            connection, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)  # noqa: FBT003
+        with self._lock:
+            self._subscribers[connection.fileno()] = _Subscriber(connection, self.buffer)
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _drain_wake(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            while self._wake_reader.recv(RECEIVE_SIZE):
+                pass
+        with self._lock:
+            waiting = list(self._waiting)
+            self._waiting.clear()
+        for subscriber in waiting:
+            if subscriber.closed:
+                self._disconnect(subscriber)
+            elif self._subscribers.get(subscriber.connection.fileno()) is subscriber:
+                self._selector.modify(
+                    subscriber.connection,
+                    selectors.EVENT_READ | selectors.EVENT_WRITE,
+                )
+
+    def _flush(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            done = subscriber.flush()
+        if subscriber.closed:
+            self._disconnect(subscriber)
+        elif done:
+            self._selector.modify(subscriber.connection, selectors.EVENT_READ)
+
+    def _receive(self, subscriber: _Subscriber) -> None:
+        try:
+            data = subscriber.connection.recv(RECEIVE_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect(subscriber)
+            return
+
+        received = subscriber.received
+        received += data
+        offset = 0
+        while len(received) - offset >= FRAME.size:
+            kind, topic_length, payload_length = FRAME.unpack_from(received, offset)
+            if FRAME.size + topic_length + payload_length > MAX_FRAME:
+                logger.warning(
+                    f"Disconnecting local bus client that sent a frame of {payload_length} bytes",
+                )
+                self._disconnect(subscriber)
+                return
+            end = offset + FRAME.size + topic_length + payload_length
+            if len(received) < end:
+                break
+            start = offset + FRAME.size
+            topic = received[start : start + topic_length].decode(errors="replace")
+            payload = bytes(received[start + topic_length : end])
+            offset = end
+            if not self._handle(subscriber, kind, topic, payload):
+                self._disconnect(subscriber)
+                return
+        del received[:offset]
+
+    def _handle(self, subscriber: _Subscriber, kind: int, topic: str, payload: bytes) -> bool:
+        if kind == SUBSCRIBE:
+            with self._lock:
+                subscriber.prefixes.append(topic)
+                retained = [
+                    frame for name, frame in self._retained.items() if name.startswith(topic)
+                ]
+                wait = any([subscriber.send(frame, keep=True) for frame in retained])  # noqa: C419
+            if wait:
+                self._selector.modify(
+                    subscriber.connection,
+                    selectors.EVENT_READ | selectors.EVENT_WRITE,
+                )
+        elif kind == UNSUBSCRIBE:
+            with self._lock, contextlib.suppress(ValueError):
+                subscriber.prefixes.remove(topic)
+        elif kind == MESSAGE:
+            for prefix, callback in self._callbacks:
+                if topic.startswith(prefix):
+                    try:
+                        callback(topic, payload)
+                    except Exception:
+                        # A failing subscription must not stop the bus
+                        logger.exception(f"Handling local bus message to {topic} failed")
+            self._send(encode_frame(MESSAGE, topic, payload), topic)
+        else:
+            logger.warning(f"Disconnecting local bus client that sent a frame of kind {kind}")
+            return False
+        return True
+
+    def _disconnect(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            if self._subscribers.pop(subscriber.connection.fileno(), None) is None:
+                return
+            self._dropped += subscriber.dropped
+            subscriber.closed = True
+        self._selector.unregister(subscriber.connection)
+        subscriber.connection.close()
+
+
+class BusMessage(NamedTuple):
+    """A message received from the local bus."""
+
+    topic: str
+    payload: bytes
+
+
+class LocalBusClient:
+    """Blocking client of a LocalBusService, for processes on the same host."""
+
+    def __init__(self, path: str | Path = DEFAULT_PATH, timeout: float | None = None) -> None:
+        """Connect to the bus.
+
+        Args:
+            path: Path of the bus's Unix domain socket.
+            timeout: Seconds to wait for a message before receive() raises
+                TimeoutError, None to wait forever.
+
+        Raises:
+            LocalBusError: If the bus cannot be reached.
+
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(str(path))
+        except OSError as e:
+            self._socket.close()
+            msg = f"Cannot connect to the local bus at {path}: {e}"
+            raise LocalBusError(msg) from e
+        self._socket.settimeout(timeout)
+        self._file = self._socket.makefile("rb")
+        # Messages the bus dropped because this client fell behind
+        self.dropped = 0
+
+    def subscribe(self, prefix: str = "") -> None:
+        """Receive the messages whose topic starts with a prefix, every one by default.
+
+        Args:
+            prefix: Start of the topics, e.g. victron/ or victron/aabbccddeeff/soc.
+
+        """
+        self._socket.sendall(encode_frame(SUBSCRIBE, prefix))
+
+    def unsubscribe(self, prefix: str) -> None:
+        """Stop receiving the messages of a prefix subscribed to before.
+
+        Args:
+            prefix: The prefix given to subscribe().
+
+        """
+        self._socket.sendall(encode_frame(UNSUBSCRIBE, prefix))
+
+    def publish(self, topic: str, payload: PayloadType) -> None:
+        """Publish a message to the bus, e.g. to van/control/profile.
+
+        Args:
+            topic: The topic of the message.
+            payload: The payload of the message.
+
+        """
+        self._socket.sendall(encode_frame(MESSAGE, topic, _encode(payload)))
+
+    def receive(self) -> BusMessage:
+        """Wait for the next message.
+
+        Raises:
+            LocalBusError: If the bus closed the connection.
+            TimeoutError: If no message arrived within the timeout.
+
+        """
+        while True:
+            kind, topic_length, payload_length = FRAME.unpack(self._read(FRAME.size))
+            topic = self._read(topic_length).decode(errors="replace")
+            payload = self._read(payload_length)
+            if kind == DROPPED:
+                self.dropped = int(payload)
+            else:
+                return BusMessage(topic, payload)
+
+    def _read(self, size: int) -> bytes:
+        data = self._file.read(size) if size else b""
+        if len(data) < size:
+            msg = "Local bus closed the connection"
+            raise LocalBusError(msg)
+        return data
+
+    def close(self) -> None:
+        """Disconnect from the bus."""
+        self._file.close()
+        self._socket.close()
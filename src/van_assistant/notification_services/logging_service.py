@@ -3,6 +3,7 @@ import logging
 from paho.mqtt.client import PayloadType
 
 from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.batch import ReadingBatch
 
 logger = logging.getLogger(__name__)
 
@@ -18,4 +19,42 @@ class LoggingService(NotificationService):
             payload: The payload of the notification.
 
         """
-        logger.info(f"Publishing to {topic}: {payload}")
+        # Formatted on the logging thread, and only if info logging is enabled
+        logger.info("Publishing to %s: %s", topic, payload)
+
+    def publish_alert(self, topic: str, payload: PayloadType) -> None:
+        """Log the alert as a warning.
+
+        Args:
+            topic: The topic of the alert.
+            payload: The payload of the alert.
+
+        """
+        logger.warning("Publishing alert to %s: %s", topic, payload)
+
+    def publish_batch(self, batch: ReadingBatch) -> None:
+        """Log the count, minimum, mean and maximum of each numeric field of a batch.
+
+        Args:
+            batch: Readings of one device type.
+
+        """
+        # Summarising the columns is the costly part, skip it if nothing is logged
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        batch = batch.select(self.fields)
+        logger.info(
+            "Batch of %d %s readings from %d device(s)",
+            len(batch),
+            batch.device_type,
+            len(batch.addresses),
+        )
+        for name, summary in batch.summary().items():
+            logger.info(
+                "  %s: %d readings, min %g, mean %g, max %g",
+                name,
+                summary.count,
+                summary.minimum,
+                summary.mean,
+                summary.maximum,
+            )
@@ -1,22 +1,43 @@
+from typing import Any
+
 import paho.mqtt.client as mqtt
 from paho.mqtt.client import PayloadType
 
-from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.base import MessageCallback, NotificationService
+from van_assistant.notification_services.batch import ReadingBatch
+
+# Batches are published to batch/<device type>, see ReadingBatch.to_bytes
+BATCH_TOPIC = "batch"
 
 
 class MQTTService(NotificationService):
     """Notification service that publishes notifications to an MQTT broker."""
 
-    def __init__(self, broker: str, port: int) -> None:
+    def __init__(
+        self,
+        broker: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
         """Initialize the MQTT client and connect to the broker.
 
         Args:
             broker: The address of the MQTT broker.
             port: The port to connect to on the MQTT broker.
+            username: Username to authenticate with, if the broker requires it.
+            password: Password to authenticate with.
 
         """
         self.client = mqtt.Client()
+        self._subscriptions: list[str] = []
+        # Subscriptions do not survive a reconnect, renew them on every connect
+        self.client.on_connect = self._on_connect
+        if username is not None:
+            self.client.username_pw_set(username, password)
         self.client.connect(broker, port)
+        # Network traffic is handled on paho's own thread, away from the event loop
+        self.client.loop_start()
 
     def publish(self, topic: str, payload: PayloadType) -> None:
         """Publish the notification to the MQTT broker.
@@ -27,4 +48,57 @@ class MQTTService(NotificationService):
 
         """
         self.client.publish(topic, payload)
+
+    def publish_alert(self, topic: str, payload: PayloadType) -> None:
+        """Publish an alert to the MQTT broker.
+
+        Alerts are sent with QoS 1 so they are redelivered if the connection drops,
+        and retained so clients connecting later see the current state.
+
+        Args:
+            topic: The topic of the alert.
+            payload: The payload of the alert.
+
+        """
+        self.client.publish(topic, payload, qos=1, retain=True)
+
+    def publish_batch(self, batch: ReadingBatch) -> None:
+        """Publish a batch of readings to the MQTT broker as one message.
+
+        Batches are sent with QoS 1, as losing one loses many readings.
+
+        Args:
+            batch: Readings of one device type.
+
+        """
+        self.client.publish(
+            f"{BATCH_TOPIC}/{batch.device_type}",
+            batch.select(self.fields).to_bytes(),
+            qos=1,
+        )
+
+    def subscribe(self, topic: str, callback: MessageCallback) -> None:
+        """Subscribe to a topic on the broker.
+
+        The callback is called on paho's network thread.
+
+        Args:
+            topic: The topic to subscribe to.
+            callback: Called with the topic and payload of each message.
+
+        """
+        self.client.message_callback_add(
+            topic,
+            lambda _client, _userdata, message: callback(message.topic, message.payload),
+        )
+        self._subscriptions.append(topic)
+        self.client.subscribe(topic)
+
+    def close(self) -> None:
+        """Disconnect from the MQTT broker."""
         self.client.disconnect()
+        self.client.loop_stop()
+
+    def _on_connect(self, client: mqtt.Client, *_args: Any) -> None:  # noqa: ANN401
+        for topic in self._subscriptions:
+            client.subscribe(topic)
@@ -0,0 +1,147 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from van_assistant.devices.base.device import Device
+from van_assistant.notification_services.base import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Frames kept per sample, deeper stacks are cut at the root end
+MAX_DEPTH = 128
+# Upper bound on a single profile, however it was requested
+MAX_DURATION = 300.0
+MIN_INTERVAL = 0.001
+
+
+def _attribute(frame: FrameType) -> str | None:
+    # Only methods can belong to a device or sink, skip everything else cheaply
+    code = frame.f_code
+    if not code.co_argcount or code.co_varnames[0] != "self":
+        return None
+    owner = frame.f_locals.get("self")
+    if isinstance(owner, Device):
+        return f"device:{type(owner).__name__}"
+    if isinstance(owner, NotificationService):
+        return f"sink:{type(owner).__name__}"
+    return None
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stack of one thread from a background thread.
+
+    Sampling from another thread means stacks are captured even while the event
+    loop is stuck inside a callback, e.g. one from bleak. Each sample costs one
+    stack walk, so the overhead is bounded by the sampling interval.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path = ".",
+        interval: float = 0.005,
+        thread_id: int | None = None,
+    ) -> None:
+        """Create a profiler, call start() to begin sampling.
+
+        Args:
+            output_dir: Directory the collapsed stack files are written to.
+            interval: Seconds between samples.
+            thread_id: Thread to sample, the calling thread if not given.
+
+        """
+        self.output_dir = Path(output_dir)
+        self.interval = max(interval, MIN_INTERVAL)
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.attribution: Counter[str] = Counter()
+        self.samples = 0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Return whether a profile is being taken."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float) -> bool:
+        """Sample for a number of seconds, then write the profile.
+
+        Args:
+            duration: Seconds to sample for, capped at MAX_DURATION.
+
+        Returns:
+            False if a profile is already being taken.
+
+        """
+        if self.running:
+            return False
+
+        self.stacks.clear()
+        self.attribution.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(min(duration, MAX_DURATION),),
+            name="van-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Profiling for {min(duration, MAX_DURATION):.0f}s")
+        return True
+
+    def stop(self) -> None:
+        """Stop sampling early, the profile taken so far is still written."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample(self) -> None:
+        """Record the current stack of the profiled thread."""
+        frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+        if frame is None:
+            return
+
+        names = []
+        owners = set()
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}")
+            owner = _attribute(frame)
+            if owner is not None:
+                owners.add(owner)
+            frame = frame.f_back
+
+        self.samples += 1
+        self.stacks[";".join(reversed(names))] += 1
+        # A sample counts once for each device or sink on the stack
+        for owner in owners:
+            self.attribution[owner] += 1
+
+    def write(self) -> Path:
+        """Write the samples in collapsed stack format, as read by flamegraph tools.
+
+        Returns:
+            Path of the written file.
+
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"van-profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+        with path.open("w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self, duration: float) -> None:
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            self.sample()
+
+        path = self.write()
+        logger.info(f"Wrote {self.samples} samples to {path}")
+        for owner, count in self.attribution.most_common():
+            logger.info(f"{owner}: {count / max(self.samples, 1):.1%} of samples")
@@ -0,0 +1,670 @@
+import asyncio
+import contextlib
+import logging
+import signal
+from functools import partial
+
+from bleak import BleakClient, BleakScanner
+from bleak.exc import BleakError
+
+from van_assistant.aggregation.alerts import AlertRules, Rule
+from van_assistant.aggregation.battery_bank import BatteryBank
+from van_assistant.aggregation.derived import DerivedMetrics
+from van_assistant.aggregation.energy_ledger import EnergyCounter, EnergyLedger
+from van_assistant.aggregation.expression import compile_expression
+from van_assistant.aggregation.watchdog import StalenessWatchdog
+from van_assistant.api.server import ApiServer
+from van_assistant.capture.log import CaptureWriter
+from van_assistant.config import (
+    AppConfig,
+    ChangeDetectionConfig,
+    DeadbandConfig,
+    DeviceConfig,
+    LedgerConfig,
+    RuleConfig,
+    SinkConfig,
+)
+from van_assistant.devices.base.ble_connect_device import BLEConnectableDevice
+from van_assistant.devices.base.device import Device
+from van_assistant.devices.brands import SupportedBrand
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.devices.victron.devices.base import VictronDevice
+from van_assistant.devices.victron.identifier import (
+    MODE_DEVICE_MAP,
+    MODEL_PARSER_OVERRIDE,
+    VictronDeviceIdentifier,
+)
+from van_assistant.metrics import pipeline
+from van_assistant.metrics.pipeline import PipelineStats
+from van_assistant.metrics.reception import ReceptionStats
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.notification_services.batch import ReadingBatcher
+from van_assistant.notification_services.change_filter import ChangeFilter, Deadband
+from van_assistant.notification_services.fanout_service import FanoutService
+from van_assistant.notification_services.local_bus import LocalBusService
+from van_assistant.notification_services.logging_service import LoggingService
+from van_assistant.notification_services.mqtt_service import MQTTService
+from van_assistant.profiling.sampler import SamplingProfiler
+from van_assistant.scanners.adapters import (
+    AdapterClient,
+    AdapterTracker,
+    MultiAdapterScanner,
+    adapter_scanner_factory,
+    format_adapter_report,
+)
+from van_assistant.scanners.base_scanner import BaseScanner
+from van_assistant.scanners.device_scanner import DeviceScanner
+from van_assistant.scanners.offload_scanner import OffloadScanner
+from van_assistant.scanners.prefilter import Prefilter
+from van_assistant.scanners.scheduler import ScanScheduler
+from van_assistant.state.shared_table import SharedTableError, SharedTableWriter, table_layout
+from van_assistant.state.store import StateStore
+from van_assistant.util.ble_backend import ClientFactory, ScannerFactory
+from van_assistant.workers.pool import DecodeWorkerPool
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+PROFILE_SIGNAL = signal.SIGUSR1
+# Publish a number of seconds, or nothing for the configured duration, to take a profile
+PROFILE_TOPIC = "van/control/profile"
+
+VICTRON_TYPES: dict[str, type[VictronDevice]] = {
+    device_type.__name__: device_type
+    for device_type in (*MODE_DEVICE_MAP.values(), *MODEL_PARSER_OVERRIDE.values())
+}
+
+
+def build_notification_service(sinks: tuple[SinkConfig, ...]) -> NotificationService:
+    """Create the notification service publishing to every configured sink.
+
+    Args:
+        sinks: The configured sinks.
+
+    Returns:
+        A single service forwarding to all sinks.
+
+    """
+    services: list[NotificationService] = []
+    for sink in sinks:
+        service: NotificationService
+        if sink.type == "mqtt":
+            service = MQTTService(sink.host, sink.port, sink.username, sink.password)
+        elif sink.type == "local":
+            service = LocalBusService(sink.path, sink.buffer)
+        else:
+            service = LoggingService()
+        if sink.fields is not None:
+            service.fields = frozenset(sink.fields)
+        service.batched = sink.batch
+        services.append(service)
+
+    if len(services) == 1:
+        return services[0]
+    return FanoutService(services)
+
+
+def build_batcher(
+    config: AppConfig,
+    notification_service: NotificationService,
+) -> ReadingBatcher | None:
+    """Create the batcher collecting readings for the sinks receiving batches.
+
+    Args:
+        config: The application configuration.
+        notification_service: Service to publish the batches to.
+
+    Returns:
+        The batcher, or None if no sink receives batches.
+
+    """
+    if not notification_service.batched:
+        return None
+    return ReadingBatcher(
+        notification_service,
+        config.batching.interval,
+        config.batching.max_rows,
+    )
+
+
+def build_rules(
+    configs: tuple[RuleConfig, ...],
+    notification_service: NotificationService,
+    state: StateStore | None,
+) -> AlertRules:
+    """Create the alert rules engine from the configured rules.
+
+    Args:
+        configs: The configured rules.
+        notification_service: Service to send alerts to.
+        state: Store to keep the alert states in, if any.
+
+    Returns:
+        The engine with every rule added.
+
+    """
+    rules = AlertRules(notification_service, state)
+    for config in configs:
+        rules.add_rule(
+            Rule(
+                config.name,
+                config.address,
+                config.field,
+                config.above,
+                config.below,
+                config.equals,
+                config.not_equals,
+                config.hysteresis,
+                config.duration,
+                config.cooldown,
+            ),
+        )
+    return rules
+
+
+def build_ledger(
+    config: LedgerConfig,
+    notification_service: NotificationService,
+) -> EnergyLedger | None:
+    """Create the energy ledger from its configuration.
+
+    Args:
+        config: The ledger configuration.
+        notification_service: Service to publish the totals to.
+
+    Returns:
+        The ledger, or None if no counters are configured.
+
+    """
+    if not config.counters:
+        return None
+
+    ledger = EnergyLedger(
+        config.path,
+        notification_service,
+        config.checkpoint_interval,
+        config.max_gap,
+    )
+    for counter in config.counters:
+        ledger.add_counter(
+            EnergyCounter(
+                counter.name,
+                counter.address,
+                power=counter.power,
+                voltage=counter.voltage,
+                current=counter.current,
+                invert=counter.invert,
+            ),
+        )
+    return ledger
+
+
+def build_scan_scheduler(
+    config: AppConfig,
+    scanner: BaseScanner,
+    addresses: list[str],
+) -> ScanScheduler | None:
+    """Create the scan duty cycle scheduler from its configuration.
+
+    Args:
+        config: The validated configuration.
+        scanner: The scanner to duty cycle.
+        addresses: Addresses of the advertising devices expected every window.
+
+    Returns:
+        The scheduler, or None if duty cycling is disabled.
+
+    """
+    duty_cycle = config.scanning.duty_cycle
+    if not duty_cycle.enabled:
+        return None
+
+    longest_rest = duty_cycle.active + (
+        duty_cycle.max_idle if duty_cycle.adaptive else duty_cycle.idle
+    )
+    if config.watchdog.enabled and config.watchdog.default_timeout < longest_rest:
+        logger.warning(
+            f"Watchdog timeout {config.watchdog.default_timeout:.0f}s is shorter than the "
+            f"{longest_rest:.0f}s scan duty cycle, devices will be reported offline while resting",
+        )
+
+    return ScanScheduler(
+        scanner,
+        addresses,
+        active=duty_cycle.active,
+        idle=duty_cycle.idle,
+        adaptive=duty_cycle.adaptive,
+        min_idle=duty_cycle.min_idle,
+        max_idle=duty_cycle.max_idle,
+        stable_change=duty_cycle.stable_change,
+    )
+
+
+def build_change_filter(config: ChangeDetectionConfig) -> ChangeFilter | None:
+    """Create the filter publishing device values only when they change.
+
+    Args:
+        config: The change detection configuration.
+
+    Returns:
+        The filter, or None if change detection is disabled.
+
+    """
+    if not config.enabled:
+        return None
+
+    def deadband(deadband_config: DeadbandConfig) -> Deadband:
+        return Deadband(deadband_config.absolute, deadband_config.relative)
+
+    return ChangeFilter(
+        {name: deadband(deadband_config) for name, deadband_config in config.deadbands.items()},
+        deadband(config.default),
+        config.heartbeat or None,
+    )
+
+
+def build_shared_table(config: AppConfig) -> SharedTableWriter | None:
+    """Create the shared memory table of every configured device's latest values.
+
+    Its layout is generated from the record schemas of the Victron device types,
+    keeping the configured fields.
+
+    Args:
+        config: The application configuration.
+
+    Returns:
+        The table writer, or None if the table is disabled or cannot be created.
+
+    """
+    shared_memory = config.shared_memory
+    if not shared_memory.enabled:
+        return None
+
+    layout = table_layout(
+        [device.address for device in config.devices],
+        VICTRON_TYPES.values(),
+        shared_memory.fields,
+        {device.address: device.name for device in config.devices if device.name},
+    )
+    try:
+        return SharedTableWriter(shared_memory.path, layout)
+    except SharedTableError as e:
+        logger.warning(f"Not sharing latest values with local processes: {e}")
+        return None
+
+
+def _profile_duration(payload: bytes) -> float | None:
+    try:
+        return float(payload) if payload.strip() else None
+    except ValueError:
+        logger.warning(f"Ignoring profile request with invalid duration {payload!r}")
+        return None
+
+
+class Runtime:
+    """Runs every configured device and the scanner until asked to stop."""
+
+    def __init__(
+        self,
+        config: AppConfig,
+        notification_service: NotificationService | None = None,
+        scanner_factory: ScannerFactory = BleakScanner,
+        client_factory: ClientFactory = BleakClient,
+        capture: CaptureWriter | None = None,
+    ) -> None:
+        """Build the devices, scanner and aggregators described by the config.
+
+        Args:
+            config: The validated configuration.
+            notification_service: Service to publish to, built from the sinks if not given.
+            scanner_factory: Callable creating the BLE scanner, e.g. a simulator.
+            client_factory: Callable creating BLE clients, e.g. a simulator.
+            capture: Capture file recording the raw advertisements and notifications.
+
+        """
+        self.config = config
+        self.notification_service = notification_service or build_notification_service(
+            config.sinks,
+        )
+        self.devices: dict[str, Device] = {}
+        self.banks: list[BatteryBank] = []
+        self.pool: DecodeWorkerPool | None = None
+        self.profiler: SamplingProfiler | None = None
+        # Only the API reads the store, and storing a reading decodes every field of it
+        self.state = StateStore() if config.api.enabled else None
+        self.rules = build_rules(config.rules, self.notification_service, self.state)
+        self.derived = DerivedMetrics(self.notification_service, self.state)
+        by_name = {device.name: device.address for device in config.devices if device.name}
+        for derived_config in config.derived:
+            references, compute = compile_expression(derived_config.expression)
+            self.derived.add_formula(
+                derived_config.name,
+                tuple((by_name[device_name], field) for device_name, field in references),
+                compute,
+            )
+        self.watchdog: StalenessWatchdog | None = None
+        if config.watchdog.enabled:
+            self.watchdog = StalenessWatchdog(
+                self.notification_service,
+                config.watchdog.timeouts,
+                config.watchdog.default_timeout,
+            )
+        self.ledger = build_ledger(config.ledger, self.notification_service)
+        self.batcher = build_batcher(config, self.notification_service)
+        self.shared_table = build_shared_table(config)
+        self.change_filter = build_change_filter(config.change_detection)
+        self.api: ApiServer | None = None
+        if self.state is not None:
+            self.api = ApiServer(
+                self.state,
+                config.api.host,
+                config.api.port,
+                min_interval=config.api.min_interval,
+                max_clients=config.api.max_clients,
+            )
+        self._stopping = asyncio.Event()
+
+        victron_configs = [
+            device_config
+            for device_config in config.devices
+            if device_config.brand == SupportedBrand.VICTRON
+        ]
+        # Per adapter statistics, when scanning on several adapters
+        self.adapters: AdapterTracker | None = None
+        self.scanner = self._build_scanner(victron_configs, scanner_factory)
+        # With several adapters the scan also tells which one hears each Remco pack best
+        self._scanning = bool(victron_configs) or self.adapters is not None
+        if self.adapters is not None and client_factory is BleakClient:
+            client_factory = partial(
+                AdapterClient,
+                tracker=self.adapters,
+                default_adapter=config.scanning.adapters[0],
+            )
+        self.scanner.capture = capture
+        self.reception = ReceptionStats(device_config.address for device_config in victron_configs)
+        self.scanner.reception = self.reception
+        self.scan_scheduler = build_scan_scheduler(
+            config,
+            self.scanner,
+            [device_config.address for device_config in victron_configs],
+        )
+
+        for device_config in config.devices:
+            if device_config.brand == SupportedBrand.REMCO:
+                battery = RemcoBattery(
+                    device_config.address,
+                    self.notification_service,
+                    client_factory,
+                    config.polling.interval,
+                )
+                battery.capture = capture
+                self._add_device(battery)
+
+        for bank_config in config.banks:
+            bank = BatteryBank(bank_config.name, self.notification_service, bank_config.stale_after)
+            for address in bank_config.packs:
+                bank.add_pack(self.devices[address])
+            self.banks.append(bank)
+
+    @property
+    def stats(self) -> PipelineStats | None:
+        """Return the pipeline statistics, or None if metrics are disabled."""
+        return pipeline.active
+
+    def stop(self) -> None:
+        """Ask the runtime to shut down."""
+        self._stopping.set()
+
+    def profile(self, duration: float | None = None) -> bool:
+        """Sample the event loop thread in the background and write a profile.
+
+        Args:
+            duration: Seconds to sample for, the configured duration if not given.
+
+        Returns:
+            False if the runtime is not running or a profile is already being taken.
+
+        """
+        if self.profiler is None:
+            return False
+        return self.profiler.start(duration or self.config.profiler.duration)
+
+    async def run(self) -> None:
+        """Run until stopped by stop() or SIGTERM/SIGINT."""
+        loop = asyncio.get_running_loop()
+        self._install_controls(loop)
+
+        connectable = [
+            device for device in self.devices.values() if isinstance(device, BLEConnectableDevice)
+        ]
+
+        if self.config.metrics.enabled:
+            pipeline.enable()
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(self._run_connectable(device)) for device in connectable]
+                tasks.extend(self._start_background_tasks(tg))
+                scheduling = await self._start_scanning(tg)
+
+                await self._stopping.wait()
+                logger.info("Shutting down")
+
+                await self._stop_scanning(scheduling)
+                for device in connectable:
+                    await self._stop_device(device)
+                for task in tasks:
+                    task.cancel()
+        finally:
+            self._remove_controls(loop)
+            if self.pool is not None:
+                self.pool.stop()
+            if self.config.metrics.enabled:
+                self._dump_once()
+                pipeline.disable()
+            if self.shared_table is not None:
+                self.shared_table.close()
+            self.notification_service.close()
+
+    def _install_controls(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Handle the shutdown and profiling signals and control topics."""
+        for sig in SHUTDOWN_SIGNALS:
+            loop.add_signal_handler(sig, self.stop)
+
+        # Created here so the profiler samples the thread running the event loop
+        self.profiler = SamplingProfiler(
+            self.config.profiler.output_dir,
+            self.config.profiler.interval,
+        )
+        loop.add_signal_handler(PROFILE_SIGNAL, self.profile)
+        self.notification_service.subscribe(
+            PROFILE_TOPIC,
+            lambda _topic, payload: loop.call_soon_threadsafe(
+                self.profile,
+                _profile_duration(payload),
+            ),
+        )
+
+    def _remove_controls(self, loop: asyncio.AbstractEventLoop) -> None:
+        for sig in (*SHUTDOWN_SIGNALS, PROFILE_SIGNAL):
+            loop.remove_signal_handler(sig)
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+
+    async def _start_scanning(self, tg: asyncio.TaskGroup) -> asyncio.Task | None:
+        """Start scanning, or the task duty cycling the scanner."""
+        if not self._scanning:
+            return None
+        if self.scan_scheduler is not None:
+            return tg.create_task(self.scan_scheduler.run())
+        await self.scanner.start()
+        return None
+
+    async def _stop_scanning(self, scheduling: asyncio.Task | None) -> None:
+        """Stop scanning, the scheduler stops the scanner if it is in an active window."""
+        if not self._scanning:
+            return
+        if scheduling is None:
+            await self.scanner.stop()
+            return
+        scheduling.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await scheduling
+
+    def _start_background_tasks(self, tg: asyncio.TaskGroup) -> list[asyncio.Task]:
+        """Start the tasks running alongside the devices until shutdown."""
+        tasks = []
+        if self.banks:
+            tasks.append(tg.create_task(self._check_banks()))
+        if self.config.metrics.enabled:
+            tasks.append(tg.create_task(self._dump_stats()))
+        if self.watchdog is not None:
+            tasks.append(tg.create_task(self.watchdog.run()))
+        if self.ledger is not None:
+            tasks.append(tg.create_task(self.ledger.run()))
+        if self.batcher is not None:
+            tasks.append(tg.create_task(self.batcher.run()))
+        if self.api is not None:
+            tasks.append(tg.create_task(self.api.run()))
+        if self.pool is not None:
+            self.pool.start()
+            tasks.append(tg.create_task(self.pool.run()))
+        return tasks
+
+    def _build_scanner(
+        self,
+        victron_configs: list[DeviceConfig],
+        scanner_factory: ScannerFactory,
+    ) -> BaseScanner:
+        scanning = self.config.scanning
+        if scanner_factory is BleakScanner:
+            scanner_factory = self._bleak_scanner_factory()
+
+        scanner: BaseScanner
+        if victron_configs and self.config.workers.count:
+            self.pool = DecodeWorkerPool(
+                {
+                    device_config.address: device_config.encryption_key or ""
+                    for device_config in victron_configs
+                },
+                self.config.workers.count,
+                self._publish_decoded,
+                self.config.workers.ring_capacity,
+            )
+            scanner = OffloadScanner(self.pool, scanner_factory)
+        else:
+            scanner = DeviceScanner(scanner_factory)
+            for device_config in victron_configs:
+                # The record type is only known once the device advertises
+                scanner.add_device_factory(
+                    device_config.address,
+                    lambda data, device_config=device_config: self._create_victron_device(
+                        device_config,
+                        data,
+                    ),
+                )
+
+        if scanning.prefilter:
+            scanner.prefilter = Prefilter(
+                device_config.address for device_config in victron_configs
+            )
+        return scanner
+
+    def _bleak_scanner_factory(self) -> ScannerFactory:
+        scanning = self.config.scanning
+        if len(scanning.adapters) <= 1:
+            adapter = scanning.adapters[0] if scanning.adapters else None
+            return adapter_scanner_factory(adapter, passive=scanning.passive)
+
+        tracker = self.adapters = AdapterTracker(scanning.adapters)
+        factories = {
+            adapter: adapter_scanner_factory(adapter, passive=scanning.passive)
+            for adapter in scanning.adapters
+        }
+        return lambda callback: MultiAdapterScanner(callback, factories, tracker)
+
+    def _create_victron_device(
+        self,
+        device_config: DeviceConfig,
+        data: bytes,
+    ) -> VictronDevice | None:
+        device_type = VictronDeviceIdentifier.detect_device_type(data)
+        if device_type is None:
+            return None
+
+        device = device_type(
+            device_config.address,
+            self.notification_service,
+            device_config.encryption_key,
+        )
+        self._add_device(device)
+        return device
+
+    def _publish_decoded(self, address: str, type_name: str, parsed: dict) -> None:
+        """Publish a record decoded by a worker process."""
+        device = self.devices.get(address)
+        if device is None:
+            device = VICTRON_TYPES[type_name](address, self.notification_service)
+            self._add_device(device)
+        device.publish_data(parsed)
+
+    def _add_device(self, device: Device) -> None:
+        self.devices[device.addr] = device
+        # First, so alerts go out before the telemetry of the same reading
+        self.rules.watch(device)
+        # Before the derived values, which are stored on top of the device fields
+        if self.state is not None:
+            self.state.watch(device)
+        self.derived.watch(device)
+        if self.watchdog is not None:
+            self.watchdog.watch(device)
+        if self.ledger is not None:
+            self.ledger.watch(device)
+        if self.batcher is not None:
+            self.batcher.watch(device)
+        if self.shared_table is not None:
+            self.shared_table.watch(device)
+        if self.scan_scheduler is not None:
+            self.scan_scheduler.watch(device)
+        if self.change_filter is not None:
+            self.change_filter.watch(device)
+
+    async def _run_connectable(self, device: BLEConnectableDevice) -> None:
+        """Keep a connectable device running, reconnecting after failures."""
+        while not self._stopping.is_set():
+            try:
+                await device.start()
+            except (BleakError, TimeoutError, OSError) as e:
+                logger.warning(f"Lost connection to {device.addr}: {e}")
+                await self._stop_device(device)
+
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._stopping.wait(),
+                    self.config.polling.reconnect_delay,
+                )
+
+    async def _stop_device(self, device: Device) -> None:
+        try:
+            await device.stop()
+        except (BleakError, TimeoutError, OSError) as e:
+            logger.warning(f"Failed to stop {device.addr} cleanly: {e}")
+
+    async def _check_banks(self) -> None:
+        """Periodically flag packs that stopped reporting."""
+        while True:
+            await asyncio.sleep(self.config.polling.stale_check_interval)
+            for bank in self.banks:
+                bank.check_stale()
+
+    async def _dump_stats(self) -> None:
+        """Periodically log the pipeline statistics."""
+        while True:
+            await asyncio.sleep(self.config.metrics.dump_interval)
+            self._dump_once()
+
+    def _dump_once(self) -> None:
+        if pipeline.active is not None:
+            pipeline.active.dump()
+        if self.adapters is not None:
+            logger.info(f"Adapter throughput:\n{format_adapter_report(self.adapters)}")
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from bleak import BleakClient, BleakScanner
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData, AdvertisementDataCallback
+from bleak.exc import BleakError
+
+from van_assistant.scanners.prefilter import passive_scanner_factory
+from van_assistant.util.ble_backend import ClientBackend, ScannerBackend, ScannerFactory
+
+if TYPE_CHECKING:
+    from bleak.args.bluez import BlueZScannerArgs
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest RSSI in each adapter's moving average per device
+RSSI_WEIGHT = 0.2
+# Seconds after which an adapter that stopped hearing a device no longer counts
+RSSI_TIMEOUT = 30.0
+# Recently seen payloads remembered to tell which adapter delivered each first
+MAX_RECENT = 1000
+
+ADAPTER_REPORT_HEADER = f"{'adapter':<10} {'adv/s':>7} {'first/s':>7} {'first':>6} {'devices':>7}"
+
+
+def adapter_scanner_factory(adapter: str | None = None, *, passive: bool = False) -> ScannerFactory:
+    """Return a factory of bleak scanners on one Bluetooth adapter.
+
+    Args:
+        adapter: Adapter to scan on, e.g. hci1, the default one if not given.
+        passive: Scan passively for the supported manufacturers only.
+
+    """
+    if passive:
+        return passive_scanner_factory(adapter=adapter)
+    if adapter is None:
+        return BleakScanner
+
+    bluez: BlueZScannerArgs = {"adapter": adapter}
+    return lambda callback: BleakScanner(callback, bluez=bluez)
+
+
+class AdapterStats:
+    """Throughput of one adapter."""
+
+    __slots__ = ("adapter", "advertisements", "first", "first_seen", "last_seen")
+
+    def __init__(self, adapter: str) -> None:
+        """Create statistics for an adapter that received nothing yet.
+
+        Args:
+            adapter: Name of the adapter, e.g. hci0.
+
+        """
+        self.adapter = adapter
+        # Every advertisement received, and those no other adapter delivered before
+        self.advertisements = 0
+        self.first = 0
+        self.first_seen = 0.0
+        self.last_seen = 0.0
+
+    def rate(self, count: int) -> float:
+        """Return a count per second over the time the adapter has been receiving.
+
+        Args:
+            count: The count, e.g. advertisements or first.
+
+        """
+        elapsed = self.last_seen - self.first_seen
+        return count / elapsed if elapsed > 0 else 0.0
+
+
+class AdapterTracker:
+    """Per adapter throughput and the adapter hearing each device best.
+
+    An advertisement heard by several adapters counts as first for the one that
+    delivered it first only, so an adapter's first count is what the gateway would
+    lose without it.
+    """
+
+    def __init__(
+        self,
+        adapters: Iterable[str],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a tracker.
+
+        Args:
+            adapters: Names of the adapters scanned on.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self._clock = clock
+        self.stats = {adapter: AdapterStats(adapter) for adapter in adapters}
+        # Moving average RSSI and when it was last updated, per device and adapter
+        self._rssi: dict[str, dict[str, tuple[float, float]]] = {}
+        self._recent: set[tuple[str, bytes]] = set()
+
+    def observe(self, adapter: str, ble_device: BLEDevice, ad_data: AdvertisementData) -> None:
+        """Record an advertisement received by an adapter.
+
+        Args:
+            adapter: The adapter that received it.
+            ble_device: The advertising device.
+            ad_data: The advertisement data.
+
+        """
+        now = self._clock()
+        stats = self.stats[adapter]
+        if not stats.advertisements:
+            stats.first_seen = now
+        stats.last_seen = now
+        stats.advertisements += 1
+
+        address = ble_device.address
+        for data in ad_data.manufacturer_data.values():
+            key = (address, data)
+            if key not in self._recent:
+                if len(self._recent) > MAX_RECENT:
+                    self._recent = set()
+                self._recent.add(key)
+                stats.first += 1
+
+        by_adapter = self._rssi.setdefault(address, {})
+        previous = by_adapter.get(adapter)
+        rssi = float(ad_data.rssi)
+        if previous is not None and now - previous[1] < RSSI_TIMEOUT:
+            rssi = previous[0] + (rssi - previous[0]) * RSSI_WEIGHT
+        by_adapter[adapter] = (rssi, now)
+
+    def best_adapter(self, address: str) -> str | None:
+        """Return the adapter recently hearing a device with the strongest signal.
+
+        Args:
+            address: Address of the device.
+
+        Returns:
+            The adapter, or None if no adapter heard the device recently.
+
+        """
+        now = self._clock()
+        heard = [
+            (rssi, adapter)
+            for adapter, (rssi, last_seen) in self._rssi.get(address, {}).items()
+            if now - last_seen < RSSI_TIMEOUT
+        ]
+        return max(heard)[1] if heard else None
+
+    def devices(self, adapter: str) -> int:
+        """Return how many devices an adapter heard best.
+
+        Args:
+            adapter: Name of the adapter.
+
+        """
+        return sum(self.best_adapter(address) == adapter for address in self._rssi)
+
+
+def format_adapter_report(tracker: AdapterTracker) -> str:
+    """Return a table of every adapter's throughput.
+
+    Args:
+        tracker: The tracker to report.
+
+    """
+    lines = [ADAPTER_REPORT_HEADER]
+    lines.extend(
+        f"{stats.adapter:<10} {stats.rate(stats.advertisements):7.2f} "
+        f"{stats.rate(stats.first):7.2f} {stats.first:6d} {tracker.devices(stats.adapter):7d}"
+        for stats in tracker.stats.values()
+    )
+    return "\n".join(lines)
+
+
+class MultiAdapterScanner:
+    """Scans on several adapters at once, merging their advertisements into one stream.
+
+    Every advertisement is passed on whichever adapter received it, so the same
+    payload heard by two adapters arrives twice and the scanner's de-duplication
+    drops the second copy, as it does for repeats heard by a single adapter.
+    """
+
+    def __init__(
+        self,
+        detection_callback: AdvertisementDataCallback,
+        factories: Mapping[str, ScannerFactory],
+        tracker: AdapterTracker,
+    ) -> None:
+        """Create a scanner per adapter.
+
+        Args:
+            detection_callback: Callback receiving the merged advertisements.
+            factories: Factory of the scanner for each adapter, by adapter name.
+            tracker: Tracker recording what each adapter receives.
+
+        """
+        self._detection_callback = detection_callback
+        self._tracker = tracker
+        self._scanners = {
+            adapter: factory(self._adapter_callback(adapter))
+            for adapter, factory in factories.items()
+        }
+        self._started: list[ScannerBackend] = []
+
+    def _adapter_callback(self, adapter: str) -> Callable[[BLEDevice, AdvertisementData], None]:
+        def callback(ble_device: BLEDevice, ad_data: AdvertisementData) -> None:
+            self._tracker.observe(adapter, ble_device, ad_data)
+            self._detection_callback(ble_device, ad_data)
+
+        return callback
+
+    async def start(self) -> None:
+        """Start scanning on every adapter that can scan.
+
+        Raises:
+            BleakError: If no adapter could be started.
+
+        """
+        error: BleakError | None = None
+        for adapter, scanner in self._scanners.items():
+            try:
+                await scanner.start()
+            except BleakError as e:
+                logger.warning(f"Cannot scan on adapter {adapter}: {e}")
+                error = e
+            else:
+                self._started.append(scanner)
+        if not self._started and error is not None:
+            raise error
+
+    async def stop(self) -> None:
+        """Stop scanning on every adapter."""
+        await asyncio.gather(*(scanner.stop() for scanner in self._started))
+        self._started = []
+
+
+class AdapterClient:
+    """BLE client connecting through the adapter hearing the device best.
+
+    The adapter is chosen again on every connect, so a device that moved closer to
+    another adapter is reached through that one after the next reconnect.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        tracker: AdapterTracker,
+        default_adapter: str,
+        client_factory: Callable[[str, str], ClientBackend] | None = None,
+    ) -> None:
+        """Create a client, connected by connect().
+
+        Args:
+            address: BLE MAC address of the device.
+            tracker: Tracker knowing which adapter hears the device best.
+            default_adapter: Adapter used while no adapter heard the device.
+            client_factory: Callable creating a client for an address and adapter.
+
+        """
+        self.address = address
+        self._tracker = tracker
+        self._default_adapter = default_adapter
+        self._client_factory = client_factory or _bleak_client
+        self._client = self._client_factory(address, default_adapter)
+
+    async def connect(self) -> Any:  # noqa: ANN401
+        """Connect through the adapter currently hearing the device best."""
+        adapter = self._tracker.best_adapter(self.address) or self._default_adapter
+        logger.info(f"Connecting to {self.address} through {adapter}")
+        self._client = self._client_factory(self.address, adapter)
+        return await self._client.connect()
+
+    async def disconnect(self) -> Any:  # noqa: ANN401
+        """Disconnect from the device."""
+        return await self._client.disconnect()
+
+    async def start_notify(
+        self,
+        char_specifier: Any,  # noqa: ANN401
+        callback: Callable[[Any, bytearray], Awaitable[None] | None],
+    ) -> None:
+        """Subscribe to notifications from a characteristic."""
+        await self._client.start_notify(char_specifier, callback)
+
+    async def write_gatt_char(
+        self,
+        char_specifier: Any,  # noqa: ANN401
+        data: bytes,
+        response: bool | None = None,  # noqa: FBT001
+    ) -> None:
+        """Write to a characteristic."""
+        await self._client.write_gatt_char(char_specifier, data, response=response)
+
+
+def _bleak_client(address: str, adapter: str) -> ClientBackend:
+    return BleakClient(address, bluez={"adapter": adapter})
@@ -1,19 +1,51 @@
 from abc import abstractmethod
+from time import perf_counter_ns
+from typing import TYPE_CHECKING
 
 from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
+from van_assistant.devices.victron.devices.base import (
+    HEADER_SIZE,
+    IV_OFFSET,
+    VICTRON_MANUFACTURER_ID,
+)
+from van_assistant.metrics import pipeline
+from van_assistant.scanners.replay_window import ReplayWindow, Verdict
+from van_assistant.util.ble_backend import ScannerFactory
+
+if TYPE_CHECKING:
+    from van_assistant.capture.log import CaptureWriter
+    from van_assistant.metrics.reception import ReceptionStats
+    from van_assistant.scanners.prefilter import Prefilter
+
 MAX_SEEN_DATA = 1000
 
 
 class BaseScanner:
     """Base class for BLE scanner."""
 
-    def __init__(self) -> None:
-        """Initialize the scanner."""
-        self._scanner = BleakScanner(self.detection_callback)
+    def __init__(
+        self,
+        scanner_factory: ScannerFactory = BleakScanner,
+    ) -> None:
+        """Initialize the scanner.
+
+        Args:
+            scanner_factory: Callable creating the BLE scanner for a detection callback,
+                e.g. a simulator.
+
+        """
+        self._scanner = scanner_factory(self.detection_callback)
         self._seen_data: set[bytes] = set()
+        self._replay_window = ReplayWindow()
+        # Set to record every advertisement before de-duplication
+        self.capture: CaptureWriter | None = None
+        # Set to track packet loss and RSSI, also before de-duplication
+        self.reception: ReceptionStats | None = None
+        # Set to drop advertisements from unconfigured devices before anything else
+        self.prefilter: Prefilter | None = None
 
     def detection_callback(
         self,
@@ -27,17 +59,48 @@ class BaseScanner:
             ad_data: The advertisement data associated with the detected device.
 
         """
+        stats = pipeline.active
+        if self.prefilter is not None and not self.prefilter.accepts(ble_device.address):
+            if stats is not None:
+                stats.count("rejected")
+            return
+
         for manufacturer_id, data in ad_data.manufacturer_data.items():
-            if data in self._seen_data:
+            if stats is not None:
+                stats.intake_ns = perf_counter_ns()
+                stats.count("in")
+
+            if self.capture is not None:
+                self.capture.advertisement(ble_device.address, manufacturer_id, data, ad_data.rssi)
+            if self.reception is not None:
+                self.reception.observe(ble_device.address, manufacturer_id, data, ad_data.rssi)
+
+            verdict = self._check(ble_device.address, manufacturer_id, data)
+            if verdict is not Verdict.NEW:
+                if stats is not None:
+                    stats.count("deduped" if verdict is Verdict.DUPLICATE else "stale")
                 continue
 
-            # De-duplicate advertisements
-            if len(self._seen_data) > MAX_SEEN_DATA:
-                self._seen_data = set()
-            self._seen_data.add(data)
-
             self.callback(manufacturer_id, ble_device, data)
 
+            if stats is not None:
+                # Anything published later did not come from this packet
+                stats.intake_ns = 0
+
+    def _check(self, address: str, manufacturer_id: int, data: bytes) -> Verdict:
+        # Victron payloads are identified by the IV in their header, anything else
+        # by comparing the whole payload against the recently seen ones
+        if manufacturer_id == VICTRON_MANUFACTURER_ID and len(data) > HEADER_SIZE:
+            iv = data[IV_OFFSET] | data[IV_OFFSET + 1] << 8
+            return self._replay_window.check(address, iv)
+
+        if data in self._seen_data:
+            return Verdict.DUPLICATE
+        if len(self._seen_data) > MAX_SEEN_DATA:
+            self._seen_data = set()
+        self._seen_data.add(data)
+        return Verdict.NEW
+
     async def start(self) -> None:
         """Start the BLE scanner."""
         await self._scanner.start()
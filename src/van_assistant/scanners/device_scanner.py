@@ -1,16 +1,62 @@
 import logging
+from collections.abc import Callable
 
+from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
 
+from van_assistant.devices.base.ble_ad_device import BLEAdvertisementDevice
 from van_assistant.devices.brands import SupportedBrand
 from van_assistant.scanners.base_scanner import BaseScanner
+from van_assistant.util.background_logging import RateLimitedLogger
+from van_assistant.util.ble_backend import ScannerFactory
 from van_assistant.util.bluetooth_providers import COMPANY_IDS
 
 logger = logging.getLogger(__name__)
+# Advertisements of devices that are not configured arrive many times a second
+packet_logger = RateLimitedLogger(logger)
+
+DeviceFactory = Callable[[bytes], BLEAdvertisementDevice | None]
 
 
 class DeviceScanner(BaseScanner):
-    """Scanner for BLE devices that identifies supported brands."""
+    """Scanner for BLE devices that identifies supported brands.
+
+    Advertisements from registered devices are routed straight to them; everything
+    else is only identified and logged.
+    """
+
+    def __init__(self, scanner_factory: ScannerFactory = BleakScanner) -> None:
+        """Initialize the scanner.
+
+        Args:
+            scanner_factory: Callable creating the BLE scanner for a detection callback.
+
+        """
+        super().__init__(scanner_factory)
+        self._devices: dict[str, BLEAdvertisementDevice] = {}
+        self._device_factories: dict[str, DeviceFactory] = {}
+
+    def add_device(self, device: BLEAdvertisementDevice) -> None:
+        """Route advertisements from the device's address to the device.
+
+        Args:
+            device: The device to route advertisements to.
+
+        """
+        self._devices[device.addr] = device
+
+    def add_device_factory(self, address: str, factory: DeviceFactory) -> None:
+        """Create a device from the first advertisement seen from an address.
+
+        Used for devices whose type is only known once they advertise.
+
+        Args:
+            address: BLE MAC address of the device.
+            factory: Callable creating the device from its advertisement data, or
+                returning None if the advertisement does not identify it.
+
+        """
+        self._device_factories[address] = factory
 
     def get_brand_name(self, manufacturer_id: int) -> str | None:
         """Get the brand name associated with a manufacturer ID.
@@ -24,7 +70,7 @@ class DeviceScanner(BaseScanner):
         """
         brand_name = COMPANY_IDS.get(manufacturer_id)
         if brand_name is None:
-            logger.info(f"Unknown manufacturer ID: {manufacturer_id}")
+            packet_logger.info(manufacturer_id, "Unknown manufacturer ID: %s", manufacturer_id)
             return None
         return brand_name
 
@@ -41,13 +87,13 @@ class DeviceScanner(BaseScanner):
         try:
             return SupportedBrand(brand_name)
         except ValueError:
-            logger.info(f"Brand not supported: {brand_name}")
+            packet_logger.info(brand_name, "Brand not supported: %s", brand_name)
 
     def callback(
         self,
         manufacturer_id: int,
         ble_device: BLEDevice,
-        data: bytes,  # noqa: ARG002
+        data: bytes,
     ) -> None:
         """Handle a detected BLE device.
 
@@ -57,7 +103,15 @@ class DeviceScanner(BaseScanner):
             data: The advertisement data associated with the detected device.
 
         """
-        logger.info(f"Detected {ble_device}")
+        device = self._devices.get(ble_device.address)
+        if device is None and ble_device.address in self._device_factories:
+            device = self._create_device(ble_device.address, data)
+
+        if device is not None:
+            device.handle_advertisement(data)
+            return
+
+        packet_logger.debug(ble_device.address, "Detected %s", ble_device)
 
         brand_name = self.get_brand_name(manufacturer_id)
         if brand_name is None:
@@ -67,4 +121,19 @@ class DeviceScanner(BaseScanner):
         if supported_brand is None:
             return
 
-        logger.info(f"Detected supported brand: {supported_brand.value} ({brand_name})")
+        packet_logger.info(
+            ble_device.address,
+            "Detected supported brand: %s (%s)",
+            supported_brand.value,
+            brand_name,
+        )
+
+    def _create_device(self, address: str, data: bytes) -> BLEAdvertisementDevice | None:
+        device = self._device_factories[address](data)
+        if device is None:
+            return None
+
+        logger.info(f"Identified {address} as {type(device).__name__}")
+        del self._device_factories[address]
+        self.add_device(device)
+        return device
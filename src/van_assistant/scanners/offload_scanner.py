@@ -0,0 +1,41 @@
+from bleak import BleakScanner
+from bleak.backends.device import BLEDevice
+
+from van_assistant.scanners.base_scanner import BaseScanner
+from van_assistant.util.ble_backend import ScannerFactory
+from van_assistant.workers.pool import DecodeWorkerPool
+
+
+class OffloadScanner(BaseScanner):
+    """Scanner handing advertisements of configured devices to decode worker processes."""
+
+    def __init__(
+        self,
+        pool: DecodeWorkerPool,
+        scanner_factory: ScannerFactory = BleakScanner,
+    ) -> None:
+        """Initialize the scanner.
+
+        Args:
+            pool: The worker pool decoding the advertisements.
+            scanner_factory: Callable creating the BLE scanner for a detection callback.
+
+        """
+        super().__init__(scanner_factory)
+        self._pool = pool
+
+    def callback(
+        self,
+        manufacturer_id: int,
+        ble_device: BLEDevice,
+        data: bytes,
+    ) -> None:
+        """Queue the advertisement for decoding if it comes from a configured device.
+
+        Args:
+            manufacturer_id: The manufacturer ID associated with the device.
+            ble_device: The BLE device that was detected.
+            data: The manufacturer-specific advertisement data.
+
+        """
+        self._pool.submit(ble_device.address, manufacturer_id, data)
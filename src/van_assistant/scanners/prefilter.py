@@ -0,0 +1,88 @@
+from collections.abc import Iterable
+
+from bleak import BleakScanner
+from bleak.args.bluez import BlueZScannerArgs, OrPattern
+from bleak.assigned_numbers import AdvertisementDataType
+from bleak.backends.scanner import AdvertisementDataCallback
+
+from van_assistant.devices.remco.devices.base import REMCO_MANUFACTURER_ID
+from van_assistant.devices.victron.devices.base import VICTRON_MANUFACTURER_ID
+from van_assistant.util.ble_backend import ScannerBackend, ScannerFactory
+
+# Manufacturer IDs of the supported brands, the only advertisements worth waking up for
+MANUFACTURER_IDS = (VICTRON_MANUFACTURER_ID, REMCO_MANUFACTURER_ID)
+
+
+class Prefilter:
+    """Fast reject of advertisements from devices that are not configured.
+
+    In a busy campground most advertisements come from phones, trackers and other
+    vans. Checking the address against a set before anything else is done costs a
+    single hash lookup, and is the only filter on platforms that cannot filter in
+    the Bluetooth stack, or for addresses, which BlueZ patterns cannot match.
+    """
+
+    def __init__(self, addresses: Iterable[str]) -> None:
+        """Create a prefilter.
+
+        Args:
+            addresses: Addresses of the devices whose advertisements are accepted.
+
+        """
+        self.addresses = frozenset(address.upper() for address in addresses)
+
+    def accepts(self, address: str) -> bool:
+        """Return whether advertisements from an address should be processed.
+
+        Args:
+            address: Address of the advertising device.
+
+        """
+        return address in self.addresses
+
+
+def or_patterns(manufacturer_ids: Iterable[int] = MANUFACTURER_IDS) -> list[OrPattern]:
+    """Return BlueZ patterns matching manufacturer data from the given manufacturers.
+
+    Manufacturer specific data starts with the little endian manufacturer ID, so a
+    pattern on its first two bytes selects the manufacturer.
+
+    Args:
+        manufacturer_ids: Manufacturer IDs to match.
+
+    """
+    return [
+        OrPattern(
+            0,
+            AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA,
+            manufacturer_id.to_bytes(2, "little"),
+        )
+        for manufacturer_id in manufacturer_ids
+    ]
+
+
+def passive_scanner_factory(
+    manufacturer_ids: Iterable[int] = MANUFACTURER_IDS,
+    adapter: str | None = None,
+) -> ScannerFactory:
+    """Return a factory of BlueZ passive scanners reporting only the given manufacturers.
+
+    The patterns are registered as a BlueZ advertisement monitor, so advertisements
+    from other manufacturers are dropped by bluetoothd and never reach Python.
+    Passive scanning also sends no scan requests, so devices are not asked for
+    scan responses. Needs BlueZ 5.56 or later with experimental features enabled.
+
+    Args:
+        manufacturer_ids: Manufacturer IDs to report.
+        adapter: Bluetooth adapter to scan on, e.g. hci1, the default one if not given.
+
+    """
+    patterns = or_patterns(manufacturer_ids)
+
+    def factory(callback: AdvertisementDataCallback) -> ScannerBackend:
+        bluez: BlueZScannerArgs = {"or_patterns": patterns}
+        if adapter is not None:
+            bluez["adapter"] = adapter
+        return BleakScanner(callback, scanning_mode="passive", bluez=bluez)
+
+    return factory
@@ -0,0 +1,92 @@
+from enum import Enum
+
+# IVs behind the highest seen that are still tracked, like the IPsec replay window
+WINDOW_SIZE = 64
+# Consecutive stale IVs, each one past the previous, after which the device is
+# taken to have restarted its sequence
+RESYNC_AFTER = 3
+# Most devices tracked, windows are forgotten beyond this
+MAX_WINDOWS = 1000
+
+_IV_RANGE = 0x10000
+_WINDOW_MASK = (1 << WINDOW_SIZE) - 1
+
+
+class Verdict(Enum):
+    """Outcome of checking an IV against a device's replay window."""
+
+    NEW = "new"
+    DUPLICATE = "duplicate"
+    STALE = "stale"
+
+
+class _Window:
+    """Highest IV seen from a device and which IVs just below it were seen."""
+
+    __slots__ = ("bitmap", "candidate", "run", "top")
+
+    def __init__(self, iv: int) -> None:
+        self.top = iv
+        # Bit n is set when IV top - n was seen
+        self.bitmap = 1
+        # Last stale IV and how many stale IVs in a row led up to it
+        self.candidate = -1
+        self.run = 0
+
+
+class ReplayWindow:
+    """Sliding per-device window over 16-bit sequence numbers, e.g. Victron IVs.
+
+    A payload is new if its IV is ahead of the highest seen, or within the window
+    behind it and not seen yet. A repeated IV is a duplicate. An IV further behind
+    is stale, for example a replay, unless stale IVs keep arriving in sequence,
+    in which case the device restarted and the window follows it. Every decision
+    is a few integer operations, taken before anything is decrypted.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty window."""
+        self._windows: dict[str, _Window] = {}
+
+    def check(self, address: str, iv: int) -> Verdict:
+        """Classify an IV received from a device and record it if new.
+
+        Args:
+            address: Address of the device.
+            iv: The 16-bit IV of the payload.
+
+        """
+        window = self._windows.get(address)
+        if window is None:
+            if len(self._windows) >= MAX_WINDOWS:
+                self._windows.clear()
+            self._windows[address] = _Window(iv)
+            return Verdict.NEW
+
+        ahead = (iv - window.top) % _IV_RANGE
+        if 0 < ahead < _IV_RANGE // 2:
+            window.bitmap = (window.bitmap << ahead | 1) & _WINDOW_MASK
+            window.top = iv
+            window.run = 0
+            return Verdict.NEW
+
+        behind = (window.top - iv) % _IV_RANGE
+        if behind < WINDOW_SIZE:
+            bit = 1 << behind
+            if window.bitmap & bit:
+                return Verdict.DUPLICATE
+            window.bitmap |= bit
+            return Verdict.NEW
+
+        return self._stale(address, window, iv)
+
+    def _stale(self, address: str, window: _Window, iv: int) -> Verdict:
+        if iv == window.candidate:
+            return Verdict.DUPLICATE
+        window.run = window.run + 1 if iv == (window.candidate + 1) % _IV_RANGE else 1
+        window.candidate = iv
+        if window.run < RESYNC_AFTER:
+            return Verdict.STALE
+
+        self._windows[address] = _Window(iv)
+        return Verdict.NEW
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Callable, Iterable, Mapping
+from numbers import Real
+from typing import Any
+
+from van_assistant.devices.base.device import Device
+from van_assistant.util.ble_backend import ScannerBackend
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_WINDOW = 10.0
+IDLE_WINDOW = 20.0
+MIN_IDLE = 5.0
+MAX_IDLE = 300.0
+# Relative change between consecutive readings up to which a reading counts as stable
+STABLE_CHANGE = 0.02
+
+
+class ScanScheduler:
+    """Duty cycles a scanner between active and idle windows to save power.
+
+    Fixed mode scans for the active window, then rests for the idle window. In
+    adaptive mode an active window also ends as soon as every device reported, and
+    the idle window doubles after each window in which every device reported
+    readings that changed by less than the stable change, up to the maximum, with
+    lists such as cell_voltages compared element by element. Any faster change
+    drops it back to the minimum, and a window in which a device did not report
+    halves it, so a parked van at night is scanned rarely while a van whose loads
+    or charging change is scanned often.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        scanner: ScannerBackend,
+        addresses: Iterable[str],
+        *,
+        active: float = ACTIVE_WINDOW,
+        idle: float = IDLE_WINDOW,
+        adaptive: bool = False,
+        min_idle: float = MIN_IDLE,
+        max_idle: float = MAX_IDLE,
+        stable_change: float = STABLE_CHANGE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a scheduler, started by run().
+
+        Args:
+            scanner: The scanner to start and stop.
+            addresses: Addresses of the advertising devices expected every window.
+            active: Longest active window, in seconds.
+            idle: Idle window, the initial one in adaptive mode, in seconds.
+            adaptive: Adapt the windows to how recent and stable the readings are.
+            min_idle: Shortest idle window in adaptive mode.
+            max_idle: Longest idle window in adaptive mode.
+            stable_change: Relative change of a reading still counted as stable.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.scanner = scanner
+        self.addresses = frozenset(addresses)
+        self.active = active
+        self.idle = idle
+        self.adaptive = adaptive
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.stable_change = stable_change
+        self._clock = clock
+        # Seconds spent scanning and the number of windows, for the duty cycle
+        self.scanning_time = 0.0
+        self.windows = 0
+        self._readings: dict[str, dict[str, Any]] = {}
+        self._reported: set[str] = set()
+        self._all_reported = asyncio.Event()
+        self._changing = False
+        # Set when a device reported for the first time, so nothing shows it is stable
+        self._unknown = False
+
+    def watch(self, device: Device) -> None:
+        """Follow the readings of a device expected every window.
+
+        Args:
+            device: The device to follow, ignored if its address is not expected.
+
+        """
+        if device.addr in self.addresses:
+            device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Record that a device reported and whether its readings changed quickly.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        previous = self._readings.setdefault(device.addr, {})
+        if not previous:
+            self._unknown = True
+        elif not self._changing:
+            self._changing = any(
+                name in previous and not self._stable(previous[name], value)
+                for name, value in data.items()
+            )
+        previous.update(data)
+
+        self._reported.add(device.addr)
+        if self._reported >= self.addresses:
+            self._all_reported.set()
+
+    def _stable(self, old: object, new: object) -> bool:
+        if isinstance(old, Real) and isinstance(new, Real):
+            return abs(new - old) <= self.stable_change * max(abs(old), 1.0)
+        # Lists such as cell_voltages are stable when every element is
+        if isinstance(old, list) and isinstance(new, list):
+            return len(old) == len(new) and all(map(self._stable, old, new))
+        return old == new
+
+    async def run(self) -> None:
+        """Alternate between scanning and resting until cancelled."""
+        while True:
+            self._reported.clear()
+            self._all_reported.clear()
+            self._changing = self._unknown = False
+
+            start = self._clock()
+            await self.scanner.start()
+            try:
+                if self.adaptive:
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(self._all_reported.wait(), self.active)
+                else:
+                    await asyncio.sleep(self.active)
+            finally:
+                await self.scanner.stop()
+                self.scanning_time += self._clock() - start
+                self.windows += 1
+
+            if self.adaptive:
+                self._adapt()
+            await asyncio.sleep(self.idle)
+
+    def _adapt(self) -> None:
+        if self._changing:
+            self.idle = self.min_idle
+        elif self._reported < self.addresses:
+            self.idle = max(self.idle / 2, self.min_idle)
+        elif not self._unknown:
+            self.idle = min(self.idle * 2, self.max_idle)
+        logger.debug(
+            f"Scan window {self.windows}: {len(self._reported)}/{len(self.addresses)} "
+            f"devices reported, {'changing' if self._changing else 'stable'}, "
+            f"idle for {self.idle:.0f}s",
+        )
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FaultConfig:
+    """Probabilities of faults injected by the simulator, each between 0 and 1."""
+
+    # Advertisement or notification fragment is lost
+    drop_rate: float = 0.0
+    # A single byte of the payload is flipped
+    corrupt_rate: float = 0.0
+    # Advertisement is received twice
+    duplicate_rate: float = 0.0
+    # Victron advertisement is sent with the wrong encryption key prefix
+    bad_key_rate: float = 0.0
+    # Connecting to a Remco BMS fails
+    connect_failure_rate: float = 0.0
+
+
+@dataclass
+class SimulatorConfig:
+    """Configuration of a simulated fleet of devices."""
+
+    # Number of Victron advertisers, cycling through every supported record type
+    victron_count: int = 12
+    # Number of Remco BMS packs
+    remco_count: int = 1
+    # Seconds between advertisements of a single Victron device
+    advertisement_interval: float = 1.0
+    # Maximum size of a single GATT notification
+    fragment_size: int = 20
+    # Seconds between GATT notification fragments
+    notification_delay: float = 0.005
+    # Seed for reproducible readings and faults
+    seed: int | None = None
+    faults: FaultConfig = field(default_factory=FaultConfig)
@@ -0,0 +1,106 @@
+import random
+
+from bleak.backends.scanner import AdvertisementDataCallback
+
+from van_assistant.devices.base.device import Device
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.devices.victron.identifier import MODE_DEVICE_MAP
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.remco import FakeBleakClient, RemcoBMSStub
+from van_assistant.simulator.scanner import FakeBleakScanner
+from van_assistant.simulator.victron import VictronAdvertiser
+
+
+def simulated_address(prefix: int, index: int) -> str:
+    """Return a deterministic MAC address for a simulated device.
+
+    Args:
+        prefix: First byte of the address, distinguishing device families.
+        index: Index of the device within its family.
+
+    """
+    octets = (prefix, 0, 0, (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF)
+    return ":".join(f"{octet:02X}" for octet in octets)
+
+
+class SimulatedFleet:
+    """A fleet of simulated Victron and Remco devices that can stand in for bleak."""
+
+    def __init__(self, config: SimulatorConfig) -> None:
+        """Create the simulated devices described by the config.
+
+        Args:
+            config: The simulator configuration.
+
+        """
+        self.config = config
+        self._rng = random.Random(config.seed)  # noqa: S311
+
+        modes = sorted(MODE_DEVICE_MAP)
+        self.victron = [
+            VictronAdvertiser(
+                simulated_address(0xF0, i),
+                modes[i % len(modes)],
+                self._rng.randbytes(16),
+                random.Random(self._rng.random()),  # noqa: S311
+                config.faults,
+            )
+            for i in range(config.victron_count)
+        ]
+        self.remco = {
+            simulated_address(0xA5, i): RemcoBMSStub(random.Random(self._rng.random()))  # noqa: S311
+            for i in range(config.remco_count)
+        }
+
+    def scanner_factory(self, detection_callback: AdvertisementDataCallback) -> FakeBleakScanner:
+        """Return a fake scanner receiving advertisements from the whole fleet.
+
+        Args:
+            detection_callback: Callback invoked for each advertisement.
+
+        """
+        return FakeBleakScanner(
+            detection_callback,
+            self.victron,
+            self.config.advertisement_interval,
+            random.Random(self._rng.random()),  # noqa: S311
+            self.config.faults,
+        )
+
+    def client_factory(self, address: str) -> FakeBleakClient:
+        """Return a fake client connected to the simulated BMS at an address.
+
+        Args:
+            address: BLE MAC address of a simulated Remco BMS.
+
+        """
+        return FakeBleakClient(
+            address,
+            self.remco[address],
+            random.Random(self._rng.random()),  # noqa: S311
+            self.config.faults,
+            self.config.fragment_size,
+            self.config.notification_delay,
+        )
+
+    def build_devices(self, notification_service: NotificationService) -> list[Device]:
+        """Return real device instances wired to the simulated fleet.
+
+        Args:
+            notification_service: Service the devices publish to.
+
+        """
+        devices: list[Device] = [
+            advertiser.device_type(
+                advertiser.address,
+                notification_service,
+                advertiser.encryption_key.hex(),
+            )
+            for advertiser in self.victron
+        ]
+        devices.extend(
+            RemcoBattery(address, notification_service, self.client_factory)
+            for address in self.remco
+        )
+        return devices
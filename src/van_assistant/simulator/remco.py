@@ -0,0 +1,207 @@
+import asyncio
+import inspect
+import random
+import struct
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from bleak.exc import BleakError
+
+from van_assistant.devices.remco.devices.base import PACKET_HEADER, PACKET_TAIL
+from van_assistant.devices.remco.devices.bms import BATT_INFO, CELL_INFO
+from van_assistant.simulator.config import FaultConfig
+
+READ_REQUEST = 0xA5
+STATUS_OK = 0x00
+
+NotifyCallback = Callable[[Any, bytearray], Awaitable[None] | None]
+
+
+def build_frame(cmd: int, data: bytes) -> bytes:
+    """Build a BMS response frame around the given data.
+
+    Args:
+        cmd: The command the frame responds to.
+        data: The response data.
+
+    Returns:
+        The complete frame including header, checksum and tail.
+
+    """
+    checksum = (0x10000 - (STATUS_OK + len(data) + sum(data))) & 0xFFFF
+    return (
+        bytes([PACKET_HEADER, cmd, STATUS_OK, len(data)])
+        + data
+        + struct.pack(">H", checksum)
+        + bytes([PACKET_TAIL])
+    )
+
+
+class RemcoBMSStub:
+    """Simulated Remco BMS answering basic info and cell voltage requests."""
+
+    def __init__(
+        self,
+        rng: random.Random,
+        cell_count: int = 4,
+        capacity_ah: float = 100.0,
+    ) -> None:
+        """Create a simulated BMS.
+
+        Args:
+            rng: Random generator used for readings.
+            cell_count: Number of cells in series.
+            capacity_ah: Full capacity of the pack in amp hours.
+
+        """
+        self._rng = rng
+        self.capacity_ah = capacity_ah
+        self.remaining_ah = capacity_ah * rng.uniform(0.4, 1.0)
+        self.current = rng.uniform(-20.0, 10.0)
+        self.cells = [rng.uniform(3.25, 3.35) for _ in range(cell_count)]
+        self.cycles = rng.randint(0, 500)
+
+    def step(self) -> None:
+        """Advance the simulated readings by one poll."""
+        self.current = max(-100.0, min(100.0, self.current + self._rng.uniform(-2.0, 2.0)))
+        self.remaining_ah = max(
+            0.0,
+            min(self.capacity_ah, self.remaining_ah + self.current / 720),
+        )
+        soc = self.remaining_ah / self.capacity_ah
+        self.cells = [3.0 + 0.4 * soc + self._rng.uniform(-0.01, 0.01) for _ in self.cells]
+
+    def info_data(self) -> bytes:
+        """Return the data of a basic info response."""
+        mdate = ((2024 - 2000) << 9) | (3 << 5) | 14
+        return struct.pack(
+            ">HhHHHHHHHBBBBBHH",
+            round(sum(self.cells) * 100),
+            round(self.current * 100),
+            round(self.remaining_ah * 100),
+            round(self.capacity_ah * 100),
+            self.cycles,
+            mdate,
+            0,
+            0,
+            0,
+            0x10,
+            round(100 * self.remaining_ah / self.capacity_ah),
+            0x03,
+            len(self.cells),
+            2,
+            2731 + self._rng.randint(150, 300),
+            2731 + self._rng.randint(150, 300),
+        )
+
+    def cell_data(self) -> bytes:
+        """Return the data of a cell voltage response."""
+        return struct.pack(f">{len(self.cells)}H", *(round(cell * 1000) for cell in self.cells))
+
+    def respond(self, command: bytes) -> bytes | None:
+        """Return the response frame for a command, or None if it is not understood.
+
+        Args:
+            command: The raw command written to the BMS.
+
+        """
+        if len(command) < 3 or command[0] != PACKET_HEADER or command[1] != READ_REQUEST:
+            return None
+
+        if command[2] == BATT_INFO:
+            self.step()
+            return build_frame(BATT_INFO, self.info_data())
+
+        if command[2] == CELL_INFO:
+            return build_frame(CELL_INFO, self.cell_data())
+
+        return None
+
+
+class FakeBleakClient:
+    """In-process stand-in for BleakClient connected to a simulated Remco BMS."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        address: str,
+        stub: RemcoBMSStub,
+        rng: random.Random,
+        faults: FaultConfig,
+        fragment_size: int,
+        notification_delay: float,
+    ) -> None:
+        """Create a fake client.
+
+        Args:
+            address: BLE MAC address of the simulated device.
+            stub: The simulated BMS answering commands.
+            rng: Random generator used for faults.
+            faults: Faults to inject into the connection and notifications.
+            fragment_size: Maximum size of a single notification.
+            notification_delay: Seconds between notification fragments.
+
+        """
+        self.address = address
+        self._stub = stub
+        self._rng = rng
+        self._faults = faults
+        self._fragment_size = fragment_size
+        self._notification_delay = notification_delay
+        self._callback: NotifyCallback | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.is_connected = False
+
+    async def connect(self) -> None:
+        """Connect to the simulated device."""
+        if self._rng.random() < self._faults.connect_failure_rate:
+            msg = f"Simulated connection failure to {self.address}"
+            raise BleakError(msg)
+        self.is_connected = True
+
+    async def disconnect(self) -> None:
+        """Disconnect from the simulated device."""
+        self.is_connected = False
+        self._callback = None
+        for task in self._tasks:
+            task.cancel()
+
+    async def start_notify(self, char_specifier: Any, callback: NotifyCallback) -> None:  # noqa: ANN401, ARG002
+        """Subscribe to notifications from the simulated device."""
+        self._callback = callback
+
+    async def write_gatt_char(
+        self,
+        char_specifier: Any,  # noqa: ANN401, ARG002
+        data: bytes,
+        response: bool | None = None,  # noqa: ARG002, FBT001
+    ) -> None:
+        """Write a command to the simulated device and schedule its response."""
+        if not self.is_connected:
+            msg = f"Not connected to {self.address}"
+            raise BleakError(msg)
+
+        frame = self._stub.respond(bytes(data))
+        if frame is None:
+            return
+
+        task = asyncio.create_task(self._notify(frame))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _notify(self, frame: bytes) -> None:
+        for start in range(0, len(frame), self._fragment_size):
+            await asyncio.sleep(self._notification_delay)
+
+            if self._callback is None:
+                return
+
+            if self._rng.random() < self._faults.drop_rate:
+                continue
+
+            fragment = bytearray(frame[start : start + self._fragment_size])
+            if self._rng.random() < self._faults.corrupt_rate:
+                fragment[self._rng.randrange(len(fragment))] ^= 1 << self._rng.randrange(8)
+
+            result = self._callback(None, fragment)
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,99 @@
+import asyncio
+import contextlib
+import random
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData, AdvertisementDataCallback
+
+from van_assistant.simulator.config import FaultConfig
+from van_assistant.simulator.victron import VICTRON_MANUFACTURER_ID, VictronAdvertiser
+
+
+class FakeBleakScanner:
+    """In-process stand-in for BleakScanner delivering simulated advertisements."""
+
+    def __init__(
+        self,
+        detection_callback: AdvertisementDataCallback,
+        advertisers: list[VictronAdvertiser],
+        advertisement_interval: float,
+        rng: random.Random,
+        faults: FaultConfig,
+    ) -> None:
+        """Create a fake scanner.
+
+        Args:
+            detection_callback: Callback invoked for each advertisement.
+            advertisers: The simulated devices to receive advertisements from.
+            advertisement_interval: Seconds between advertisements of a single device.
+            rng: Random generator used for faults and signal strength.
+            faults: Faults to inject into the advertisements.
+
+        """
+        self._detection_callback = detection_callback
+        self._advertisers = advertisers
+        self._advertisement_interval = advertisement_interval
+        self._rng = rng
+        self._faults = faults
+        self._devices = {
+            advertiser.address: BLEDevice(advertiser.address, None, None)
+            for advertiser in advertisers
+        }
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start delivering advertisements."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop delivering advertisements."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    def advertise(self, advertiser: VictronAdvertiser) -> None:
+        """Deliver the next advertisement of a single device to the detection callback.
+
+        Args:
+            advertiser: The simulated device advertising.
+
+        """
+        # Generated even when dropped, a real device moves on to its next IV regardless
+        payload = advertiser.next_advertisement()
+        if self._rng.random() < self._faults.drop_rate:
+            return
+
+        ad_data = AdvertisementData(
+            local_name=None,
+            manufacturer_data={VICTRON_MANUFACTURER_ID: payload},
+            service_data={},
+            service_uuids=[],
+            tx_power=None,
+            rssi=self._rng.randint(-95, -50),
+            platform_data=(),
+        )
+        ble_device = self._devices[advertiser.address]
+
+        self._detection_callback(ble_device, ad_data)
+        if self._rng.random() < self._faults.duplicate_rate:
+            self._detection_callback(ble_device, ad_data)
+
+    async def _run(self) -> None:
+        if not self._advertisers:
+            return
+
+        # Spread the fleet evenly over the interval from a single task
+        delay = self._advertisement_interval / len(self._advertisers)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+
+        while True:
+            for advertiser in self._advertisers:
+                self.advertise(advertiser)
+                deadline += delay
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
@@ -0,0 +1,224 @@
+import random
+import struct
+from collections.abc import Callable
+
+from Crypto.Cipher import AES
+from Crypto.Util import Counter
+
+from van_assistant.devices.victron.identifier import MODE_DEVICE_MAP
+from van_assistant.devices.victron.utils import BitWriter
+from van_assistant.simulator.config import FaultConfig
+
+VICTRON_MANUFACTURER_ID = 0x02E1
+
+# Product advertisement prefix and a generic model ID
+RECORD_PREFIX = 0x0210
+DEFAULT_MODEL_ID = 0xA060
+
+HEADER_FORMAT = "<HHBH"
+
+RawValue = Callable[[random.Random], int]
+
+
+def _between(low: int, high: int) -> RawValue:
+    return lambda rng: rng.randint(low, high)
+
+
+def _choice(*values: int) -> RawValue:
+    return lambda rng: rng.choice(values)
+
+
+def _constant(value: int) -> RawValue:
+    return lambda _: value
+
+
+# Realistic raw (unscaled) values for each record type, keyed by mode.
+# Fields missing from a profile are sent as zero.
+RECORD_PROFILES: dict[int, dict[str, RawValue]] = {
+    # Solar charger
+    0x1: {
+        "charge_state": _choice(0, 3, 4, 5),
+        "battery_voltage": _between(1250, 1450),
+        "battery_charging_current": _between(0, 300),
+        "yield_today": _between(0, 250),
+        "solar_power": _between(0, 400),
+        "external_device_load": _between(0, 100),
+    },
+    # Battery monitor
+    0x2: {
+        "remaining_mins": _between(60, 6000),
+        "voltage": _between(1250, 1340),
+        "aux": _constant(29815),
+        "aux_mode": _choice(2, 3),
+        "current": _between(-25000, 15000),
+        "consumed_ah": _between(0, 1500),
+        "soc": _between(300, 1000),
+    },
+    # Inverter
+    0x3: {
+        "device_state": _choice(0, 9),
+        "battery_voltage": _between(1250, 1340),
+        "ac_apparent_power": _between(0, 1500),
+        "ac_voltage": _between(22800, 23200),
+        "ac_current": _between(0, 65),
+    },
+    # DC-DC converter
+    0x4: {
+        "device_state": _choice(0, 3, 4, 5),
+        "input_voltage": _between(1300, 1450),
+        "output_voltage": _between(1330, 1440),
+    },
+    # Smart Lithium
+    0x5: {
+        **{f"cell_voltage_{i}": _between(60, 80) for i in range(4)},
+        **{f"cell_voltage_{i}": _constant(0x7F) for i in range(4, 8)},
+        "battery_voltage": _between(1280, 1360),
+        "balancer_status": _choice(1, 2),
+        "battery_temperature": _between(50, 70),
+    },
+    # AC charger
+    0x8: {
+        "charge_state": _choice(3, 4, 5),
+        "output_voltage1": _between(1330, 1440),
+        "output_current1": _between(0, 300),
+        "output_voltage2": _constant(0x1FFF),
+        "output_current2": _constant(0x7FF),
+        "output_voltage3": _constant(0x1FFF),
+        "output_current3": _constant(0x7FF),
+        "temperature": _between(55, 80),
+        "ac_current": _between(0, 100),
+    },
+    # Smart Battery Protect
+    0x9: {
+        "device_state": _choice(1, 9),
+        "output_state": _choice(1, 4),
+        "input_voltage": _between(1250, 1340),
+        "output_voltage": _between(1250, 1340),
+    },
+    # Lynx Smart BMS
+    0xA: {
+        "remaining_mins": _between(60, 6000),
+        "voltage": _between(1250, 1340),
+        "current": _between(-250, 150),
+        "soc": _between(300, 1000),
+        "consumed_ah": _between(0, 1500),
+        "temperature": _between(50, 70),
+    },
+    # Multi RS
+    0xB: {
+        "device_state": _choice(0, 3, 4, 5, 9),
+        "battery_current": _between(-250, 250),
+        "battery_voltage": _between(1250, 1340),
+        "active_ac_in": _choice(0, 2),
+        "active_ac_in_power": _between(0, 2000),
+        "active_ac_out_power": _between(0, 2000),
+        "pv_power": _between(0, 800),
+        "yield_today": _between(0, 500),
+    },
+    # VE.Bus
+    0xC: {
+        "device_state": _choice(0, 3, 4, 5, 9),
+        "battery_current": _between(-250, 250),
+        "battery_voltage": _between(1250, 1340),
+        "ac_in_state": _choice(0, 2),
+        "ac_in_power": _between(0, 2000),
+        "ac_out_power": _between(0, 2000),
+        "battery_temperature": _between(50, 70),
+        "soc": _between(30, 100),
+    },
+    # DC energy meter
+    0xD: {
+        "meter_type": _choice(-6, -3, 1, 3),
+        "voltage": _between(1250, 1340),
+        "aux_mode": _constant(3),
+        "current": _between(-20000, 20000),
+    },
+    # Orion XS
+    0xF: {
+        "device_state": _choice(0, 3, 4, 5),
+        "output_voltage": _between(1330, 1440),
+        "output_current": _between(0, 300),
+        "input_voltage": _between(1300, 1450),
+        "input_current": _between(0, 320),
+    },
+}
+
+
+class VictronAdvertiser:
+    """Simulated Victron device emitting encrypted Instant Readout advertisements."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        address: str,
+        mode: int,
+        encryption_key: bytes,
+        rng: random.Random,
+        faults: FaultConfig,
+        model_id: int = DEFAULT_MODEL_ID,
+    ) -> None:
+        """Create a Victron advertiser.
+
+        Args:
+            address: BLE MAC address of the simulated device.
+            mode: Record type of the advertisement, a key of MODE_DEVICE_MAP.
+            encryption_key: 16 byte AES key of the simulated device.
+            rng: Random generator used for readings and faults.
+            faults: Faults to inject into the advertisements.
+            model_id: Model ID to advertise.
+
+        """
+        self.address = address
+        self.mode = mode
+        self.encryption_key = encryption_key
+        self.model_id = model_id
+        self.device_type = MODE_DEVICE_MAP[mode]
+        self._rng = rng
+        self._faults = faults
+        self._profile = RECORD_PROFILES[mode]
+        self._iv = rng.randrange(0x10000)
+
+    def freeze(self) -> None:
+        """Keep advertising the same readings from now on, like a van parked overnight."""
+        self._profile = {name: _constant(raw(self._rng)) for name, raw in self._profile.items()}
+
+    def build_record(self) -> bytes:
+        """Return a new plaintext record with fresh readings."""
+        writer = BitWriter()
+        for field in self.device_type.layout:
+            raw = self._profile.get(field.name)
+            writer.write_unsigned_int(raw(self._rng) if raw else 0, field.bits)
+        return writer.to_bytes()
+
+    def encrypt(self, record: bytes, iv: int) -> bytes:
+        """Encrypt a plaintext record and prepend the advertisement header.
+
+        Args:
+            record: The plaintext record.
+            iv: The nonce used for the AES-CTR counter.
+
+        Returns:
+            The manufacturer data of the advertisement.
+
+        """
+        ctr = Counter.new(128, initial_value=iv, little_endian=True)
+        cipher = AES.new(self.encryption_key, AES.MODE_CTR, counter=ctr)
+
+        key_prefix = self.encryption_key[0]
+        if self._rng.random() < self._faults.bad_key_rate:
+            key_prefix ^= 0xFF
+
+        header = struct.pack(HEADER_FORMAT, RECORD_PREFIX, self.model_id, self.mode, iv)
+        return header + bytes([key_prefix]) + cipher.encrypt(record)
+
+    def next_advertisement(self) -> bytes:
+        """Return the manufacturer data of the next advertisement."""
+        self._iv = (self._iv + 1) & 0xFFFF
+        payload = self.encrypt(self.build_record(), self._iv)
+
+        if self._rng.random() < self._faults.corrupt_rate:
+            corrupted = bytearray(payload)
+            index = self._rng.randrange(struct.calcsize(HEADER_FORMAT) + 1, len(payload))
+            corrupted[index] ^= 1 << self._rng.randrange(8)
+            payload = bytes(corrupted)
+
+        return payload
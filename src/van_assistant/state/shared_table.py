@@ -0,0 +1,433 @@
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections.abc import Iterable, Mapping
+from enum import Enum
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# Only the standard library is imported, so readers can use this module, or a copy
+# of it, without the gateway's dependencies
+MAGIC = b"VANSHM\x00\x01"
+# Magic, whether the writer is running, length of the JSON layout that follows
+HEADER = struct.Struct("<8sII")
+# Records hold native 8 byte words, the table is only shared on one machine
+SEQUENCE = struct.Struct("=Q")
+# Attempts at a consistent read before giving up on a record being written
+READ_ATTEMPTS = 1000
+DEFAULT_PATH = "/dev/shm/van-assistant"  # noqa: S108
+
+
+class SharedTableError(Exception):
+    """Raised when a shared table cannot be created or read."""
+
+
+class Column(NamedTuple):
+    """A value of the records, a device field or one element of a list field."""
+
+    name: str
+    # The device field the value comes from and its list index, None for a scalar
+    field: str
+    index: int | None = None
+
+
+class TableLayout(NamedTuple):
+    """Fixed layout of a shared table, stored as JSON in the file's header."""
+
+    addresses: tuple[str, ...]
+    # Configured device names by address
+    names: Mapping[str, str]
+    columns: tuple[Column, ...]
+    # Member values by name of every enum column, whose values are the member values
+    enums: Mapping[str, Mapping[str, int]]
+
+    @property
+    def record_size(self) -> int:
+        """Return the size of a record: sequence, update time and the columns."""
+        return SEQUENCE.size + 8 * (1 + len(self.columns))
+
+    def to_json(self) -> str:
+        """Return the layout as JSON."""
+        return json.dumps(
+            {
+                "addresses": self.addresses,
+                "names": self.names,
+                "columns": [column.name for column in self.columns],
+                "enums": self.enums,
+                "record_size": self.record_size,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, text: str | bytes) -> "TableLayout":
+        """Read a layout written by to_json().
+
+        Raises:
+            SharedTableError: If the text is not a layout.
+
+        """
+        try:
+            raw = json.loads(text)
+            layout = cls(
+                tuple(raw["addresses"]),
+                raw["names"],
+                tuple(_column(name) for name in raw["columns"]),
+                raw["enums"],
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            msg = f"Not a shared table layout: {e}"
+            raise SharedTableError(msg) from e
+        if layout.record_size != raw["record_size"]:
+            msg = "Shared table layout has an unexpected record size"
+            raise SharedTableError(msg)
+        return layout
+
+
+def _column(name: str) -> Column:
+    field, _, index = name.partition("/")
+    return Column(name, field, int(index) if index.isdigit() else None)
+
+
+def table_layout(
+    addresses: Iterable[str],
+    device_types: Iterable[type],
+    fields: Iterable[str] | None = None,
+    names: Mapping[str, str] | None = None,
+) -> TableLayout:
+    """Generate a table layout from the record schemas of the device types.
+
+    Every field of the device types becomes a column, in schema order. A list
+    field, such as cell voltages, becomes a column per element, and an enum field
+    a column of member values described in the layout.
+
+    Args:
+        addresses: Addresses of the devices with a record in the table.
+        device_types: Victron device types whose fields are columns.
+        fields: Fields to keep, None for every schema field. Fields outside the
+            schemas, e.g. of Remco packs, are added as scalar columns, and a list
+            element can be named directly, e.g. cell_voltages/0.
+        names: Configured device names by address.
+
+    """
+    schema: dict[str, list[Column]] = {}
+    enums: dict[str, dict[str, int]] = {}
+    for device_type in device_types:
+        record_layout = device_type.record_layout
+        for value_field in record_layout.fields.values():
+            if value_field.name in schema:
+                continue
+            if value_field.enum is not None:
+                enums[value_field.name] = {member.name: member.value for member in value_field.enum}
+            schema[value_field.name] = _columns(value_field)
+
+    wanted = list(schema) if fields is None else list(dict.fromkeys(fields))
+    columns: list[Column] = []
+    for name in wanted:
+        columns.extend(schema.get(name) or [_column(name)])
+    return TableLayout(
+        tuple(addresses),
+        dict(names or {}),
+        tuple(columns),
+        {name: members for name, members in enums.items() if name in wanted},
+    )
+
+
+# Columns of a schema field, calling a convert function with zero raw values to
+# tell whether it returns a list and of how many elements
+def _columns(value_field: Any) -> list[Column]:  # noqa: ANN401
+    if value_field.convert is not None:
+        value = value_field.convert(*(0 for _ in value_field.sources))
+        if isinstance(value, list):
+            return [
+                Column(f"{value_field.name}/{i}", value_field.name, i) for i in range(len(value))
+            ]
+    return [Column(value_field.name, value_field.name)]
+
+
+class SharedTableWriter:
+    """Writes the latest values of devices into a fixed layout, memory-mapped file.
+
+    The file starts with a header describing the layout, followed by one record
+    per device: a sequence counter, the time of the last update and a float64 per
+    column, NaN for a value the device has not reported. The counter is a seqlock,
+    made odd before the record changes and even again after, so a reader that sees
+    the same even counter before and after copying a record has a consistent copy.
+
+    Records are 8 byte aligned and every counter and value is written as one
+    aligned native word, so neither is ever seen half written. Python cannot issue
+    memory barriers though, so the seqlock relies on the CPU keeping stores in
+    order, as x86 does. On weakly ordered CPUs such as ARM a reader may rarely get
+    a record mixing the values of two consecutive updates, and must tolerate that.
+    """
+
+    def __init__(self, path: str | Path, layout: TableLayout) -> None:
+        """Create the table file, replacing any previous one.
+
+        The file is written next to its final path and renamed into place, so a
+        reader never maps a partly written header.
+
+        Args:
+            path: Path of the table, e.g. under /dev/shm to keep it in memory.
+            layout: Layout of the table.
+
+        Raises:
+            SharedTableError: If the file cannot be created.
+
+        """
+        self.path = Path(path)
+        self.layout = layout
+        encoded = layout.to_json().encode()
+        self._length = len(encoded)
+        # Records start 8 byte aligned after the header
+        self._offset = -(-(HEADER.size + len(encoded)) // 8) * 8
+        empty = (
+            bytes(SEQUENCE.size) + array("d", [0.0, *[math.nan] * len(layout.columns)]).tobytes()
+        )
+
+        temporary = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+        try:
+            with temporary.open("wb") as file:
+                file.write(HEADER.pack(MAGIC, 1, len(encoded)) + encoded)
+                file.write(bytes(self._offset - HEADER.size - len(encoded)))
+                file.write(empty * len(layout.addresses))
+            temporary.replace(self.path)
+            with self.path.open("r+b") as file:
+                self._map = mmap.mmap(file.fileno(), 0)
+        except OSError as e:
+            temporary.unlink(missing_ok=True)
+            msg = f"Cannot create shared table {self.path}: {e}"
+            raise SharedTableError(msg) from e
+
+        self._words = _Words(self._map)
+        self._values = {address: [math.nan] * len(layout.columns) for address in layout.addresses}
+        # Word index of each device's record
+        self._records = {
+            address: (self._offset + i * layout.record_size) // 8
+            for i, address in enumerate(layout.addresses)
+        }
+        # Column indexes of each field, with the list index of element columns
+        self._targets: dict[str, list[tuple[int, int | None]]] = {}
+        for i, column in enumerate(layout.columns):
+            self._targets.setdefault(column.field, []).append((i, column.index))
+
+    def watch(self, device: Any) -> None:  # noqa: ANN401
+        """Write the readings a device publishes, if it has a record.
+
+        Args:
+            device: The device to follow.
+
+        """
+        if device.addr in self._records:
+            device.add_listener(self.on_data)
+
+    def on_data(self, device: Any, data: Mapping[str, Any]) -> None:  # noqa: ANN401
+        """Write the fields of a reading that are columns, keeping the others.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        self.update(device.addr, data)
+
+    def update(self, address: str, data: Mapping[str, Any], timestamp: float | None = None) -> None:
+        """Write the columns found in the data into a device's record.
+
+        Only the fields that are columns are read from the data, so a lazily
+        decoded record never decodes the others. Values that are not numbers,
+        booleans or enums are left out.
+
+        Args:
+            address: Address of the device.
+            data: Mapping of field names to values.
+            timestamp: Time of the update, now if not given.
+
+        """
+        record = self._records.get(address)
+        if record is None:
+            return
+        values = self._values[address]
+        for name, targets in self._targets.items():
+            if name not in data:
+                continue
+            value = data[name]
+            for column, index in targets:
+                if index is None:
+                    values[column] = _number(value)
+                elif isinstance(value, list):
+                    values[column] = _number(value[index]) if index < len(value) else math.nan
+
+        sequences, floats = self._words.sequences, self._words.floats
+        sequence = sequences[record]
+        sequences[record] = sequence + 1
+        floats[record + 1 : record + 2 + len(values)] = array(
+            "d",
+            (time.time() if timestamp is None else timestamp, *values),
+        )
+        sequences[record] = sequence + 2
+
+    def close(self) -> None:
+        """Mark the table as no longer written and unmap it, leaving the last values."""
+        if self._map.closed:
+            return
+        HEADER.pack_into(self._map, 0, MAGIC, 0, self._length)
+        self._words.release()
+        self._map.close()
+
+
+class _Words:
+    """The 8 byte words of a table's mapping, as counters and as values."""
+
+    __slots__ = ("_view", "floats", "sequences")
+
+    def __init__(self, mapping: mmap.mmap) -> None:
+        # Item assignment of a cast view is a single aligned store of the word
+        self._view = memoryview(mapping)[: len(mapping) // 8 * 8]
+        self.sequences = self._view.cast("Q")
+        self.floats = self._view.cast("d")
+
+    def release(self) -> None:
+        # The mapping cannot be closed while views of it exist
+        self.sequences.release()
+        self.floats.release()
+        self._view.release()
+
+
+def _number(value: object) -> float:
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return math.nan
+
+
+class TableRecord(NamedTuple):
+    """Consistent snapshot of a device's record."""
+
+    address: str
+    # Time of the last update in seconds since the epoch, 0 if never updated
+    updated: float
+    # Reported values by column, enum members by name
+    values: Mapping[str, float | str]
+
+
+class SharedTableReader:
+    """Reads consistent snapshots of the records of a shared table.
+
+    The file is mapped once and every read is a copy out of the mapping, so
+    reading several times per second costs no system calls. Once the gateway
+    stops, live is False and the last values stay readable; a restarted gateway
+    replaces the file, so readers should reopen the table when live turns False.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PATH) -> None:
+        """Map a table written by a SharedTableWriter.
+
+        Args:
+            path: Path of the table.
+
+        Raises:
+            SharedTableError: If the file is missing or not a shared table.
+
+        """
+        self.path = Path(path)
+        try:
+            with self.path.open("rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            msg = f"Cannot open shared table {self.path}: {e}"
+            raise SharedTableError(msg) from e
+
+        try:
+            magic, _, length = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = length = None
+        if magic != MAGIC:
+            self._map.close()
+            msg = f"{self.path} is not a shared table"
+            raise SharedTableError(msg)
+        self.layout = TableLayout.from_json(self._map[HEADER.size : HEADER.size + length])
+        offset = -(-(HEADER.size + length) // 8) * 8
+        self._words = _Words(self._map)
+        # Word index of each device's record
+        self._records = {
+            address: (offset + i * self.layout.record_size) // 8
+            for i, address in enumerate(self.layout.addresses)
+        }
+        self._records.update(
+            {name: self._records[address] for address, name in self.layout.names.items()},
+        )
+        self._addresses = {name: address for address, name in self.layout.names.items()}
+        # Member names by value of every enum column
+        self._members = {
+            column: {value: name for name, value in members.items()}
+            for column, members in self.layout.enums.items()
+        }
+
+    @property
+    def live(self) -> bool:
+        """Return whether the gateway is still writing the table."""
+        return HEADER.unpack_from(self._map, 0)[1] == 1
+
+    def read(self, device: str) -> TableRecord:
+        """Return a consistent snapshot of a device's record.
+
+        Args:
+            device: Address or configured name of the device.
+
+        Raises:
+            KeyError: If the table has no record of the device.
+            SharedTableError: If every attempt overlapped a write.
+
+        """
+        record = self._records[device]
+        end = record + 2 + len(self.layout.columns)
+        sequences, floats = self._words.sequences, self._words.floats
+        for _ in range(READ_ATTEMPTS):
+            before = sequences[record]
+            if not before & 1:
+                updated, *values = floats[record + 1 : end].tolist()
+                after = sequences[record]
+                if before == after:
+                    return TableRecord(
+                        self._addresses.get(device, device),
+                        updated,
+                        self._decode(values),
+                    )
+            # Let a writer that was preempted mid-write finish, e.g. on a single core
+            time.sleep(0)
+        msg = f"Record of {device} kept changing while being read"
+        raise SharedTableError(msg)
+
+    def _decode(self, values: list[float]) -> dict[str, float | str]:
+        decoded: dict[str, float | str] = {}
+        for column, value in zip(self.layout.columns, values, strict=True):
+            if math.isnan(value):
+                continue
+            members = self._members.get(column.name)
+            decoded[column.name] = value if members is None else members.get(value, value)
+        return decoded
+
+    def value(self, device: str, column: str) -> float | str | None:
+        """Return one value of a device, None if it has not been reported.
+
+        Args:
+            device: Address or configured name of the device.
+            column: Name of the column, e.g. soc or cell_voltages/0.
+
+        Raises:
+            KeyError: If the table has no record of the device.
+            SharedTableError: If every attempt overlapped a write.
+
+        """
+        return self.read(device).values.get(column)
+
+    def close(self) -> None:
+        """Unmap the table."""
+        self._words.release()
+        self._map.close()
@@ -0,0 +1,263 @@
+import asyncio
+from collections.abc import Iterable, Mapping
+from types import MappingProxyType
+from typing import Any, NamedTuple, Self
+
+from van_assistant.devices.base.device import Device
+
+_MISSING = object()
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+class Record(NamedTuple):
+    """Latest values of one device, never modified once created."""
+
+    address: str
+    device_type: str
+    # Store version of the last change to the record
+    version: int
+    fields: Mapping[str, Any]
+
+
+class Snapshot(NamedTuple):
+    """Consistent view of every record at one version of the store."""
+
+    version: int
+    records: Mapping[str, Record]
+
+
+class Change(NamedTuple):
+    """Fields of a device that changed since a subscriber last received a change."""
+
+    address: str
+    version: int
+    fields: Mapping[str, Any]
+
+
+class Subscription:
+    """Asynchronous iterator over the changes matching a subscription's filters.
+
+    Changes not yet received are merged per device, so a slow subscriber holds at
+    most one pending change per device and always catches up to the latest values
+    instead of replaying every intermediate one.
+    """
+
+    def __init__(
+        self,
+        store: "StateStore",
+        addresses: frozenset[str] | None,
+        fields: frozenset[str] | None,
+    ) -> None:
+        """Create a subscription, use StateStore.subscribe instead.
+
+        Args:
+            store: The store the subscription belongs to.
+            addresses: Addresses of the devices to receive, None for all.
+            fields: Names of the fields to receive, None for all.
+
+        """
+        self.addresses = addresses
+        self.fields = fields
+        self._store = store
+        self._pending: dict[str, Change] = {}
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def offer(self, address: str, version: int, changed: Mapping[str, Any]) -> None:
+        """Queue the changed fields that pass the field filter.
+
+        Args:
+            address: Address of the device that changed.
+            version: Store version of the change.
+            changed: The fields that changed and their new values.
+
+        """
+        if self.fields is not None:
+            changed = {name: value for name, value in changed.items() if name in self.fields}
+            if not changed:
+                return
+
+        pending = self._pending.get(address)
+        if pending is not None:
+            changed = {**pending.fields, **changed}
+        self._pending[address] = Change(address, version, changed)
+        self._ready.set()
+
+    def drain(self) -> list[Change]:
+        """Return every pending change without waiting."""
+        changes = list(self._pending.values())
+        self._pending.clear()
+        return changes
+
+    def close(self) -> None:
+        """Stop receiving changes and end the iteration."""
+        if not self._closed:
+            self._closed = True
+            self._store.unsubscribe(self)
+            self._ready.set()
+
+    def __aiter__(self) -> Self:
+        """Return the subscription itself."""
+        return self
+
+    async def __anext__(self) -> Change:
+        """Wait for the oldest pending change.
+
+        Raises:
+            StopAsyncIteration: Once the subscription is closed.
+
+        """
+        while not self._pending:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+
+        address = next(iter(self._pending))
+        return self._pending.pop(address)
+
+
+class StateStore:
+    """Latest value of every field of every device, with versioned change delivery.
+
+    Every change that modifies a field increments the store version. Records are
+    replaced rather than modified, so a snapshot only copies the mapping of records
+    and stays consistent however the store changes afterwards; the copy is made
+    once per version, however many readers ask for it.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty store."""
+        self.version = 0
+        self._records: dict[str, Record] = {}
+        self._snapshot = Snapshot(0, _EMPTY)
+        self._watched: set[str] = set()
+        self._subscriptions: dict[str | None, set[Subscription]] = {}
+
+    def watch(self, device: Device) -> None:
+        """Store the data a device publishes.
+
+        Args:
+            device: The device to store the data of.
+
+        """
+        if device.addr not in self._watched:
+            self._watched.add(device.addr)
+            device.add_listener(self.on_data)
+
+    def on_data(self, device: Device, data: Mapping[str, Any]) -> None:
+        """Store data published by a device.
+
+        Args:
+            device: The device that published the data.
+            data: The published data.
+
+        """
+        self.update(device.addr, data, type(device).__name__)
+
+    def update(
+        self,
+        address: str,
+        data: Mapping[str, Any],
+        device_type: str | None = None,
+    ) -> int:
+        """Store new values of a device's fields, notifying subscribers of changes.
+
+        Args:
+            address: Address of the device, or a name for values not tied to one.
+            data: The new field values.
+            device_type: Class name of the device, kept from before if not given.
+
+        Returns:
+            The version of the record, unchanged if no value changed.
+
+        """
+        record = self._records.get(address)
+        old = record.fields if record is not None else _EMPTY
+        changed = {name: value for name, value in data.items() if old.get(name, _MISSING) != value}
+        if not changed:
+            return record.version if record is not None else 0
+
+        self.version += 1
+        self._records[address] = Record(
+            address,
+            device_type or (record.device_type if record is not None else ""),
+            self.version,
+            MappingProxyType({**old, **changed}),
+        )
+
+        for key in (address, None):
+            for subscription in self._subscriptions.get(key, ()):
+                subscription.offer(address, self.version, changed)
+        return self.version
+
+    def get(self, address: str) -> Record | None:
+        """Return the latest record of a device.
+
+        Args:
+            address: Address of the device.
+
+        """
+        return self._records.get(address)
+
+    def value(self, address: str, name: str) -> Any:  # noqa: ANN401
+        """Return the latest value of a field, or None if it was never published.
+
+        Args:
+            address: Address of the device.
+            name: Name of the field.
+
+        """
+        record = self._records.get(address)
+        return record.fields.get(name) if record is not None else None
+
+    def snapshot(self) -> Snapshot:
+        """Return a view of every record that later updates do not modify."""
+        if self._snapshot.version != self.version:
+            self._snapshot = Snapshot(self.version, MappingProxyType(dict(self._records)))
+        return self._snapshot
+
+    def subscribe(
+        self,
+        addresses: Iterable[str] | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> Subscription:
+        """Receive the changes made from now on.
+
+        Take a snapshot right after subscribing, before awaiting anything, to start
+        from the current state without missing a change.
+
+        Args:
+            addresses: Addresses of the devices to receive, None for all.
+            fields: Names of the fields to receive, None for all.
+
+        Returns:
+            An asynchronous iterator of changes, closed with its close method.
+
+        """
+        subscription = Subscription(
+            self,
+            frozenset(addresses) if addresses is not None else None,
+            frozenset(fields) if fields is not None else None,
+        )
+        for key in _keys(subscription):
+            self._subscriptions.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering changes to a subscription.
+
+        Args:
+            subscription: The subscription to remove.
+
+        """
+        for key in _keys(subscription):
+            subscribers = self._subscriptions.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+
+
+def _keys(subscription: Subscription) -> Iterable[str | None]:
+    # Subscriptions to every device are indexed under None
+    return (None,) if subscription.addresses is None else subscription.addresses
@@ -0,0 +1,169 @@
+import atexit
+import logging
+import queue
+import sys
+import time
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# Log records waiting for the logging thread before new ones are dropped
+QUEUE_CAPACITY = 10_000
+# Seconds between the messages a rate limited logger lets through per key
+RATE_LIMIT_INTERVAL = 10.0
+# Keys a rate limited logger tracks before forgetting them all, e.g. unknown addresses
+MAX_KEYS = 1024
+
+
+class BackgroundHandler(QueueHandler):
+    """Hands log records to the logging thread without formatting them.
+
+    The message, its arguments and any traceback are formatted by the handlers on
+    the logging thread, so a call from the event loop only creates the record and
+    queues it. Arguments are formatted later, so they must not be changed after
+    logging them. The queue is bounded; when the logging thread falls behind new
+    records are dropped and counted, and a warning with the count is queued once
+    there is room again.
+    """
+
+    def __init__(self, records: queue.Queue) -> None:
+        """Create a handler queuing to the logging thread.
+
+        Args:
+            records: Bounded queue read by the logging thread.
+
+        """
+        super().__init__(records)
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return the record unformatted, it is formatted on the logging thread."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it if the queue is full."""
+        try:
+            if self.dropped > self._reported:
+                self.queue.put_nowait(
+                    logging.LogRecord(
+                        __name__,
+                        logging.WARNING,
+                        __file__,
+                        0,
+                        "Dropped %d log records while logging fell behind",
+                        (self.dropped - self._reported,),
+                        None,
+                    ),
+                )
+                self._reported = self.dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_background_logging(
+    level: str,
+    fmt: str,
+    capacity: int = QUEUE_CAPACITY,
+) -> QueueListener:
+    """Log through a queue to a thread writing to stderr, replacing the root handlers.
+
+    The thread is stopped, and the queued records written, when the interpreter
+    exits.
+
+    Args:
+        level: Name of the root logger's level, e.g. INFO.
+        fmt: Format of the written records.
+        capacity: Records waiting for the thread before new ones are dropped.
+
+    Returns:
+        The listener running the logging thread.
+
+    """
+    records: queue.Queue = queue.Queue(capacity)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(fmt))
+    listener = QueueListener(records, stream, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(BackgroundHandler(records))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class RateLimitedLogger:
+    """Logger for per-packet messages, letting one message per key through per interval.
+
+    A message is only formatted and recorded if its level is enabled and its key,
+    e.g. a device address, has not logged within the interval, so a stream of
+    per-packet messages costs a dictionary lookup each. The next message let
+    through says how many were suppressed in between.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        interval: float = RATE_LIMIT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Wrap a logger.
+
+        Args:
+            logger: The logger to log to.
+            interval: Seconds between the messages let through per key.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.logger = logger
+        self.interval = interval
+        self._clock = clock
+        # Time of the last message let through and the number suppressed since, by key
+        self._keys: dict[object, list[float | int]] = {}
+
+    def log(self, level: int, key: object, msg: str, *args: Any) -> None:  # noqa: ANN401
+        """Log a message unless its key logged within the interval.
+
+        Args:
+            level: Level of the message.
+            key: What the message is about, e.g. a device address.
+            msg: The message, formatted with the arguments by the logging thread.
+            *args: Arguments of the message.
+
+        """
+        self._log(level, key, msg, args)
+
+    def debug(self, key: object, msg: str, *args: Any) -> None:  # noqa: ANN401
+        """Log a debug message unless its key logged within the interval."""
+        self._log(logging.DEBUG, key, msg, args)
+
+    def info(self, key: object, msg: str, *args: Any) -> None:  # noqa: ANN401
+        """Log an info message unless its key logged within the interval."""
+        self._log(logging.INFO, key, msg, args)
+
+    def warning(self, key: object, msg: str, *args: Any) -> None:  # noqa: ANN401
+        """Log a warning unless its key logged within the interval."""
+        self._log(logging.WARNING, key, msg, args)
+
+    def _log(self, level: int, key: object, msg: str, args: tuple) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = self._clock()
+        state = self._keys.get(key)
+        if state is not None and now - state[0] < self.interval:
+            state[1] += 1
+            return
+
+        if state is not None and state[1]:
+            msg += " (%d similar messages suppressed)"
+            args = (*args, state[1])
+        if state is None and len(self._keys) >= MAX_KEYS:
+            self._keys.clear()
+        self._keys[key] = [now, 0]
+        # Attributed to the caller of the public method
+        self.logger.log(level, msg, *args, stacklevel=3)
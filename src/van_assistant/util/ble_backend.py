@@ -0,0 +1,43 @@
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+from bleak.backends.scanner import AdvertisementDataCallback
+
+
+class ScannerBackend(Protocol):
+    """The subset of the BleakScanner interface used by the scanners."""
+
+    async def start(self) -> None:
+        """Start scanning."""
+
+    async def stop(self) -> None:
+        """Stop scanning."""
+
+
+class ClientBackend(Protocol):
+    """The subset of the BleakClient interface used by connectable devices."""
+
+    async def connect(self) -> Any:  # noqa: ANN401
+        """Connect to the device."""
+
+    async def disconnect(self) -> Any:  # noqa: ANN401
+        """Disconnect from the device."""
+
+    async def start_notify(
+        self,
+        char_specifier: Any,  # noqa: ANN401
+        callback: Callable[[Any, bytearray], Awaitable[None] | None],
+    ) -> None:
+        """Subscribe to notifications from a characteristic."""
+
+    async def write_gatt_char(
+        self,
+        char_specifier: Any,  # noqa: ANN401
+        data: bytes,
+        response: bool | None = None,  # noqa: FBT001
+    ) -> None:
+        """Write to a characteristic."""
+
+
+ScannerFactory = Callable[[AdvertisementDataCallback], ScannerBackend]
+ClientFactory = Callable[[str], ClientBackend]
@@ -4,6 +4,8 @@ import requests
 import yaml
 
 from van_assistant.devices.brands import SupportedBrand
+from van_assistant.devices.remco.devices.base import REMCO_MANUFACTURER_ID
+from van_assistant.devices.victron.devices.base import VICTRON_MANUFACTURER_ID
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +28,28 @@ def get_company_identifiers() -> dict[int, str]:
     return {entry["value"]: entry["name"] for entry in ids}
 
 
-COMPANY_IDS: dict[int, str] = get_company_identifiers()
-COMPANY_IDS[0x3461] = "Remco Energy"
+def load_company_identifiers() -> dict[int, str]:
+    """Return the company identifiers, falling back to the supported brands when offline.
+
+    Returns:
+        A dictionary mapping company identifier values to company names.
+
+    """
+    try:
+        company_ids = get_company_identifiers()
+    except requests.RequestException as e:
+        logger.warning(f"Could not fetch Bluetooth company identifiers: {e}")
+        company_ids = {VICTRON_MANUFACTURER_ID: SupportedBrand.VICTRON.value}
+    company_ids[REMCO_MANUFACTURER_ID] = SupportedBrand.REMCO.value
+    return company_ids
+
+
+COMPANY_IDS: dict[int, str] = load_company_identifiers()
 
 
 if __name__ == "__main__":
     company_identifiers = get_company_identifiers()
-    logger.info(company_identifiers[0x02E1])
+    logger.info(company_identifiers[VICTRON_MANUFACTURER_ID])
     for identifier, name in company_identifiers.items():
         if name == SupportedBrand.VICTRON:
             logger.info(f"{identifier}: {name}")
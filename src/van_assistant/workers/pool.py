@@ -0,0 +1,244 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import queue
+import time
+from collections.abc import Callable
+from multiprocessing.synchronize import Event, Lock, Semaphore
+from typing import TYPE_CHECKING, Any
+
+from paho.mqtt.client import PayloadType
+
+from van_assistant.devices.victron.identifier import VictronDeviceIdentifier
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.workers.ring import AdvertisementRing, RawAdvertisement
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+
+    from van_assistant.devices.victron.devices.base import VictronDevice
+
+logger = logging.getLogger(__name__)
+
+RING_CAPACITY = 4096
+BATCH_SIZE = 64
+IDLE_WAIT = 1.0
+RESULT_POLL = 0.1
+
+# Address, device class name, parsed fields and receive time of a decoded advertisement
+DecodedRecord = tuple[str, str, dict[str, Any], float]
+ResultCallback = Callable[[str, str, dict[str, Any]], None]
+
+
+class _DiscardService(NotificationService):
+    """Workers only decode, publishing happens in the main process."""
+
+    def publish(self, topic: str, payload: PayloadType) -> None:
+        pass
+
+
+def format_address(address: bytes) -> str:
+    """Return the colon separated form of a 6 byte BLE address."""
+    return ":".join(f"{octet:02X}" for octet in address)
+
+
+def decode_worker(  # noqa: PLR0913, PLR0917
+    ring_name: str,
+    ring_capacity: int,
+    ring_lock: Lock,
+    ring_doorbell: Semaphore,
+    keys: dict[str, str],
+    results: multiprocessing.Queue,
+    stop: Event,
+    batch_size: int = BATCH_SIZE,
+) -> None:
+    """Decrypt and parse advertisements from a ring until stopped.
+
+    Runs in a worker process. Decoded records are sent back in batches to keep
+    the number of queue operations low. An idle worker blocks on the ring's
+    doorbell rather than polling it.
+
+    Args:
+        ring_name: Name of the shared memory ring to read from.
+        ring_capacity: Number of slots in the ring.
+        ring_lock: Lock guarding the ring.
+        ring_doorbell: Semaphore rung when an advertisement is put in the empty ring.
+        keys: Encryption keys of the configured devices, by address.
+        results: Queue receiving lists of decoded records.
+        stop: Event set when the worker should exit.
+        batch_size: Maximum number of records sent at once.
+
+    """
+    ring = AdvertisementRing(ring_capacity, ring_name, ring_lock, ring_doorbell)
+    service = _DiscardService()
+    decoders: dict[bytes, VictronDevice | None] = {}
+    batch: list[DecodedRecord] = []
+
+    try:
+        while not stop.is_set():
+            item = ring.get()
+            if item is None:
+                if batch:
+                    results.put(batch)
+                    batch = []
+                ring.wait(IDLE_WAIT)
+                continue
+
+            decoder = _get_decoder(decoders, keys, service, item)
+            if decoder is None:
+                continue
+
+            try:
+                parsed = decoder.decode(item.payload)
+            except ValueError:
+                continue
+            if parsed is None:
+                continue
+
+            batch.append((decoder.addr, type(decoder).__name__, parsed, item.timestamp))
+            if len(batch) >= batch_size:
+                results.put(batch)
+                batch = []
+    finally:
+        ring.close()
+
+
+def _get_decoder(
+    decoders: "dict[bytes, VictronDevice | None]",
+    keys: dict[str, str],
+    service: NotificationService,
+    item: RawAdvertisement,
+) -> "VictronDevice | None":
+    """Return the decoder for an advertisement's address, creating it on first sight."""
+    if item.address in decoders:
+        return decoders[item.address]
+
+    address = format_address(item.address)
+    if address not in keys:
+        # Not configured, ignore this address from now on
+        decoders[item.address] = None
+        return None
+
+    device_type = VictronDeviceIdentifier.detect_device_type(item.payload)
+    if device_type is None:
+        return None
+
+    decoder = decoders[item.address] = device_type(address, service, keys[address])
+    return decoder
+
+
+class DecodeWorkerPool:
+    """Pool of processes decrypting and parsing Victron advertisements.
+
+    Advertisements are sharded by address over one ring per worker, so each
+    device is always decoded by the same worker and in order.
+    """
+
+    def __init__(
+        self,
+        keys: dict[str, str],
+        workers: int,
+        on_result: ResultCallback,
+        ring_capacity: int = RING_CAPACITY,
+    ) -> None:
+        """Create a worker pool, call start() to launch the processes.
+
+        Args:
+            keys: Encryption keys of the configured Victron devices, by address.
+            workers: Number of worker processes.
+            on_result: Called in the event loop with the address, device class name
+                and parsed fields of every decoded advertisement.
+            ring_capacity: Number of slots in each worker's ring.
+
+        """
+        self.keys = keys
+        self.workers = workers
+        self.ring_capacity = ring_capacity
+        self.on_result = on_result
+        self._context = multiprocessing.get_context("spawn")
+        self._results: multiprocessing.Queue = self._context.Queue()
+        self._stop = self._context.Event()
+        self._rings: list[AdvertisementRing] = []
+        self._processes: list[BaseProcess] = []
+        self._routes: dict[str, tuple[AdvertisementRing, bytes]] = {}
+
+    @property
+    def dropped(self) -> int:
+        """Return the number of advertisements dropped because a ring was full."""
+        return sum(ring.dropped for ring in self._rings)
+
+    def start(self) -> None:
+        """Create the rings and launch the worker processes."""
+        for _ in range(self.workers):
+            ring = AdvertisementRing(self.ring_capacity)
+            process = self._context.Process(
+                target=decode_worker,
+                args=(
+                    ring.name,
+                    self.ring_capacity,
+                    ring.lock,
+                    ring.doorbell,
+                    self.keys,
+                    self._results,
+                    self._stop,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._rings.append(ring)
+            self._processes.append(process)
+
+        # Shard assignment is fixed up front so submit() is a single dict lookup
+        for i, address in enumerate(sorted(self.keys)):
+            self._routes[address] = (
+                self._rings[i % self.workers],
+                bytes.fromhex(address.replace(":", "")),
+            )
+
+    def submit(self, address: str, manufacturer_id: int, payload: bytes) -> bool:
+        """Queue an advertisement for decoding.
+
+        Args:
+            address: BLE MAC address of the advertiser.
+            manufacturer_id: The manufacturer ID of the data.
+            payload: The manufacturer data.
+
+        Returns:
+            True if the advertisement was queued, False if it was dropped.
+
+        """
+        route = self._routes.get(address)
+        if route is None:
+            return False
+        ring, raw_address = route
+        return ring.put(raw_address, manufacturer_id, payload, time.time())
+
+    async def run(self) -> None:
+        """Deliver decoded records to on_result until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await loop.run_in_executor(None, self._next_batch)
+            for address, type_name, parsed, _ in batch:
+                self.on_result(address, type_name, parsed)
+
+    def stop(self) -> None:
+        """Stop the workers and free the rings."""
+        self._stop.set()
+        for ring in self._rings:
+            ring.wake()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._rings:
+            ring.close()
+            ring.unlink()
+        self._processes.clear()
+        self._rings.clear()
+        self._routes.clear()
+
+    def _next_batch(self) -> list[DecodedRecord]:
+        with contextlib.suppress(queue.Empty):
+            return self._results.get(timeout=RESULT_POLL)
+        return []
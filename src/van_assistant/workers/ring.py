@@ -0,0 +1,155 @@
+import multiprocessing
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Lock, Semaphore
+from typing import NamedTuple
+
+# Write and read positions, and whether the consumer is waiting for the doorbell
+INDEX = struct.Struct("<QQQ")
+# Address, manufacturer ID, timestamp, payload length, payload
+SLOT = struct.Struct("<6sHdB64s")
+MAX_PAYLOAD = 64
+
+
+class RawAdvertisement(NamedTuple):
+    """A raw advertisement as stored in the ring."""
+
+    address: bytes
+    manufacturer_id: int
+    timestamp: float
+    payload: bytes
+
+
+class AdvertisementRing:
+    """Fixed-size single-producer, single-consumer ring of raw advertisements.
+
+    The ring lives in shared memory so the scanner process can hand advertisements
+    to a decode worker without pickling. Python gives no memory ordering guarantee
+    between writes to shared memory, so on weakly ordered CPUs such as ARM the
+    consumer could see a new write position before the slot it points at. Slots and
+    positions are therefore only accessed while holding a process-shared lock, whose
+    acquire and release are full memory barriers. The lock is held for a single
+    struct copy, so the two sides rarely contend for it.
+
+    An empty ring is waited on with wait(), which blocks on a doorbell semaphore
+    that put() only rings when the consumer has said it is waiting.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        name: str | None = None,
+        lock: Lock | None = None,
+        doorbell: Semaphore | None = None,
+    ) -> None:
+        """Create a new ring, or attach to an existing one by name.
+
+        Args:
+            capacity: Number of slots in the ring.
+            name: Name of an existing ring to attach to.
+            lock: Lock of the existing ring, required when attaching.
+            doorbell: Doorbell of the existing ring, required when attaching.
+
+        """
+        self.capacity = capacity
+        size = INDEX.size + capacity * SLOT.size
+        if name is None:
+            context = multiprocessing.get_context("spawn")
+            self._shm = SharedMemory(create=True, size=size)
+            INDEX.pack_into(self._shm.buf, 0, 0, 0, 0)
+            lock = context.Lock()
+            doorbell = context.Semaphore(0)
+        elif lock is None or doorbell is None:
+            msg = "Attaching to a ring requires its lock and doorbell"
+            raise ValueError(msg)
+        else:
+            self._shm = SharedMemory(name=name)
+        self.name = self._shm.name
+        self.lock = lock
+        self.doorbell = doorbell
+        self.dropped = 0
+
+    def put(self, address: bytes, manufacturer_id: int, payload: bytes, timestamp: float) -> bool:
+        """Append an advertisement, dropping it if the ring is full.
+
+        Args:
+            address: The 6 byte BLE address.
+            manufacturer_id: The manufacturer ID of the data.
+            payload: The manufacturer data, at most 64 bytes.
+            timestamp: Time the advertisement was received.
+
+        Returns:
+            True if the advertisement was stored.
+
+        """
+        buf = self._shm.buf
+        with self.lock:
+            write, read, waiting = INDEX.unpack_from(buf, 0)
+            if write - read >= self.capacity or len(payload) > MAX_PAYLOAD:
+                self.dropped += 1
+                return False
+
+            SLOT.pack_into(
+                buf,
+                INDEX.size + (write % self.capacity) * SLOT.size,
+                address,
+                manufacturer_id,
+                timestamp,
+                len(payload),
+                payload,
+            )
+            INDEX.pack_into(buf, 0, write + 1, read, 0)
+        if waiting:
+            self.doorbell.release()
+        return True
+
+    def get(self) -> RawAdvertisement | None:
+        """Remove and return the oldest advertisement, or None if the ring is empty."""
+        buf = self._shm.buf
+        with self.lock:
+            write, read, waiting = INDEX.unpack_from(buf, 0)
+            if read == write:
+                return None
+
+            address, manufacturer_id, timestamp, length, payload = SLOT.unpack_from(
+                buf,
+                INDEX.size + (read % self.capacity) * SLOT.size,
+            )
+            INDEX.pack_into(buf, 0, write, read + 1, waiting)
+        return RawAdvertisement(address, manufacturer_id, timestamp, payload[:length])
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the ring is not empty, the ring is woken or the timeout passes.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            False if the timeout passed without the doorbell ringing.
+
+        """
+        buf = self._shm.buf
+        with self.lock:
+            write, read, _ = INDEX.unpack_from(buf, 0)
+            if write != read:
+                return True
+            INDEX.pack_into(buf, 0, write, read, 1)
+        return self.doorbell.acquire(timeout=timeout)
+
+    def wake(self) -> None:
+        """Wake the consumer if it is waiting, so it can notice it should stop."""
+        self.doorbell.release()
+
+    def __len__(self) -> int:
+        """Return the number of advertisements waiting in the ring."""
+        with self.lock:
+            write, read, _ = INDEX.unpack_from(self._shm.buf, 0)
+        return write - read
+
+    def close(self) -> None:
+        """Detach from the shared memory."""
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory, called once by the creator."""
+        self._shm.unlink()
@@ -0,0 +1,65 @@
+import pytest
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from van_assistant.devices.remco.devices.base import REMCO_MANUFACTURER_ID
+from van_assistant.notification_services.base import NotificationService
+from van_assistant.scanners.base_scanner import BaseScanner
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+class RecordingService(NotificationService):
+    """Keeps every notification published to it, in order."""
+
+    def __init__(self) -> None:
+        """Create a service with nothing published."""
+        self.published: list[tuple[str, object]] = []
+        self.alerts: list[tuple[str, object]] = []
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Keep the notification."""
+        self.published.append((topic, payload))
+
+    def publish_alert(self, topic: str, payload: object) -> None:
+        """Keep the alert, apart from the other notifications."""
+        self.alerts.append((topic, payload))
+
+    def latest(self) -> dict[str, object]:
+        """Return the last payload published to each topic."""
+        return dict(self.published)
+
+
+class RecordingScanner(BaseScanner):
+    """Keeps the address of every advertisement passed on to the callback."""
+
+    def __init__(self) -> None:
+        """Create a scanner that never scans."""
+        super().__init__(lambda _: None)
+        self.received: list[str] = []
+
+    def callback(self, manufacturer_id: int, ble_device: BLEDevice, data: bytes) -> None:  # noqa: ARG002
+        """Keep the address."""
+        self.received.append(ble_device.address)
+
+
+def advertisement(payload: bytes, rssi: int = -70) -> AdvertisementData:
+    return AdvertisementData(
+        local_name=None,
+        manufacturer_data={REMCO_MANUFACTURER_ID: payload},
+        service_data={},
+        service_uuids=[],
+        tx_power=None,
+        rssi=rssi,
+        platform_data=(),
+    )
+
+
+@pytest.fixture
+def service() -> RecordingService:
+    return RecordingService()
+
+
+@pytest.fixture
+def fleet() -> SimulatedFleet:
+    return SimulatedFleet(SimulatorConfig(victron_count=12, remco_count=2, seed=7))
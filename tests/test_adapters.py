@@ -0,0 +1,156 @@
+import pytest
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData, AdvertisementDataCallback
+from bleak.exc import BleakError
+
+from tests.conftest import RecordingScanner, advertisement
+from van_assistant.scanners.adapters import (
+    RSSI_TIMEOUT,
+    AdapterClient,
+    AdapterTracker,
+    MultiAdapterScanner,
+    format_adapter_report,
+)
+from van_assistant.util.ble_backend import ScannerFactory
+
+ADDRESS = "C0:3B:98:12:34:56"
+
+
+class FakeScanner:
+    """Scanner whose advertisements are delivered by the test."""
+
+    def __init__(self, callback: AdvertisementDataCallback, *, fails: bool = False) -> None:
+        """Create a scanner delivering to a callback."""
+        self.callback = callback
+        self.fails = fails
+        self.running = False
+
+    def deliver(self, address: str, ad_data: AdvertisementData) -> None:
+        """Pass an advertisement to the callback."""
+        self.callback(BLEDevice(address, None, None), ad_data)
+
+    async def start(self) -> None:
+        """Start scanning, unless the adapter is missing."""
+        if self.fails:
+            msg = "adapter not found"
+            raise BleakError(msg)
+        self.running = True
+
+    async def stop(self) -> None:
+        """Stop scanning."""
+        self.running = False
+
+
+class FakeClient:
+    """Client recording the adapter it connects through."""
+
+    def __init__(self, address: str, adapter: str) -> None:
+        """Create a client for an address on an adapter."""
+        self.address = address
+        self.adapter = adapter
+
+    async def connect(self) -> bool:
+        """Pretend to connect."""
+        return True
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def tracker(now: list[float]) -> AdapterTracker:
+    return AdapterTracker(["hci0", "hci1"], clock=lambda: now[0])
+
+
+def _scanners(
+    tracker: AdapterTracker,
+    callback: AdvertisementDataCallback,
+    failing: frozenset[str] = frozenset(),
+) -> tuple[MultiAdapterScanner, dict[str, FakeScanner]]:
+    scanners: dict[str, FakeScanner] = {}
+
+    def factory(adapter: str) -> ScannerFactory:
+        def create(callback: AdvertisementDataCallback) -> FakeScanner:
+            scanner = scanners[adapter] = FakeScanner(callback, fails=adapter in failing)
+            return scanner
+
+        return create
+
+    multi = MultiAdapterScanner(callback, {name: factory(name) for name in tracker.stats}, tracker)
+    return multi, scanners
+
+
+def test_best_adapter_follows_the_average_rssi(
+    tracker: AdapterTracker,
+    now: list[float],
+) -> None:
+    device = BLEDevice(ADDRESS, None, None)
+    assert tracker.best_adapter(ADDRESS) is None
+
+    tracker.observe("hci0", device, advertisement(b"\x01", rssi=-60))
+    tracker.observe("hci1", device, advertisement(b"\x01", rssi=-70))
+    assert tracker.best_adapter(ADDRESS) == "hci0"
+
+    # One strong reading moves the average only part of the way
+    now[0] = 1
+    tracker.observe("hci1", device, advertisement(b"\x02", rssi=-50))
+    assert tracker.best_adapter(ADDRESS) == "hci0"
+    for _ in range(5):
+        tracker.observe("hci1", device, advertisement(b"\x02", rssi=-50))
+    assert tracker.best_adapter(ADDRESS) == "hci1"
+    assert (tracker.devices("hci0"), tracker.devices("hci1")) == (0, 1)
+
+    # An adapter that stopped hearing the device no longer counts
+    now[0] = 1 + RSSI_TIMEOUT
+    tracker.observe("hci0", device, advertisement(b"\x03", rssi=-90))
+    assert tracker.best_adapter(ADDRESS) == "hci0"
+    now[0] += RSSI_TIMEOUT
+    assert tracker.best_adapter(ADDRESS) is None
+
+
+async def test_advertisements_heard_twice_are_passed_on_once(tracker: AdapterTracker) -> None:
+    receiver = RecordingScanner()
+    multi, scanners = _scanners(tracker, receiver.detection_callback)
+    await multi.start()
+
+    scanners["hci0"].deliver(ADDRESS, advertisement(b"\x01"))
+    scanners["hci1"].deliver(ADDRESS, advertisement(b"\x01"))
+    scanners["hci1"].deliver(ADDRESS, advertisement(b"\x02"))
+    scanners["hci0"].deliver(ADDRESS, advertisement(b"\x02"))
+
+    assert receiver.received == [ADDRESS, ADDRESS]
+    assert [(stats.advertisements, stats.first) for stats in tracker.stats.values()] == [
+        (2, 1),
+        (2, 1),
+    ]
+    assert format_adapter_report(tracker).splitlines()[1].split()[0] == "hci0"
+
+    await multi.stop()
+    assert not any(scanner.running for scanner in scanners.values())
+
+
+async def test_missing_adapters_are_skipped(tracker: AdapterTracker) -> None:
+    multi, scanners = _scanners(tracker, lambda _device, _data: None, frozenset({"hci0"}))
+    await multi.start()
+    assert scanners["hci1"].running
+
+    multi, _ = _scanners(tracker, lambda _device, _data: None, frozenset({"hci0", "hci1"}))
+    with pytest.raises(BleakError, match="adapter not found"):
+        await multi.start()
+
+
+async def test_client_connects_through_the_best_adapter(tracker: AdapterTracker) -> None:
+    clients: list[FakeClient] = []
+
+    def factory(address: str, adapter: str) -> FakeClient:
+        clients.append(FakeClient(address, adapter))
+        return clients[-1]
+
+    client = AdapterClient(ADDRESS, tracker, "hci0", factory)
+    await client.connect()
+    tracker.observe("hci1", BLEDevice(ADDRESS, None, None), advertisement(b"\x01"))
+    await client.connect()
+
+    assert [client.adapter for client in clients] == ["hci0", "hci0", "hci1"]
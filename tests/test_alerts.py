@@ -0,0 +1,101 @@
+import logging
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.aggregation.alerts import ACTIVE, CLEAR, AlertRules, Rule
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.devices.victron.utils import AlarmReason
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def battery(fleet: SimulatedFleet, service: RecordingService) -> RemcoBattery:
+    return RemcoBattery(next(iter(fleet.remco)), service, fleet.client_factory)
+
+
+@pytest.fixture
+def rules(service: RecordingService, now: list[float], battery: RemcoBattery) -> AlertRules:
+    rules = AlertRules(service, clock=lambda: now[0])
+    rules.add_rule(Rule("cell_high", battery.addr, "cell_voltages", above=3.6, hysteresis=0.1))
+    rules.add_rule(Rule("low", battery.addr, "volts", below=12.0, duration=10))
+    rules.add_rule(Rule("alarm", battery.addr, "alarm", equals="LOW_VOLTAGE"))
+    rules.watch(battery)
+    return rules
+
+
+def test_threshold_with_hysteresis(
+    battery: RemcoBattery,
+    service: RecordingService,
+    rules: AlertRules,
+) -> None:
+    for cells in ([3.3, 3.65], [3.3, 3.55], [3.3, 3.49]):
+        battery.publish_data({"cell_voltages": cells})
+
+    assert service.alerts == [("alerts/cell_high", ACTIVE), ("alerts/cell_high", CLEAR)]
+    assert rules.active() == []
+
+
+def test_condition_must_hold_for_the_duration(
+    battery: RemcoBattery,
+    service: RecordingService,
+    rules: AlertRules,
+    now: list[float],
+) -> None:
+    for time in (0, 5, 10):
+        now[0] = time
+        battery.publish_data({"volts": 11.5})
+
+    assert service.alerts == [("alerts/low", ACTIVE)]
+    assert rules.active() == ["low"]
+
+
+def test_enum_fields_are_compared_by_name(
+    battery: RemcoBattery,
+    service: RecordingService,
+    rules: AlertRules,
+) -> None:
+    battery.publish_data({"alarm": AlarmReason.LOW_VOLTAGE})
+
+    assert service.alerts == [("alerts/alarm", ACTIVE)]
+    assert rules.active() == ["alarm"]
+
+
+def test_elements_that_are_not_numbers_are_ignored(
+    battery: RemcoBattery,
+    service: RecordingService,
+    rules: AlertRules,
+) -> None:
+    battery.publish_data({"cell_voltages": [3.3, None, 3.7]})
+    battery.publish_data({"cell_voltages": [None, None]})
+
+    assert service.alerts == [("alerts/cell_high", ACTIVE)]
+    assert rules.active() == ["cell_high"]
+    assert service.latest()[f"{battery.topic_prefix}/cell_voltages/2"] == 3.7
+
+
+def test_threshold_on_a_field_that_is_not_a_number(
+    battery: RemcoBattery,
+    service: RecordingService,
+    rules: AlertRules,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    rules.add_rule(Rule("date", battery.addr, "mdate", above=1))
+
+    with caplog.at_level(logging.WARNING):
+        battery.publish_data({"mdate": "2024-03-14"})
+        battery.publish_data({"mdate": "2024-03-14"})
+
+    assert service.alerts == []
+    assert f"{battery.topic_prefix}/mdate" in service.latest()
+    assert caplog.text.count("is not a number") == 1
+
+
+def test_rule_needs_one_condition(rules: AlertRules) -> None:
+    with pytest.raises(ValueError, match="exactly one"):
+        rules.add_rule(Rule("bad", "AA:BB:CC:DD:EE:FF", "volts", above=1, below=0))
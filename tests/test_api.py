@@ -0,0 +1,70 @@
+import asyncio
+import json
+import math
+from collections.abc import AsyncIterator
+
+import pytest
+
+from van_assistant.api.server import ApiServer
+from van_assistant.devices.victron.utils import AlarmReason
+from van_assistant.metrics import pipeline
+from van_assistant.state.store import StateStore
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[ApiServer]:
+    server = ApiServer(StateStore(), "127.0.0.1", 0)
+    task = asyncio.create_task(server.run())
+    while not server.sockets:  # noqa: ASYNC110
+        await asyncio.sleep(0.01)
+    yield server
+    task.cancel()
+
+
+async def _get(server: ApiServer, path: str) -> tuple[str, bytes]:
+    reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return head.decode(), body
+
+
+async def test_device_record(server: ApiServer) -> None:
+    server.state.update(ADDRESS, {"voltage": 12.5, "alarm": AlarmReason.LOW_VOLTAGE}, "Battery")
+
+    head, body = await _get(server, "/api/devices/aabbccddeeff")
+
+    assert head.startswith("HTTP/1.1 200")
+    record = json.loads(body)
+    assert record["fields"] == {"voltage": 12.5, "alarm": "LOW_VOLTAGE"}
+
+
+async def test_non_finite_floats_are_null(server: ApiServer) -> None:
+    server.state.update(ADDRESS, {"voltage": math.nan, "cells": [3.3, math.inf]}, "Battery")
+
+    _, body = await _get(server, "/api/state")
+
+    # Strict parsing, Python accepts NaN and Infinity by default
+    state = json.loads(body, parse_constant=pytest.fail)
+    assert state["devices"][ADDRESS]["fields"] == {"voltage": None, "cells": [3.3, None]}
+
+
+async def test_metrics(server: ApiServer) -> None:
+    head, _ = await _get(server, "/api/metrics")
+    assert head.startswith("HTTP/1.1 404")
+
+    stats = pipeline.enable()
+    try:
+        stats.count("in", 2)
+        stats.record("VictronSolarCharger", "parse", 1500)
+        head, body = await _get(server, "/api/metrics")
+    finally:
+        pipeline.disable()
+
+    assert head.startswith("HTTP/1.1 200")
+    metrics = json.loads(body)
+    assert metrics["counters"]["in"] == 2
+    assert metrics["stages"]["VictronSolarCharger"]["parse"]["count"] == 1
@@ -0,0 +1,115 @@
+import math
+from enum import Enum
+
+import pytest
+
+from van_assistant.notification_services import batch as batch_module
+from van_assistant.notification_services.batch import (
+    MISSING_CODE,
+    BatchError,
+    ColumnSummary,
+    ReadingBatch,
+)
+
+FIRST = "AA:BB:CC:DD:EE:01"
+SECOND = "AA:BB:CC:DD:EE:02"
+
+
+class State(Enum):
+    """States of the test readings."""
+
+    IDLE = 0
+    CHARGING = 3
+
+
+@pytest.fixture
+def batch() -> ReadingBatch:
+    batch = ReadingBatch("Battery")
+    batch.append(FIRST, 1.0, {"volts": 13.2, "state": State.IDLE, "cells": [3.3, 3.31]})
+    batch.append(SECOND, 2.0, {"volts": None, "state": None, "name": "pack"})
+    batch.append(FIRST, 3.0, {"volts": 12.8, "state": State.CHARGING, "cells": [3.2, None, 3.1]})
+    return batch
+
+
+def test_readings_are_stored_by_column(batch: ReadingBatch) -> None:
+    assert len(batch) == 3
+    assert list(batch.timestamps) == [1.0, 2.0, 3.0]
+    assert batch.addresses == [FIRST, SECOND]
+    assert list(batch.address_index) == [0, 1, 0]
+    assert batch.values("volts") == [13.2, None, 12.8]
+    assert list(batch.columns["state"]) == [0, MISSING_CODE, 3]
+    assert batch.values("state") == [State.IDLE, None, State.CHARGING]
+    assert batch.values("cells/1") == [3.31, None, None]
+    assert batch.values("cells/2") == [None, None, 3.1]
+    assert batch.columns["name"] == [None, "pack", None]
+
+
+def test_value_that_does_not_fit_turns_the_column_into_a_list(batch: ReadingBatch) -> None:
+    batch.append(FIRST, 4.0, {"volts": "n/a", "state": 7})
+
+    assert batch.columns["volts"] == [13.2, None, 12.8, "n/a"]
+    assert batch.columns["state"] == [State.IDLE, None, State.CHARGING, 7]
+    assert "state" not in batch.enums
+    batch.append(FIRST, 5.0, {})
+    assert batch.values("volts")[-1] is None
+
+
+def test_fields_are_filtered() -> None:
+    batch = ReadingBatch("Battery", frozenset({"cells"}))
+    batch.append(FIRST, 1.0, {"volts": 13.2, "cells": [3.3]})
+
+    assert list(batch.columns) == ["cells/0"]
+    assert list(batch.select(frozenset({"volts"})).columns) == []
+
+
+def test_round_trip(batch: ReadingBatch) -> None:
+    batch.append(FIRST, 4.0, {"name": State.IDLE})
+
+    restored = ReadingBatch.from_bytes(batch.to_bytes())
+
+    assert restored.device_type == "Battery"
+    assert restored.timestamps == batch.timestamps
+    assert restored.addresses == batch.addresses
+    assert restored.address_index == batch.address_index
+    assert set(restored.columns) == set(batch.columns)
+    for name, column in batch.columns.items():
+        assert restored.columns[name] is not column
+        if name == "name":
+            # Values that are not JSON are kept as their text
+            assert restored.columns[name] == [None, "pack", None, str(State.IDLE)]
+        elif name in batch.enums:
+            assert [value and value.name for value in restored.values(name)] == [
+                value and value.name for value in batch.values(name)
+            ]
+        else:
+            assert restored.values(name) == batch.values(name)
+
+
+@pytest.mark.parametrize("data", [b"", b"\x05\x00\x00\x00{bad}", b"\x02\x00\x00\x00{}"])
+def test_invalid_data_is_rejected(data: bytes) -> None:
+    with pytest.raises(BatchError):
+        ReadingBatch.from_bytes(data)
+
+
+def test_truncated_batch_is_rejected(batch: ReadingBatch) -> None:
+    with pytest.raises(BatchError, match="truncated"):
+        ReadingBatch.from_bytes(batch.to_bytes()[:-8])
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_summary(batch: ReadingBatch, monkeypatch: pytest.MonkeyPatch, numpy: bool) -> None:  # noqa: FBT001
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(batch_module, "np", None)
+
+    summary = batch.summary()
+
+    assert set(summary) == {"volts", "cells/0", "cells/1", "cells/2"}
+    assert summary["volts"] == ColumnSummary(2, 12.8, 13.2, pytest.approx(13.0))
+    assert summary["cells/2"] == ColumnSummary(1, 3.1, 3.1, 3.1)
+    empty = ReadingBatch("Battery")
+    empty.append(FIRST, 1.0, {"volts": None})
+    count, *aggregates = empty.summary()["volts"]
+    assert count == 0
+    assert all(math.isnan(value) for value in aggregates)
@@ -0,0 +1,112 @@
+import math
+import random
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.capture.log import CaptureWriter
+from van_assistant.devices.victron.batch_decoder import (
+    BatchDecodeError,
+    decode_batch,
+    decode_capture,
+)
+from van_assistant.devices.victron.identifier import MODE_DEVICE_MAP, VictronBatterySense
+from van_assistant.simulator.config import FaultConfig
+from van_assistant.simulator.victron import VictronAdvertiser
+
+pytest.importorskip("numpy")
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+DEVICE_TYPES = [*MODE_DEVICE_MAP.items(), (0x2, VictronBatterySense)]
+
+
+def _flatten(data: dict) -> dict:
+    flat = {}
+    for name, value in data.items():
+        if isinstance(value, list):
+            flat.update({f"{name}/{i}": element for i, element in enumerate(value)})
+        else:
+            flat[name] = value
+    return flat
+
+
+def _same(expected: object, actual: object) -> bool:
+    if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+        return actual is None or (isinstance(actual, float) and math.isnan(actual))
+    return expected == actual
+
+
+@pytest.mark.parametrize(("mode", "device_type"), DEVICE_TYPES)
+def test_batch_matches_per_packet_records(
+    mode: int,
+    device_type: type,
+    service: RecordingService,
+) -> None:
+    rng = random.Random(mode)  # noqa: S311
+    key = rng.randbytes(16)
+    advertiser = VictronAdvertiser(
+        ADDRESS,
+        mode,
+        key,
+        rng,
+        FaultConfig(bad_key_rate=0.05, corrupt_rate=0.1),
+    )
+    advertiser.device_type = device_type
+    payloads = [advertiser.next_advertisement() for _ in range(500)]
+    # Random plaintexts of random lengths, and short and truncated payloads
+    payloads.extend(
+        advertiser.encrypt(rng.randbytes(rng.randrange(24)), rng.randrange(0x10000))
+        for _ in range(500)
+    )
+    payloads.extend([b"", b"\x10\x02", payloads[0][:8], payloads[0][:9]])
+
+    device = device_type(ADDRESS, service, key.hex())
+    expected = []
+    for i, payload in enumerate(payloads):
+        try:
+            record = device.record(payload)
+        except ValueError:
+            continue
+        if record is not None:
+            expected.append((i, _flatten(dict(record))))
+
+    batch = decode_batch(
+        device_type,
+        key.hex(),
+        payloads,
+        [float(i) for i in range(len(payloads))],
+        ADDRESS,
+    )
+
+    assert len(batch) == len(expected)
+    assert batch.addresses == [ADDRESS]
+    columns = {name: batch.values(name) for name in batch.columns}
+    for row, (i, data) in enumerate(expected):
+        assert batch.timestamps[row] == i
+        for name in set(data) | set(columns):
+            actual = columns[name][row] if name in columns else None
+            assert _same(data.get(name), actual), (name, i, data.get(name), actual)
+
+
+def test_invalid_key_is_rejected() -> None:
+    with pytest.raises(BatchDecodeError, match="Invalid encryption key"):
+        decode_batch(MODE_DEVICE_MAP[0x1], "not hex", [])
+
+
+def test_capture_is_decoded_per_device_without_repeats(tmp_path: Path) -> None:
+    key = bytes(range(16))
+    advertiser = VictronAdvertiser(ADDRESS, 0x1, key, random.Random(1), FaultConfig())  # noqa: S311
+    path = tmp_path / "capture.bin"
+    capture = CaptureWriter(path)
+    for _ in range(100):
+        payload = advertiser.next_advertisement()
+        capture.advertisement(ADDRESS, 0x02E1, payload)
+        capture.advertisement(ADDRESS, 0x02E1, payload)
+    capture.close()
+
+    batches = decode_capture(path, {ADDRESS: key.hex()})
+
+    assert [(batch.device_type, len(batch)) for batch in batches] == [
+        (advertiser.device_type.__name__, 100),
+    ]
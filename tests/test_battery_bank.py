@@ -0,0 +1,116 @@
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.aggregation.battery_bank import BatteryBank
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def packs(fleet: SimulatedFleet, service: RecordingService) -> list[RemcoBattery]:
+    return [RemcoBattery(address, service, fleet.client_factory) for address in fleet.remco]
+
+
+@pytest.fixture
+def bank(service: RecordingService, now: list[float], packs: list[RemcoBattery]) -> BatteryBank:
+    bank = BatteryBank("house", service, stale_after=30, clock=lambda: now[0])
+    for pack in packs:
+        bank.add_pack(pack)
+    return bank
+
+
+def _report(pack: RemcoBattery, capacity: float, percent: float, amps: float = 1.0) -> None:
+    pack.publish_data(
+        {
+            "volts": 13.2,
+            "amps": amps,
+            "capacity": capacity,
+            "remain": capacity * percent / 100,
+            "percent": percent,
+        },
+    )
+
+
+def test_totals_and_capacity_weighted_soc(
+    bank: BatteryBank,
+    packs: list[RemcoBattery],
+    service: RecordingService,
+) -> None:
+    first, second = packs
+    _report(first, 100, 50)
+    _report(second, 300, 90, amps=-3)
+    _report(first, 100, 70)
+
+    summary = bank.summary()
+
+    assert summary["packs"] == 2
+    assert summary["amps"] == -2
+    assert summary["capacity"] == 400
+    assert summary["remain"] == 340
+    assert summary["percent"] == 85
+    assert service.latest()["bank/house/percent"] == 85
+
+
+def test_stale_packs_are_excluded_and_counted_again(
+    bank: BatteryBank,
+    packs: list[RemcoBattery],
+    now: list[float],
+) -> None:
+    first, second = packs
+    _report(first, 100.1, 40)
+    _report(second, 200.3, 76)
+    now[0] = 31
+    bank.check_stale()
+
+    assert bank.summary() == {
+        "volts": None,
+        "amps": None,
+        "capacity": None,
+        "remain": None,
+        "percent": None,
+        "min_cell": None,
+        "max_cell": None,
+        "cell_delta": None,
+        "packs": 0,
+        "stale_packs": 2,
+    }
+    assert bank._capacity_sum == bank._weighted_soc_sum == 0
+
+    _report(second, 200.3, 76)
+
+    summary = bank.summary()
+    assert summary["packs"] == 1
+    assert summary["capacity"] == 200.3
+    assert summary["percent"] == 76
+
+
+def test_min_and_max_cells_across_packs(
+    bank: BatteryBank,
+    packs: list[RemcoBattery],
+    now: list[float],
+) -> None:
+    first, second = packs
+    first.publish_data({"cell_voltages": [3.30, 3.32]})
+    second.publish_data({"cell_voltages": [3.28, 3.35]})
+    assert (bank.summary()["min_cell"], bank.summary()["max_cell"]) == (3.28, 3.35)
+
+    # The pack holding both extremes moves away from them
+    second.publish_data({"cell_voltages": [3.31, 3.31]})
+    assert (bank.summary()["min_cell"], bank.summary()["max_cell"]) == (3.30, 3.32)
+
+    second.publish_data({"cell_voltages": [3.25, 3.40]})
+    now[0] = 20
+    first.publish_data({"volts": 13.2})
+    now[0] = 40
+    bank.check_stale()
+    assert bank.summary()["stale_packs"] == 1
+    assert (bank.summary()["min_cell"], bank.summary()["max_cell"]) == (3.30, 3.32)
+
+    # Its cells count again as soon as it reports, before its next cell reading
+    second.publish_data({"volts": 13.2})
+    assert (bank.summary()["min_cell"], bank.summary()["max_cell"]) == (3.25, 3.40)
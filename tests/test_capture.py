@@ -0,0 +1,128 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.capture import log
+from van_assistant.capture.log import (
+    MAGIC,
+    CaptureError,
+    CaptureRecord,
+    CaptureWriter,
+    RecordKind,
+    read_capture,
+)
+from van_assistant.capture.replay import CaptureReplay
+from van_assistant.config import parse_config
+from van_assistant.runtime import Runtime
+from van_assistant.simulator.config import SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+def _write(path: Path, *, compress: bool = False) -> None:
+    capture = CaptureWriter(path, compress=compress)
+    capture.advertisement(ADDRESS, 0x02E1, b"\x10\x02\x01", rssi=-200)
+    capture.notification(ADDRESS, bytearray(b"\xdd\x03\x00"))
+    capture.advertisement(ADDRESS, 0x02E1, b"")
+    capture.close()
+
+
+def _without_times(records: list[CaptureRecord]) -> list[CaptureRecord]:
+    return [record._replace(timestamp=0.0) for record in records]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_records_round_trip(tmp_path: Path, compress: bool) -> None:  # noqa: FBT001
+    if compress:
+        pytest.importorskip("zstandard")
+    path = tmp_path / "capture.bin"
+    _write(path, compress=compress)
+
+    records = list(read_capture(path))
+
+    assert _without_times(records) == [
+        CaptureRecord(RecordKind.ADVERTISEMENT, 0.0, ADDRESS, 0x02E1, -128, b"\x10\x02\x01"),
+        CaptureRecord(RecordKind.NOTIFICATION, 0.0, ADDRESS, 0, 0, b"\xdd\x03\x00"),
+        CaptureRecord(RecordKind.ADVERTISEMENT, 0.0, ADDRESS, 0x02E1, 0, b""),
+    ]
+    assert records[0].timestamp <= records[1].timestamp <= records[2].timestamp
+
+
+def test_truncated_capture_stops_at_the_last_whole_record(tmp_path: Path) -> None:
+    path = tmp_path / "capture.bin"
+    _write(path)
+    data = path.read_bytes()
+
+    for cut, count in ((len(data) - 1, 2), (len(MAGIC) + 5, 0)):
+        path.write_bytes(data[:cut])
+        assert len(list(read_capture(path))) == count
+
+
+def test_other_files_are_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"not a capture")
+
+    with pytest.raises(CaptureError, match="not a capture"):
+        list(read_capture(path))
+    with pytest.raises(CaptureError, match="non MAC address"):
+        CaptureWriter(path).notification("hci0", b"")
+
+
+def test_compression_needs_zstandard(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(log, "zstandard", None)
+    path = tmp_path / "capture.bin.zst"
+
+    with pytest.raises(CaptureError, match="zstandard"):
+        CaptureWriter(path, compress=True)
+    path.write_bytes(log.ZSTD_MAGIC + bytes(16))
+    with pytest.raises(CaptureError, match="zstandard"):
+        list(read_capture(path))
+
+
+async def test_replay_publishes_the_captured_devices(tmp_path: Path) -> None:
+    fleet = SimulatedFleet(
+        SimulatorConfig(victron_count=4, remco_count=1, seed=5, advertisement_interval=0.05),
+    )
+    config = parse_config(
+        {
+            "devices": [
+                {
+                    "address": advertiser.address,
+                    "brand": "victron",
+                    "key": advertiser.encryption_key.hex(),
+                }
+                for advertiser in fleet.victron
+            ]
+            + [{"address": address, "brand": "remco"} for address in fleet.remco],
+            "polling": {"interval": 0.05},
+        },
+    )
+    path = tmp_path / "capture.bin"
+    capture = CaptureWriter(path)
+    recorded = RecordingService()
+    runtime = Runtime(config, recorded, fleet.scanner_factory, fleet.client_factory, capture)
+    asyncio.get_running_loop().call_later(0.5, runtime.stop)
+    await runtime.run()
+    capture.close()
+
+    replay = CaptureReplay(path, speed=0)
+    replayed = RecordingService()
+    runtime = Runtime(config, replayed, replay.scanner_factory, replay.client_factory)
+    task = asyncio.create_task(runtime.run())
+    await replay.run()
+    runtime.stop()
+    await task
+
+    assert replay.unmatched == 0
+    assert replay.delivered == capture.records
+    prefixes = tuple(f"{device.topic_prefix}/" for device in runtime.devices.values())
+
+    def device_topics(service: RecordingService) -> set[str]:
+        return {topic for topic, _ in service.published if topic.startswith(prefixes)}
+
+    assert device_topics(replayed) == device_topics(recorded)
+    for prefix in prefixes:
+        assert any(topic.startswith(prefix) for topic in device_topics(replayed)), prefix
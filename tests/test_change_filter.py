@@ -0,0 +1,122 @@
+import math
+from enum import Enum
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.notification_services.change_filter import ChangeFilter, Deadband
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+class State(Enum):
+    """States of the test readings."""
+
+    IDLE = 0
+    CHARGING = 1
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def battery(
+    fleet: SimulatedFleet,
+    service: RecordingService,
+    now: list[float],
+) -> RemcoBattery:
+    battery = RemcoBattery(next(iter(fleet.remco)), service, fleet.client_factory)
+    ChangeFilter(
+        {"cell_voltages": Deadband(0.01), "amps": Deadband(0.1), "soc": Deadband(relative=0.1)},
+        heartbeat=60,
+        clock=lambda: now[0],
+    ).watch(battery)
+    return battery
+
+
+# The values published, by their topic below the device's prefix
+def _published(battery: RemcoBattery, service: RecordingService) -> dict[str, object]:
+    return {
+        topic.removeprefix(f"{battery.topic_prefix}/"): payload
+        for topic, payload in service.published
+    }
+
+
+def test_first_reading_is_published(battery: RemcoBattery, service: RecordingService) -> None:
+    battery.publish_data({"amps": 1.0, "state": State.IDLE, "cell_voltages": [3.3, 3.31]})
+
+    assert _published(battery, service) == {
+        "amps": 1.0,
+        "state": "IDLE",
+        "cell_voltages/0": 3.3,
+        "cell_voltages/1": 3.31,
+    }
+
+
+def test_changes_within_the_deadband_are_suppressed(
+    battery: RemcoBattery,
+    service: RecordingService,
+    now: list[float],
+) -> None:
+    battery.publish_data({"amps": 1.0, "cell_voltages": [3.3, 3.31], "soc": 50.0})
+    service.published.clear()
+    now[0] = 1.0
+
+    battery.publish_data({"amps": 1.05, "cell_voltages": [3.305, 3.33], "soc": 54.0})
+
+    assert _published(battery, service) == {"cell_voltages/1": 3.33}
+    assert battery.changes is not None
+    assert battery.changes.suppressed == 3
+
+
+def test_deadband_is_from_the_last_published_value(
+    battery: RemcoBattery,
+    service: RecordingService,
+) -> None:
+    for amps in (1.0, 1.06, 1.12):
+        battery.publish_data({"amps": amps})
+
+    assert [payload for _, payload in service.published] == [1.0, 1.12]
+
+
+def test_relative_deadband(battery: RemcoBattery, service: RecordingService) -> None:
+    for soc in (50.0, 54.0, 56.0):
+        battery.publish_data({"soc": soc})
+
+    assert [payload for _, payload in service.published] == [50.0, 56.0]
+
+
+def test_other_values_are_compared_for_equality(
+    battery: RemcoBattery,
+    service: RecordingService,
+) -> None:
+    for value in (State.IDLE, State.IDLE, State.CHARGING, None, None, math.nan, 1):
+        battery.publish_data({"state": value})
+
+    assert [payload for _, payload in service.published] == ["IDLE", "CHARGING", None, 1]
+
+
+def test_heartbeat_publishes_unchanged_values(
+    battery: RemcoBattery,
+    service: RecordingService,
+    now: list[float],
+) -> None:
+    battery.publish_data({"amps": 1.0, "mdate": "2024-03-14"})
+    now[0] = 59.0
+    battery.publish_data({"amps": 1.0, "mdate": "2024-03-14"})
+    now[0] = 60.0
+    battery.publish_data({"amps": 1.0, "mdate": "2024-03-14"})
+
+    assert len(service.published) == 4
+
+
+def test_listeners_see_every_reading(battery: RemcoBattery) -> None:
+    readings = []
+    battery.add_listener(lambda _device, data: readings.append(data))
+
+    battery.publish_data({"amps": 1.0})
+    battery.publish_data({"amps": 1.0})
+
+    assert readings == [{"amps": 1.0}, {"amps": 1.0}]
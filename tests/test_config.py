@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from van_assistant.config import ConfigError, load_config, parse_config
+
+SHUNT = {
+    "name": "shunt",
+    "address": "C0:3B:98:12:34:56",
+    "brand": "victron",
+    "key": "0df4d0395b7d1a876c0c33ecb9e70dcd",
+}
+PACK = {"name": "pack", "address": "A5:C2:37:63:34:61", "brand": "remco"}
+
+
+def _config(**sections: object) -> dict:
+    return {"devices": [SHUNT, PACK], **sections}
+
+
+def test_example_config_is_valid() -> None:
+    config = load_config(Path(__file__).parent.parent / "van.example.toml")
+
+    assert len(config.devices) == 3
+
+
+def test_known_fields_are_accepted() -> None:
+    config = parse_config(
+        _config(
+            sinks=[{"type": "logging", "fields": ["soc", "volts", "power"]}],
+            rules=[{"name": "low", "device": "pack", "field": "cell_voltages", "below": 3.0}],
+            shared_memory={"fields": ["soc", "cell_voltages/0", "volts"]},
+            derived=[{"name": "total", "expression": "shunt.current + pack.amps"}],
+            ledger={"counters": [{"name": "in", "device": "shunt", "power": "power"}]},
+            watchdog={"timeouts": {"RemcoBattery": 120, "VictronBatteryMonitor": 10}},
+        ),
+    )
+
+    assert config.sinks[0].fields == ("soc", "volts", "power")
+    assert config.rules[0].field == "cell_voltages"
+    assert config.watchdog.timeouts == {"RemcoBattery": 120.0, "VictronBatteryMonitor": 10.0}
+
+
+@pytest.mark.parametrize(
+    ("sections", "error"),
+    [
+        (
+            {"sinks": [{"type": "logging", "fields": ["sco"]}]},
+            r"sinks\[0\]\.fields: sco is not a field the devices publish, did you mean soc\?",
+        ),
+        (
+            {"rules": [{"name": "low", "device": "pack", "field": "voltage", "below": 12}]},
+            r"rules\[0\]\.field: voltage is not a field",
+        ),
+        (
+            {"shared_memory": {"fields": ["cell_voltage/0"]}},
+            r"shared_memory\.fields: cell_voltage is not a field",
+        ),
+        (
+            {"derived": [{"name": "total", "expression": "shunt.amps + pack.amps"}]},
+            r"derived\[0\]\.expression: amps is not a field",
+        ),
+        (
+            {"ledger": {"counters": [{"name": "in", "device": "pack", "current": "current"}]}},
+            r"ledger\.counters\[0\]\.current: current is not a field",
+        ),
+        (
+            {"watchdog": {"timeouts": {"VictronSolarCharge": 120}}},
+            r"VictronSolarCharge is not a device type, did you mean VictronSolarCharger\?",
+        ),
+        (
+            {"sinks": [{"type": "mqtt", "username": 1234}]},
+            r"sinks\[0\]\.username: expected a string",
+        ),
+        (
+            {"sinks": [{"type": "mqtt", "username": "user", "password": ["secret"]}]},
+            r"sinks\[0\]\.password: expected a string",
+        ),
+    ],
+)
+def test_invalid_references_are_rejected(sections: dict, error: str) -> None:
+    with pytest.raises(ConfigError, match=error):
+        parse_config(_config(**sections))
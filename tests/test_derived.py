@@ -0,0 +1,107 @@
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.aggregation.derived import SYSTEM, DerivedMetrics
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+@pytest.fixture
+def packs(fleet: SimulatedFleet, service: RecordingService) -> list[RemcoBattery]:
+    return [RemcoBattery(address, service, fleet.client_factory) for address in fleet.remco]
+
+
+@pytest.fixture
+def calls() -> Counter[str]:
+    return Counter()
+
+
+def _counted(calls: Counter[str], name: str, compute: Callable[..., Any]) -> Callable[..., Any]:
+    def counted(*values: Any) -> Any:  # noqa: ANN401
+        calls[name] += 1
+        return compute(*values)
+
+    return counted
+
+
+def test_only_dependents_of_changed_inputs_recompute(
+    service: RecordingService,
+    packs: list[RemcoBattery],
+    calls: Counter[str],
+) -> None:
+    first, second = packs
+    derived = DerivedMetrics(service)
+    for pack in packs:
+        derived.watch(pack)
+    formulas = {
+        "first_power": (((first.addr, "volts"), (first.addr, "amps")), lambda v, a: v * a),
+        "second_power": (((second.addr, "volts"), (second.addr, "amps")), lambda v, a: v * a),
+        "total": (((SYSTEM, "first_power"), (SYSTEM, "second_power")), lambda a, b: a + b),
+    }
+    for name, (inputs, compute) in formulas.items():
+        derived.add_formula(name, inputs, _counted(calls, name, compute))
+
+    first.publish_data({"volts": 13.0, "amps": 2.0})
+    assert calls == {"first_power": 1}
+    assert derived.value(SYSTEM, "total") is None
+
+    second.publish_data({"volts": 12.0, "amps": 1.0})
+    assert calls == {"first_power": 1, "second_power": 1, "total": 1}
+    assert service.latest()["derived/total"] == 38.0
+
+    # Unchanged values recompute nothing
+    first.publish_data({"volts": 13.0, "amps": 2.0})
+    second.publish_data({"volts": 12.0, "amps": 1.0, "percent": 80})
+    assert calls == {"first_power": 1, "second_power": 1, "total": 1}
+
+    # A result that does not change stops the propagation
+    second.publish_data({"volts": 6.0, "amps": 2.0})
+    assert calls == {"first_power": 1, "second_power": 2, "total": 1}
+
+    first.publish_data({"volts": 13.0, "amps": 3.0})
+    assert calls == {"first_power": 2, "second_power": 2, "total": 2}
+    assert derived.value(SYSTEM, "total") == 51.0
+
+
+def test_dependents_compute_after_all_their_inputs(
+    service: RecordingService,
+    packs: list[RemcoBattery],
+    calls: Counter[str],
+) -> None:
+    pack = packs[0]
+    derived = DerivedMetrics(service)
+    derived.watch(pack)
+    # Added before its inputs, and reachable from amps along two paths
+    derived.add_formula(
+        "sum",
+        ((SYSTEM, "double"), (SYSTEM, "triple")),
+        _counted(calls, "sum", lambda a, b: a + b),
+    )
+    derived.add_formula("double", ((pack.addr, "amps"),), lambda a: a * 2)
+    derived.add_formula("triple", ((pack.addr, "amps"),), lambda a: a * 3)
+
+    pack.publish_data({"amps": 1.0})
+    pack.publish_data({"amps": 2.0})
+
+    assert calls == {"sum": 2}
+    assert [payload for topic, payload in service.published if topic == "derived/sum"] == [5, 10]
+
+
+def test_cycles_are_rejected(service: RecordingService) -> None:
+    derived = DerivedMetrics(service)
+    derived.add_formula("a", ((SYSTEM, "b"),), abs)
+
+    with pytest.raises(ValueError, match="depend on each other: derived/a, derived/b"):
+        derived.add_formula("b", ((SYSTEM, "a"),), abs)
+
+
+def test_duplicate_names_are_rejected(service: RecordingService) -> None:
+    derived = DerivedMetrics(service)
+    derived.add_formula("a", (("pack", "amps"),), abs)
+
+    with pytest.raises(ValueError, match="a is already derived for derived"):
+        derived.add_formula("a", (("pack", "volts"),), abs)
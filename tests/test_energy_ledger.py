@@ -0,0 +1,114 @@
+import json
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.aggregation.energy_ledger import EnergyCounter, EnergyLedger
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.simulator.fleet import SimulatedFleet
+
+START = datetime(2026, 10, 19, 12, tzinfo=UTC).timestamp()
+
+
+def _utc_day(now: float) -> date:
+    return datetime.fromtimestamp(now, UTC).date()
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [START]
+
+
+@pytest.fixture
+def battery(fleet: SimulatedFleet, service: RecordingService) -> RemcoBattery:
+    return RemcoBattery(next(iter(fleet.remco)), service, fleet.client_factory)
+
+
+def _ledger(
+    path: Path,
+    service: RecordingService,
+    now: list[float],
+    battery: RemcoBattery,
+) -> EnergyLedger:
+    ledger = EnergyLedger(path, service, max_gap=60, clock=lambda: now[0], today=_utc_day)
+    ledger.add_counter(EnergyCounter("in", battery.addr, voltage="volts", current="amps"))
+    ledger.add_counter(
+        EnergyCounter("out", battery.addr, voltage="volts", current="amps", invert=True),
+    )
+    ledger.watch(battery)
+    return ledger
+
+
+def test_samples_are_integrated(
+    tmp_path: Path,
+    service: RecordingService,
+    now: list[float],
+    battery: RemcoBattery,
+) -> None:
+    ledger = _ledger(tmp_path / "energy.json", service, now, battery)
+
+    for amps in (10.0, 20.0, -10.0):
+        battery.publish_data({"volts": 12.0, "amps": amps})
+        now[0] += 36
+
+    totals = ledger.totals()
+    # 0.01h from 10A to 20A, then 0.01h from 20A to -10A, counted as 0A charging
+    # and from 0A to 10A discharging
+    assert totals["in"]["ah_total"] == pytest.approx(0.15 + 0.1)
+    assert totals["in"]["wh_total"] == pytest.approx(12 * 0.25)
+    assert totals["out"]["ah_total"] == pytest.approx(0.05)
+    assert service.latest()["ledger/in/ah_today"] == round(totals["in"]["ah_today"], 3)
+
+
+def test_gaps_are_not_integrated(
+    tmp_path: Path,
+    service: RecordingService,
+    now: list[float],
+    battery: RemcoBattery,
+) -> None:
+    ledger = _ledger(tmp_path / "energy.json", service, now, battery)
+
+    battery.publish_data({"volts": 12.0, "amps": 10.0})
+    now[0] += 61
+    battery.publish_data({"volts": 12.0, "amps": 10.0})
+
+    assert ledger.totals()["in"]["ah_total"] == 0
+
+
+def test_interval_over_midnight_is_split(
+    tmp_path: Path,
+    service: RecordingService,
+    now: list[float],
+    battery: RemcoBattery,
+) -> None:
+    ledger = _ledger(tmp_path / "energy.json", service, now, battery)
+    now[0] = datetime(2026, 10, 19, 23, 59, 30, tzinfo=UTC).timestamp()
+    battery.publish_data({"volts": 12.0, "amps": 10.0})
+    now[0] += 60
+    battery.publish_data({"volts": 12.0, "amps": 20.0})
+
+    totals = ledger.totals()["in"]
+    # 30s at 10A to 15A before midnight, and 30s at 15A to 20A after
+    assert totals["ah_today"] == pytest.approx(17.5 / 120, abs=1e-5)
+    assert totals["ah_total"] == pytest.approx(15 / 60)
+
+
+def test_checkpoint_is_restored(
+    tmp_path: Path,
+    service: RecordingService,
+    now: list[float],
+    battery: RemcoBattery,
+) -> None:
+    path = tmp_path / "energy.json"
+    ledger = _ledger(path, service, now, battery)
+    battery.publish_data({"volts": 12.0, "amps": 10.0})
+    now[0] += 36
+    battery.publish_data({"volts": 12.0, "amps": 10.0})
+    ledger.checkpoint()
+
+    assert json.loads(path.read_text())["in"]["day"] == "2026-10-19"
+    assert not path.with_name("energy.json.tmp").exists()
+    restored = _ledger(path, service, now, RemcoBattery(battery.addr, service, lambda _: None))
+    assert restored.totals() == ledger.totals()
@@ -0,0 +1,39 @@
+import pytest
+
+from van_assistant.aggregation.expression import compile_expression
+
+
+def test_references_become_arguments_in_order() -> None:
+    references, compute = compile_expression(
+        "shunt.current + max(pack.amps, 0) * 2 - shunt.current",
+    )
+
+    assert references == (("shunt", "current"), ("pack", "amps"))
+    assert compute(1.5, 2) == 4
+    assert compute(1.5, -2) == 0
+    assert compute(0.1, 0.1) == 0.2
+
+
+@pytest.mark.parametrize(
+    ("expression", "error"),
+    [
+        ("pack.amps.real", "only <device>.<field> references"),
+        ("pack.amps.__class__", "only <device>.<field> references"),
+        ("pack.amps.conjugate()", "only abs, min, max, round can be called"),
+        ("__import__('os').getcwd() + pack.amps", "only abs, min, max, round can be called"),
+        ("open(pack.amps)", "only abs, min, max, round can be called"),
+        ("round(pack.amps, ndigits=1)", "only abs, min, max, round can be called"),
+        ("pack.amps ** 2", "unsupported syntax Pow"),
+        ("pack.amps // 2", "unsupported syntax FloorDiv"),
+        ("pack.amps if pack.amps else 0", "unsupported syntax IfExp"),
+        ("[pack.amps][0]", "unsupported syntax"),
+        ("pack.amps + 'a'", "unsupported constant 'a'"),
+        ("pack.amps + True", "unsupported constant True"),
+        ("amps * 2", "unknown name amps"),
+        ("min(1, 2)", "must reference at least one field"),
+        ("pack.amps +", "invalid expression"),
+    ],
+)
+def test_unsupported_expressions_are_rejected(expression: str, error: str) -> None:
+    with pytest.raises(ValueError, match=error.replace("(", r"\(")):
+        compile_expression(expression)
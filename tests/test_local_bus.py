@@ -0,0 +1,103 @@
+import socket
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from van_assistant.notification_services import local_bus
+from van_assistant.notification_services.local_bus import (
+    FRAME,
+    MAX_FRAME,
+    MESSAGE,
+    SUBSCRIBE,
+    BusMessage,
+    LocalBusClient,
+    LocalBusError,
+    LocalBusService,
+    encode_frame,
+)
+
+
+@pytest.fixture
+def bus(tmp_path: Path) -> Iterator[LocalBusService]:
+    bus = LocalBusService(tmp_path / "bus.sock", buffer=2)
+    yield bus
+    bus.close()
+
+
+@pytest.fixture
+def client(bus: LocalBusService) -> Iterator[LocalBusClient]:
+    client = LocalBusClient(bus.path, timeout=5)
+    yield client
+    client.close()
+
+
+def _wait_for(condition: object) -> None:
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_subscribers_receive_matching_messages(
+    bus: LocalBusService,
+    client: LocalBusClient,
+) -> None:
+    client.subscribe("victron/")
+    _wait_for(lambda: bus._subscribers and next(iter(bus._subscribers.values())).prefixes)
+
+    bus.publish("remco/soc", 50)
+    bus.publish("victron/soc", 80.5)
+
+    assert client.receive() == BusMessage("victron/soc", b"80.5")
+
+
+def test_retained_alerts_are_sent_on_subscribe(
+    bus: LocalBusService,
+    client: LocalBusClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(local_bus, "MAX_RETAINED", 2)
+    for name in ("a", "b", "c", "b"):
+        bus.publish_alert(f"alerts/{name}", "active")
+
+    client.subscribe("alerts/")
+
+    assert {client.receive().topic for _ in range(2)} == {"alerts/b", "alerts/c"}
+    assert list(bus._retained) == ["alerts/c", "alerts/b"]
+
+
+def test_oversized_frame_disconnects_the_client(
+    bus: LocalBusService,
+    client: LocalBusClient,
+) -> None:
+    _wait_for(lambda: bus.subscribers)
+    client._socket.sendall(FRAME.pack(MESSAGE, 1, MAX_FRAME) + b"t")
+
+    with pytest.raises(LocalBusError):
+        client.receive()
+    assert bus.subscribers == 0
+
+
+def test_subscriber_not_reading_alerts_is_disconnected(
+    bus: LocalBusService,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(local_bus, "KEPT_LIMIT", 3)
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(str(bus.path))
+    connection.sendall(encode_frame(SUBSCRIBE, "alerts/"))
+    _wait_for(lambda: bus._subscribers and next(iter(bus._subscribers.values())).prefixes)
+    subscriber = next(iter(bus._subscribers.values()))
+
+    payload = bytes(65536)
+    for i in range(1000):
+        bus.publish_alert(f"alerts/{i % 10}", payload)
+        if not bus.subscribers:
+            break
+    _wait_for(lambda: not bus.subscribers)
+
+    assert bus.subscribers == 0
+    assert subscriber.closed
+    assert len(subscriber.pending) == bus.buffer + 3
+    connection.close()
@@ -0,0 +1,127 @@
+import logging
+import queue
+
+import pytest
+
+from van_assistant.notification_services.batch import ReadingBatch
+from van_assistant.notification_services.logging_service import LoggingService
+from van_assistant.util import background_logging
+from van_assistant.util.background_logging import BackgroundHandler, RateLimitedLogger
+
+LOGGER = "tests.logging"
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def limited(now: list[float], caplog: pytest.LogCaptureFixture) -> RateLimitedLogger:
+    caplog.set_level(logging.INFO, LOGGER)
+    return RateLimitedLogger(logging.getLogger(LOGGER), interval=10.0, clock=lambda: now[0])
+
+
+def _record(msg: str, *args: object) -> logging.LogRecord:
+    return logging.LogRecord(LOGGER, logging.INFO, __file__, 0, msg, args, None)
+
+
+def test_records_are_queued_unformatted() -> None:
+    records: queue.Queue = queue.Queue()
+    handler = BackgroundHandler(records)
+    payload = [3.31, 3.32]
+
+    handler.handle(_record("Publishing %s", payload))
+
+    record = records.get_nowait()
+    assert record.msg == "Publishing %s"
+    assert record.args == (payload,)
+
+
+def test_full_queue_drops_and_reports_records() -> None:
+    records: queue.Queue = queue.Queue(2)
+    handler = BackgroundHandler(records)
+    for i in range(5):
+        handler.handle(_record("reading %d", i))
+    assert handler.dropped == 3
+
+    # The warning takes the free slot, and the record after it is dropped
+    records.get_nowait()
+    handler.handle(_record("reading %d", 5))
+    assert handler.dropped == 4
+    assert [records.get_nowait().getMessage() for _ in range(2)] == [
+        "reading 1",
+        "Dropped 3 log records while logging fell behind",
+    ]
+
+    handler.handle(_record("reading %d", 6))
+
+    warning, record = records.get_nowait(), records.get_nowait()
+    assert warning.levelno == logging.WARNING
+    assert warning.getMessage() == "Dropped 1 log records while logging fell behind"
+    assert record.getMessage() == "reading 6"
+
+    handler.handle(_record("reading %d", 7))
+    assert records.get_nowait().getMessage() == "reading 7"
+
+
+def test_one_message_per_key_per_interval(
+    limited: RateLimitedLogger,
+    now: list[float],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    for second in range(3):
+        now[0] = second
+        limited.warning("a", "Bad packet from %s", "a")
+    limited.info("b", "Bad packet from %s", "b")
+    limited.debug("c", "Not logged at info level")
+    now[0] = 10
+    limited.warning("a", "Bad packet from %s", "a")
+    limited.warning("a", "Bad packet from %s", "a")
+    now[0] = 20
+    limited.log(logging.WARNING, "a", "Bad packet from %s", "a")
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Bad packet from a",
+        "Bad packet from b",
+        "Bad packet from a (2 similar messages suppressed)",
+        "Bad packet from a (1 similar messages suppressed)",
+    ]
+
+
+def test_keys_are_forgotten_beyond_max_keys(
+    limited: RateLimitedLogger,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(background_logging, "MAX_KEYS", 3)
+    for key in (1, 2, 3, 1, 4, 1):
+        limited.info(key, "key %d", key)
+
+    # Key 4 cleared the others, so the second repeat of key 1 is logged again
+    assert [record.getMessage() for record in caplog.records] == [
+        "key 1",
+        "key 2",
+        "key 3",
+        "key 4",
+        "key 1",
+    ]
+
+
+def test_logging_service_formats_lazily(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO, "van_assistant.notification_services.logging_service")
+    service = LoggingService()
+    batch = ReadingBatch("VictronSolarCharger")
+    batch.append("C0:3B:98:12:34:56", 1.0, {"solar_power": 10, "charge_state": "BULK"})
+    batch.append("C0:3B:98:12:34:56", 2.0, {"solar_power": 30})
+
+    service.publish_alert("victron/alarm", {"low": True})
+    service.publish_batch(batch)
+
+    assert [(record.msg, record.args) for record in caplog.records[:1]] == [
+        ("Publishing alert to %s: %s", ("victron/alarm", {"low": True})),
+    ]
+    assert [record.getMessage() for record in caplog.records[1:]] == [
+        "Batch of 2 VictronSolarCharger readings from 1 device(s)",
+        "  solar_power: 2 readings, min 10, mean 20, max 30",
+    ]
@@ -0,0 +1,91 @@
+import random
+from collections.abc import Iterator
+
+import pytest
+
+from van_assistant.metrics import pipeline
+from van_assistant.metrics.histogram import (
+    MAX_VALUE,
+    SUB_BUCKETS,
+    LatencyHistogram,
+    _highest_equivalent,
+    _index,
+)
+
+
+@pytest.fixture
+def stats() -> Iterator[pipeline.PipelineStats]:
+    yield pipeline.enable()
+    pipeline.disable()
+
+
+def test_buckets_bound_the_relative_error() -> None:
+    values = [*range(200), *random.Random(1).sample(range(MAX_VALUE), 2000), MAX_VALUE]  # noqa: S311
+    for value in values:
+        highest = _highest_equivalent(_index(value))
+        assert value <= highest <= value + value / SUB_BUCKETS, value
+    assert [_index(value) for value in sorted(values)] == sorted(_index(value) for value in values)
+
+
+def test_small_values_are_exact() -> None:
+    histogram = LatencyHistogram()
+    for value in (3, 1, 2, 31):
+        histogram.record(value)
+
+    assert [histogram.percentile(p) for p in (25, 50, 75, 100)] == [1, 2, 3, 31]
+    assert (histogram.min, histogram.max, histogram.mean()) == (1, 31, 9.25)
+
+
+def test_percentiles_are_within_the_bucket_error() -> None:
+    histogram = LatencyHistogram()
+    for value in range(1, 100_001):
+        histogram.record(value * 1000)
+
+    for percentile in (50, 90, 99, 99.9):
+        expected = percentile * 1_000_000
+        assert expected <= histogram.percentile(percentile) <= expected * (1 + 1 / SUB_BUCKETS)
+    assert histogram.percentile(100) == histogram.max == 100_000_000
+
+
+def test_values_are_clamped() -> None:
+    histogram = LatencyHistogram()
+    histogram.record(-5)
+    histogram.record(MAX_VALUE * 2)
+
+    assert (histogram.min, histogram.max) == (0, MAX_VALUE)
+
+
+def test_empty_histogram() -> None:
+    histogram = LatencyHistogram()
+
+    assert histogram.summary() == {
+        "count": 0,
+        "min": 0,
+        "mean": 0.0,
+        "p50": 0,
+        "p90": 0,
+        "p99": 0,
+        "p999": 0,
+        "max": 0,
+    }
+
+
+def test_snapshot_groups_stages_by_device_type(stats: pipeline.PipelineStats) -> None:
+    assert pipeline.enable() is stats
+    stats.count("in", 3)
+    stats.count("parsed")
+    stats.record("VictronSolarCharger", "parse", 2000)
+    stats.record("VictronSolarCharger", "decrypt", 1000)
+    stats.record("RemcoBattery", "publish", 10)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["counters"]["in"] == 3
+    assert snapshot["counters"]["parsed"] == 1
+    assert set(snapshot["counters"]) == set(pipeline.COUNTERS)
+    assert list(snapshot["stages"]) == ["RemcoBattery", "VictronSolarCharger"]
+    assert list(snapshot["stages"]["VictronSolarCharger"]) == ["decrypt", "parse"]
+    assert snapshot["stages"]["RemcoBattery"]["publish"]["max"] == 10
+
+    stats.reset()
+    assert stats.snapshot() == {"counters": dict.fromkeys(pipeline.COUNTERS, 0), "stages": {}}
@@ -0,0 +1,61 @@
+from collections.abc import Iterator
+
+import pytest
+from bleak.assigned_numbers import AdvertisementDataType
+from bleak.backends.device import BLEDevice
+
+from tests.conftest import RecordingScanner, advertisement
+from van_assistant.metrics import pipeline
+from van_assistant.scanners.base_scanner import BaseScanner
+from van_assistant.scanners.prefilter import Prefilter, or_patterns
+
+CONFIGURED = "C0:3B:98:12:34:56"
+
+
+@pytest.fixture
+def stats() -> Iterator[pipeline.PipelineStats]:
+    yield pipeline.enable()
+    pipeline.disable()
+
+
+def _advertise(scanner: BaseScanner, address: str, payload: bytes) -> None:
+    scanner.detection_callback(BLEDevice(address, None, None), advertisement(payload))
+
+
+def test_accepts_only_configured_addresses() -> None:
+    prefilter = Prefilter([CONFIGURED.lower(), "A5:C2:37:63:34:61"])
+
+    assert prefilter.accepts(CONFIGURED)
+    assert prefilter.accepts("A5:C2:37:63:34:61")
+    assert not prefilter.accepts("AA:BB:CC:DD:EE:FF")
+    assert not Prefilter([]).accepts(CONFIGURED)
+
+
+def test_rejected_advertisements_are_counted(stats: pipeline.PipelineStats) -> None:
+    scanner = RecordingScanner()
+    scanner.prefilter = Prefilter([CONFIGURED])
+
+    _advertise(scanner, "AA:BB:CC:DD:EE:FF", b"\x01")
+    _advertise(scanner, CONFIGURED, b"\x01")
+    _advertise(scanner, "11:22:33:44:55:66", b"\x02")
+
+    assert scanner.received == [CONFIGURED]
+    assert stats.snapshot()["counters"]["rejected"] == 2
+    assert stats.snapshot()["counters"]["in"] == 1
+
+
+def test_without_a_prefilter_every_address_is_processed() -> None:
+    scanner = RecordingScanner()
+
+    _advertise(scanner, "AA:BB:CC:DD:EE:FF", b"\x01")
+    _advertise(scanner, CONFIGURED, b"\x02")
+
+    assert scanner.received == ["AA:BB:CC:DD:EE:FF", CONFIGURED]
+
+
+def test_or_patterns_match_the_little_endian_manufacturer_id() -> None:
+    (pattern,) = or_patterns([0x02E1])
+
+    assert pattern.start_position == 0
+    assert pattern.ad_data_type == AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA
+    assert pattern.content_of_pattern == b"\xe1\x02"
@@ -0,0 +1,82 @@
+import pytest
+
+from van_assistant.devices.victron.devices.base import (
+    HEADER_SIZE,
+    IV_OFFSET,
+    VICTRON_MANUFACTURER_ID,
+)
+from van_assistant.metrics.reception import MAX_IV_GAP, ReceptionStats, format_report
+
+ADDRESS = "C0:3B:98:12:34:56"
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def stats(now: list[float]) -> ReceptionStats:
+    return ReceptionStats([ADDRESS], clock=lambda: now[0])
+
+
+def _advertise(stats: ReceptionStats, iv: int, rssi: int = -70) -> None:
+    data = bytearray(HEADER_SIZE + 4)
+    data[IV_OFFSET : IV_OFFSET + 2] = iv.to_bytes(2, "little")
+    stats.observe(ADDRESS, VICTRON_MANUFACTURER_ID, bytes(data), rssi)
+
+
+def test_iv_steps_count_missed_payloads_and_duplicates(stats: ReceptionStats) -> None:
+    for iv in (10, 10, 11, 14, 14, 14, 15):
+        _advertise(stats, iv)
+
+    link = stats.links[ADDRESS]
+    assert (link.advertisements, link.payloads, link.duplicates) == (7, 4, 3)
+    assert link.missed == 2
+    assert link.loss == pytest.approx(2 / 6)
+
+
+def test_iv_wraps_around(stats: ReceptionStats) -> None:
+    for iv in (0xFFFD, 0xFFFF, 0, 2):
+        _advertise(stats, iv)
+
+    link = stats.links[ADDRESS]
+    assert (link.payloads, link.missed, link.resyncs) == (4, 2, 0)
+    assert link.last_iv == 2
+
+
+def test_large_jumps_resync_instead_of_counting_loss(stats: ReceptionStats) -> None:
+    _advertise(stats, 100)
+    _advertise(stats, 100 + MAX_IV_GAP)
+    _advertise(stats, 100 + MAX_IV_GAP * 2 + 1)
+    # A restarted device counts from a lower IV
+    _advertise(stats, 5)
+    _advertise(stats, 6)
+
+    link = stats.links[ADDRESS]
+    assert (link.payloads, link.missed, link.resyncs) == (5, MAX_IV_GAP - 1, 2)
+
+
+def test_other_advertisements_are_ignored(stats: ReceptionStats) -> None:
+    stats.observe(ADDRESS, 0x004C, bytes(HEADER_SIZE + 4), -70)
+    stats.observe(ADDRESS, VICTRON_MANUFACTURER_ID, bytes(HEADER_SIZE), -70)
+    stats.observe("AA:BB:CC:DD:EE:FF", VICTRON_MANUFACTURER_ID, bytes(HEADER_SIZE + 4), -70)
+
+    assert stats.links[ADDRESS].advertisements == 0
+    assert list(stats.links) == [ADDRESS]
+
+
+def test_rates_rssi_and_verdict(stats: ReceptionStats, now: list[float]) -> None:
+    for iv in range(11):
+        now[0] = iv * 0.5
+        _advertise(stats, iv, rssi=-60 - iv)
+
+    link = stats.links[ADDRESS]
+    assert link.rate(link.payloads) == pytest.approx(2.0)
+    assert (link.rssi_min, link.rssi_max) == (-70, -60)
+    assert link.rssi_trend < 0
+    assert link.verdict() == "ok"
+
+    _advertise(stats, 30)
+    assert link.verdict() == "poor"
+    assert format_report(stats, {ADDRESS: "shunt"}).splitlines()[1].startswith("shunt ")
@@ -0,0 +1,99 @@
+from enum import Enum
+
+import pytest
+
+from van_assistant.devices.victron.record import ABSENT, Field, RecordLayout, VictronRecord
+from van_assistant.devices.victron.utils import BitField, BitWriter
+from van_assistant.simulator.fleet import SimulatedFleet
+
+ADDRESS = "C0:3B:98:12:34:56"
+
+
+class Mode(Enum):
+    """Modes of the test record."""
+
+    OFF = 0
+    ON = 1
+
+
+def _odd_only(raw: int) -> object:
+    return raw if raw % 2 else ABSENT
+
+
+LAYOUT = RecordLayout(
+    (
+        BitField("voltage", 16, signed=True),
+        BitField("mode", 4),
+        BitField("extra", 4),
+    ),
+    (
+        Field("voltage", missing=0x7FFF, divisor=100),
+        Field("mode", enum=Mode),
+        Field("extra", convert=_odd_only, optional=True),
+    ),
+)
+
+
+def _record(voltage: int, mode: int, extra: int) -> bytes:
+    writer = BitWriter()
+    writer.write_unsigned_int(voltage & 0xFFFF, 16)
+    writer.write_unsigned_int(mode, 4)
+    writer.write_unsigned_int(extra, 4)
+    return writer.to_bytes()
+
+
+def test_fields_decode_on_access() -> None:
+    record = VictronRecord(LAYOUT, _record(-1234, 1, 3), ADDRESS, model_id=5)
+
+    assert record["voltage"] == -12.34
+    assert record.mode is Mode.ON
+    assert record["extra"] == 3
+    assert record["model_id"] == 5
+    assert dict(record) == {"voltage": -12.34, "mode": Mode.ON, "extra": 3, "model_id": 5}
+
+
+def test_missing_and_absent_fields() -> None:
+    record = VictronRecord(LAYOUT, _record(0x7FFF, 0, 2), ADDRESS)
+
+    assert record["voltage"] is None
+    assert "extra" not in record
+    assert list(record) == ["voltage", "mode"]
+    with pytest.raises(AttributeError):
+        _ = record.extra
+
+
+def test_invalid_enum_value_is_missing() -> None:
+    record = VictronRecord(LAYOUT, _record(100, 9, 1), ADDRESS)
+
+    assert record["mode"] is None
+    with pytest.raises(ValueError, match="9"):
+        LAYOUT.decode(_record(100, 9, 1))
+
+
+def test_decode_warnings_are_rate_limited_per_device(caplog: pytest.LogCaptureFixture) -> None:
+    for address in ("AA:00:00:00:00:01", "AA:00:00:00:00:02", "AA:00:00:00:00:01"):
+        _ = VictronRecord(LAYOUT, _record(100, 9, 1), address)["mode"]
+
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Cannot decode field mode from {address}: 9 is not a valid Mode"
+        for address in ("AA:00:00:00:00:01", "AA:00:00:00:00:02")
+    ]
+
+
+def test_short_record_is_rejected() -> None:
+    with pytest.raises(ValueError, match="shorter"):
+        VictronRecord(LAYOUT, b"\x00", ADDRESS)
+
+
+def test_unknown_bit_field_is_rejected() -> None:
+    with pytest.raises(ValueError, match="unknown bit-field"):
+        RecordLayout((BitField("a", 8),), (Field("b"),))
+
+
+def test_lazy_record_matches_decode(fleet: SimulatedFleet) -> None:
+    for advertiser in fleet.victron:
+        layout = advertiser.device_type.record_layout
+        for _ in range(50):
+            decrypted = advertiser.build_record()
+            record = VictronRecord(layout, decrypted, advertiser.address)
+            assert dict(record) == layout.decode(decrypted)
@@ -0,0 +1,47 @@
+from van_assistant.scanners.replay_window import RESYNC_AFTER, WINDOW_SIZE, ReplayWindow, Verdict
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+def test_new_and_duplicate_ivs() -> None:
+    window = ReplayWindow()
+
+    assert window.check(ADDRESS, 10) is Verdict.NEW
+    assert window.check(ADDRESS, 10) is Verdict.DUPLICATE
+    assert window.check(ADDRESS, 12) is Verdict.NEW
+    # Reordered within the window
+    assert window.check(ADDRESS, 11) is Verdict.NEW
+    assert window.check(ADDRESS, 11) is Verdict.DUPLICATE
+
+
+def test_devices_have_their_own_window() -> None:
+    window = ReplayWindow()
+
+    assert window.check(ADDRESS, 10) is Verdict.NEW
+    assert window.check("11:22:33:44:55:66", 10) is Verdict.NEW
+
+
+def test_iv_wraps_around() -> None:
+    window = ReplayWindow()
+
+    assert window.check(ADDRESS, 0xFFFF) is Verdict.NEW
+    assert window.check(ADDRESS, 0) is Verdict.NEW
+    assert window.check(ADDRESS, 0xFFFF) is Verdict.DUPLICATE
+
+
+def test_replay_behind_the_window_is_stale() -> None:
+    window = ReplayWindow()
+    window.check(ADDRESS, 1000)
+
+    assert window.check(ADDRESS, 1000 - WINDOW_SIZE) is Verdict.STALE
+
+
+def test_restarted_sequence_is_followed() -> None:
+    window = ReplayWindow()
+    window.check(ADDRESS, 1000)
+
+    verdicts = [window.check(ADDRESS, iv) for iv in range(5, 5 + RESYNC_AFTER)]
+
+    assert verdicts[:-1] == [Verdict.STALE] * (RESYNC_AFTER - 1)
+    assert verdicts[-1] is Verdict.NEW
+    assert window.check(ADDRESS, 5 + RESYNC_AFTER) is Verdict.NEW
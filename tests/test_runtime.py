@@ -0,0 +1,32 @@
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.config import parse_config
+from van_assistant.runtime import Runtime
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+@pytest.mark.parametrize("api", [False, True])
+def test_state_store_is_fed_when_the_api_is_enabled(
+    fleet: SimulatedFleet,
+    service: RecordingService,
+    api: bool,  # noqa: FBT001
+) -> None:
+    address = next(iter(fleet.remco))
+    config = parse_config(
+        {
+            "devices": [{"address": address, "brand": "remco"}],
+            "api": {"enabled": api, "host": "127.0.0.1"},
+        },
+    )
+    runtime = Runtime(config, service, fleet.scanner_factory, fleet.client_factory)
+    battery = runtime.devices[address]
+
+    battery.publish_data({"volts": 13.2})
+
+    assert (runtime.api is not None) is api
+    if api:
+        assert runtime.state is not None
+        assert runtime.state.get(address).fields["volts"] == 13.2
+    else:
+        assert runtime.state is None
@@ -0,0 +1,69 @@
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.profiling.sampler import SamplingProfiler
+
+
+class BlockingService(RecordingService):
+    """Holds every publish until it is released."""
+
+    def __init__(self) -> None:
+        """Create a service that blocks until release is set."""
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def publish(self, topic: str, payload: object) -> None:
+        """Wait for the release, then keep the notification."""
+        self.entered.set()
+        self.release.wait()
+        super().publish(topic, payload)
+
+
+@pytest.fixture
+def blocked() -> Iterator[threading.Thread]:
+    service = BlockingService()
+    thread = threading.Thread(target=service.publish, args=("topic", 1), daemon=True)
+    thread.start()
+    service.entered.wait()
+    yield thread
+    service.release.set()
+    thread.join()
+
+
+def test_sample_attributes_the_stack(blocked: threading.Thread, tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path, thread_id=blocked.ident)
+    profiler.sample()
+    profiler.sample()
+
+    assert profiler.samples == 2
+    assert profiler.attribution == {"sink:BlockingService": 2}
+    ((stack, count),) = profiler.stacks.items()
+    assert count == 2
+    frames = stack.split(";")
+    assert frames[0] == "threading:Thread._bootstrap"
+    assert "tests.test_sampler:BlockingService.publish" in frames
+    assert frames[-1] == "threading:Event.wait" or frames[-1].startswith("threading:Condition.wait")
+
+
+def test_write_collapsed_stacks(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path / "profiles")
+    profiler.stacks.update({"main:a;main:b": 3, "main:a": 5})
+
+    path = profiler.write()
+
+    assert path.parent == tmp_path / "profiles"
+    assert path.suffix == ".collapsed"
+    assert path.read_text(encoding="utf-8").splitlines() == ["main:a 5", "main:a;main:b 3"]
+
+
+def test_unknown_thread_is_not_sampled(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path, thread_id=-1)
+    profiler.sample()
+
+    assert profiler.samples == 0
+    assert not profiler.stacks
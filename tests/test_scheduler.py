@@ -0,0 +1,80 @@
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.scanners.scheduler import ScanScheduler
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+class FakeScanner:
+    """Scanner that does nothing, the tests drive the readings."""
+
+    async def start(self) -> None:
+        """Start scanning."""
+
+    async def stop(self) -> None:
+        """Stop scanning."""
+
+
+@pytest.fixture
+def battery(fleet: SimulatedFleet, service: RecordingService) -> RemcoBattery:
+    return RemcoBattery(next(iter(fleet.remco)), service, fleet.client_factory)
+
+
+@pytest.fixture
+def scheduler(battery: RemcoBattery) -> ScanScheduler:
+    scheduler = ScanScheduler(
+        FakeScanner(),
+        [battery.addr],
+        idle=20,
+        adaptive=True,
+        min_idle=5,
+        max_idle=80,
+        clock=lambda: 0.0,
+    )
+    scheduler.watch(battery)
+    return scheduler
+
+
+# Run the end of a scan window in which the battery reported the readings
+def _window(scheduler: ScanScheduler, battery: RemcoBattery, *readings: dict) -> float:
+    scheduler._reported.clear()
+    scheduler._changing = scheduler._unknown = False
+    for data in readings:
+        battery.publish_data(data)
+    scheduler._adapt()
+    return scheduler.idle
+
+
+def test_stable_readings_lengthen_the_idle_window(
+    scheduler: ScanScheduler,
+    battery: RemcoBattery,
+) -> None:
+    reading = {"volts": 13.2, "cell_voltages": [3.3, 3.31, 3.3, None]}
+
+    idles = [_window(scheduler, battery, reading) for _ in range(4)]
+
+    # Unchanged on the first reading, as nothing shows it is stable yet
+    assert idles == [20, 40, 80, 80]
+
+
+def test_changing_list_element_shortens_the_idle_window(
+    scheduler: ScanScheduler,
+    battery: RemcoBattery,
+) -> None:
+    _window(scheduler, battery, {"cell_voltages": [3.3, 3.31]})
+
+    assert _window(scheduler, battery, {"cell_voltages": [3.301, 3.311]}) == 40
+    assert _window(scheduler, battery, {"cell_voltages": [3.301, 3.6]}) == 5
+    assert _window(scheduler, battery, {"cell_voltages": [3.301, 3.6, 3.3]}) == 5
+
+
+def test_missing_device_halves_the_idle_window(
+    scheduler: ScanScheduler,
+    battery: RemcoBattery,
+) -> None:
+    _window(scheduler, battery, {"volts": 13.2})
+
+    assert _window(scheduler, battery) == 10
+    assert _window(scheduler, battery) == 5
+    assert _window(scheduler, battery) == 5
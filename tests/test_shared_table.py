@@ -0,0 +1,138 @@
+import math
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from van_assistant.devices.victron.devices.smart_lithium import BalancerStatus, VictronSmartLithium
+from van_assistant.devices.victron.devices.solar_charger import VictronSolarCharger
+from van_assistant.devices.victron.utils import OperationMode
+from van_assistant.state import shared_table
+from van_assistant.state.shared_table import (
+    SharedTableError,
+    SharedTableReader,
+    SharedTableWriter,
+    TableLayout,
+    table_layout,
+)
+
+LITHIUM = "C0:3B:98:12:34:56"
+SOLAR = "F9:4B:C1:22:33:44"
+
+
+@pytest.fixture
+def layout() -> TableLayout:
+    return table_layout(
+        [LITHIUM, SOLAR],
+        [VictronSmartLithium, VictronSolarCharger],
+        ["battery_voltage", "cell_voltages", "balancer_status", "charge_state", "percent"],
+        {SOLAR: "solar"},
+    )
+
+
+@pytest.fixture
+def writer(tmp_path: Path, layout: TableLayout) -> Iterator[SharedTableWriter]:
+    writer = SharedTableWriter(tmp_path / "table", layout)
+    yield writer
+    writer.close()
+
+
+def test_layout_columns_and_enums(layout: TableLayout) -> None:
+    assert [column.name for column in layout.columns] == [
+        "battery_voltage",
+        *(f"cell_voltages/{i}" for i in range(8)),
+        "balancer_status",
+        "charge_state",
+        "percent",
+    ]
+    assert layout.columns[3].field == "cell_voltages"
+    assert layout.columns[3].index == 2
+    assert layout.enums["charge_state"]["BULK"] == OperationMode.BULK.value
+    assert set(layout.enums) == {"balancer_status", "charge_state"}
+    assert layout.record_size == 8 * (2 + len(layout.columns))
+
+
+def test_layout_json_round_trip(layout: TableLayout) -> None:
+    assert TableLayout.from_json(layout.to_json()) == layout
+
+    with pytest.raises(SharedTableError, match="Not a shared table layout"):
+        TableLayout.from_json('{"addresses": []}')
+    with pytest.raises(SharedTableError, match="unexpected record size"):
+        TableLayout.from_json(layout.to_json().replace('"record_size":', '"record_size":1'))
+
+
+def test_reader_sees_what_the_writer_wrote(writer: SharedTableWriter) -> None:
+    reader = SharedTableReader(writer.path)
+    try:
+        assert reader.live
+        assert reader.read(LITHIUM).updated == 0
+        assert reader.read(LITHIUM).values == {}
+
+        writer.update(
+            LITHIUM,
+            {
+                "battery_voltage": 13.25,
+                "cell_voltages": [3.31, 3.32, None, 3.30],
+                "balancer_status": BalancerStatus.BALANCING,
+                "temperature": 21.0,
+            },
+            timestamp=100.0,
+        )
+        writer.update(SOLAR, {"charge_state": OperationMode.BULK, "percent": True}, timestamp=5.0)
+        writer.update(LITHIUM, {"battery_voltage": 13.5}, timestamp=101.0)
+
+        record = reader.read(LITHIUM)
+        assert record.updated == 101.0
+        assert record.values == {
+            "battery_voltage": 13.5,
+            "cell_voltages/0": 3.31,
+            "cell_voltages/1": 3.32,
+            "cell_voltages/3": 3.30,
+            "balancer_status": "BALANCING",
+        }
+        assert reader.read("solar") == shared_table.TableRecord(
+            SOLAR,
+            5.0,
+            {"charge_state": "BULK", "percent": 1.0},
+        )
+        assert reader.value("solar", "battery_voltage") is None
+        with pytest.raises(KeyError):
+            reader.read("AA:BB:CC:DD:EE:FF")
+
+        writer.close()
+        assert not reader.live
+        assert reader.value(LITHIUM, "battery_voltage") == 13.5
+    finally:
+        reader.close()
+
+
+def test_record_being_written_is_not_read(
+    writer: SharedTableWriter,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(shared_table, "READ_ATTEMPTS", 3)
+    reader = SharedTableReader(writer.path)
+    try:
+        writer.update(SOLAR, {"percent": 80}, timestamp=1.0)
+        record = writer._records[SOLAR]
+        writer._words.sequences[record] += 1
+
+        with pytest.raises(SharedTableError, match="kept changing"):
+            reader.read(SOLAR)
+
+        writer._words.sequences[record] += 1
+        assert reader.value(SOLAR, "percent") == 80
+        assert writer._words.sequences[record] == 4
+        assert math.isnan(writer._words.floats[record + 2])
+    finally:
+        reader.close()
+
+
+def test_other_files_are_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "table"
+    path.write_bytes(b"not a table")
+
+    with pytest.raises(SharedTableError, match="is not a shared table"):
+        SharedTableReader(path)
+    with pytest.raises(SharedTableError, match="Cannot open shared table"):
+        SharedTableReader(tmp_path / "missing")
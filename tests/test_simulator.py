@@ -0,0 +1,114 @@
+import asyncio
+
+from tests.conftest import RecordingService
+from van_assistant.config import parse_config
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.devices.victron.identifier import VictronDeviceIdentifier
+from van_assistant.metrics import pipeline
+from van_assistant.runtime import Runtime
+from van_assistant.simulator.config import FaultConfig, SimulatorConfig
+from van_assistant.simulator.fleet import SimulatedFleet
+from van_assistant.simulator.remco import build_frame
+from van_assistant.simulator.victron import DEFAULT_MODEL_ID
+
+
+def test_victron_advertisements_decode(fleet: SimulatedFleet, service: RecordingService) -> None:
+    for advertiser in fleet.victron:
+        device = advertiser.device_type(
+            advertiser.address,
+            service,
+            advertiser.encryption_key.hex(),
+        )
+        for _ in range(20):
+            payload = advertiser.next_advertisement()
+            assert VictronDeviceIdentifier.detect_device_type(payload) is advertiser.device_type
+            record = device.record(payload)
+            assert record is not None
+            assert record["model_id"] == DEFAULT_MODEL_ID
+            assert dict(record) == {**device.decode(payload), "model_id": DEFAULT_MODEL_ID}
+
+
+def test_bad_key_prefix_is_skipped(service: RecordingService) -> None:
+    fleet = SimulatedFleet(
+        SimulatorConfig(victron_count=1, remco_count=0, seed=1, faults=FaultConfig(bad_key_rate=1)),
+    )
+    advertiser = fleet.victron[0]
+    device = advertiser.device_type(advertiser.address, service, advertiser.encryption_key.hex())
+
+    assert device.record(advertiser.next_advertisement()) is None
+
+
+def test_timed_pipeline_publishes_the_same_readings(
+    fleet: SimulatedFleet,
+    service: RecordingService,
+) -> None:
+    advertiser = fleet.victron[0]
+    device = advertiser.device_type(advertiser.address, service, advertiser.encryption_key.hex())
+    payloads = [advertiser.next_advertisement() for _ in range(10)]
+    payloads.append(payloads[0][:7])
+
+    for payload in payloads:
+        device.handle_advertisement(payload)
+    untimed = list(service.published)
+    service.published.clear()
+    stats = pipeline.enable()
+    try:
+        for payload in payloads:
+            device.handle_advertisement(payload)
+    finally:
+        pipeline.disable()
+
+    assert service.published == untimed
+    assert stats.counters["decrypted"] == stats.counters["parsed"] == len(payloads) - 1
+    assert stats.counters["dropped"] == 1
+
+
+def test_frozen_advertiser_repeats_readings(fleet: SimulatedFleet) -> None:
+    advertiser = fleet.victron[1]
+    advertiser.freeze()
+
+    assert advertiser.build_record() == advertiser.build_record()
+
+
+async def test_remco_frames_parse(fleet: SimulatedFleet, service: RecordingService) -> None:
+    address, stub = next(iter(fleet.remco.items()))
+    battery = RemcoBattery(address, service, fleet.client_factory)
+
+    await battery.handle_data(build_frame(0x03, stub.info_data()))
+    await battery.handle_data(build_frame(0x04, stub.cell_data()))
+
+    latest = service.latest()
+    prefix = battery.topic_prefix
+    assert latest[f"{prefix}/capacity"] == stub.capacity_ah
+    assert latest[f"{prefix}/cells"] == len(stub.cells)
+    for i, cell in enumerate(stub.cells):
+        assert abs(latest[f"{prefix}/cell_voltages/{i}"] - cell) < 0.001
+
+
+async def test_runtime_publishes_every_simulated_device(service: RecordingService) -> None:
+    fleet = SimulatedFleet(
+        SimulatorConfig(victron_count=4, remco_count=1, seed=3, advertisement_interval=0.05),
+    )
+    config = parse_config(
+        {
+            "devices": [
+                {
+                    "address": advertiser.address,
+                    "brand": "victron",
+                    "key": advertiser.encryption_key.hex(),
+                }
+                for advertiser in fleet.victron
+            ]
+            + [{"address": address, "brand": "remco"} for address in fleet.remco],
+            "polling": {"interval": 0.05},
+        },
+    )
+    runtime = Runtime(config, service, fleet.scanner_factory, fleet.client_factory)
+
+    asyncio.get_running_loop().call_later(0.5, runtime.stop)
+    await runtime.run()
+
+    assert set(runtime.devices) == {device.address for device in config.devices}
+    topics = {topic for topic, _ in service.published}
+    for device in runtime.devices.values():
+        assert any(topic.startswith(f"{device.topic_prefix}/") for topic in topics), device.addr
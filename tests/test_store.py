@@ -0,0 +1,86 @@
+import asyncio
+
+from van_assistant.state.store import Change, StateStore
+
+
+def test_only_changed_fields_are_stored_and_delivered() -> None:
+    store = StateStore()
+    subscription = store.subscribe()
+
+    assert store.update("a", {"volts": 13.2, "amps": 1.0}, "RemcoBattery") == 1
+    assert store.update("a", {"volts": 13.2, "amps": 1.0}) == 1
+    assert store.update("a", {"volts": 13.2, "amps": 2.0}) == 2
+
+    record = store.get("a")
+    assert record is not None
+    assert (record.device_type, record.version) == ("RemcoBattery", 2)
+    assert dict(record.fields) == {"volts": 13.2, "amps": 2.0}
+    # Both changes were merged while nothing was received
+    assert subscription.drain() == [Change("a", 2, {"volts": 13.2, "amps": 2.0})]
+    assert subscription.drain() == []
+
+
+def test_pending_changes_are_merged_per_device() -> None:
+    store = StateStore()
+    subscription = store.subscribe()
+
+    store.update("a", {"volts": 13.2, "amps": 1.0})
+    store.update("b", {"volts": 12.8})
+    store.update("a", {"amps": 2.0, "percent": 80})
+
+    assert subscription.drain() == [
+        Change("a", 3, {"volts": 13.2, "amps": 2.0, "percent": 80}),
+        Change("b", 2, {"volts": 12.8}),
+    ]
+
+
+def test_address_and_field_filters() -> None:
+    store = StateStore()
+    by_address = store.subscribe(addresses=["a"])
+    by_field = store.subscribe(fields=["amps"])
+    both = store.subscribe(addresses=["b"], fields=["amps"])
+
+    store.update("a", {"volts": 13.2, "amps": 1.0})
+    store.update("b", {"volts": 12.8})
+    store.update("c", {"amps": 3.0})
+
+    assert by_address.drain() == [Change("a", 1, {"volts": 13.2, "amps": 1.0})]
+    assert by_field.drain() == [Change("a", 1, {"amps": 1.0}), Change("c", 3, {"amps": 3.0})]
+    assert both.drain() == []
+
+
+def test_snapshots_do_not_change_after_updates() -> None:
+    store = StateStore()
+    store.update("a", {"volts": 13.2})
+    snapshot = store.snapshot()
+    assert store.snapshot() is snapshot
+
+    store.update("a", {"volts": 13.0})
+
+    assert snapshot.records["a"].fields["volts"] == 13.2
+    assert store.snapshot().records["a"].fields["volts"] == 13.0
+    assert store.value("a", "volts") == 13.0
+    assert store.value("b", "volts") is None
+
+
+async def test_iteration_waits_for_changes_until_closed() -> None:
+    store = StateStore()
+    subscription = store.subscribe(addresses=["a"])
+
+    async def receive() -> list[Change]:
+        return [change async for change in subscription]
+
+    task = asyncio.create_task(receive())
+    await asyncio.sleep(0)
+    store.update("a", {"volts": 13.2})
+    await asyncio.sleep(0)
+    store.update("a", {"volts": 13.0})
+    store.update("a", {"amps": 1.0})
+    await asyncio.sleep(0)
+    subscription.close()
+    store.update("a", {"amps": 2.0})
+
+    assert await task == [
+        Change("a", 1, {"volts": 13.2}),
+        Change("a", 3, {"volts": 13.0, "amps": 1.0}),
+    ]
@@ -0,0 +1,122 @@
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.aggregation.watchdog import OFFLINE, ONLINE, WHEEL_SLOTS, StalenessWatchdog
+from van_assistant.devices.remco.devices.bms import RemcoBattery
+from van_assistant.simulator.fleet import SimulatedFleet
+
+
+@pytest.fixture
+def now() -> list[float]:
+    return [0.0]
+
+
+@pytest.fixture
+def pack(fleet: SimulatedFleet, service: RecordingService) -> RemcoBattery:
+    return RemcoBattery(next(iter(fleet.remco)), service, fleet.client_factory)
+
+
+def _watchdog(
+    service: RecordingService,
+    now: list[float],
+    pack: RemcoBattery,
+    timeout: float,
+) -> StalenessWatchdog:
+    watchdog = StalenessWatchdog(
+        service,
+        timeouts={"RemcoBattery": timeout},
+        default_timeout=1.0,
+        clock=lambda: now[0],
+    )
+    watchdog.watch(pack)
+    return watchdog
+
+
+def _run_until(watchdog: StalenessWatchdog, now: list[float], until: float) -> None:
+    while now[0] < until:
+        now[0] += 1
+        watchdog.tick()
+
+
+def _availability(service: RecordingService, pack: RemcoBattery) -> list[str]:
+    topic = f"{pack.topic_prefix}/available"
+    return [payload for published, payload in service.published if published == topic]
+
+
+def test_device_goes_offline_after_its_timeout(
+    service: RecordingService,
+    now: list[float],
+    pack: RemcoBattery,
+) -> None:
+    watchdog = _watchdog(service, now, pack, timeout=5)
+    pack.publish_data({"volts": 13.2})
+    assert watchdog.is_available(pack.addr)
+
+    _run_until(watchdog, now, 3)
+    pack.publish_data({"volts": 13.2})
+    _run_until(watchdog, now, 7)
+    assert watchdog.is_available(pack.addr)
+
+    _run_until(watchdog, now, 8)
+    assert not watchdog.is_available(pack.addr)
+    assert _availability(service, pack) == [ONLINE, OFFLINE]
+
+    pack.publish_data({"volts": 13.2})
+    assert _availability(service, pack) == [ONLINE, OFFLINE, ONLINE]
+
+
+def test_metrics_go_stale_while_the_device_is_online(
+    service: RecordingService,
+    now: list[float],
+    pack: RemcoBattery,
+) -> None:
+    watchdog = _watchdog(service, now, pack, timeout=5)
+    pack.publish_data({"volts": 13.2, "amps": 1.0})
+    for _ in range(6):
+        _run_until(watchdog, now, now[0] + 1)
+        pack.publish_data({"volts": 13.2})
+
+    assert watchdog.is_available(pack.addr)
+    assert watchdog.is_available(pack.addr, "volts")
+    assert not watchdog.is_available(pack.addr, "amps")
+    assert not watchdog.is_available(pack.addr, "unknown")
+    assert service.latest()[f"{pack.topic_prefix}/amps/stale"] is True
+    assert service.latest()[f"{pack.topic_prefix}/volts/stale"] is False
+
+
+def test_timeouts_longer_than_a_revolution(
+    service: RecordingService,
+    now: list[float],
+    pack: RemcoBattery,
+) -> None:
+    timeout = WHEEL_SLOTS * 2.5
+    watchdog = _watchdog(service, now, pack, timeout=timeout)
+    pack.publish_data({"volts": 13.2})
+
+    _run_until(watchdog, now, timeout - 1)
+    assert watchdog.is_available(pack.addr)
+
+    _run_until(watchdog, now, timeout)
+    assert not watchdog.is_available(pack.addr)
+    assert _availability(service, pack) == [ONLINE, OFFLINE]
+
+
+def test_tick_catches_up_after_a_stall(
+    service: RecordingService,
+    now: list[float],
+    pack: RemcoBattery,
+) -> None:
+    watchdog = _watchdog(service, now, pack, timeout=5)
+    pack.publish_data({"volts": 13.2})
+    now[0] = 4
+    pack.publish_data({"volts": 13.2})
+
+    # The first deadline has passed, but the device was seen since
+    watchdog.tick(6)
+    assert watchdog.is_available(pack.addr)
+
+    # Far more than a revolution without a tick
+    watchdog.tick(WHEEL_SLOTS * 3 + 0.5)
+    assert not watchdog.is_available(pack.addr)
+    assert not watchdog.is_available(pack.addr, "volts")
+    assert _availability(service, pack) == [ONLINE, OFFLINE]
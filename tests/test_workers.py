@@ -0,0 +1,87 @@
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from tests.conftest import RecordingService
+from van_assistant.simulator.fleet import SimulatedFleet
+from van_assistant.workers.pool import DecodeWorkerPool
+from van_assistant.workers.ring import AdvertisementRing
+
+ADDRESS = bytes(6)
+
+
+@pytest.fixture
+def ring() -> Iterator[AdvertisementRing]:
+    ring = AdvertisementRing(4)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_ring_is_first_in_first_out(ring: AdvertisementRing) -> None:
+    for i in range(5):
+        ring.put(ADDRESS, 0x02E1, bytes([i]), float(i))
+
+    assert len(ring) == 4
+    assert ring.dropped == 1
+    assert [ring.get().payload for _ in range(4)] == [b"\x00", b"\x01", b"\x02", b"\x03"]
+    assert ring.get() is None
+
+
+def test_attached_ring_shares_the_slots(ring: AdvertisementRing) -> None:
+    attached = AdvertisementRing(ring.capacity, ring.name, ring.lock, ring.doorbell)
+    ring.put(ADDRESS, 0x02E1, b"\x10", 1.0)
+
+    assert attached.get() == (ADDRESS, 0x02E1, 1.0, b"\x10")
+    assert len(ring) == 0
+    attached.close()
+
+
+def test_attaching_requires_the_lock(ring: AdvertisementRing) -> None:
+    with pytest.raises(ValueError, match="lock and doorbell"):
+        AdvertisementRing(ring.capacity, ring.name)
+
+
+def test_wait_times_out_on_an_empty_ring(ring: AdvertisementRing) -> None:
+    assert not ring.wait(0.01)
+    ring.put(ADDRESS, 0x02E1, b"", 1.0)
+    assert ring.wait(10)
+
+
+def test_put_wakes_a_waiting_consumer(ring: AdvertisementRing) -> None:
+    woken = []
+    consumer = threading.Thread(target=lambda: woken.append(ring.wait(10)))
+    consumer.start()
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    ring.put(ADDRESS, 0x02E1, b"", 1.0)
+    consumer.join()
+
+    assert woken == [True]
+    assert time.monotonic() - start < 1
+
+
+def test_pool_decodes_advertisements(fleet: SimulatedFleet, service: RecordingService) -> None:
+    keys = {advertiser.address: advertiser.encryption_key.hex() for advertiser in fleet.victron}
+    pool = DecodeWorkerPool(keys, 1, lambda *_: None)
+    pool.start()
+    try:
+        advertiser = fleet.victron[0]
+        payloads = [advertiser.next_advertisement() for _ in range(3)]
+        for payload in payloads:
+            pool.submit(advertiser.address, 0x02E1, payload)
+        device = advertiser.device_type(advertiser.address, service, keys[advertiser.address])
+
+        decoded = []
+        deadline = time.monotonic() + 30
+        while len(decoded) < len(payloads) and time.monotonic() < deadline:
+            decoded.extend(pool._next_batch())
+    finally:
+        pool.stop()
+
+    expected = [device.decode(payload) for payload in payloads]
+    assert any(expected)
+    assert [parsed for _, _, parsed, _ in decoded] == [data for data in expected if data]